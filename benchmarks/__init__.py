@@ -0,0 +1,4 @@
+"""Benchmarks for smif, run with airspeed velocity (asv)
+
+See ``docs/developers.rst`` for instructions.
+"""
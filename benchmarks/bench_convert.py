@@ -0,0 +1,68 @@
+"""Conversion coefficient generation and application
+"""
+import math
+
+import numpy as np
+from smif.convert.adaptor import Adaptor
+from smif.convert.interval import IntervalAdaptor
+from smif.convert.region import RegionAdaptor
+from smif.metadata import Spec
+
+from .synthetic import even_intervals, grid_regions
+
+
+class RegionCoefficients:
+    """RegionAdaptor.generate_coefficients from a fine to a coarse grid
+    """
+    params = [16, 100, 400]
+    param_names = ['regions']
+
+    def setup(self, n_regions):
+        # integer grid cell sizes, so that fine and coarse grids have identical coverage
+        size = math.sqrt(n_regions)
+        self.adaptor = RegionAdaptor('convert_regions')
+        self.from_spec = Spec(
+            name='population', dims=['fine'], dtype='float',
+            coords={'fine': grid_regions(n_regions, 'fine', size)})
+        self.to_spec = Spec(
+            name='population', dims=['coarse'], dtype='float',
+            coords={'coarse': grid_regions(n_regions // 4, 'coarse', size)})
+
+    def time_generate_coefficients(self, n_regions):
+        self.adaptor.generate_coefficients(self.from_spec, self.to_spec)
+
+
+class IntervalCoefficients:
+    """IntervalAdaptor.generate_coefficients from a fine to a coarse set of intervals
+    """
+    params = [12, 365, 8760]
+    param_names = ['intervals']
+
+    def setup(self, n_intervals):
+        self.adaptor = IntervalAdaptor('convert_intervals')
+        self.from_spec = Spec(
+            name='demand', dims=['fine'], dtype='float',
+            coords={'fine': even_intervals(n_intervals, 'fine')})
+        self.to_spec = Spec(
+            name='demand', dims=['coarse'], dtype='float',
+            coords={'coarse': even_intervals(4, 'coarse')})
+
+    def time_generate_coefficients(self, n_intervals):
+        self.adaptor.generate_coefficients(self.from_spec, self.to_spec)
+
+
+class ConvertWithCoefficients:
+    """Adaptor.convert_with_coefficients along each axis of region-interval data
+    """
+    params = ([100, 1000], [24, 8760], [0, 1])
+    param_names = ['regions', 'intervals', 'axis']
+
+    def setup(self, n_regions, n_intervals, axis):
+        rng = np.random.RandomState(0)
+        self.data = rng.rand(n_regions, n_intervals)
+        # convert to 12 elements, for example hourly to monthly or regions to countries
+        self.coefficients = rng.rand(self.data.shape[axis], 12)
+        self.axis = axis
+
+    def time_convert_with_coefficients(self, n_regions, n_intervals, axis):
+        Adaptor.convert_with_coefficients(self.data, self.coefficients, self.axis)
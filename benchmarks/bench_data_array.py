@@ -0,0 +1,27 @@
+"""DataArray conversion to and from pandas
+"""
+from .synthetic import random_data_array, region_interval_spec
+
+
+class DataArrayConversion:
+    """DataArray.as_df and DataArray.from_df
+    """
+    params = ([10, 100, 1000], [24, 720])
+    param_names = ['regions', 'intervals']
+
+    def setup(self, n_regions, n_intervals):
+        self.spec = region_interval_spec(n_regions, n_intervals)
+        self.data_array = random_data_array(self.spec)
+        self.dataframe = self.data_array.as_df()
+
+    def time_as_df(self, n_regions, n_intervals):
+        self.data_array.as_df()
+
+    def time_from_df(self, n_regions, n_intervals):
+        self.data_array.from_df(self.spec, self.dataframe)
+
+    def peakmem_from_df(self, n_regions, n_intervals):
+        self.data_array.from_df(self.spec, self.dataframe)
+
+    def time_as_xarray(self, n_regions, n_intervals):
+        self.data_array.as_xarray()
@@ -0,0 +1,86 @@
+"""Read and write data through the file data stores
+"""
+import os
+import shutil
+import tempfile
+
+import pandas
+from smif.data_layer.file import CSVDataStore, ParquetDataStore
+
+from .synthetic import random_data_array, region_interval_spec
+
+STORES = {
+    'csv': CSVDataStore,
+    'parquet': ParquetDataStore
+}
+
+DATA_FOLDERS = [
+    'coefficients', 'strategies', 'initial_conditions', 'interventions', 'narratives',
+    'scenarios', 'parameters'
+]
+
+
+def make_data_store(kind):
+    """Create a file data store in a new temporary folder
+    """
+    base_folder = tempfile.mkdtemp(prefix='smif-bench-')
+    for folder in DATA_FOLDERS:
+        os.makedirs(os.path.join(base_folder, 'data', folder))
+    os.makedirs(os.path.join(base_folder, 'results'))
+    return STORES[kind](base_folder), base_folder
+
+
+class Results:
+    """FileDataStore.read_results and write_results
+    """
+    params = (['csv', 'parquet'], [10, 100, 1000], [24, 720])
+    param_names = ['store', 'regions', 'intervals']
+
+    def setup(self, kind, n_regions, n_intervals):
+        self.store, self.base_folder = make_data_store(kind)
+        self.data_array = random_data_array(region_interval_spec(n_regions, n_intervals))
+        self.store.write_results(self.data_array, 'bench', 'model', 2010, 0)
+
+    def teardown(self, kind, n_regions, n_intervals):
+        shutil.rmtree(self.base_folder)
+
+    def time_write_results(self, kind, n_regions, n_intervals):
+        self.store.write_results(self.data_array, 'bench', 'model', 2015, 0)
+
+    def time_read_results(self, kind, n_regions, n_intervals):
+        self.store.read_results('bench', 'model', self.data_array.spec, 2010, 0)
+
+    def peakmem_read_results(self, kind, n_regions, n_intervals):
+        self.store.read_results('bench', 'model', self.data_array.spec, 2010, 0)
+
+
+class ScenarioVariantData:
+    """Read one timestep from scenario data files containing many timesteps
+    """
+    params = (['csv', 'parquet'], [1, 10, 50])
+    param_names = ['store', 'timesteps']
+
+    def setup(self, kind, n_timesteps):
+        self.store, self.base_folder = make_data_store(kind)
+        self.spec = region_interval_spec(100, 24, name='population')
+        data_array = random_data_array(self.spec)
+
+        dataframes = []
+        for timestep in range(2010, 2010 + n_timesteps):
+            dataframe = data_array.as_df()
+            dataframe['timestep'] = timestep
+            dataframes.append(dataframe)
+        dataframe = pandas.concat(dataframes).reset_index()
+
+        self.key = 'population.{}'.format(self.store.ext)
+        path = os.path.join(self.store.data_folders['scenarios'], self.key)
+        if kind == 'csv':
+            dataframe.to_csv(path, index=False)
+        else:
+            dataframe.to_parquet(path, engine='pyarrow')
+
+    def teardown(self, kind, n_timesteps):
+        shutil.rmtree(self.base_folder)
+
+    def time_read_timestep(self, kind, n_timesteps):
+        self.store.read_scenario_variant_data(self.key, self.spec, 2010)
@@ -0,0 +1,57 @@
+"""Job graph construction for model runs
+"""
+from types import SimpleNamespace
+
+from smif.controller.modelrun import ModelRunner
+from smif.metadata import RelativeTimestep, Spec
+from smif.model import SectorModel, SosModel
+
+
+class ChainModel(SectorModel):
+    """Sector model which does nothing
+    """
+    def simulate(self, data):
+        return data
+
+
+def chain_model_run(n_models, n_timesteps):
+    """Model run with a chain of models, each depending on the previous one in the current
+    timestep and on itself in the previous timestep
+    """
+    sos_model = SosModel('bench_sos_model')
+    previous = None
+    for i in range(n_models):
+        model = ChainModel('model_{}'.format(i))
+        model.add_input(Spec('input', dtype='float'))
+        model.add_input(Spec('state', dtype='float'))
+        model.add_output(Spec('output', dtype='float'))
+        sos_model.add_model(model)
+        if previous is not None:
+            sos_model.add_dependency(previous, 'output', model, 'input')
+        sos_model.add_dependency(model, 'output', model, 'state', RelativeTimestep.PREVIOUS)
+        previous = model
+
+    return SimpleNamespace(
+        name='bench',
+        sos_model=sos_model,
+        model_horizon=list(range(2010, 2010 + 5 * n_timesteps, 5)),
+        initialised=False
+    )
+
+
+class BuildJobGraph:
+    """ModelRunner.build_job_graph for a bundle of all timesteps and decision iterations
+    """
+    params = ([5, 20, 50], [5, 20], [1, 10])
+    param_names = ['models', 'timesteps', 'decision_iterations']
+
+    def setup(self, n_models, n_timesteps, n_decisions):
+        self.model_run = chain_model_run(n_models, n_timesteps)
+        self.bundle = {
+            'decision_iterations': list(range(n_decisions)),
+            'timesteps': self.model_run.model_horizon
+        }
+        self.runner = ModelRunner()
+
+    def time_build_job_graph(self, n_models, n_timesteps, n_decisions):
+        self.runner.build_job_graph(self.model_run, self.bundle)
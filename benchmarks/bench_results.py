@@ -0,0 +1,67 @@
+"""Read results for many timesteps and decision iterations through the Store
+"""
+import shutil
+
+from smif.data_layer import Store
+from smif.data_layer.memory_interface import (MemoryConfigStore,
+                                              MemoryDataStore,
+                                              MemoryMetadataStore)
+
+from .bench_data_store import make_data_store
+from .synthetic import random_data_array, region_interval_spec
+
+
+def results_store(kind, n_regions, n_intervals, n_timesteps, n_decisions):
+    """Store with a single model output written for each timestep and decision iteration
+
+    Returns
+    -------
+    (Store, str or None)
+        The store and its base folder, if file-backed
+    """
+    if kind == 'memory':
+        data_store, base_folder = MemoryDataStore(), None
+    else:
+        data_store, base_folder = make_data_store(kind)
+    store = Store(
+        config_store=MemoryConfigStore(),
+        metadata_store=MemoryMetadataStore(),
+        data_store=data_store
+    )
+    spec = region_interval_spec(n_regions, n_intervals)
+    for dim in spec.dims:
+        store.write_dimension({'name': dim, 'elements': spec.dim_elements(dim)})
+    store.config_store.write_model({
+        'name': 'energy_demand',
+        'inputs': [],
+        'parameters': [],
+        'outputs': [{
+            'name': spec.name, 'dims': spec.dims, 'dtype': spec.dtype, 'unit': spec.unit
+        }]
+    })
+    data_array = random_data_array(spec)
+    for decision in range(n_decisions):
+        for timestep in range(2010, 2010 + 5 * n_timesteps, 5):
+            store.write_results(data_array, 'bench', 'energy_demand', timestep, decision)
+    return store, base_folder
+
+
+class GetResultDarray:
+    """Store.get_result_darray for all available timesteps and decision iterations
+    """
+    params = (['memory', 'csv', 'parquet'], [100, 1000], [5, 20], [1, 5])
+    param_names = ['store', 'regions', 'timesteps', 'decision_iterations']
+
+    def setup(self, kind, n_regions, n_timesteps, n_decisions):
+        self.store, self.base_folder = results_store(
+            kind, n_regions, 24, n_timesteps, n_decisions)
+
+    def teardown(self, kind, n_regions, n_timesteps, n_decisions):
+        if self.base_folder is not None:
+            shutil.rmtree(self.base_folder)
+
+    def time_get_result_darray(self, kind, n_regions, n_timesteps, n_decisions):
+        self.store.get_result_darray('bench', 'energy_demand', 'energy_use')
+
+    def peakmem_get_result_darray(self, kind, n_regions, n_timesteps, n_decisions):
+        self.store.get_result_darray('bench', 'energy_demand', 'energy_use')
@@ -0,0 +1,90 @@
+"""Start-up time of the command line interface
+
+Batch scripts call commands like ``smif list`` and ``smif available_results`` many times,
+so the time taken to import smif and run a command which only reads configuration is
+tracked here, each in a fresh interpreter.
+
+Run as a script to check start-up time against the budget, exiting with an error if any
+command is over budget::
+
+    python -m benchmarks.bench_startup
+"""
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+# Budget for the median wall time of each command, in seconds, including interpreter
+# start-up. These are generous, to allow for slower machines: the aim is to catch a heavy
+# dependency (pandas, flask, networkx) being imported at start-up again - which is also
+# checked, more precisely, by tests/cli/test_startup.py
+BUDGET_S = {
+    'import': 0.5,
+    'list': 0.75,
+    'available_results': 0.75,
+}
+
+SETUP = """
+import os, tempfile
+from smif.controller.setup import copy_project_folder
+project = os.path.join(tempfile.mkdtemp(), 'project')
+copy_project_folder(project)
+"""
+
+COMMANDS = {
+    'import': "import smif.cli",
+    'list': "from smif.cli import main; main(['list', '-d', {project!r}])",
+    'available_results': "from smif.cli import main; " +
+                         "main(['available_results', '-d', {project!r}, 'energy_central'])",
+}
+
+
+def timeraw_import_cli():
+    return COMMANDS['import']
+
+
+def timeraw_list():
+    return COMMANDS['list'].replace("{project!r}", "project"), SETUP
+
+
+def timeraw_available_results():
+    return COMMANDS['available_results'].replace("{project!r}", "project"), SETUP
+
+
+def measure(command, repeat=5):
+    """Median wall time of `command`, each run in a fresh interpreter
+    """
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, '-c', command], check=True, stdout=subprocess.DEVNULL)
+        times.append(time.perf_counter() - start)
+    return statistics.median(times)
+
+
+def main():
+    from smif.controller.setup import copy_project_folder
+
+    tmp = tempfile.mkdtemp()
+    try:
+        project = os.path.join(tmp, 'project')
+        copy_project_folder(project)
+        over_budget = []
+        for name, command in COMMANDS.items():
+            elapsed = measure(command.format(project=project))
+            status = 'ok' if elapsed <= BUDGET_S[name] else 'OVER BUDGET'
+            print('{:<20} {:.3f}s (budget {:.3f}s) {}'.format(
+                name, elapsed, BUDGET_S[name], status))
+            if elapsed > BUDGET_S[name]:
+                over_budget.append(name)
+    finally:
+        shutil.rmtree(tmp)
+    if over_budget:
+        sys.exit("Start-up over budget for: {}".format(', '.join(over_budget)))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,152 @@
+"""End-to-end scaling harness
+
+Generates synthetic projects (see :mod:`smif.controller.generate`) while scaling one
+dimension at a time, runs each under every store interface and scheduler, and reports:
+
+- jobs run, wall time and throughput (jobs per second)
+- peak resident memory of the model run process, from the job statistics
+- on-disk footprint of the input data and of the results
+
+Each model run is a fresh ``smif run`` process, so peak memory is not polluted by earlier
+runs. Run from the repository root, for example::
+
+    python -m benchmarks.scaling --dimension models --values 2 4 8 16
+    python -m benchmarks.scaling --dimension regions --values 16 64 256 --output regions.csv
+
+This is not an asv benchmark: a full sweep takes minutes and writes projects to disk.
+"""
+import argparse
+import csv
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from collections import OrderedDict
+
+from smif.controller.generate import (DATA_STORES, MODEL_RUN_NAME,
+                                      generate_project)
+from smif.data_layer import Store
+from smif.data_layer.file import FileMetadataStore, YamlConfigStore
+
+# Size of the project when a dimension is not being scaled
+BASE = OrderedDict([
+    ('models', 4),
+    ('regions', 16),
+    ('intervals', 12),
+    ('timesteps', 3),
+    ('fan_in', 2),
+    ('interventions', 10),
+])
+
+# Extra arguments to ``smif run`` for each scheduler
+SCHEDULERS = OrderedDict([
+    ('serial', []),
+])
+
+COLUMNS = [
+    'dimension', 'value', 'interface', 'scheduler', 'jobs', 'wall_s', 'jobs_per_s',
+    'peak_rss_mb', 'input_mb', 'results_mb'
+]
+
+
+def run_point(directory, size, interface, scheduler):
+    """Generate a project of the given size, run it and measure it
+
+    Returns
+    -------
+    dict
+    """
+    generate_project(directory, interface=interface, **size)
+    args = ['run', '-i', interface, '-d', directory] + SCHEDULERS[scheduler] + \
+        [MODEL_RUN_NAME]
+    start = time.perf_counter()
+    process = subprocess.run(
+        [sys.executable, '-c', 'import sys; from smif.cli import main; main(sys.argv[1:])'] +
+        args, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, universal_newlines=True)
+    wall_s = time.perf_counter() - start
+    if process.returncode != 0:
+        raise RuntimeError("smif {} failed:\n{}".format(' '.join(args), process.stderr))
+
+    data_store_class, _ = DATA_STORES[interface]
+    store = Store(
+        config_store=YamlConfigStore(directory),
+        metadata_store=FileMetadataStore(directory),
+        data_store=data_store_class(directory),
+        model_base_folder=directory
+    )
+    job_stats = store.read_model_run_stats(MODEL_RUN_NAME, 'jobs')
+    rss = [row['rss_peak_bytes'] for row in job_stats if row.get('rss_peak_bytes')]
+    return {
+        'jobs': len(job_stats),
+        'wall_s': round(wall_s, 3),
+        'jobs_per_s': round(len(job_stats) / wall_s, 3),
+        'peak_rss_mb': round(max(rss) / 1024**2, 1) if rss else None,
+        'input_mb': round(_folder_size(os.path.join(directory, 'data')) / 1024**2, 3),
+        'results_mb': round(_folder_size(os.path.join(directory, 'results')) / 1024**2, 3)
+    }
+
+
+def sweep(dimension, values, interfaces=tuple(DATA_STORES), schedulers=tuple(SCHEDULERS),
+          base=None, workdir=None):
+    """Scale one dimension, yielding a row of measurements per project and run
+    """
+    base = BASE if base is None else base
+    tmp = tempfile.mkdtemp(dir=workdir)
+    try:
+        for value in values:
+            size = OrderedDict(base)
+            size[dimension] = value
+            for interface in interfaces:
+                for scheduler in schedulers:
+                    directory = os.path.join(tmp, '{}_{}_{}_{}'.format(
+                        dimension, value, interface, scheduler))
+                    row = OrderedDict([
+                        ('dimension', dimension), ('value', value),
+                        ('interface', interface), ('scheduler', scheduler)
+                    ])
+                    row.update(run_point(directory, size, interface, scheduler))
+                    shutil.rmtree(directory)
+                    yield row
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+
+def _folder_size(folder):
+    total = 0
+    for root, _, filenames in os.walk(folder):
+        total += sum(os.path.getsize(os.path.join(root, name)) for name in filenames)
+    return total
+
+
+def main(arguments=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('--dimension', choices=list(BASE), default='models',
+                        help='Dimension to scale')
+    parser.add_argument('--values', type=int, nargs='+', default=[2, 4, 8],
+                        help='Values of the dimension')
+    parser.add_argument('--interfaces', nargs='+', choices=list(DATA_STORES),
+                        default=list(DATA_STORES), help='Store interfaces to run under')
+    parser.add_argument('--schedulers', nargs='+', choices=list(SCHEDULERS),
+                        default=list(SCHEDULERS), help='Schedulers to run with')
+    parser.add_argument('--workdir', help='Folder for generated projects')
+    parser.add_argument('--output', help='Also write rows to this CSV file')
+    args = parser.parse_args(arguments)
+
+    print(' '.join('{:>12}'.format(column[:12]) for column in COLUMNS), flush=True)
+    rows = []
+    for row in sweep(args.dimension, args.values, args.interfaces, args.schedulers,
+                     workdir=args.workdir):
+        rows.append(row)
+        print(' '.join('{:>12}'.format(str(row[column])) for column in COLUMNS), flush=True)
+
+    if args.output:
+        with open(args.output, 'w', newline='') as file_handle:
+            writer = csv.DictWriter(file_handle, fieldnames=COLUMNS)
+            writer.writeheader()
+            writer.writerows(rows)
+
+
+if __name__ == '__main__':
+    main()
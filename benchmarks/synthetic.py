@@ -0,0 +1,61 @@
+"""Synthetic dimensions, specs and data used across the benchmarks
+"""
+import math
+
+import numpy as np
+from smif.controller.generate import even_intervals  # noqa: F401
+from smif.data_layer.data_array import DataArray
+from smif.metadata import Spec
+
+
+def grid_regions(n, name='region', size=1.0):
+    """Square polygons covering a square grid, with at least `n` cells in total
+
+    Regions are returned as dimension elements with a GeoJSON-like 'feature'.
+    """
+    side = int(math.ceil(math.sqrt(n)))
+    cell = size / side
+    regions = []
+    for i in range(side):
+        for j in range(side):
+            if len(regions) == n:
+                return regions
+            x, y = i * cell, j * cell
+            region_name = '{}_{}'.format(name, len(regions))
+            regions.append({
+                'name': region_name,
+                'feature': {
+                    'type': 'Feature',
+                    'properties': {'name': region_name},
+                    'geometry': {
+                        'type': 'Polygon',
+                        'coordinates': [[
+                            [x, y], [x, y + cell], [x + cell, y + cell], [x + cell, y],
+                            [x, y]
+                        ]]
+                    }
+                }
+            })
+    return regions
+
+
+def region_interval_spec(n_regions, n_intervals, name='energy_use'):
+    """Spec over 'region' and 'interval' dimensions (names only, no geometry)
+    """
+    return Spec(
+        name=name,
+        dims=['region', 'interval'],
+        coords={
+            'region': ['region_{}'.format(i) for i in range(n_regions)],
+            'interval': ['interval_{}'.format(i) for i in range(n_intervals)]
+        },
+        dtype='float',
+        unit='GWh'
+    )
+
+
+def random_data_array(spec, seed=0):
+    """DataArray filled with random values
+    """
+    rng = np.random.RandomState(seed)
+    return DataArray(spec, rng.rand(*spec.shape))
@@ -4,7 +4,6 @@
 """
 from __future__ import division, print_function, absolute_import
 
-import pkg_resources
 import warnings
 
 __author__ = "Will Usher, Tom Russell"
@@ -12,8 +11,17 @@ __copyright__ = "Will Usher, Tom Russell"
 __license__ = "mit"
 
 
+# importlib.metadata is much quicker to import than pkg_resources, which is only a fallback
+# for python versions before 3.8
 try:
-    __version__ = pkg_resources.get_distribution(__name__).version
+    from importlib.metadata import version as _get_version
+except ImportError:
+    def _get_version(name):
+        import pkg_resources
+        return pkg_resources.get_distribution(name).version
+
+try:
+    __version__ = _get_version(__name__)
 except Exception:
     __version__ = 'unknown'
 
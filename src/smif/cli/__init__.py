@@ -4,6 +4,7 @@
 This command line interface implements a number of methods.
 
 - `setup` creates an example project with the recommended folder structure
+- `generate` creates a synthetic project of a given size, to test smif at scale
 - `run` performs a simulation of an individual sector model, or the whole system
         of systems model
 - `validate` performs a validation check of the configuration file
@@ -70,16 +71,17 @@ import os
 import sys
 from argparse import ArgumentParser
 
-import pkg_resources
-
 import smif
 import smif.cli.log
-from smif.controller import (ModelRunScheduler, copy_project_folder,
-                             execute_model_run)
 from smif.data_layer import Store
 from smif.data_layer.file import (CSVDataStore, FileMetadataStore,
                                   ParquetDataStore, YamlConfigStore)
-from smif.http_api import create_app
+from smif.data_layer.file.snapshot import open_snapshot
+from smif.profiling import PROFILER
+
+# smif.controller and smif.http_api (and their dependencies, such as networkx and flask) are
+# imported by the commands which use them, to keep start-up quick for commands which only
+# read from the store, like `smif list`
 
 try:
     import _thread
@@ -212,8 +214,11 @@ def run_model_runs(args):
     ----------
     args
     """
+    from smif.controller import execute_model_run
+    from smif.controller.scheduler import MemoryBudget
+
     logger = logging.getLogger(__name__)
-    logger.profiling_start('run_model_runs', '{:s}, {:s}, {:s}'.format(
+    span = PROFILER.start('run_model_runs', '{:s}, {:s}, {:s}'.format(
         args.modelrun, args.interface, args.directory))
     if args.batchfile:
         with open(args.modelrun, 'r') as f:
@@ -221,41 +226,63 @@ def run_model_runs(args):
     else:
         model_run_ids = [args.modelrun]
 
-    store = _get_store(args)
-    execute_model_run(model_run_ids, store, args.warm)
-    logger.profiling_stop('run_model_runs', '{:s}, {:s}, {:s}'.format(
-        args.modelrun, args.interface, args.directory))
-    logger.summary()
+    if args.memory:
+        PROFILER.track_memory = True
+    if args.memory_budget:
+        memory_budget = MemoryBudget(args.memory_budget * 1024**2)
+    else:
+        memory_budget = None
+
+    try:
+        store = _get_store(args)
+        execute_model_run(model_run_ids, store, args.warm, memory_budget, args.io_stats,
+                          jobs=args.jobs)
+    finally:
+        # report on failed runs too
+        PROFILER.stop(span)
+        logger.summary()
+
+        if args.trace:
+            PROFILER.write_chrome_trace(args.trace)
+        if args.profile:
+            PROFILER.write_json(args.profile, group_by=('operation', 'model'))
 
 
 def _get_store(args):
     """Contruct store as configured by arguments
     """
     if args.interface == 'local_csv':
-        store = Store(
-            config_store=YamlConfigStore(args.directory),
-            metadata_store=FileMetadataStore(args.directory),
-            data_store=CSVDataStore(args.directory),
-            model_base_folder=args.directory
-        )
+        data_store = CSVDataStore(args.directory)
     elif args.interface == 'local_binary':
-        store = Store(
-            config_store=YamlConfigStore(args.directory),
-            metadata_store=FileMetadataStore(args.directory),
-            data_store=ParquetDataStore(args.directory),
-            model_base_folder=args.directory
-        )
+        data_store = ParquetDataStore(args.directory)
     else:
         raise ValueError("Store interface type {} not recognised.".format(args.interface))
-    return store
+
+    config_store = YamlConfigStore(args.directory)
+    metadata_store = FileMetadataStore(args.directory)
+    open_snapshot(args.directory, config_store, metadata_store)
+
+    return Store(
+        config_store=config_store,
+        metadata_store=metadata_store,
+        data_store=data_store,
+        model_base_folder=args.directory
+    )
 
 
 def _run_server(args):
+    import pkg_resources
+    from smif.controller import ModelRunScheduler
+    from smif.http_api import create_app
+
     app_folder = pkg_resources.resource_filename('smif', 'app/dist')
+    store = _get_store(args)
+    if args.io_stats:
+        store.instrument()
     app = create_app(
         static_folder=app_folder,
         template_folder=app_folder,
-        data_interface=_get_store(args),
+        data_interface=store,
         scheduler=ModelRunScheduler()
     )
 
@@ -298,9 +325,28 @@ def run_app(args):
 def setup_project_folder(args):
     """Setup a sample project
     """
+    from smif.controller import copy_project_folder
     copy_project_folder(args.directory)
 
 
+def generate_project_folder(args):
+    """Generate a synthetic project
+    """
+    from smif.controller import generate_project
+    generate_project(
+        args.directory,
+        models=args.models,
+        regions=args.regions,
+        intervals=args.intervals,
+        timesteps=args.timesteps,
+        fan_in=args.fan_in,
+        adaptor_every=args.adaptor_every,
+        interventions=args.interventions,
+        variants=args.variants,
+        interface=args.interface
+    )
+
+
 def parse_arguments():
     """Parse command line arguments
 
@@ -335,6 +381,31 @@ def parse_arguments():
         'setup', help='Setup the project folder', parents=[parent_parser])
     parser_setup.set_defaults(func=setup_project_folder)
 
+    # GENERATE
+    parser_generate = subparsers.add_parser(
+        'generate', help='Generate a synthetic project of a given size',
+        parents=[parent_parser])
+    parser_generate.set_defaults(func=generate_project_folder)
+    parser_generate.add_argument('--models', type=int, default=4,
+                                 help="Number of sector models (default: %(default)s)")
+    parser_generate.add_argument('--regions', type=int, default=16,
+                                 help="Number of regions (default: %(default)s)")
+    parser_generate.add_argument('--intervals', type=int, default=12,
+                                 help="Number of intervals (default: %(default)s)")
+    parser_generate.add_argument('--timesteps', type=int, default=3,
+                                 help="Number of timesteps (default: %(default)s)")
+    parser_generate.add_argument('--fan-in', type=int, default=2,
+                                 help="Number of preceding models each model depends on \
+                                       (default: %(default)s)")
+    parser_generate.add_argument('--adaptor-every', type=int, default=4,
+                                 help="Run every nth model on coarse regions, linked by \
+                                       adaptors, or 0 for none (default: %(default)s)")
+    parser_generate.add_argument('--interventions', type=int, default=10,
+                                 help="Number of interventions per model \
+                                       (default: %(default)s)")
+    parser_generate.add_argument('--variants', type=int, default=2,
+                                 help="Number of scenario variants (default: %(default)s)")
+
     # LIST
     parser_list = subparsers.add_parser(
         'list', help='List available model runs', parents=[parent_parser])
@@ -368,6 +439,10 @@ def parse_arguments():
                             type=int,
                             default=5000,
                             help="The port over which to serve the app")
+    parser_app.add_argument('--io-stats',
+                            action='store_true',
+                            help="Record store reads and writes, reported at \
+                                  /api/v1/io_stats/")
 
     # RUN
     parser_run = subparsers.add_parser(
@@ -381,6 +456,26 @@ def parse_arguments():
                             action='store_true',
                             help="Use a batchfile instead of a modelrun name (a \
                                   list of modelrun names)")
+    parser_run.add_argument('-j', '--jobs',
+                            type=int,
+                            default=1,
+                            help="Number of model runs from a batchfile to run at once, \
+                                  each in a separate process")
+    parser_run.add_argument('--trace',
+                            help="Write a time profile of the run to this path, in Chrome \
+                                  trace format (open in chrome://tracing)")
+    parser_run.add_argument('--profile',
+                            help="Write a time profile of the run to this path as JSON, \
+                                  including totals aggregated per operation and model")
+    parser_run.add_argument('--memory',
+                            action='store_true',
+                            help="Record memory allocated by each job (slows down the run)")
+    parser_run.add_argument('--memory-budget',
+                            type=float,
+                            help="Memory budget for the jobs of a model run, in MB")
+    parser_run.add_argument('--io-stats',
+                            help="Write counts, bytes and timings of store reads and writes \
+                                  to this path as JSON")
     parser_run.add_argument('modelrun',
                             help="Name of the model run to run")
 
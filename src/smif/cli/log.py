@@ -1,66 +1,48 @@
-import datetime
 import logging
 import logging.config
-import re
-import sys
-from collections import OrderedDict
+
+from smif.profiling import PROFILER
 
 
 # Make profiling methods available through the logger
 def profiling_start(self, operation, key):
-    time_placeholder = datetime.time(0, 0)
-    level = sum(log[1]['stop'] == time_placeholder for log in logging.Logger._profile.items())
-    logging.Logger._profile[(operation, key)] = {
-        'start': datetime.datetime.now(),
-        'stop': time_placeholder,
-        'level': level
-    }
+    PROFILER.start(operation, key)
 
 
 def profiling_stop(self, operation, key):
-    logging.Logger._profile[(operation, key)]['stop'] = datetime.datetime.now()
+    PROFILER.stop(operation, key)
 
 
 def summary(self, *args, **kws):
 
     if self.isEnabledFor(logging.INFO):
+        rows = PROFILER.aggregate(group_by=('operation', 'model'))
+        if not rows:
+            return
+
         summary = []
-        columns = [30, 80, 12]
+        columns = [30, 30, 8, 12, 12, 12, 12]
         column = "{:" + str(columns[0]) + "s}" + \
                  "{:" + str(columns[1]) + "s}" + \
-                 "{:" + str(columns[2]) + "s}"
-
-        level_width = max([profile['level'] for profile
-                          in logging.Logger._profile.values()]) * 2
-        total_width = sum(columns) + level_width
+                 "".join("{:>" + str(width) + "s}" for width in columns[2:])
+        headings = ['Calls', 'Wall [s]', 'CPU [s]', 'Alloc [MB]', 'RSS+ [MB]']
+        total_width = sum(columns)
 
         # header
         summary.append(("{:*^" + str(total_width) + "s}").format(" Modelrun time profile "))
-        summary.append(column.format('Function', 'Operation', 'Duration [hh:mm:ss]'))
+        summary.append(column.format('Function', 'Model', *headings))
         summary.append("*"*total_width)
 
-        # body
-        for profile in logging.Logger._profile.keys():
-
-            # calculate time diff
-            profile_data = logging.Logger._profile[profile]
-            diff = profile_data['stop'] - profile_data['start']
-            s = diff.total_seconds()
-            time_spent = '{:02d}:{:02d}:{:02d}'.format(
-                int(s // 3600), int(s % 3600 // 60), int(s % 60))
-
-            # trunctuate long lines
-            if len(profile[0]) > columns[0]-2:
-                func = profile[0][:columns[0]-3] + '..'
-            else:
-                func = profile[0]
-            if len(profile[1]) > columns[1]-2:
-                op = profile[1][:columns[1]-3] + '..'
-            else:
-                op = profile[1]
-
-            summary.append(profile_data['level']*'| ' + column.format(
-                func, op, time_spent))
+        # one row of totals per operation and model
+        for row in rows:
+            summary.append(column.format(
+                _truncate(row['operation'], columns[0]),
+                _truncate(str(row['model'] or '-'), columns[1]),
+                str(row['count']),
+                '{:.3f}'.format(row['wall_total_s']),
+                '{:.3f}'.format(row['cpu_total_s']),
+                _megabytes(row['alloc_peak_max']),
+                _megabytes(row['rss_growth_max'])))
 
         # footer
         summary.append("*"*total_width)
@@ -69,6 +51,22 @@ def summary(self, *args, **kws):
             self._log(logging.INFO, entry, args)
 
 
+def _megabytes(nbytes):
+    """Format a size in bytes as megabytes, or '-' if not recorded
+    """
+    if nbytes is None:
+        return '-'
+    return '{:.1f}'.format(nbytes / 1024**2)
+
+
+def _truncate(text, width):
+    """Truncate long lines to fit a column
+    """
+    if len(text) > width-2:
+        return text[:width-3] + '..'
+    return text
+
+
 def setup_logging(loglevel):
     config = {
         'version': 1,
@@ -115,4 +113,3 @@ def setup_logging(loglevel):
 logging.Logger.profiling_start = profiling_start
 logging.Logger.profiling_stop = profiling_stop
 logging.Logger.summary = summary
-logging.Logger._profile = OrderedDict()
@@ -10,6 +10,10 @@ Copy a project folder::
 
 >>> copy_project_folder('/projects/smif/')
 
+Generate a synthetic project, to test at scale::
+
+>>> generate_project('/projects/large/', models=20, regions=400)
+
 Run a single system-of-systems model::
 
 >>> execute_model_run('energy_supply_demand', store)
@@ -35,13 +39,37 @@ Use the ModelRunScheduler to run a system-of-systems model::
     }
 """
 
+import importlib
+
 # import classes for access like ::
 #         from smif.controller import ModelRunScheduler
-from smif.controller.scheduler import ModelRunScheduler
-from smif.controller.execute import execute_model_run
-from smif.controller.setup import copy_project_folder
-from smif.controller.modelrun import ModelRunner
+# Classes are imported from their modules on first access, so that importing one module
+# (for example smif.controller.setup) does not import the dependencies of all the others
+_LAZY_ATTRIBUTES = {
+    'ModelRunScheduler': 'smif.controller.scheduler',
+    'execute_model_run': 'smif.controller.execute',
+    'copy_project_folder': 'smif.controller.setup',
+    'generate_project': 'smif.controller.generate',
+    'ModelRunner': 'smif.controller.modelrun',
+    'SweepRunner': 'smif.controller.sweep',
+    'expand_sweep': 'smif.controller.sweep',
+}
 
 # Define what should be imported as * ::
 #         from smif.controller import *
-__all__ = ['ModelRunner', 'ModelRunScheduler', 'execute_model_run', 'copy_project_folder']
+__all__ = ['ModelRunner', 'ModelRunScheduler', 'SweepRunner', 'execute_model_run',
+           'expand_sweep', 'copy_project_folder', 'generate_project']
+
+
+def __getattr__(name):
+    try:
+        module_name = _LAZY_ATTRIBUTES[name]
+    except KeyError:
+        raise AttributeError("module '{}' has no attribute '{}'".format(__name__, name))
+    value = getattr(importlib.import_module(module_name), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(list(globals()) + __all__)
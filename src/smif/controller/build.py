@@ -7,6 +7,7 @@ from smif.controller.modelrun import ModelRunBuilder
 from smif.data_layer.model_loader import ModelLoader
 from smif.exception import SmifDataNotFoundError
 from smif.model import ScenarioModel, SosModel
+from smif.profiling import PROFILER
 
 
 def get_model_run_definition(store, modelrun):
@@ -122,7 +123,7 @@ def build_model_run(model_run_config):
     `smif.controller.modelrun.ModelRun`
     """
     logger = logging.getLogger()
-    logger.profiling_start('build_model_run', model_run_config['name'])
+    span = PROFILER.start('build_model_run', model_run_config['name'])
     try:
         builder = ModelRunBuilder()
         builder.construct(model_run_config)
@@ -137,5 +138,5 @@ def build_model_run(model_run_config):
             logger.error("An AssertionError occurred, see details above.")
         exit(-1)
 
-    logger.profiling_stop('build_model_run', model_run_config['name'])
+    PROFILER.stop(span)
     return modelrun
@@ -1,38 +1,213 @@
 import logging
+import multiprocessing
 import sys
+from collections import OrderedDict
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
 
 from smif.controller.build import build_model_run, get_model_run_definition
+from smif.controller.scheduler import SharedMemoryBudget
+from smif.controller.sweep import run_sweep, write_sweep_model_runs
+from smif.data_layer.instrument import IOStats
+from smif.data_layer.shared_memory import SharedDataPlane
 from smif.exception import SmifModelRunError
 
+# State of a worker process, set once by _init_worker
+_WORKER = {}
 
-def execute_model_run(model_run_ids, store, warm=False):
+
+def execute_model_run(model_run_ids, store, warm=False, memory_budget=None,
+                      io_stats_path=None, jobs=1):
     """Runs the model run
 
     Parameters
     ----------
     modelrun_ids: list
         Modelrun ids that should be executed sequentially
+    store: smif.data_layer.Store
+    warm: bool, default=False
+        Continue from the results of a previous model run
+    memory_budget: smif.controller.scheduler.MemoryBudget, optional
+        Memory budget shared by the jobs of each model run
+    io_stats_path: str, optional
+        If given, record I/O statistics for the store and write them to this path as JSON
+        once all model runs have finished
+    jobs: int, default=1
+        Number of model runs to run at once, each in a worker process
     """
-    model_run_definitions = []
+    model_run_definitions = OrderedDict()
     for model_run in model_run_ids:
         logging.info("Getting model run definition for '%s'", model_run)
-        model_run_definitions.append(get_model_run_definition(store, model_run))
+        model_run_definitions[model_run] = _get_definition(store, model_run)
+
+    if jobs > 1 and len(model_run_definitions) > 1:
+        _execute_in_parallel(model_run_definitions, store, warm, memory_budget,
+                             io_stats_path, jobs)
+        return
+
+    if io_stats_path is not None:
+        store.instrument()
+    try:
+        for model_run, model_run_config in model_run_definitions.items():
+            if not _run(store, model_run_config, warm, memory_budget):
+                exit(1)
+            print("Model run '%s' complete" % model_run)
+            sys.stdout.flush()
+    finally:
+        if io_stats_path is not None:
+            store.io_stats.write_json(io_stats_path)
+
+
+def _get_definition(store, model_run_name):
+    """Get a model run definition, or a list of definitions of each model run of a sweep
+    """
+    model_run_config = get_model_run_definition(store, model_run_name)
+    if not model_run_config.get('sweep'):
+        return model_run_config
+
+    names = write_sweep_model_runs(store, store.read_model_run(model_run_name))
+    logging.info("Sweep of '%s' expanded to %s model runs", model_run_name, len(names))
+    return [get_model_run_definition(store, name) for name in names]
+
+
+def _run(store, model_run_config, warm, memory_budget):
+    """Build and run a single model run, or the model runs of a sweep together, returning
+    False if it failed
+    """
+    if isinstance(model_run_config, list):
+        return _run_sweep(store, model_run_config, warm, memory_budget)
+
+    logging.info("Build model run from configuration data")
+    modelrun = build_model_run(model_run_config)
+
+    logging.info("Running model run %s", modelrun.name)
+    try:
+        if warm:
+            modelrun.run(store, store.prepare_warm_start(modelrun.name), memory_budget)
+        else:
+            modelrun.run(store, memory_budget=memory_budget)
+    except SmifModelRunError as ex:
+        logging.exception(ex)
+        return False
+    return True
+
+
+def _run_sweep(store, model_run_configs, warm, memory_budget):
+    """Build and run the model runs of a sweep, returning False if they failed
+    """
+    if warm:
+        logging.warning("Warm start is not supported for sweeps, running from the start")
+    modelruns = [build_model_run(model_run_config) for model_run_config in model_run_configs]
+    try:
+        run_sweep(modelruns, store, memory_budget)
+    except SmifModelRunError as ex:
+        logging.exception(ex)
+        return False
+    return True
+
+
+def _execute_in_parallel(model_run_definitions, store, warm, memory_budget, io_stats_path,
+                         jobs):
+    """Run model runs in a pool of worker processes
+
+    Where processes can be forked, workers start with the store as already read by this
+    process - configuration, dimensions and model run definitions are shared rather than
+    read again by each worker. Otherwise the store is pickled to each worker, which reads
+    model run definitions again. Scenario data is shared through shared memory: the first
+    worker to read a scenario variant publishes it, and the others copy it from there
+    rather than read it again.
+
+    Any memory budget is shared by the jobs of all workers, rather than each worker having
+    the whole budget.
+
+    As for sequential runs, the first model run to fail stops the batch: runs which have not
+    started are cancelled, those which have are left to finish, then exit with status 1.
+    """
+    if 'fork' in multiprocessing.get_all_start_methods():
+        context = multiprocessing.get_context('fork')
+        definitions = model_run_definitions
+    else:
+        context = multiprocessing.get_context()
+        definitions = None
 
-    for model_run_config in model_run_definitions:
+    io_stats = IOStats() if io_stats_path is not None else None
+    if memory_budget is not None:
+        memory_budget = SharedMemoryBudget(memory_budget.limit, context)
+    plane = SharedDataPlane(lock=context.Lock())
+    failed = False
+    try:
+        with ProcessPoolExecutor(max_workers=min(jobs, len(model_run_definitions)),
+                                 mp_context=context, initializer=_init_worker,
+                                 initargs=(store, definitions, io_stats is not None,
+                                           memory_budget, plane)
+                                 ) as executor:
+            pending = {
+                executor.submit(_run_in_worker, model_run, warm)
+                for model_run in model_run_definitions
+            }
+            try:
+                while pending and not failed:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    failed = _collect(done, io_stats)
+            finally:
+                for future in pending:
+                    future.cancel()
+            # wait for any model runs already started, counting their statistics
+            failed = _collect(wait(pending)[0], io_stats) or failed
+    finally:
+        plane.close()
+        if io_stats is not None:
+            io_stats.write_json(io_stats_path)
+    if failed:
+        exit(1)
 
-        logging.info("Build model run from configuration data")
-        modelrun = build_model_run(model_run_config)
 
-        logging.info("Running model run %s", modelrun.name)
+def _collect(futures, io_stats):
+    """Report finished model runs, returning True if any failed
+    """
+    failed = False
+    for future in futures:
+        if future.cancelled():
+            continue
+        name, succeeded, stats = future.result()
+        if stats is not None and io_stats is not None:
+            io_stats.merge(stats)
+        if succeeded:
+            print("Model run '%s' complete" % name)
+            sys.stdout.flush()
+        else:
+            failed = True
+    return failed
+
+
+def _init_worker(store, definitions, record_io_stats, memory_budget, plane):
+    """Set up a worker process to run model runs from the store
+    """
+    if record_io_stats:
+        store.instrument()
+    store.share_data(plane)
+    _WORKER['store'] = store
+    _WORKER['definitions'] = definitions
+    _WORKER['memory_budget'] = memory_budget
 
-        try:
-            if warm:
-                modelrun.run(store, store.prepare_warm_start(modelrun.name))
-            else:
-                modelrun.run(store)
-        except SmifModelRunError as ex:
-            logging.exception(ex)
-            exit(1)
 
-        print("Model run '%s' complete" % modelrun.name)
-        sys.stdout.flush()
+def _run_in_worker(model_run_name, warm):
+    """Run a model run in a worker process
+
+    Returns
+    -------
+    tuple
+        Model run name, whether it succeeded, and I/O statistics (or None)
+    """
+    store = _WORKER['store']
+    definitions = _WORKER['definitions']
+    if definitions is not None:
+        model_run_config = definitions[model_run_name]
+    else:
+        model_run_config = _get_definition(store, model_run_name)
+    memory_budget = _WORKER['memory_budget']
+
+    if store.io_stats is not None:
+        store.io_stats.reset()
+    succeeded = _run(store, model_run_config, warm, memory_budget)
+    stats = store.io_stats.as_dict() if store.io_stats is not None else None
+    return model_run_name, succeeded, stats
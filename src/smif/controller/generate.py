@@ -0,0 +1,525 @@
+"""Generate synthetic projects, to exercise smif at production scale
+
+:func:`generate_project` writes a complete project, with the same layout as the sample
+project created by ``smif setup``, whose size is set by a few parameters:
+
+- ``models`` sector models, linked in dense dependency chains: each model reads the output
+  of up to ``fan_in`` preceding models, as well as a scenario driver
+- ``regions`` square regions on a grid, with a second, coarser region set made of 2x2 blocks
+  of the fine regions. Every ``adaptor_every``-th model runs on the coarse regions, so
+  :class:`~smif.convert.region.RegionAdaptor` models convert data to and from its
+  resolution.
+- ``intervals`` time intervals of equal length, covering a year
+- ``timesteps`` timesteps, five years apart
+- ``interventions`` interventions per model, a few of which are built as initial conditions
+- a scenario with ``variants`` variants and a narrative which overrides a parameter of every
+  model
+
+Example
+-------
+Generate a project and run it::
+
+    >>> generate_project('/tmp/large', models=20, regions=400, intervals=24, timesteps=5)
+    >>> # then from the command line:
+    >>> # smif run -d /tmp/large synthetic
+"""
+import json
+import logging
+import math
+import os
+from collections import OrderedDict
+
+import numpy as np  # type: ignore
+from ruamel.yaml import YAML  # type: ignore
+from smif.data_layer.data_array import DataArray
+from smif.data_layer.file import (CSVDataStore, FileMetadataStore,
+                                  ParquetDataStore, YamlConfigStore)
+from smif.data_layer.store import Store
+from smif.metadata import Spec
+
+HOURS_PER_YEAR = 8760
+BASE_YEAR = 2010
+
+SOS_MODEL_NAME = 'synthetic'
+MODEL_RUN_NAME = 'synthetic'
+SCENARIO_NAME = 'drivers'
+NARRATIVE_NAME = 'technology'
+FINE_REGIONS = 'regions'
+COARSE_REGIONS = 'regions_coarse'
+INTERVALS = 'intervals'
+
+# Metres along the side of a (fine) region
+CELL_SIZE = 1000
+
+# Interfaces, as accepted by ``smif -i``, and the data store and file extension for each
+DATA_STORES = OrderedDict([
+    ('local_csv', (CSVDataStore, 'csv')),
+    ('local_binary', (ParquetDataStore, 'parquet')),
+])
+
+MODEL_WRAPPER = '''"""Synthetic sector model, generated by smif
+"""
+from smif.model.sector_model import SectorModel
+
+
+class SyntheticModel(SectorModel):
+    """Scale the mean of all inputs by each parameter, add one per current intervention
+    """
+    def simulate(self, data):
+        total = 0
+        for name in self.inputs:
+            total = total + data.get_data(name).as_ndarray()
+        total = total / len(self.inputs)
+        for name in self.parameters:
+            total = total * data.get_parameter(name).as_ndarray()
+        total = total + len(data.get_current_interventions())
+        for name in self.outputs:
+            data.set_results(name, total)
+'''
+
+ADAPTORS = '''"""Adaptors used by the synthetic project, generated by smif
+"""
+from smif.convert import RegionAdaptor
+
+__all__ = ['RegionAdaptor']
+'''
+
+
+def generate_project(directory, models=4, regions=16, intervals=12, timesteps=3,
+                     fan_in=2, adaptor_every=4, interventions=10, variants=2,
+                     interface='local_csv', seed=0):
+    """Write a synthetic project
+
+    Parameters
+    ----------
+    directory : str
+        Project folder, created if it does not exist
+    models : int, default=4
+        Number of sector models
+    regions : int, default=16
+        Number of regions in the fine region set
+    intervals : int, default=12
+        Number of intervals
+    timesteps : int, default=3
+        Number of timesteps in the model run
+    fan_in : int, default=2
+        Number of preceding models whose output each model reads
+    adaptor_every : int, default=4
+        Every `adaptor_every`-th model runs on coarse regions. Set to zero to run every
+        model on the fine regions, without adaptors.
+    interventions : int, default=10
+        Number of interventions per model
+    variants : int, default=2
+        Number of scenario variants
+    interface : str, default='local_csv'
+        Data interface which will be used to run the project, one of 'local_csv' or
+        'local_binary' - data files are written in its format
+    seed : int, default=0
+        Seed for random scenario data
+
+    Returns
+    -------
+    dict
+        Summary of the project: counts of each item
+    """
+    for name, value in (('models', models), ('regions', regions),
+                        ('intervals', intervals), ('timesteps', timesteps),
+                        ('variants', variants)):
+        if value < 1:
+            raise ValueError("Expected at least one of '{}', got {}".format(name, value))
+    try:
+        data_store_class, ext = DATA_STORES[interface]
+    except KeyError:
+        msg = "Interface '{}' not recognised, expected one of {}"
+        raise ValueError(msg.format(interface, list(DATA_STORES)))
+
+    _make_folders(directory)
+    rng = np.random.RandomState(seed)
+
+    model_names = ['model_{:03d}'.format(i) for i in range(models)]
+    resolutions = {
+        name: COARSE_REGIONS if adaptor_every and (i + 1) % adaptor_every == 0
+        else FINE_REGIONS
+        for i, name in enumerate(model_names)
+    }
+    years = [BASE_YEAR + 5 * i for i in range(timesteps)]
+    variant_names = ['variant_{}'.format(i) for i in range(variants)]
+
+    # dimensions
+    fine, coarse = grid_regions(regions)
+    _write_geojson(os.path.join(directory, 'data', 'dimensions', FINE_REGIONS), fine)
+    _write_geojson(os.path.join(directory, 'data', 'dimensions', COARSE_REGIONS), coarse)
+    _write_yaml(directory, 'dimensions', FINE_REGIONS, {
+        'name': FINE_REGIONS,
+        'description': '{} square regions'.format(len(fine)),
+        'elements': '{}/regions.geojson'.format(FINE_REGIONS)
+    })
+    _write_yaml(directory, 'dimensions', COARSE_REGIONS, {
+        'name': COARSE_REGIONS,
+        'description': 'Blocks of up to 2x2 regions',
+        'elements': '{}/regions.geojson'.format(COARSE_REGIONS)
+    })
+    intervals_ = even_intervals(intervals)
+    metadata_store = FileMetadataStore(directory)
+    metadata_store.write_dimension({
+        'name': INTERVALS,
+        'description': '{} intervals of equal length'.format(intervals),
+        'elements': intervals_
+    })
+
+    # scenario
+    dims = {
+        FINE_REGIONS: [FINE_REGIONS, INTERVALS],
+        COARSE_REGIONS: [COARSE_REGIONS, INTERVALS]
+    }
+    _write_yaml(directory, 'scenarios', SCENARIO_NAME, {
+        'name': SCENARIO_NAME,
+        'description': 'Drivers at each resolution',
+        'provides': [
+            _spec_config(_driver(resolution), dims[resolution], 'people')
+            for resolution in dims
+        ],
+        'variants': [
+            {
+                'name': variant,
+                'description': '',
+                'data': OrderedDict(
+                    (_driver(resolution), '{}_{}.{}'.format(
+                        _driver(resolution), variant, ext))
+                    for resolution in dims
+                )
+            }
+            for variant in variant_names
+        ]
+    })
+
+    # models, with an adaptor for each source which feeds a model at another resolution
+    dependencies, adaptors = _write_sector_models(
+        directory, model_names, resolutions, dims, fan_in, interventions, ext)
+
+    scenario_dependencies = [
+        _dependency(SCENARIO_NAME, _driver(resolutions[name]), name,
+                    _driver(resolutions[name]))
+        for name in model_names
+    ]
+
+    # system-of-systems model, with a narrative which overrides every model parameter
+    _write_yaml(directory, 'sos_models', SOS_MODEL_NAME, {
+        'name': SOS_MODEL_NAME,
+        'description': 'Synthetic system-of-systems model',
+        'scenarios': [SCENARIO_NAME],
+        'narratives': [{
+            'name': NARRATIVE_NAME,
+            'description': 'Override the scale of every model',
+            'sos_model': SOS_MODEL_NAME,
+            'provides': OrderedDict((name, [_parameter(name)]) for name in model_names),
+            'variants': [{
+                'name': 'rapid',
+                'description': 'Every model scales up',
+                'data': OrderedDict(
+                    (_parameter(name), 'rapid_{}.{}'.format(_parameter(name), ext))
+                    for name in model_names
+                )
+            }]
+        }],
+        'sector_models': model_names + list(adaptors),
+        'scenario_dependencies': scenario_dependencies,
+        'model_dependencies': dependencies
+    })
+
+    _write_yaml(directory, 'model_runs', MODEL_RUN_NAME, {
+        'name': MODEL_RUN_NAME,
+        'description': 'Synthetic model run',
+        'stamp': '2019-01-01T00:00:00+00:00',
+        'timesteps': years,
+        'sos_model': SOS_MODEL_NAME,
+        'scenarios': {SCENARIO_NAME: variant_names[0]},
+        'narratives': {NARRATIVE_NAME: ['rapid']},
+        'strategies': []
+    })
+
+    with open(os.path.join(directory, 'models', 'synthetic.py'), 'w') as file_handle:
+        file_handle.write(MODEL_WRAPPER)
+    with open(os.path.join(directory, 'models', 'adaptors.py'), 'w') as file_handle:
+        file_handle.write(ADAPTORS)
+
+    # data, written through the store in the format of the chosen interface
+    store = Store(
+        config_store=YamlConfigStore(directory),
+        metadata_store=metadata_store,
+        data_store=data_store_class(directory),
+        model_base_folder=directory
+    )
+    coords = {
+        FINE_REGIONS: [region['properties']['name'] for region in fine],
+        COARSE_REGIONS: [region['properties']['name'] for region in coarse],
+        INTERVALS: [interval['name'] for interval in intervals_]
+    }
+    for variant in variant_names:
+        for resolution in dims:
+            spec = Spec(
+                name=_driver(resolution),
+                dims=['timestep'] + dims[resolution],
+                coords=dict(timestep=years, **{dim: coords[dim] for dim in dims[resolution]}),
+                dtype='float',
+                unit='people'
+            )
+            store.write_scenario_variant_data(
+                SCENARIO_NAME, variant, DataArray(spec, rng.rand(*spec.shape) * 1000))
+
+    for name in model_names:
+        spec = Spec(name=_parameter(name), dtype='float', unit='dimensionless')
+        store.write_model_parameter_default(name, _parameter(name), DataArray(spec, 1.0))
+        store.write_narrative_variant_data(
+            SOS_MODEL_NAME, NARRATIVE_NAME, 'rapid', DataArray(spec, 1.1))
+
+        if interventions:
+            _write_interventions(store, name, coords[resolutions[name]], interventions,
+                                 ext, rng)
+
+    summary = OrderedDict([
+        ('models', models),
+        ('adaptors', len(adaptors)),
+        ('dependencies', len(dependencies) + len(scenario_dependencies)),
+        ('regions', len(fine)),
+        ('coarse_regions', len(coarse)),
+        ('intervals', intervals),
+        ('timesteps', timesteps),
+        ('interventions', interventions * models),
+        ('variants', variants)
+    ])
+    logging.info("Generated synthetic project in %s: %s", directory, dict(summary))
+    return summary
+
+
+def grid_regions(n, cell_size=CELL_SIZE):
+    """Square regions on a grid, along with coarse regions which each cover up to 2x2 of them
+
+    Parameters
+    ----------
+    n : int
+        Number of (fine) regions
+    cell_size : float, default=1000
+        Length of the side of each fine region
+
+    Returns
+    -------
+    tuple of (list, list)
+        Fine and coarse regions, as GeoJSON features with a 'name' property
+    """
+    columns = int(math.ceil(math.sqrt(n)))
+    blocks = OrderedDict()
+    fine = []
+    for i in range(n):
+        column, row = i % columns, i // columns
+        fine.append(_square('region_{}'.format(i), column * cell_size, row * cell_size,
+                            cell_size))
+        blocks.setdefault((column // 2, row // 2), []).append((column, row))
+
+    coarse = []
+    for j, cells in enumerate(blocks.values()):
+        # up to four cells, which may leave out the top-right or the whole top row
+        rows = sorted(set(row for _, row in cells))
+        ring = []
+        for row in rows:
+            columns_in_row = [column for column, cell_row in cells if cell_row == row]
+            ring.append((min(columns_in_row), max(columns_in_row) + 1, row))
+        coarse.append(_block('region_coarse_{}'.format(j), ring, cell_size))
+    return fine, coarse
+
+
+def even_intervals(n, name='interval'):
+    """`n` intervals of (roughly) equal numbers of hours, covering a year
+
+    Returns
+    -------
+    list of dict
+        Intervals as dimension elements with 'name' and 'interval' keys
+    """
+    bounds = np.linspace(0, HOURS_PER_YEAR, n + 1).astype(int)
+    return [
+        {
+            'name': '{}_{}'.format(name, i),
+            'interval': [['PT{}H'.format(start), 'PT{}H'.format(end)]]
+        }
+        for i, (start, end) in enumerate(zip(bounds[:-1], bounds[1:]))
+    ]
+
+
+def _write_sector_models(directory, model_names, resolutions, dims, fan_in, interventions,
+                         ext):
+    """Write sector model and adaptor configuration
+
+    Returns
+    -------
+    tuple of (list, dict)
+        Model dependencies, and adaptors as {name: (source, from_resolution, to_resolution)}
+    """
+    dependencies = []
+    adaptors = OrderedDict()
+    for i, name in enumerate(model_names):
+        resolution = resolutions[name]
+        inputs = [_spec_config(_driver(resolution), dims[resolution], 'people')]
+        for source in model_names[max(0, i - fan_in):i]:
+            inputs.append(_spec_config(source, dims[resolution], 'GWh'))
+            if resolutions[source] == resolution:
+                dependencies.append(_dependency(source, 'output', name, source))
+            else:
+                adaptor = '{}_to_{}'.format(source, resolution)
+                if adaptor not in adaptors:
+                    adaptors[adaptor] = (source, resolutions[source], resolution)
+                    dependencies.append(_dependency(source, 'output', adaptor, 'output'))
+                dependencies.append(_dependency(adaptor, 'output', name, source))
+        _write_yaml(directory, 'sector_models', name, {
+            'name': name,
+            'description': 'Synthetic model at {} resolution'.format(resolution),
+            'path': 'models/synthetic.py',
+            'classname': 'SyntheticModel',
+            'inputs': inputs,
+            'outputs': [_spec_config('output', dims[resolution], 'GWh')],
+            'parameters': [{
+                'name': _parameter(name),
+                'description': 'Scale applied to the outputs of {}'.format(name),
+                'abs_range': [0, 10],
+                'exp_range': [0.5, 2],
+                'default': '{}.{}'.format(_parameter(name), ext),
+                'dtype': 'float',
+                'unit': 'dimensionless'
+            }],
+            'interventions': ['{}.{}'.format(name, ext)] if interventions else [],
+            'initial_conditions': ['{}.{}'.format(name, ext)] if interventions else []
+        })
+
+    for adaptor, (source, from_resolution, to_resolution) in adaptors.items():
+        _write_yaml(directory, 'sector_models', adaptor, {
+            'name': adaptor,
+            'description': 'Convert outputs of {} to {}'.format(source, to_resolution),
+            'path': 'models/adaptors.py',
+            'classname': 'RegionAdaptor',
+            'inputs': [_spec_config('output', dims[from_resolution], 'GWh')],
+            'outputs': [_spec_config('output', dims[to_resolution], 'GWh')],
+            'parameters': [],
+            'interventions': [],
+            'initial_conditions': []
+        })
+    return dependencies, adaptors
+
+
+def _write_interventions(store, model_name, locations, count, ext, rng):
+    """Write an intervention register for a model, with the first tenth already built
+    """
+    register = OrderedDict()
+    for j in range(count):
+        intervention = '{}_asset_{}'.format(model_name, j)
+        register[intervention] = {
+            'name': intervention,
+            'location': locations[j % len(locations)],
+            'capacity': {'value': float(rng.randint(1, 100)), 'unit': 'MW'},
+            'capital_cost': {'value': float(rng.randint(1, 100)), 'unit': 'million £'},
+            'technical_lifetime': {'value': 50, 'unit': 'years'}
+        }
+    key = '{}.{}'.format(model_name, ext)
+    store.data_store.write_interventions(key, register)
+    store.data_store.write_initial_conditions(key, [
+        {'name': intervention, 'build_year': BASE_YEAR - 10}
+        for intervention in list(register)[:max(1, count // 10)]
+    ])
+
+
+def _square(name, x, y, size):
+    return _feature(name, [[x, y], [x, y + size], [x + size, y + size], [x + size, y], [x, y]])
+
+
+def _block(name, rows, size):
+    """Polygon covering one or two rows of cells, each row given as (start, stop, row)
+    """
+    (start, stop, row) = rows[0]
+    bottom = row * size
+    if len(rows) == 1:
+        return _square_rows(name, start, stop, bottom, bottom + size, size)
+    top_start, top_stop, _ = rows[1]
+    top = bottom + 2 * size
+    if (top_start, top_stop) == (start, stop):
+        return _square_rows(name, start, stop, bottom, top, size)
+    # top row is shorter than the bottom row, leaving a notch at the top-right
+    return _feature(name, [
+        [start * size, bottom], [start * size, top], [top_stop * size, top],
+        [top_stop * size, bottom + size], [stop * size, bottom + size], [stop * size, bottom],
+        [start * size, bottom]
+    ])
+
+
+def _square_rows(name, start, stop, bottom, top, size):
+    return _feature(name, [
+        [start * size, bottom], [start * size, top], [stop * size, top],
+        [stop * size, bottom], [start * size, bottom]
+    ])
+
+
+def _feature(name, ring):
+    return {
+        'type': 'Feature',
+        'properties': {'name': name},
+        'geometry': {'type': 'Polygon', 'coordinates': [ring]}
+    }
+
+
+def _driver(resolution):
+    return 'driver' if resolution == FINE_REGIONS else 'driver_coarse'
+
+
+def _parameter(model_name):
+    return '{}_scale'.format(model_name)
+
+
+def _spec_config(name, dims, unit):
+    return {'name': name, 'dims': dims, 'dtype': 'float', 'unit': unit}
+
+
+def _dependency(source, source_output, sink, sink_input):
+    return {
+        'source': source,
+        'source_output': source_output,
+        'sink': sink,
+        'sink_input': sink_input
+    }
+
+
+def _make_folders(directory):
+    folders = [
+        'config/dimensions', 'config/model_runs', 'config/scenarios', 'config/sector_models',
+        'config/sos_models', 'data/coefficients', 'data/dimensions', 'data/initial_conditions',
+        'data/interventions', 'data/narratives', 'data/parameters', 'data/scenarios',
+        'data/strategies', 'models', 'results'
+    ]
+    for folder in folders:
+        os.makedirs(os.path.join(directory, folder), exist_ok=True)
+
+
+def _write_geojson(folder, features):
+    os.makedirs(folder, exist_ok=True)
+    with open(os.path.join(folder, 'regions.geojson'), 'w') as file_handle:
+        json.dump({
+            'type': 'FeatureCollection',
+            'crs': {'type': 'name', 'properties': {'name': 'urn:ogc:def:crs:EPSG::27700'}},
+            'features': features
+        }, file_handle)
+
+
+def _write_yaml(directory, folder, name, data):
+    path = os.path.join(directory, 'config', folder, '{}.yml'.format(name))
+    with open(path, 'w') as file_handle:
+        yaml = YAML()
+        yaml.default_flow_style = False
+        yaml.allow_unicode = True
+        yaml.dump(_plain(data), file_handle)
+
+
+def _plain(data):
+    """Convert OrderedDicts to dicts (preserving order), which ruamel.yaml dumps plainly
+    """
+    if isinstance(data, dict):
+        return {key: _plain(value) for key, value in data.items()}
+    if isinstance(data, list):
+        return [_plain(item) for item in data]
+    return data
@@ -25,6 +25,7 @@ from smif.decision.decision import DecisionManager
 from smif.exception import SmifModelRunError, SmifTimestepResolutionError
 from smif.metadata import RelativeTimestep
 from smif.model import ModelOperation, ScenarioModel
+from smif.profiling import PROFILER
 
 
 class ModelRun(object):
@@ -116,15 +117,19 @@ class ModelRun(object):
     def model_horizon(self, value):
         self._model_horizon = sorted(list(set(value)))
 
-    def run(self, store, warm_start_timestep=None):
+    def run(self, store, warm_start_timestep=None, memory_budget=None):
         """Builds all the objects and passes them to the ModelRunner
 
         The idea is that this will add ModelRuns to a queue for asychronous
         processing
 
+        Arguments
+        ---------
+        store : :class:`smif.data_layer.Store`
+        warm_start_timestep : int, optional
+        memory_budget : :class:`smif.controller.scheduler.MemoryBudget`, optional
         """
         self.logger.debug("Running model run %s", self.name)
-        self.logger.profiling_start('modelrun.run', self.name)
 
         if self.status == 'Built':
             if not self.model_horizon:
@@ -133,21 +138,26 @@ class ModelRun(object):
                 idx = self.model_horizon.index(warm_start_timestep)
                 self.model_horizon = self.model_horizon[idx:]
             self.status = 'Running'
-            modelrunner = ModelRunner()
-            modelrunner.solve_model(self, store)
+            with PROFILER.span('modelrun.run', self.name, model_run=self.name):
+                modelrunner = ModelRunner(memory_budget)
+                modelrunner.solve_model(self, store)
             self.status = 'Successful'
         else:
             raise SmifModelRunError("Model is not yet built.")
 
-        self.logger.profiling_stop('modelrun.run', self.name)
-
 
 class ModelRunner(object):
     """The ModelRunner orchestrates the simulation of a SoSModel over decision iterations and
     timesteps as provided by a DecisionManager.
+
+    Arguments
+    ---------
+    memory_budget : :class:`smif.controller.scheduler.MemoryBudget`, optional
+        Passed on to the job scheduler
     """
-    def __init__(self):
+    def __init__(self, memory_budget=None):
         self.logger = getLogger(__name__)
+        self.memory_budget = memory_budget
 
     def solve_model(self, model_run, store):
         """Solve a ModelRun
@@ -174,20 +184,28 @@ class ModelRunner(object):
 
         # Initialise the job scheduler
         self.logger.debug("Initialising the job scheduler")
-        job_scheduler = JobScheduler()
+        job_scheduler = JobScheduler(self.memory_budget)
         job_scheduler.store = store
 
-        for bundle in decision_manager.decision_loop():
-            # each iteration is independent at this point, so the following loop is a
-            # candidate for running in parallel
-            job_graph = self.build_job_graph(model_run, bundle)
-
-            job_id, err = job_scheduler.add(job_graph)
-            self.logger.debug("Running job %s", job_id)
-            if err is not None:
-                status = job_scheduler.get_status(job_id)
-                self.logger.debug("Job %s %s", job_id, status['status'])
-                raise err
+        job_stats = []
+        try:
+            for bundle in decision_manager.decision_loop():
+                # each iteration is independent at this point, so the following loop is a
+                # candidate for running in parallel
+                job_graph = self.build_job_graph(model_run, bundle)
+
+                job_id, err = job_scheduler.add(job_graph)
+                self.logger.debug("Running job %s", job_id)
+                job_stats.extend(job_scheduler.get_job_stats(job_id))
+                if err is not None:
+                    status = job_scheduler.get_status(job_id)
+                    self.logger.debug("Job %s %s", job_id, status['status'])
+                    raise err
+        finally:
+            # keep time and memory used by each job alongside the results, including for
+            # failed runs, which is when they are most useful
+            if job_stats:
+                store.write_model_run_stats(job_stats, model_run.name, 'jobs')
 
     def build_job_graph(self, model_run, bundle):
         """ Build a job graph
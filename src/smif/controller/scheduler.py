@@ -8,14 +8,18 @@ up models to run in parallel and/or distributed.
 """
 import itertools
 import logging
+import multiprocessing
 import subprocess
 import traceback
 from collections import defaultdict
 from datetime import datetime
 
 import networkx
+import numpy
 from smif.data_layer import DataHandle
-from smif.model import ModelOperation
+from smif.exception import SmifDataNotFoundError
+from smif.model import ModelOperation, ScenarioModel
+from smif.profiling import PROFILER
 
 
 class ModelRunScheduler(object):
@@ -157,14 +161,160 @@ class ModelRunScheduler(object):
         }
 
 
+def estimate_model_memory(model):
+    """Estimate the memory needed to hold a model's inputs, parameters and outputs
+
+    Parameters
+    ----------
+    model : smif.model.Model
+
+    Returns
+    -------
+    int
+        Size in bytes, based on the shape and dtype of each Spec
+    """
+    specs = itertools.chain(
+        model.inputs.values(), model.parameters.values(), model.outputs.values())
+    return sum(estimate_spec_memory(spec) for spec in specs)
+
+
+def estimate_spec_memory(spec):
+    """Estimate the memory needed to hold data described by a Spec
+
+    Parameters
+    ----------
+    spec : smif.metadata.Spec
+
+    Returns
+    -------
+    int
+        Size in bytes
+    """
+    try:
+        itemsize = numpy.dtype(spec.dtype).itemsize
+    except TypeError:
+        # unrecognised dtypes are assumed to be 64-bit
+        itemsize = 8
+    return int(numpy.prod(spec.shape, dtype='int64')) * itemsize
+
+
+class MemoryBudget(object):
+    """Keep track of memory reserved by running jobs against a fixed budget
+
+    A scheduler should :meth:`reserve` a job's estimated memory before starting it, hold
+    the job back while the reservation would exceed the budget, and :meth:`release` the
+    reservation when the job finishes.
+
+    Parameters
+    ----------
+    limit : int
+        Budget in bytes
+    """
+    def __init__(self, limit):
+        self.limit = int(limit)
+        self.in_use = 0
+        self.logger = logging.getLogger(__name__)
+
+    def __repr__(self):
+        return "<MemoryBudget in_use={} limit={}>".format(self.in_use, self.limit)
+
+    def fits(self, nbytes):
+        """Check whether a job of `nbytes` could start now
+
+        A job larger than the whole budget is allowed to start when nothing else is running,
+        so that it can never be held back indefinitely.
+        """
+        return self.in_use == 0 or self.in_use + nbytes <= self.limit
+
+    def reserve(self, nbytes):
+        """Reserve memory for a job
+
+        Returns
+        -------
+        bool
+            False (and nothing is reserved) if the job does not fit in the budget
+        """
+        if not self.fits(nbytes):
+            return False
+        if nbytes > self.limit:
+            self.logger.warning(
+                "Job estimated to need %s bytes, more than the memory budget of %s bytes",
+                nbytes, self.limit)
+        self.in_use += nbytes
+        return True
+
+    def release(self, nbytes):
+        """Release memory reserved for a job
+        """
+        self.in_use = max(0, self.in_use - nbytes)
+
+
+class SharedMemoryBudget(MemoryBudget):
+    """A memory budget shared by jobs running in several processes
+
+    Reservations are counted in shared memory. A job which does not fit waits for jobs in
+    other processes to release theirs, so the jobs of all processes together keep within
+    the one budget. Pass the budget to worker processes as they start.
+
+    Parameters
+    ----------
+    limit : int
+        Budget in bytes
+    context : multiprocessing.context.BaseContext, optional
+        Context of the worker processes
+    """
+    def __init__(self, limit, context=None):
+        context = context or multiprocessing.get_context()
+        self._in_use = context.Value('q', 0, lock=False)
+        self._condition = context.Condition()
+        super().__init__(limit)
+
+    @property
+    def in_use(self):
+        return self._in_use.value
+
+    @in_use.setter
+    def in_use(self, nbytes):
+        self._in_use.value = nbytes
+
+    def reserve(self, nbytes):
+        """Reserve memory for a job, waiting until it fits in the budget
+
+        Returns
+        -------
+        bool
+            Always True, once reserved
+        """
+        with self._condition:
+            self._condition.wait_for(lambda: self.fits(nbytes))
+            return super().reserve(nbytes)
+
+    def release(self, nbytes):
+        """Release memory reserved for a job, and wake any jobs waiting to reserve
+        """
+        with self._condition:
+            super().release(nbytes)
+            self._condition.notify_all()
+
+
 class JobScheduler(object):
     """Run JobGraphs produced by a :class:`~smif.controller.modelrun.ModelRun`
+
+    Jobs are run in series. Time and memory used by each job are recorded, and are available
+    from :meth:`get_job_stats`.
+
+    Parameters
+    ----------
+    memory_budget : MemoryBudget, optional
+        Budget against which the estimated memory of each job is reserved
     """
-    def __init__(self):
+    def __init__(self, memory_budget=None):
         self._status = defaultdict(lambda: 'unstarted')
+        self._job_stats = defaultdict(list)
         self._id_counter = itertools.count()
         self.logger = logging.getLogger(__name__)
         self.store = None
+        self.memory_budget = memory_budget
 
     def add(self, job_graph):
         """Add a JobGraph to the JobScheduler and run directly
@@ -218,42 +368,117 @@ class JobScheduler(object):
         """
         return {'status': self._status[job_graph_id]}
 
+    def get_job_stats(self, job_graph_id):
+        """Get time and memory statistics for each job run from a job graph
+
+        Parameters
+        ----------
+        job_graph_id: int
+
+        Returns
+        -------
+        list[dict]
+            One dict per job, in run order, with keys 'job_id', 'model', 'operation',
+            'timestep', 'decision_iteration', 'wall_s', 'cpu_s', 'estimated_bytes',
+            'alloc_delta_bytes', 'alloc_peak_bytes' and 'rss_growth_bytes' (how far
+            the job raised the peak resident set size of the process). Memory allocation
+            values are None unless the profiler is tracking memory.
+        """
+        return list(self._job_stats[job_graph_id])
+
     def _run(self, job_graph, job_graph_id):
         """Run a job graph
         - sort the jobs into a single list
         - unpack model, data_handle and operation from each node
         """
-        self.logger.profiling_start('JobScheduler._run()', 'graph_' + str(job_graph_id))
-        self._status[job_graph_id] = 'running'
-
-        for job_node_id, job in self._get_run_order(job_graph):
-            self.logger.info("Job %s", job_node_id)
-            self.logger.profiling_start('JobScheduler._run()', 'job_' + job_node_id)
-
-            model = job['model']
-            data_handle = DataHandle(
-                store=self.store,
-                model=model,
-                modelrun_name=job['modelrun_name'],
-                current_timestep=job['current_timestep'],
-                timesteps=job['timesteps'],
-                decision_iteration=job['decision_iteration']
-            )
-            operation = job['operation']
-            if operation is ModelOperation.BEFORE_MODEL_RUN:
-                # before_model_run may not be implemented by all jobs
-                if hasattr(model, "before_model_run"):
+        with PROFILER.span('JobScheduler._run()', 'graph_' + str(job_graph_id)):
+            self._status[job_graph_id] = 'running'
+
+            for job_node_id, job in self._get_run_order(job_graph):
+                self.logger.info("Job %s", job_node_id)
+                estimated_bytes = estimate_model_memory(job['model'])
+                if self.memory_budget is not None:
+                    # running in series, so the budget is only ever shared with jobs
+                    # which have already finished
+                    self.memory_budget.reserve(estimated_bytes)
+                operation = getattr(job['operation'], 'value', job['operation'])
+                try:
+                    with PROFILER.span('JobScheduler._run()', 'job_' + job_node_id,
+                                       model=job['model'].name,
+                                       job_operation=operation,
+                                       timestep=job['current_timestep'],
+                                       decision_iteration=job['decision_iteration']) as span:
+                        self._run_job(job)
+                finally:
+                    if self.memory_budget is not None:
+                        self.memory_budget.release(estimated_bytes)
+                if span is not None:
+                    self._job_stats[job_graph_id].append({
+                        'job_id': job_node_id,
+                        'model': job['model'].name,
+                        'operation': operation,
+                        'timestep': job['current_timestep'],
+                        'decision_iteration': job['decision_iteration'],
+                        'wall_s': span.wall_ns / 1e9,
+                        'cpu_s': span.cpu_ns / 1e9,
+                        'estimated_bytes': estimated_bytes,
+                        'alloc_delta_bytes': span.alloc_delta,
+                        'alloc_peak_bytes': span.alloc_peak,
+                        'rss_growth_bytes': span.rss_growth
+                    })
+
+            self._status[job_graph_id] = 'done'
+
+    def _run_job(self, job):
+        """Run a single job
+        - unpack model, data_handle and operation from the job node
+        """
+        model = job['model']
+        data_handle = DataHandle(
+            store=self.store,
+            model=model,
+            modelrun_name=job['modelrun_name'],
+            current_timestep=job['current_timestep'],
+            timesteps=job['timesteps'],
+            decision_iteration=job['decision_iteration']
+        )
+        operation = job['operation']
+        if operation is ModelOperation.BEFORE_MODEL_RUN:
+            # before_model_run may not be implemented by all jobs
+            if hasattr(model, "before_model_run"):
+                with PROFILER.span('Model.before_model_run', model.name, model=model.name):
                     model.before_model_run(data_handle)
 
-            elif operation is ModelOperation.SIMULATE:
+        elif operation is ModelOperation.SIMULATE:
+            with PROFILER.span('Model.simulate', model.name, model=model.name):
                 model.simulate(data_handle)
+            if job.get('shared_with'):
+                self._share_results(job)
 
-            else:
-                raise ValueError("Unrecognised operation: {}".format(operation))
-            self.logger.profiling_stop('JobScheduler._run()', 'job_' + job_node_id)
+        else:
+            raise ValueError("Unrecognised operation: {}".format(operation))
+
+    def _share_results(self, job):
+        """Share the results of a job with other model runs in which it is identical
 
-        self._status[job_graph_id] = 'done'
-        self.logger.profiling_stop('JobScheduler._run()', 'graph_' + str(job_graph_id))
+        Job nodes may list the names of these model runs as 'shared_with' - see
+        :class:`smif.controller.sweep.SweepRunner`.
+        """
+        model = job['model']
+        if isinstance(model, ScenarioModel):
+            # scenario data is read directly from the store by each model run
+            return
+        for output_spec in model.outputs.values():
+            for modelrun_name in job['shared_with']:
+                try:
+                    self.store.link_results(
+                        job['modelrun_name'], modelrun_name, model.name, output_spec,
+                        job['current_timestep'], job['decision_iteration'])
+                except SmifDataNotFoundError:
+                    # outputs need not be written at every timestep
+                    self.logger.debug("No results for %s.%s to share", model.name,
+                                      output_spec.name)
+                    break
 
     def _next_id(self):
         return next(self._id_counter)
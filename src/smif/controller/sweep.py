@@ -0,0 +1,387 @@
+"""A sweep expands one model run into many, each with a different combination of scenario
+variants and narrative variants, and runs them together.
+
+A model run configuration may include a ``sweep``, listing the variants to use for each
+scenario and narrative which varies. Narratives are given as lists of variants, as in the
+``narratives`` of a model run::
+
+    sweep:
+      scenarios:
+        population: [population_low, population_med, population_high]
+      narratives:
+        technology:
+        - [high_tech_dsm]
+        - []
+      samples: 4  # optional - a random sample of the combinations, without replacement
+      seed: 1     # optional - random seed for the sample
+
+Each combination (the Cartesian product, or a sample from it) is a model run, named after
+the swept model run with a numeric suffix, for example ``energy_central_0``, and written to
+the store so that results can be read as for any other model run.
+
+:class:`SweepRunner` schedules the model runs of a sweep as one job graph for each decision
+bundle. Jobs whose inputs are identical in several model runs - the same model, operation,
+timestep and decision iteration, the same scenario and narrative variants, the same
+strategies, and identical upstream jobs - are run once, and their results are linked into
+each of the other model runs. For example, a population model which does not depend on a
+swept scenario runs once for the whole sweep.
+"""
+import hashlib
+import json
+import random
+from copy import deepcopy
+
+import networkx as nx
+from smif.controller.modelrun import ModelRunner
+from smif.controller.scheduler import JobScheduler
+from smif.decision.decision import DecisionManager
+from smif.exception import (SmifDataNotFoundError, SmifModelRunError,
+                            SmifValidationError)
+from smif.model import ModelOperation
+from smif.profiling import PROFILER
+
+
+def expand_sweep(model_run_config):
+    """Expand a model run with a sweep into a model run for each combination of variants
+
+    Parameters
+    ----------
+    model_run_config : dict
+        Model run configuration, with a 'sweep'
+
+    Returns
+    -------
+    list[dict]
+        Model run configurations, without a 'sweep'
+    """
+    sweep = model_run_config['sweep']
+    axes = []
+    for scenario_name, variants in sorted(sweep.get('scenarios', {}).items()):
+        axes.append(('scenarios', scenario_name, list(variants)))
+    for narrative_name, variants in sorted(sweep.get('narratives', {}).items()):
+        axes.append(('narratives', narrative_name, [_as_list(v) for v in variants]))
+    if not axes:
+        msg = "Sweep of model run '{}' must vary at least one scenario or narrative"
+        raise SmifValidationError(msg.format(model_run_config['name']))
+    for config_type, name, variants in axes:
+        if not variants:
+            msg = "Sweep of model run '{}' lists no variants for {} '{}'"
+            raise SmifValidationError(
+                msg.format(model_run_config['name'], config_type[:-1], name))
+
+    sizes = [len(variants) for _, _, variants in axes]
+    total = 1
+    for size in sizes:
+        total *= size
+    if 'samples' in sweep:
+        # decode sampled positions in the product, rather than build the whole product
+        sample = random.Random(sweep.get('seed')).sample(range(total), min(sweep['samples'],
+                                                                           total))
+        combinations = sorted(sample)
+    else:
+        combinations = range(total)
+
+    width = len(str(len(combinations) - 1))
+    return [
+        _sweep_model_run(model_run_config, axes, _unravel(position, sizes), index, width)
+        for index, position in enumerate(combinations)
+    ]
+
+
+def write_sweep_model_runs(store, model_run_config):
+    """Expand a model run with a sweep, and write each of its model runs to the store
+
+    Model runs which already exist, for example from a previous run of the sweep, are
+    updated. Each has the strategies of the swept model run.
+
+    Parameters
+    ----------
+    store : smif.data_layer.Store
+    model_run_config : dict
+
+    Returns
+    -------
+    list[str]
+        Names of the model runs
+    """
+    # interventions of pre-specified planning strategies are read from their files, so are
+    # not written with the strategies
+    strategies = [
+        {key: value for key, value in strategy.items() if key != 'interventions'}
+        for strategy in store.read_strategies(model_run_config['name'])
+    ]
+    names = []
+    for config in expand_sweep(model_run_config):
+        try:
+            store.read_model_run(config['name'])
+        except SmifDataNotFoundError:
+            store.write_model_run(config)
+        else:
+            store.update_model_run(config['name'], config)
+        store.write_strategies(config['name'], strategies)
+        names.append(config['name'])
+    return names
+
+
+def run_sweep(model_runs, store, memory_budget=None):
+    """Run the model runs of a sweep together
+
+    Parameters
+    ----------
+    model_runs : list[smif.controller.modelrun.ModelRun]
+        Built model runs
+    store : smif.data_layer.Store
+    memory_budget : smif.controller.scheduler.MemoryBudget, optional
+    """
+    for model_run in model_runs:
+        if model_run.status != 'Built':
+            raise SmifModelRunError("Model is not yet built.")
+        if not model_run.model_horizon:
+            raise SmifModelRunError("No timesteps specified for model run")
+        model_run.status = 'Running'
+
+    names = ', '.join(model_run.name for model_run in model_runs)
+    with PROFILER.span('sweep.run', names):
+        SweepRunner(memory_budget).solve_model_runs(model_runs, store)
+
+    for model_run in model_runs:
+        model_run.status = 'Successful'
+
+
+class SweepRunner(ModelRunner):
+    """Solve several model runs together, running jobs which are identical in more than
+    one model run only once
+
+    Jobs are identified by a digest of everything which may affect their results. Model
+    initialisation (before_model_run) is always run for each model run, as models may keep
+    state for the run. Model runs with strategies other than pre-specified planning do not
+    share sector model jobs, as their decisions may depend on their results.
+
+    Arguments
+    ---------
+    memory_budget : :class:`smif.controller.scheduler.MemoryBudget`, optional
+        Passed on to the job scheduler
+    """
+    def solve_model_runs(self, model_runs, store):
+        """Solve model runs, stepping through the decision loops of all of them together
+
+        Arguments
+        ---------
+        model_runs : list[:class:`smif.controller.modelrun.ModelRun`]
+        store : :class:`smif.data_layer.Store`
+        """
+        job_scheduler = JobScheduler(self.memory_budget)
+        job_scheduler.store = store
+
+        contexts = {model_run.name: _run_context(model_run) for model_run in model_runs}
+        loops = [
+            (model_run, DecisionManager(store, model_run.model_horizon, model_run.name,
+                                        model_run.sos_model).decision_loop())
+            for model_run in model_runs
+        ]
+        keys = {}
+        job_stats = {model_run.name: [] for model_run in model_runs}
+        try:
+            while loops:
+                bundles = []
+                for model_run, loop in loops:
+                    try:
+                        bundles.append((model_run, next(loop)))
+                    except StopIteration:
+                        pass
+                if not bundles:
+                    break
+                running = set(model_run.name for model_run, _ in bundles)
+                loops = [(model_run, loop) for model_run, loop in loops
+                         if model_run.name in running]
+
+                job_graph = self.build_sweep_job_graph(bundles, keys, contexts)
+                job_id, err = job_scheduler.add(job_graph)
+                self.logger.debug("Running job %s", job_id)
+                for stats in job_scheduler.get_job_stats(job_id):
+                    modelrun_name = job_graph.nodes[stats['job_id']]['modelrun_name']
+                    job_stats[modelrun_name].append(stats)
+                if err is not None:
+                    raise err
+        finally:
+            for modelrun_name, stats in job_stats.items():
+                if stats:
+                    store.write_model_run_stats(stats, modelrun_name, 'jobs')
+
+    def build_sweep_job_graph(self, bundles, keys, contexts):
+        """Build a job graph for a bundle of each model run, with identical jobs combined
+
+        Arguments
+        ---------
+        bundles : list[tuple]
+            Pairs of (model run, bundle)
+        keys : dict
+            Digest of each job already seen, by job id, updated in place
+        contexts : dict
+            Model run details which jobs depend on, by model run name
+
+        Returns
+        -------
+        :class:`networkx.DiGraph`
+            A job graph, where each job shared with other model runs lists their names as
+            'shared_with'
+        """
+        job_graph = nx.DiGraph()
+        for model_run, bundle in bundles:
+            job_graph = nx.compose(
+                job_graph, self._with_state_edges(self.build_job_graph(model_run, bundle),
+                                                  bundle))
+
+        for job_id in nx.topological_sort(job_graph):
+            job = job_graph.nodes[job_id]
+            if job and job['operation'] is ModelOperation.SIMULATE:
+                upstream = [
+                    keys.get(source_id, source_id)
+                    for source_id in job_graph.predecessors(job_id)
+                    if job_graph.nodes[source_id].get('operation') is not
+                    ModelOperation.BEFORE_MODEL_RUN
+                ]
+                keys[job_id] = _job_key(job, contexts[job['modelrun_name']], upstream)
+
+        shared_graph = nx.DiGraph()
+        first_job_ids = {}
+        job_ids = {}
+        for job_id, job in job_graph.nodes(data=True):
+            if not job:
+                # from a previous bundle, so already run
+                continue
+            key = keys.get(job_id) if job['operation'] is ModelOperation.SIMULATE else None
+            if key in first_job_ids:
+                job_ids[job_id] = first_job_ids[key]
+                shared_graph.nodes[job_ids[job_id]]['shared_with'].append(
+                    job['modelrun_name'])
+            else:
+                if key is not None:
+                    first_job_ids[key] = job_id
+                job_ids[job_id] = job_id
+                shared_graph.add_node(job_id, shared_with=[], **job)
+        shared_graph.add_edges_from(
+            (job_ids[source_id], job_ids[sink_id])
+            for source_id, sink_id in job_graph.edges
+            if source_id in job_ids and sink_id in job_ids
+        )
+
+        self.logger.info("Running %s jobs for %s model runs, %s shared", len(shared_graph),
+                         len(bundles), len(job_ids) - len(shared_graph))
+        return shared_graph
+
+    @staticmethod
+    def _with_state_edges(job_graph, bundle):
+        """Add edges from each model's job at the previous timestep, as a model may read
+        its own earlier results and state
+        """
+        edges = []
+        for job_id, job in job_graph.nodes(data=True):
+            if not job or job['operation'] is not ModelOperation.SIMULATE:
+                continue
+            timesteps = job['timesteps']
+            index = timesteps.index(job['current_timestep'])
+            if index == 0:
+                continue
+            decision_iteration = job['decision_iteration']
+            if job['current_timestep'] == bundle['timesteps'][0]:
+                try:
+                    decision_iteration = bundle['decision_links'][decision_iteration]
+                except KeyError:
+                    pass
+            edges.append((
+                ModelRunner._make_job_id(
+                    job['modelrun_name'], job['model'].name, ModelOperation.SIMULATE,
+                    timesteps[index - 1], decision_iteration),
+                job_id
+            ))
+        job_graph.add_edges_from(edges)
+        return job_graph
+
+
+def _run_context(model_run):
+    """Details of a model run which may affect the results of each of its models
+
+    Returns
+    -------
+    dict
+        With 'sos_model', the scenario variant of each scenario model, and the narrative
+        variants and decisions which apply to each sector model
+    """
+    sos_model = model_run.sos_model
+    strategies = model_run.strategies or []
+    if all(strategy['type'] == 'pre-specified-planning' for strategy in strategies):
+        decisions = _digest(strategies)
+    else:
+        # decisions may depend on results, so are particular to this model run
+        decisions = model_run.name
+
+    models = {}
+    for model in sos_model.sector_models:
+        narratives = {
+            name: variants for name, variants in model_run.narratives.items()
+            if model.name in sos_model.narratives.get(name, {}).get('provides', {})
+        }
+        models[model.name] = {'narratives': narratives, 'decisions': decisions}
+    for model in sos_model.scenario_models:
+        models[model.name] = {'variant': model_run.scenarios.get(model.name, model.scenario)}
+    return {'sos_model': sos_model.name, 'models': models}
+
+
+def _job_key(job, context, upstream):
+    """Digest of a simulate job and everything which may affect its results
+    """
+    model = job['model']
+    return _digest([
+        model.name,
+        job['current_timestep'],
+        job['decision_iteration'],
+        list(job['timesteps']),
+        context['sos_model'],
+        context['models'][model.name],
+        sorted(upstream)
+    ])
+
+
+def _digest(value):
+    encoded = json.dumps(value, sort_keys=True, default=str).encode('utf-8')
+    return hashlib.blake2b(encoded, digest_size=16).hexdigest()
+
+
+def _sweep_model_run(model_run_config, axes, indices, index, width):
+    """Configuration of a single model run of a sweep
+    """
+    config = deepcopy(model_run_config)
+    del config['sweep']
+    config['name'] = '{}_{}'.format(model_run_config['name'], str(index).zfill(width))
+    config['scenarios'] = dict(config.get('scenarios') or {})
+    config['narratives'] = dict(config.get('narratives') or {})
+
+    labels = []
+    for (config_type, name, variants), variant_index in zip(axes, indices):
+        variant = variants[variant_index]
+        config[config_type][name] = variant
+        if config_type == 'narratives':
+            variant = '+'.join(variant) or 'none'
+        labels.append('{}={}'.format(name, variant))
+
+    description = model_run_config.get('description') or ''
+    config['description'] = '{} ({})'.format(description, ', '.join(labels)).strip()
+    return config
+
+
+def _unravel(position, sizes):
+    """Index along each axis of a position in the Cartesian product of axes of `sizes`,
+    the last axis varying fastest
+    """
+    indices = []
+    for size in reversed(sizes):
+        position, index = divmod(position, size)
+        indices.append(index)
+    return indices[::-1]
+
+
+def _as_list(variants):
+    if isinstance(variants, str):
+        return [variants]
+    return list(variants)
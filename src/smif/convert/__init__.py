@@ -5,13 +5,33 @@ metadata is provided in the :class:`~smif.metadata.spec.Spec` definition.
 These should be useful to link models in simple cases, where it may be reasonable to rely on
 strong assumptions about the underlying distributions of the variables to be converted.
 """
-from smif.convert.adaptor import Adaptor
-from smif.convert.interval import IntervalAdaptor
-from smif.convert.region import RegionAdaptor
-from smif.convert.unit import UnitAdaptor
+import importlib
+
+# Adaptors are imported from their modules on first access: RegionAdaptor needs rtree and
+# shapely, UnitAdaptor needs pint, and neither should be imported to use the other
+_LAZY_ATTRIBUTES = {
+    'Adaptor': 'smif.convert.adaptor',
+    'IntervalAdaptor': 'smif.convert.interval',
+    'RegionAdaptor': 'smif.convert.region',
+    'UnitAdaptor': 'smif.convert.unit',
+}
 
 __all__ = ["Adaptor", "IntervalAdaptor", "UnitAdaptor", "RegionAdaptor"]
 
 __author__ = "Will Usher, Tom Russell, Roald Schoenmakers"
 __copyright__ = "Will Usher, Tom Russell, Roald Schoenmakers"
 __license__ = "mit"
+
+
+def __getattr__(name):
+    try:
+        module_name = _LAZY_ATTRIBUTES[name]
+    except KeyError:
+        raise AttributeError("module '{}' has no attribute '{}'".format(__name__, name))
+    value = getattr(importlib.import_module(module_name), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(list(globals()) + __all__)
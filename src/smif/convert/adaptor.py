@@ -12,6 +12,7 @@ from smif.data_layer.data_handle import DataHandle
 from smif.exception import SmifDataNotFoundError
 from smif.metadata import Spec
 from smif.model import Model
+from smif.profiling import PROFILER
 
 
 class Adaptor(Model, metaclass=ABCMeta):
@@ -55,7 +56,9 @@ class Adaptor(Model, metaclass=ABCMeta):
             msg = "Generating coefficients for %s to %s"
             self.logger.info(msg, from_dim, to_dim)
 
-            coefficients = self.generate_coefficients(from_spec, to_spec)
+            with PROFILER.span('Adaptor.generate_coefficients', self.name, model=self.name,
+                               from_dim=from_dim, to_dim=to_dim):
+                coefficients = self.generate_coefficients(from_spec, to_spec)
             data_handle.write_coefficients(from_dim, to_dim, coefficients)
         return coefficients
 
@@ -88,9 +91,13 @@ class Adaptor(Model, metaclass=ABCMeta):
 
         Returns
         -------
-        numpy.ndarray
+        numpy.ndarray or smif.data_layer.sparse_array.COOArray
+            Sparse if `data_array` is sparse
         """
-        data = data_array.data
+        if data_array.is_sparse:
+            data = data_array.as_coo()
+        else:
+            data = data_array.data
         from_spec = data_array.spec
 
         self.logger.debug("Converting from %s to %s.", from_spec.name, to_spec.name)
@@ -103,7 +110,12 @@ class Adaptor(Model, metaclass=ABCMeta):
         axis = from_spec.dims.index(from_convert_dim)
 
         try:
-            converted = self.convert_with_coefficients(data, coefficients, axis)
+            with PROFILER.span('Adaptor.convert', self.name, model=self.name,
+                               from_dim=from_convert_dim, to_dim=to_convert_dim):
+                if data_array.is_sparse:
+                    converted = data.contract(coefficients, axis)
+                else:
+                    converted = self.convert_with_coefficients(data, coefficients, axis)
         except ValueError as ex:
             if coefficients.shape[0] != data.shape[axis]:
                 msg = "Coefficients do not match dimension to convert: %s != %s"
@@ -111,7 +123,11 @@ class Adaptor(Model, metaclass=ABCMeta):
             else:
                 raise ex
 
-        self.logger.debug("Converted total from %s to %s", data.sum(), converted.sum())
+        if data_array.is_sparse:
+            self.logger.debug("Converted total from %s to %s",
+                              data.values.sum(), converted.values.sum())
+        else:
+            self.logger.debug("Converted total from %s to %s", data.sum(), converted.sum())
         return converted
 
     @staticmethod
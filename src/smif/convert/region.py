@@ -7,6 +7,7 @@ from shapely.geometry import mapping, shape  # type: ignore
 from shapely.validation import explain_validity  # type: ignore
 from smif.convert.adaptor import Adaptor
 from smif.convert.register import NDimensionalRegister, ResolutionSet
+from smif.metadata.geometry import RegionElements
 
 __author__ = "Will Usher, Tom Russell"
 __copyright__ = "Will Usher, Tom Russell"
@@ -61,7 +62,11 @@ class RegionSet(ResolutionSet):
         super().__init__()
         self.name = set_name
         self._regions = []
-        self.data = [e['feature'] for e in elements]
+        if isinstance(elements, RegionElements):
+            # read shapes directly from compact geometry, without building features
+            self._set_shapes(elements.names, elements.geometries())
+        else:
+            self.data = [e['feature'] for e in elements]
 
         self._idx = index.Index()
         for pos, region in enumerate(self._regions):
@@ -73,19 +78,19 @@ class RegionSet(ResolutionSet):
 
     @data.setter
     def data(self, value):
-        names = {}
-        for region in value:
-            name = region['properties']['name']
-            if name in names:
+        self._set_shapes(
+            [region['properties']['name'] for region in value],
+            [shape(region['geometry']) for region in value]
+        )
+
+    def _set_shapes(self, names, shapes):
+        seen = set()
+        for name, shape_ in zip(names, shapes):
+            if name in seen:
                 msg = "Region set must have uniquely named regions - {} duplicated"
                 raise AssertionError(msg.format(name))
-            names[name] = True
-            self._regions.append(
-                NamedShape(
-                    name,
-                    shape(region['geometry'])
-                )
-            )
+            seen.add(name)
+            self._regions.append(NamedShape(name, shape_))
 
     def get_entry_names(self):
         return [region.name for region in self.data]
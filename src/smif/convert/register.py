@@ -327,7 +327,9 @@ class NDimensionalRegister(Register):
         self.logger.debug("Coefficients array is of shape %s for %s to %s",
                           coefficients.shape, from_set.name, to_set.name)
 
-        from_names = from_set.get_entry_names()
+        from_positions = {
+            name: position for position, name in enumerate(from_set.get_entry_names())
+        }
         for to_idx, to_entry in enumerate(to_set):
             for from_idx in from_set.intersection(to_entry):
                 from_entry = from_set.data[from_idx]
@@ -337,7 +339,7 @@ class NDimensionalRegister(Register):
                                   proportion * 100,
                                   to_entry.name, to_idx,
                                   from_entry.name, from_idx)
-                from_idx = from_names.index(from_entry.name)
+                from_idx = from_positions[from_entry.name]
 
                 coefficients[from_idx, to_idx] = proportion
         self.logger.debug("Generated %s", coefficients)
@@ -4,6 +4,7 @@ from pint import DimensionalityError, UndefinedUnitError, UnitRegistry  # type:
 
 from smif.convert.adaptor import Adaptor
 from smif.data_layer.data_handle import DataHandle
+from smif.data_layer.sparse_array import COOArray
 
 
 class UnitAdaptor(Adaptor):
@@ -21,9 +22,19 @@ class UnitAdaptor(Adaptor):
             self._register.define(unit)
 
     def convert(self, data_array, to_spec, coefficients):
-        data = data_array.data
         from_spec = data_array.spec
 
+        if data_array.is_sparse:
+            # convert only the stored values, if zero is still zero in the new unit
+            # (as for any unit without an offset)
+            if self._convert_magnitude(0.0, from_spec, to_spec) == 0:
+                coo = data_array.as_coo()
+                values = self._convert_magnitude(coo.values, from_spec, to_spec)
+                return COOArray(coo.coords, values, coo.shape)
+
+        return self._convert_magnitude(data_array.data, from_spec, to_spec)
+
+    def _convert_magnitude(self, data, from_spec, to_spec):
         try:
             quantity = self._register.Quantity(data, from_spec.unit)
         except UndefinedUnitError:
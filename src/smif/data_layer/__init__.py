@@ -7,8 +7,11 @@
 from smif.data_layer.data_array import DataArray
 from smif.data_layer.data_handle import DataHandle
 from smif.data_layer.results import Results
+from smif.data_layer.shared_memory import SharedDataPlane
+from smif.data_layer.sparse_array import COOArray
 from smif.data_layer.store import Store
 
 # Define what should be imported as * ::
 #         from smif.data_layer import *
-__all__ = ['DataArray', 'DataHandle', 'Results', 'Store']
+__all__ = ['COOArray', 'DataArray', 'DataHandle', 'Results', 'SharedDataPlane',
+           'Store']
@@ -12,6 +12,25 @@ from abc import ABCMeta, abstractmethod
 class ConfigStore(metaclass=ABCMeta):
     """A ConfigStore must implement each of the abstract methods defined in this interface
     """
+    def read_signature(self, config_type, config_name=None):
+        """Read a signature which changes whenever configuration is modified, without
+        reading the configuration itself
+
+        Parameters
+        ----------
+        config_type : str
+            One of 'model_run', 'sos_model', 'sector_model' or 'scenario'
+        config_name : str, optional
+            A single item, otherwise all items of the type
+
+        Returns
+        -------
+        tuple or None
+            ``(digest, mtime)``, a hex digest and the time last modified in seconds since
+            the epoch - or None if the store cannot tell cheaply
+        """
+        return None
+
     # region Model runs
     @abstractmethod
     def read_model_runs(self):
@@ -3,11 +3,13 @@
 - model interventions, initial conditions and state
 - conversion coefficients
 - results
+- model run statistics
 """
 from abc import ABCMeta, abstractmethod
 from typing import Dict, List
 
 from smif.data_layer.data_array import DataArray
+from smif.exception import SmifDataMismatchError
 
 
 class DataStore(metaclass=ABCMeta):
@@ -15,7 +17,8 @@ class DataStore(metaclass=ABCMeta):
     """
     # region DataArray
     @abstractmethod
-    def read_scenario_variant_data(self, key, spec, timestep=None) -> DataArray:
+    def read_scenario_variant_data(self, key, spec, timestep=None,
+                                   selection=None) -> DataArray:
         """Read data array
 
         Parameters
@@ -24,6 +27,9 @@ class DataStore(metaclass=ABCMeta):
         spec : ~smif.metadata.spec.Spec
         timestep : int (optional)
             If None, read data for all timesteps
+        selection : dict[str, list] (optional)
+            Map from dimension name to the ids of the elements to read - the data array
+            returned has a correspondingly reduced spec
 
         Returns
         -------
@@ -43,7 +49,7 @@ class DataStore(metaclass=ABCMeta):
         """
 
     @abstractmethod
-    def read_narrative_variant_data(self, key, spec, timestep=None):
+    def read_narrative_variant_data(self, key, spec, timestep=None, selection=None):
         """Read data array
 
         Parameters
@@ -52,6 +58,9 @@ class DataStore(metaclass=ABCMeta):
         spec : ~smif.metadata.spec.Spec
         timestep : int (optional)
             If None, read data for all timesteps
+        selection : dict[str, list] (optional)
+            Map from dimension name to the ids of the elements to read - the data array
+            returned has a correspondingly reduced spec
 
         Returns
         -------
@@ -234,7 +243,7 @@ class DataStore(metaclass=ABCMeta):
     # region Results
     @abstractmethod
     def read_results(self, modelrun_name, model_name, output_spec, timestep=None,
-                     decision_iteration=None) -> DataArray:
+                     decision_iteration=None, selection=None) -> DataArray:
         """Return results of a model from a model_run for a given output at a timestep and
         decision iteration
 
@@ -245,6 +254,8 @@ class DataStore(metaclass=ABCMeta):
         output_spec : ~smif.metadata.spec.Spec
         timestep : int, default=None
         decision_iteration : int, default=None
+        selection : dict[str, list], default=None
+            Map from dimension name to the ids of the elements to read
 
         Returns
         -------
@@ -265,6 +276,48 @@ class DataStore(metaclass=ABCMeta):
         decision_iteration : int, optional
         """
 
+    @abstractmethod
+    def open_results_writer(self, output_spec, modelrun_name, model_name, timestep=None,
+                            decision_iteration=None) -> 'ResultsWriter':
+        """Open a writer to write results in chunks, each a subset of the output coordinates
+
+        Parameters
+        ----------
+        output_spec : ~smif.metadata.spec.Spec
+        modelrun_name : str
+        model_name : str
+        timestep : int, optional
+        decision_iteration : int, optional
+
+        Returns
+        -------
+        ResultsWriter
+        """
+
+    def link_results(self, modelrun_name, to_modelrun_name, model_name, output_spec,
+                     timestep=None, decision_iteration=None):
+        """Make results of one model run available as the same results of another
+
+        Used where a job's inputs are identical in several model runs, so it is run once and
+        its results shared. Stores may link rather than copy, so results should be replaced
+        rather than changed in place once written. By default, results are read and written
+        again.
+
+        Parameters
+        ----------
+        modelrun_name : str
+            Model run with the results
+        to_modelrun_name : str
+            Model run to share them with
+        model_name : str
+        output_spec : ~smif.metadata.spec.Spec
+        timestep : int, optional
+        decision_iteration : int, optional
+        """
+        data = self.read_results(
+            modelrun_name, model_name, output_spec, timestep, decision_iteration)
+        self.write_results(data, to_modelrun_name, model_name, timestep, decision_iteration)
+
     @abstractmethod
     def available_results(self, modelrun_name):
         """List available results from a model run
@@ -275,3 +328,103 @@ class DataStore(metaclass=ABCMeta):
              Each tuple is (timestep, decision_iteration, model_name, output_name)
         """
     # endregion
+
+    # region Model run statistics
+    @abstractmethod
+    def read_model_run_stats(self, modelrun_name, stats_name) -> List[Dict]:
+        """Read statistics recorded while running a model run
+
+        Parameters
+        ----------
+        modelrun_name : str
+        stats_name : str
+            Kind of statistics, for example 'jobs'
+
+        Returns
+        -------
+        list[dict]
+        """
+
+    @abstractmethod
+    def write_model_run_stats(self, stats: List[Dict], modelrun_name: str, stats_name: str):
+        """Write statistics recorded while running a model run, for example time and memory
+        used by each job
+
+        Parameters
+        ----------
+        stats : list[dict]
+        modelrun_name : str
+        stats_name : str
+        """
+    # endregion
+
+
+class ResultsWriter(metaclass=ABCMeta):
+    """Write the results of one output in chunks, so the whole output need never be held in
+    memory at once
+
+    Each chunk is a :class:`~smif.data_layer.data_array.DataArray` whose spec selects a
+    subset of the output coordinates (see :meth:`~smif.metadata.spec.Spec.select`). Results
+    can be read once the writer is closed. Used as a context manager, the writer is closed
+    on success and discarded if an exception is raised::
+
+        with store.open_results_writer(spec, 'modelrun', 'model', 2010) as writer:
+            for chunk in chunks:
+                writer.write(chunk)
+
+    Parameters
+    ----------
+    output_spec : ~smif.metadata.spec.Spec
+    """
+    def __init__(self, output_spec):
+        self.spec = output_spec
+
+    @abstractmethod
+    def write(self, data_array):
+        """Write a chunk of results
+
+        Parameters
+        ----------
+        data_array : ~smif.data_layer.data_array.DataArray
+        """
+
+    @abstractmethod
+    def close(self):
+        """Finish writing, making the results available to read
+        """
+
+    @abstractmethod
+    def discard(self):
+        """Stop writing, leaving no results
+        """
+
+    def _positions(self, data_array):
+        """Positions of a chunk's coordinates in the output coordinates, for each dimension
+
+        Raises
+        ------
+        SmifDataMismatchError
+            If the chunk is not a subset of the output
+        """
+        chunk_spec = data_array.spec
+        if chunk_spec.name != self.spec.name or chunk_spec.dims != self.spec.dims:
+            msg = "Chunk {} does not match output {}"
+            raise SmifDataMismatchError(msg.format(chunk_spec, self.spec))
+
+        positions = []
+        for dim in self.spec.dims:
+            dim_positions = self.spec.dim_coords(dim).positions(chunk_spec.dim_names(dim))
+            if (dim_positions < 0).any():
+                msg = "Chunk of '{}' has coordinates of '{}' which are not in the output"
+                raise SmifDataMismatchError(msg.format(self.spec.name, dim))
+            positions.append(dim_positions)
+        return positions
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.close()
+        else:
+            self.discard()
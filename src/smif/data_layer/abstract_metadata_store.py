@@ -32,6 +32,25 @@ class MetadataStore(metaclass=ABCMeta):
     # endregion
 
     # region Dimensions
+    def read_dimension_signature(self, dimension_name=None, skip_coords=False):
+        """Read a signature which changes whenever dimensions are modified, without reading
+        the dimensions themselves
+
+        Parameters
+        ----------
+        dimension_name : str, optional
+            A single dimension, otherwise all dimensions
+        skip_coords : bool, default False
+            If True, ignore changes to dimension elements
+
+        Returns
+        -------
+        tuple or None
+            ``(digest, mtime)``, a hex digest and the time last modified in seconds since
+            the epoch - or None if the store cannot tell cheaply
+        """
+        return None
+
     @abstractmethod
     def read_dimensions(self, skip_coords=False):
         """Read dimensions
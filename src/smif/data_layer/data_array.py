@@ -1,19 +1,19 @@
 """DataArray provides a thin wrapper around multidimensional arrays and metadata
 """
-from logging import getLogger
+import importlib
+from collections import OrderedDict
+from logging import DEBUG, getLogger
+from threading import Lock
+from typing import TYPE_CHECKING
 
 import numpy as np  # type: ignore
 from smif.exception import (SmifDataError, SmifDataMismatchError,
                             SmifDataNotFoundError)
+from smif.data_layer.sparse_array import COOArray, is_sparse
 from smif.metadata.spec import Spec
 
-# Import pandas, xarray if available (optional dependencies)
-try:
-    import pandas  # type: ignore
-    import xarray  # type: ignore
-except ImportError:
-    pass
-
+if TYPE_CHECKING:
+    import pandas  # type: ignore  # noqa: F401
 
 INSTALL_WARNING = """\
 Please install pandas and xarray to access smif.DataArray
@@ -23,27 +23,56 @@ or:
     conda install pandas xarray
 """
 
+# Positions of the labels of the Arrow dictionary last read for each set of coordinates, by
+# (name, fingerprint), as data read from many files usually has the same labels - the least
+# recently used are dropped beyond _DICTIONARY_POSITIONS_SIZE
+_DICTIONARY_POSITIONS = OrderedDict()  # type: OrderedDict
+_DICTIONARY_POSITIONS_SIZE = 64
+_DICTIONARY_POSITIONS_LOCK = Lock()
+
 
 class DataArray():
     """DataArray provides access to input/parameter/results data, with conversions to common
     python data libraries (for example: numpy, pandas, xarray).
 
+    Data is stored with the numeric or boolean dtype given by the spec, where it can be cast
+    without loss - so a spec with dtype 'float32' or 'int16' keeps its data compact.
+
+    Missing values are described by :attr:`mask`. For float and object data, missing values
+    are NaN or None, and the mask is derived from them. Integer and boolean data cannot hold
+    NaN, so may be given an explicit mask instead of being upcast to float.
+
+    Data which is mostly zero may be given as a sparse
+    :class:`~smif.data_layer.sparse_array.COOArray` (or ``sparse.COO`` or ``scipy.sparse``
+    array). It is held sparse, and stored sparse by the data stores, until :attr:`data` is
+    accessed, which converts it to a dense array.
+
     Attributes
     ----------
     spec: smif.metadata.spec.Spec
     data: numpy.ndarray
+    mask: numpy.ndarray
+        Boolean array, True where values are missing
+    is_sparse: bool
     """
-    def __init__(self, spec: Spec, data: np.ndarray):
+    def __init__(self, spec: Spec, data: np.ndarray, mask: np.ndarray = None):
         self.logger = getLogger(__name__)
 
-        if not hasattr(data, 'shape'):
-            self.logger.debug("Data is not an numpy.ndarray")
-            data = np.array(data)
-
         if not hasattr(spec, 'shape'):
             self.logger.error("spec argument is not a Spec")
             raise TypeError("spec argument is not a Spec")
 
+        self.spec = spec
+        self._mask = None
+        if is_sparse(data):
+            self._set_sparse(data, mask)
+            return
+        self._sparse = None
+
+        if not hasattr(data, 'shape'):
+            self.logger.debug("Data is not an numpy.ndarray")
+            data = np.array(data)
+
         if not data.shape == spec.shape:
             # special case for scalar - allow a single-value 1D array, here coerced to single
             # value 0D array. Then simpler to create from DataFrame or xarray.DataArray
@@ -53,18 +82,90 @@ class DataArray():
                 msg = "Data shape {} does not match spec {}"
                 raise SmifDataMismatchError(msg.format(data.shape, spec.shape))
 
-        self.spec = spec
-        self.data = data
+        if mask is not None:
+            mask = np.asarray(mask, dtype=bool).reshape(data.shape)
+            if not mask.any():
+                mask = None
+
+        self._data = _as_spec_dtype(spec, data)
+        self._mask = mask
+
+    def _set_sparse(self, data, mask):
+        if mask is not None:
+            raise ValueError("Sparse data cannot have missing values")
+        sparse = COOArray.from_sparse(data)
+        if sparse.shape != self.spec.shape:
+            msg = "Data shape {} does not match spec {}"
+            raise SmifDataMismatchError(msg.format(sparse.shape, self.spec.shape))
+        values = _as_spec_dtype(self.spec, sparse.values)
+        if values is not sparse.values:
+            sparse = COOArray(sparse.coords, values, sparse.shape)
+        self._sparse = sparse
+        self._data = None
+
+    @property
+    def data(self):
+        """Data as a :class:`numpy.ndarray` - sparse data is converted to dense on access
+        """
+        if self._data is None:
+            self._data = self._sparse.todense()
+            self._sparse = None
+        return self._data
+
+    @data.setter
+    def data(self, data):
+        self._data = data
+        self._sparse = None
+
+    @property
+    def is_sparse(self):
+        """Whether data is held sparse
+        """
+        return self._sparse is not None
+
+    def as_coo(self):
+        """Access as a :class:`~smif.data_layer.sparse_array.COOArray`, without converting
+        sparse data to dense
+
+        Returns
+        -------
+        smif.data_layer.sparse_array.COOArray
+        """
+        if self._sparse is not None:
+            return self._sparse
+        return COOArray.from_dense(self._data)
+
+    def _dense(self):
+        """Dense data, leaving sparse data sparse
+        """
+        if self._sparse is not None:
+            return self._sparse.todense()
+        return self._data
+
+    @property
+    def mask(self):
+        """Boolean array, True where values are missing
+        """
+        if self._mask is not None:
+            return self._mask
+        if self._sparse is not None:
+            return np.zeros(self.shape, dtype=bool)
+        return _null_mask(self._data)
 
     def __eq__(self, other):
-        return self.spec == other.spec and \
-            _array_equal_nan(self.data, other.data)
+        if not self.spec == other.spec:
+            return False
+        mask = self.mask
+        if not np.array_equal(mask, other.mask):
+            return False
+        return bool(np.all((self._dense() == other._dense()) | mask))
 
     def __repr__(self):
-        return "<DataArray('{}', '{}')>".format(self.spec, self.data)
+        data = self._sparse if self._sparse is not None else self._data
+        return "<DataArray('{}', '{}')>".format(self.spec, data)
 
     def __str__(self):
-        return "<DataArray('{}', '{}')>".format(self.spec, self.data)
+        return self.__repr__()
 
     def as_dict(self):
         """
@@ -124,36 +225,107 @@ class DataArray():
     def shape(self):
         """The shape of the data array
         """
-        return self.data.shape
+        if self._sparse is not None:
+            return self._sparse.shape
+        return self._data.shape
+
+    def select(self, selection):
+        """Select a subset of the coordinates of some dimensions
+
+        Parameters
+        ----------
+        selection : dict[str, list]
+            Map from dimension name to the ids of the elements to select, in order
+
+        Returns
+        -------
+        DataArray
+            With a correspondingly reduced spec
+        """
+        spec = self.spec.select(selection)
+        positions = {
+            dim: self.spec.dim_coords(dim).positions(ids) for dim, ids in selection.items()
+        }
+
+        if self._sparse is not None:
+            coo = self._sparse
+            keep = np.ones(coo.nnz, dtype=bool)
+            coords = coo.coords.copy()
+            for axis, dim in enumerate(self.dims):
+                if dim in positions:
+                    lookup = np.full(coo.shape[axis], -1, dtype='int64')
+                    lookup[positions[dim]] = np.arange(len(positions[dim]))
+                    coords[axis] = lookup[coords[axis]]
+                    keep &= coords[axis] >= 0
+            return DataArray(spec, COOArray(coords[:, keep], coo.values[keep], spec.shape))
+
+        data, mask = self._data, self._mask
+        for axis, dim in enumerate(self.dims):
+            if dim in positions:
+                data = np.take(data, positions[dim], axis=axis)
+                if mask is not None:
+                    mask = np.take(mask, positions[dim], axis=axis)
+        return DataArray(spec, data, mask)
 
     def as_ndarray(self) -> np.ndarray:
         """Access as a :class:`numpy.ndarray`
+
+        Missing values in integer or boolean data are not marked in the array - check
+        :attr:`mask`.
         """
         return self.data
 
-    def as_df(self) -> pandas.DataFrame:
+    def as_filled(self) -> np.ndarray:
+        """Access as a :class:`numpy.ndarray` with missing values as NaN (or None)
+
+        Integer and boolean data with missing values is converted to float (or object).
+        """
+        if self._mask is None:
+            return self.data
+        if self.data.dtype.kind == 'b':
+            filled = self.data.astype(object)
+            filled[self._mask] = None
+        else:
+            filled = self.data.astype(np.result_type(self.data.dtype, np.float64))
+            filled[self._mask] = np.nan
+        return filled
+
+    def as_df(self) -> 'pandas.DataFrame':
         """Access DataArray as a :class:`pandas.DataFrame`
         """
+        pandas = _import_optional('pandas')
         dims = self.dims
         coords = [c.ids for c in self.coords]
-
-        try:
-            if dims and coords:
-                index = pandas.MultiIndex.from_product(coords, names=dims)
-                return pandas.DataFrame(
-                    {self.name: np.reshape(self.data, self.data.size)}, index=index)
-            else:
-                # with no dims or coords, should be in the zero-dimensional case
-                if self.data.shape != ():
-                    msg = "Expected zero-dimensional data, got %s" % self.data.shape
-                    raise SmifDataMismatchError(msg)
-                return pandas.DataFrame([{self.name: self.data[()]}])
-        except NameError as ex:
-            raise SmifDataError(INSTALL_WARNING) from ex
+        data = self._dense()
+
+        values = np.reshape(data, data.size)
+        if self._mask is not None:
+            # nullable integer or boolean
+            values = pandas.array(values)
+            values[np.reshape(self._mask, data.size)] = None
+
+        if dims and coords:
+            index = pandas.MultiIndex.from_product(coords, names=dims)
+            return pandas.DataFrame({self.name: values}, index=index)
+        else:
+            # with no dims or coords, should be in the zero-dimensional case
+            if data.shape != ():
+                msg = "Expected zero-dimensional data, got %s" % data.shape
+                raise SmifDataMismatchError(msg)
+            return pandas.DataFrame([{self.name: data[()]}])
 
     @classmethod
-    def from_df(cls, spec, dataframe):
+    def from_df(cls, spec, dataframe, sparse=False):
         """Create a DataArray from a :class:`pandas.DataFrame`
+
+        Parameters
+        ----------
+        spec : smif.metadata.spec.Spec
+        dataframe : pandas.DataFrame
+            With a data column named for the spec, indexed by the spec dims
+        sparse : bool, default=False
+            Create a sparse DataArray, with any cells not in `dataframe` set to zero,
+            rather than missing
         """
         name = spec.name
         dims = spec.dims
@@ -178,6 +350,17 @@ class DataArray():
                 data_columns=data_columns,
                 index_names=index_names))
 
+        if dims and sparse:
+            flat_positions = _df_positions(spec, dataframe)
+            coords = np.array(np.unravel_index(flat_positions, spec.shape), dtype='int64')
+            values = dataframe[spec.name].to_numpy()
+            return cls(spec, COOArray(coords, values, spec.shape))
+
+        if dims:
+            # place values by coordinate position, without building an intermediate
+            # xarray.Dataset over the full product of index values
+            return cls._from_filled(spec, *_fill_from_df(spec, dataframe))
+
         try:
             # convert to dataset
             xr_dataset = dataframe.to_xarray()
@@ -199,6 +382,52 @@ class DataArray():
 
         return cls(spec, xr_data_array.data)
 
+    @classmethod
+    def from_arrow(cls, spec, table, sparse=False, subset_dims=()):
+        """Create a DataArray from a :class:`pyarrow.Table`
+
+        Faster than :meth:`from_df` for data read from Arrow or Parquet, as no DataFrame
+        index is built: the labels of dictionary-encoded (categorical) dimension columns are
+        looked up once each, however many rows refer to them.
+
+        Parameters
+        ----------
+        spec : smif.metadata.spec.Spec
+            With at least one dimension
+        table : pyarrow.Table
+            With a column for each of the spec dims and a data column named for the spec
+        sparse : bool, default=False
+            Create a sparse DataArray, with any cells not in `table` set to zero, rather
+            than missing
+        subset_dims : list, optional
+            Dimensions along which the spec may hold a subset of the labels in `table` - rows
+            with other labels are dropped, rather than reported as unexpected
+        """
+        columns = table.column_names
+        if spec.name not in columns or not set(spec.dims).issubset(columns):
+            msg = "Data for '{name}' expected a data column called '{name}' and dimension " + \
+                  "columns {dims}, instead got columns {columns}"
+            raise SmifDataMismatchError(msg.format(
+                name=spec.name, dims=spec.dims, columns=columns))
+
+        positions = [
+            _arrow_positions(spec, dim, table.column(dim), dim in subset_dims)
+            for dim in spec.dims
+        ]
+        column = table.column(spec.name).to_pandas()
+        if subset_dims:
+            keep = np.logical_and.reduce([dim_positions >= 0 for dim_positions in positions])
+            if not keep.all():
+                positions = [dim_positions[keep] for dim_positions in positions]
+                column = column[keep]
+
+        flat_positions = np.ravel_multi_index(tuple(positions), spec.shape)
+        _check_unique(spec, flat_positions, positions)
+        if sparse:
+            coords = np.array(positions, dtype='int64').reshape((len(spec.dims), -1))
+            return cls(spec, COOArray(coords, column.to_numpy(), spec.shape))
+        return cls._from_filled(spec, *_fill(spec, flat_positions, column))
+
     def as_xarray(self):
         """Access DataArray as a :class:`xarray.DataArray`
         """
@@ -209,16 +438,14 @@ class DataArray():
         dims = self.dims
         coords = {c.name: c.ids for c in self.coords}
 
-        try:
-            return xarray.DataArray(
-                self.data,
-                coords=coords,
-                dims=dims,
-                name=self.name,
-                attrs=metadata
-            )
-        except NameError as ex:
-            raise SmifDataError(INSTALL_WARNING) from ex
+        xarray = _import_optional('xarray')
+        return xarray.DataArray(
+            self.as_filled(),
+            coords=coords,
+            dims=dims,
+            name=self.name,
+            attrs=metadata
+        )
 
     @classmethod
     def from_xarray(cls, spec, xr_data_array):
@@ -226,32 +453,65 @@ class DataArray():
         """
         # reindex to ensure data order and fill out NaNs
         xr_data_array = _reindex_xr_data_array(spec, xr_data_array)
-        return cls(spec, xr_data_array.data)
+        return cls._from_filled(spec, xr_data_array.data, _null_mask(xr_data_array.data))
+
+    @classmethod
+    def _from_filled(cls, spec, data, missing):
+        """Create from data and a mask of missing values
+
+        Where the spec has an integer or boolean dtype, the mask is kept, rather than
+        upcasting data to float to hold NaN. Otherwise missing values are set to NaN.
+        """
+        if not missing.any():
+            return cls(spec, data)
+
+        dtype = _numeric_dtype(spec.dtype)
+        if dtype is not None and dtype.kind in 'biu':
+            if data.dtype.kind in 'biu':
+                return cls(spec, data, missing)
+            # values may have been read as float, to hold NaN
+            present = data[~missing]
+            try:
+                converted = present.astype(dtype)
+            except (TypeError, ValueError):
+                converted = None
+            if converted is not None and np.array_equal(converted, present):
+                filled = np.zeros(data.shape, dtype=dtype)
+                filled[~missing] = converted
+                return cls(spec, filled, missing)
+
+        if data.dtype.kind in 'biu':
+            data = data.astype(np.float64)
+        data[missing] = np.nan
+        return cls(spec, data)
 
     def update(self, other):
         """Update data values with any from other which are non-null
         """
         assert self.spec == other.spec, "Specs must match when updating DataArray"
-        # convert self and other to xarray representation
-        self_xr = self.as_xarray()
-        other_xr = other.as_xarray()
-        # use xarray.combine_first convenience function
-        overridden = other_xr.combine_first(self_xr)
-        # assign result back to self
-        self.data = overridden.data
+        other_mask = other.mask
+        data = np.where(other_mask, self.data, other.data)
+        mask = self._mask
+        if mask is not None:
+            mask = mask & other_mask
+        self.data = _as_spec_dtype(self.spec, data)
+        self._mask = mask if mask is not None and mask.any() else None
 
     def validate_as_full(self):
-        """Check that the data array contains no NaN values
+        """Check that the data array contains no missing values
         """
-        dataframe = self.as_df()
-        if np.any(dataframe.isnull()):
-            expected_len = len(dataframe)
-            missing_data = show_null(dataframe)
-            actual_len = expected_len - len(missing_data)
+        if self._sparse is not None:
+            # cells of sparse data which are not stored are zero, not missing
+            return
+        mask = self.mask
+        if mask.any():
+            expected_len = mask.size
+            actual_len = expected_len - int(mask.sum())
+            if self.logger.isEnabledFor(DEBUG):
+                self.logger.debug("Missing data:\n\n    %s", show_null(self.as_df()))
             dim_lens = "{" + ", ".join(
                 "{}: {}".format(dim, len_) for dim, len_ in zip(self.dims, self.shape)
             ) + "}"
-            self.logger.debug("Missing data:\n\n    %s", missing_data)
             msg = "Data for '{name}' had missing values - read {actual_len} but expected " + \
                   "{expected_len} in total, from dims of length {dim_lens}"
             raise SmifDataMismatchError(msg.format(
@@ -261,18 +521,14 @@ class DataArray():
                 dim_lens=dim_lens))
 
 
-def show_null(dataframe) -> pandas.DataFrame:
+def show_null(dataframe) -> 'pandas.DataFrame':
     """Shows missing data
 
     Returns
     -------
     pandas.DataFrame
     """
-    try:
-        missing_data = dataframe[dataframe.isnull().values]
-    except NameError as ex:
-        raise SmifDataError(INSTALL_WARNING) from ex
-    return missing_data
+    return dataframe[dataframe.isnull().values]
 
 
 def find_duplicate_indices(dataframe):
@@ -289,13 +545,200 @@ def find_duplicate_indices(dataframe):
     return dups_index_df.to_dict('records')
 
 
-def _array_equal_nan(a, b):
-    """Compare numpy arrays for equality, allowing NaN to be considerd equal to itself
+def _df_positions(spec, dataframe):
+    """Flat position in an array of the spec's shape of each row of a DataFrame indexed by
+    the spec's dims
+
+    Index values are looked up in each dimension's
+    :attr:`~smif.metadata.coordinates.Coordinates.index`.
+    """
+    index = dataframe.index
+    if hasattr(index, 'remove_unused_levels'):
+        # MultiIndex levels may hold values which no longer appear in the data
+        index = index.remove_unused_levels()
+        levels = [(index.levels[i], index.codes[i]) for i in range(index.nlevels)]
+    else:
+        codes, uniques = index.factorize()
+        levels = [(uniques, codes)]
+
+    positions = {}
+    for dim, (uniques, codes) in zip(index.names, levels):
+        level_positions = spec.dim_coords(dim).positions(uniques)
+        extras = [value for value, position in zip(uniques, level_positions) if position < 0]
+        if extras or (codes < 0).any():
+            msg = "Data for '{name}' contained unexpected values in the set of " + \
+                  "coordinates for dimension '{dim}': {extras}"
+            raise SmifDataMismatchError(msg.format(
+                dim=dim, extras=extras or [np.nan], name=spec.name))
+        positions[dim] = level_positions[codes]
+
+    flat_positions = np.ravel_multi_index(
+        tuple(positions[dim] for dim in spec.dims), spec.shape)
+    if _has_duplicates(spec, flat_positions):
+        dups = find_duplicate_indices(dataframe)
+        msg = "Data for '{name}' contains duplicate values at {dups}"
+        raise SmifDataMismatchError(msg.format(name=spec.name, dups=dups))
+    return flat_positions
+
+
+def _arrow_positions(spec, dim, column, subset=False):
+    """Position along a dimension of each label in a :class:`pyarrow.ChunkedArray`
+
+    Labels are dictionary-encoded, if not already, so each distinct label is looked up once.
+    Unexpected labels are reported, unless `subset` is True, in which case their position
+    is -1.
+    """
+    coords = spec.dim_coords(dim)
+    chunk_positions = []
+    for chunk in column.chunks:
+        if not hasattr(chunk, 'dictionary'):
+            chunk = chunk.dictionary_encode()
+        label_positions = _dictionary_positions(coords, chunk.dictionary)
+        indices = chunk.indices
+        if indices.null_count:
+            indices = indices.fill_null(0)
+        indices = indices.to_numpy(zero_copy_only=False)
+        positions = label_positions[indices]
+        # the dictionary may hold labels which no row refers to, so check only those used
+        unexpected = positions < 0
+        if (unexpected.any() and not subset) or chunk.null_count:
+            labels = chunk.dictionary.to_pylist()
+            extras = [labels[index] for index in np.unique(indices[unexpected])]
+            msg = "Data for '{name}' contained unexpected values in the set of " + \
+                  "coordinates for dimension '{dim}': {extras}"
+            raise SmifDataMismatchError(msg.format(
+                dim=dim, extras=extras or [np.nan], name=spec.name))
+        chunk_positions.append(positions)
+    if not chunk_positions:
+        return np.zeros(0, dtype='int64')
+    return np.concatenate(chunk_positions)
+
+
+def _dictionary_positions(coords, dictionary):
+    """Positions of the labels of an Arrow dictionary in a set of Coordinates
+    """
+    key = (coords.name, coords.fingerprint)
+    with _DICTIONARY_POSITIONS_LOCK:
+        cached = _DICTIONARY_POSITIONS.get(key)
+        if cached is not None:
+            _DICTIONARY_POSITIONS.move_to_end(key)
+    if cached is not None and cached[0].equals(dictionary):
+        return cached[1]
+
+    positions = coords.positions(dictionary.to_pylist())
+    with _DICTIONARY_POSITIONS_LOCK:
+        _DICTIONARY_POSITIONS[key] = (dictionary, positions)
+        while len(_DICTIONARY_POSITIONS) > _DICTIONARY_POSITIONS_SIZE:
+            _DICTIONARY_POSITIONS.popitem(last=False)
+    return positions
+
+
+def _has_duplicates(spec, flat_positions):
+    """Check whether any flat position is repeated
+    """
+    size = int(np.prod(spec.shape))
+    return len(flat_positions) > size or \
+        bool(len(flat_positions) and np.bincount(flat_positions, minlength=size).max() > 1)
+
+
+def _check_unique(spec, flat_positions, positions):
+    """Raise if any position is repeated, listing the repeated coordinates
+    """
+    if not _has_duplicates(spec, flat_positions):
+        return
+    _, first, counts = np.unique(flat_positions, return_index=True, return_counts=True)
+    dups = [
+        {dim: spec.dim_names(dim)[positions[axis][row]] for axis, dim in enumerate(spec.dims)}
+        for row in first[counts > 1]
+    ]
+    msg = "Data for '{name}' contains duplicate values at {dups}"
+    raise SmifDataMismatchError(msg.format(name=spec.name, dups=dups))
+
+
+def _fill_from_df(spec, dataframe):
+    """Fill an array of the spec's shape from a DataFrame indexed by the spec's dims
+
+    Returns
+    -------
+    tuple(numpy.ndarray, numpy.ndarray)
+        Data, and a mask of missing values
     """
-    if np.issubdtype(a.dtype, np.number) and np.issubdtype(b.dtype, np.number):
-        return np.all((a == b) | (np.isnan(a) & np.isnan(b)))
+    return _fill(spec, _df_positions(spec, dataframe), dataframe[spec.name])
+
+
+def _fill(spec, flat_positions, column):
+    """Fill an array of the spec's shape with the values of a :class:`pandas.Series`,
+    placed at flat positions
+
+    Returns
+    -------
+    tuple(numpy.ndarray, numpy.ndarray)
+        Data, and a mask of missing values
+    """
+    size = int(np.prod(spec.shape))
+    if hasattr(column.dtype, 'numpy_dtype'):
+        # nullable integer or boolean column
+        numpy_dtype = column.dtype.numpy_dtype
+        values = column.to_numpy(dtype=numpy_dtype, na_value=numpy_dtype.type(0))
+    else:
+        values = column.to_numpy()
+
+    missing = np.ones(size, dtype=bool)
+    missing[flat_positions] = column.isna().to_numpy()
+    if values.dtype.kind in 'biuf':
+        data = np.zeros(size, dtype=values.dtype)
     else:
-        return np.all(a == b)
+        data = np.full(size, np.nan, dtype=object)
+    data[flat_positions] = values
+    return data.reshape(spec.shape), missing.reshape(spec.shape)
+
+
+def _import_optional(name):
+    """Import pandas or xarray on first use - they are optional, and slow to import
+    """
+    try:
+        return importlib.import_module(name)
+    except ImportError as ex:
+        raise SmifDataError(INSTALL_WARNING) from ex
+
+
+def _null_mask(data):
+    """Boolean array, True where data is NaN or None
+    """
+    if data.dtype.kind in 'fc':
+        return np.isnan(data)
+    if data.dtype.kind == 'O':
+        return np.frompyfunc(lambda value: value is None or value != value, 1, 1)(data) \
+            .astype(bool)
+    return np.zeros(data.shape, dtype=bool)
+
+
+def _numeric_dtype(dtype):
+    """Spec dtype as a numeric or boolean :class:`numpy.dtype`, or None for other dtypes
+    """
+    try:
+        dtype = np.dtype(dtype)
+    except TypeError:
+        return None
+    return dtype if dtype.kind in 'biuf' else None
+
+
+def _as_spec_dtype(spec, data):
+    """Cast data to the spec dtype, where that can be done without loss
+
+    Floats may be cast to a smaller float type, and integers to a smaller integer type if
+    every value is in range. Other data is left as it is.
+    """
+    dtype = _numeric_dtype(spec.dtype)
+    if dtype is None or data.dtype == dtype \
+            or not np.can_cast(data.dtype, dtype, casting='same_kind'):
+        return data
+    if dtype.kind in 'iu' and data.dtype.kind in 'iu' and data.size:
+        info = np.iinfo(dtype)
+        if data.min() < info.min or data.max() > info.max:
+            msg = "Data for '{}' has values outside the range of dtype {}"
+            raise SmifDataMismatchError(msg.format(spec.name, dtype))
+    return data.astype(dtype)
 
 
 def _reindex_xr_data_array(spec, xr_data_array):
@@ -15,7 +15,7 @@ import numpy as np  # type: ignore
 
 from smif.data_layer.data_array import DataArray
 from smif.data_layer.store import Store
-from smif.exception import SmifDataError
+from smif.exception import SmifDataError, SmifDataMismatchError
 from smif.metadata import RelativeTimestep
 
 
@@ -267,7 +267,7 @@ class DataHandle(object):
 
         return current_interventions
 
-    def get_data(self, input_name: str, timestep=None) -> DataArray:
+    def get_data(self, input_name: str, timestep=None, selection=None) -> DataArray:
         """Get data required for model inputs
 
         Parameters
@@ -275,6 +275,10 @@ class DataHandle(object):
         input_name : str
         timestep : RelativeTimestep or int, optional
             defaults to RelativeTimestep.CURRENT
+        selection : dict[str, list], optional
+            Map from dimension name to the ids of the elements to read, for example
+            ``{'lad': ['E06000001', 'E06000002']}`` - if given, only that subset of the data
+            is read, and returned with a correspondingly reduced spec
 
         Returns
         -------
@@ -301,13 +305,45 @@ class DataHandle(object):
             timestep)
 
         if dep['type'] == 'scenario':
-            data = self._get_scenario(dep, timestep, input_name)
+            data = self._get_scenario(dep, timestep, input_name, selection)
         else:
             input_spec = self._inputs[input_name]
-            data = self._get_result(dep, timestep, input_spec)
+            data = self._get_result(dep, timestep, input_spec, selection)
 
         return data
 
+    def iter_data(self, input_name: str, chunk_dim: str, chunk_size: int, timestep=None):
+        """Get data required for model inputs in chunks along one dimension, so the whole
+        input need never be held in memory at once
+
+        Parameters
+        ----------
+        input_name : str
+        chunk_dim : str
+            Dimension of the input to split into chunks
+        chunk_size : int
+            Number of elements of `chunk_dim` in each chunk (the last may have fewer)
+        timestep : RelativeTimestep or int, optional
+            defaults to RelativeTimestep.CURRENT
+
+        Returns
+        -------
+        iterator of smif.data_layer.data_array.DataArray
+            Chunks in the order of the `chunk_dim` coordinates, each with a spec which
+            selects that chunk's elements
+        """
+        if input_name not in self._inputs:
+            raise KeyError(
+                "'{}' not recognised as input for '{}'".format(input_name, self._model_name))
+        if chunk_size < 1:
+            raise ValueError("Chunk size must be at least 1, got {}".format(chunk_size))
+
+        ids = self._inputs[input_name].dim_names(chunk_dim)
+        return (
+            self.get_data(input_name, timestep, {chunk_dim: ids[start:start + chunk_size]})
+            for start in range(0, len(ids), chunk_size)
+        )
+
     def _resolve_timestep(self, timestep):
         """Resolves a relative timestep to an absolute timestep
 
@@ -336,7 +372,7 @@ class DataHandle(object):
                 assert isinstance(timestep, int) and timestep <= self._current_timestep
         return timestep
 
-    def _get_result(self, dep, timestep, input_spec) -> DataArray:
+    def _get_result(self, dep, timestep, input_spec, selection=None) -> DataArray:
         """Retrieves a model result for a dependency
         """
         output_spec = copy(input_spec)
@@ -349,7 +385,8 @@ class DataHandle(object):
                 dep['source_model_name'],  # read from source model
                 output_spec,  # using source model output spec
                 timestep,
-                self._decision_iteration
+                self._decision_iteration,
+                selection=selection
             )
             data.name = input_spec.name  # ensure name matches input (as caller expects)
         except SmifDataError as ex:
@@ -362,7 +399,7 @@ class DataHandle(object):
             )) from ex
         return data
 
-    def _get_scenario(self, dep, timestep, input_name) -> DataArray:
+    def _get_scenario(self, dep, timestep, input_name, selection=None) -> DataArray:
         """Retrieves data from a scenario
 
         Arguments
@@ -370,6 +407,7 @@ class DataHandle(object):
         dep : dict
             A scenario dependency
         timestep : int
+        selection : dict, optional
 
         Returns
         -------
@@ -380,7 +418,8 @@ class DataHandle(object):
                 dep['source_model_name'],  # read from a given scenario model
                 dep['variant'],  # with given scenario variant
                 dep['source_output_name'],  # using output (variable) name
-                timestep
+                timestep,
+                selection=selection
             )
             data.name = input_name  # ensure name matches input (as caller expects)
         except SmifDataError as ex:
@@ -493,7 +532,9 @@ class DataHandle(object):
         Parameters
         ----------
         output_name : str
-        data : numpy.ndarray
+        data : numpy.ndarray or smif.data_layer.sparse_array.COOArray
+            Mostly-zero outputs may be passed as a sparse array (or a ``sparse.COO`` or
+            ``scipy.sparse`` array), which is stored sparse
         """
         if hasattr(data, 'as_ndarray'):
             raise TypeError("Pass in a numpy array")
@@ -517,6 +558,48 @@ class DataHandle(object):
             self._decision_iteration
         )
 
+    def open_results_writer(self, output_name, chunk_dim):
+        """Open a writer to set results values for a model output in chunks along one
+        dimension, so the whole output need never be held in memory at once
+
+        Use as a context manager - results are saved once all chunks are written::
+
+            with data_handle.open_results_writer('heat_demand', 'building') as writer:
+                for block in blocks:
+                    writer.write(block)
+
+        Parameters
+        ----------
+        output_name : str
+        chunk_dim : str
+            Dimension of the output along which chunks are written, in order
+
+        Returns
+        -------
+        ChunkedResultsWriter
+        """
+        if output_name not in self._outputs:
+            raise KeyError(
+                "'{}' not recognised as output for '{}'".format(output_name, self._model_name))
+
+        spec = self._outputs[output_name]
+        if chunk_dim not in spec.dims:
+            raise KeyError(
+                "'{}' not recognised as a dimension of '{}'".format(chunk_dim, output_name))
+
+        self.logger.debug(
+            "Write %s %s %s in chunks along %s", self._model_name, output_name,
+            self._current_timestep, chunk_dim)
+
+        writer = self._store.open_results_writer(
+            spec,
+            self._modelrun_name,
+            self._model_name,
+            self._current_timestep,
+            self._decision_iteration
+        )
+        return ChunkedResultsWriter(writer, chunk_dim)
+
     def get_results(self, output_name, decision_iteration=None,
                     timestep=None):
         """Get results values for model outputs
@@ -619,6 +702,80 @@ class DataHandle(object):
         return data
 
 
+class ChunkedResultsWriter(object):
+    """Write a model output in consecutive chunks along one dimension
+
+    Created by :meth:`DataHandle.open_results_writer`.
+
+    Parameters
+    ----------
+    writer : ~smif.data_layer.abstract_data_store.ResultsWriter
+    chunk_dim : str
+    """
+    def __init__(self, writer, chunk_dim):
+        self._writer = writer
+        self.spec = writer.spec
+        self.chunk_dim = chunk_dim
+        self._axis = self.spec.dims.index(chunk_dim)
+        self._ids = self.spec.dim_names(chunk_dim)
+        self._written = 0
+
+    def write(self, data):
+        """Write the next chunk of results
+
+        Parameters
+        ----------
+        data : numpy.ndarray or smif.data_layer.sparse_array.COOArray
+            With the shape of the output, except along the chunk dimension, where it holds
+            the elements following those already written
+        """
+        if hasattr(data, 'as_ndarray'):
+            raise TypeError("Pass in a numpy array")
+
+        length = data.shape[self._axis]
+        if not length:
+            return
+        ids = self._ids[self._written:self._written + length]
+        if len(ids) < length:
+            msg = "Chunk of '{}' runs past the end of '{}', which has {} elements"
+            raise SmifDataMismatchError(
+                msg.format(self.spec.name, self.chunk_dim, len(self._ids)))
+
+        spec = self.spec.select({self.chunk_dim: ids})
+        self._writer.write(DataArray(spec, data))
+        self._written += length
+
+    def close(self):
+        """Finish writing, saving the results
+
+        Raises
+        ------
+        SmifDataMismatchError
+            If fewer elements were written than the output has along the chunk dimension,
+            in which case no results are saved
+        """
+        if self._written < len(self._ids):
+            self._writer.discard()
+            msg = "Wrote {} of {} elements of '{}' along '{}'"
+            raise SmifDataMismatchError(msg.format(
+                self._written, len(self._ids), self.spec.name, self.chunk_dim))
+        self._writer.close()
+
+    def discard(self):
+        """Stop writing, leaving no results
+        """
+        self._writer.discard()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.close()
+        else:
+            self.discard()
+
+
 class ResultsHandle(object):
     """Results access for decision modules
     """
@@ -1230,7 +1230,8 @@ class DbDataStore(DataStore):
     """Database backend for data store
     """
     # region Scenario Variant Data
-    def read_scenario_variant_data(self, scenario_name, variant_name, variable, timestep=None):
+    def read_scenario_variant_data(self, scenario_name, variant_name, variable, timestep=None,
+                                   selection=None):
         raise NotImplementedError()
 
     def write_scenario_variant_data(self, scenario_name, variant_name,
@@ -1240,7 +1241,7 @@ class DbDataStore(DataStore):
 
     # region Narrative Data
     def read_narrative_variant_data(self, narrative_name, variant_name, variable,
-                                    timestep=None):
+                                    timestep=None, selection=None):
         raise NotImplementedError()
 
     def write_narrative_variant_data(self, narrative_name, variant_name, data_array,
@@ -1280,13 +1281,25 @@ class DbDataStore(DataStore):
 
     # region Results
     def read_results(self, modelrun_name, model_name, output_spec, timestep=None,
-                     decision_iteration=None):
+                     decision_iteration=None, selection=None):
         raise NotImplementedError()
 
     def write_results(self, data_array, modelrun_name, model_name, timestep=None,
                       decision_iteration=None):
         raise NotImplementedError()
 
+    def open_results_writer(self, output_spec, modelrun_name, model_name, timestep=None,
+                            decision_iteration=None):
+        raise NotImplementedError()
+
     def prepare_warm_start(self, modelrun_id):
         raise NotImplementedError()
     # endregion
+
+    # region Model run statistics
+    def read_model_run_stats(self, modelrun_name, stats_name):
+        raise NotImplementedError()
+
+    def write_model_run_stats(self, stats, modelrun_name, stats_name):
+        raise NotImplementedError()
+    # endregion
@@ -0,0 +1,188 @@
+"""Persistent cache of parsed dimension elements
+
+Reading a large spatial dimension through GDAL, feature by feature, or re-parsing the
+intervals of a temporal dimension is slow, and would otherwise happen in every new process.
+:class:`DimensionCache` saves parsed elements to Arrow IPC files under
+``<project>/.smif/dimensions``, named by a hash of the source file contents, so they are
+re-parsed only when the source changes.
+
+Spatial elements are stored as columns of names, ids and properties (as JSON) and
+geometries (as WKB), and read back as :class:`~smif.metadata.geometry.RegionElements`
+without decoding any geometry. Other elements are stored as an Arrow table of records.
+
+Elements are only cached if they read back exactly as parsed - records which do not all have
+the same keys, or values which Arrow would convert to another type, are parsed every time.
+"""
+import gc
+import hashlib
+import json
+import os
+from contextlib import contextmanager
+from logging import getLogger
+
+from smif.metadata.geometry import RegionElements
+
+CACHE_FORMAT = 2
+
+# Other files which make up a shapefile, and so contribute to its hash
+SHAPEFILE_PARTS = ('.shp', '.shx', '.dbf', '.prj', '.cpg')
+
+LOGGER = getLogger(__name__)
+
+
+class DimensionCache(object):
+    """On-disk cache of parsed dimension elements, keyed by source file hash
+
+    Parameters
+    ----------
+    folder : str
+        Folder for cache files, created if needed
+    """
+    def __init__(self, folder):
+        self.folder = str(folder)
+
+    def read(self, source_path, parse):
+        """Read elements parsed from a dimension file, calling `parse(source_path)` only if
+        the file has not been parsed before
+
+        Parameters
+        ----------
+        source_path : str
+        parse : function
+            Function which reads and parses the file at `source_path`
+
+        Returns
+        -------
+        list[dict]
+        """
+        path = self.cache_path(source_path)
+        try:
+            with _gc_paused():
+                return _read_elements(path)
+        except FileNotFoundError:
+            pass
+        except Exception as ex:  # a corrupt cache file is replaced
+            LOGGER.warning("Ignoring unreadable dimension cache file %s: %s", path, ex)
+
+        elements = parse(source_path)
+        self.write(path, elements)
+        return elements
+
+    def write(self, path, elements):
+        """Write parsed elements to a cache file
+
+        Elements which cannot be represented in Arrow, or a failure to write, are logged
+        and not cached.
+        """
+        try:
+            table = _elements_to_table(elements)
+        except (ImportError, _NotCacheable) as ex:
+            LOGGER.debug("Not caching dimension elements: %s", ex)
+            return
+        except Exception as ex:
+            LOGGER.warning("Could not cache dimension elements to %s: %s", path, ex)
+            return
+
+        from pyarrow import feather  # type: ignore
+        tmp_path = '{}.{}.tmp'.format(path, os.getpid())
+        try:
+            os.makedirs(self.folder, exist_ok=True)
+            feather.write_feather(table, tmp_path, compression='uncompressed')
+            os.replace(tmp_path, path)
+        except OSError as ex:
+            LOGGER.warning("Could not cache dimension elements to %s: %s", path, ex)
+
+    def cache_path(self, source_path):
+        """Path of the cache file for a dimension file
+        """
+        filename = '{}.v{}.arrow'.format(_source_hash(source_path), CACHE_FORMAT)
+        return os.path.join(self.folder, filename)
+
+
+def _source_hash(source_path):
+    """Hash the contents of a dimension file, including all parts of a shapefile
+    """
+    basename, ext = os.path.splitext(source_path)
+    if ext == '.shp':
+        paths = [basename + part for part in SHAPEFILE_PARTS]
+        paths = [path for path in paths if os.path.exists(path)]
+    else:
+        paths = [source_path]
+
+    digest = hashlib.sha256()
+    for path in paths:
+        digest.update(os.path.splitext(path)[1].encode('utf-8'))
+        with open(path, 'rb') as file_handle:
+            for block in iter(lambda: file_handle.read(1024 * 1024), b''):
+                digest.update(block)
+    return digest.hexdigest()
+
+
+class _NotCacheable(Exception):
+    """Elements would not read back from the cache as parsed
+    """
+
+
+def _elements_to_table(elements):
+    """Elements as an Arrow table, checked to read back as they are
+
+    Raises
+    ------
+    _NotCacheable
+        If the elements would read back with different keys or types
+    """
+    import pyarrow  # type: ignore
+
+    if elements and not isinstance(elements, RegionElements) and 'feature' in elements[0]:
+        elements = RegionElements.from_features(elements)
+
+    if isinstance(elements, RegionElements):
+        table = pyarrow.table({
+            'name': elements.names,
+            'id': [json.dumps(id_) for id_ in elements.ids],
+            'properties': [json.dumps(elements.properties(i)) for i in range(len(elements))],
+            'geometry': pyarrow.array(elements.wkb(), pyarrow.binary())
+        }, metadata={'smif_elements': 'spatial'})
+        cached = _table_to_elements(table)
+        # compare by repr, which differs where values are equal but of different types
+        same = repr((cached.names, cached.ids)) == repr((elements.names, elements.ids))
+    else:
+        elements = list(elements)
+        table = pyarrow.Table.from_pylist(elements, metadata={'smif_elements': 'records'})
+        same = repr(_table_to_elements(table)) == repr(elements)
+
+    if not same:
+        raise _NotCacheable("elements would not read back from Arrow as parsed")
+    return table
+
+
+def _read_elements(path):
+    from pyarrow import feather  # type: ignore
+
+    return _table_to_elements(feather.read_table(path, memory_map=True))
+
+
+def _table_to_elements(table):
+    kind = table.schema.metadata[b'smif_elements']
+    if kind == b'records':
+        return table.to_pylist()
+    return RegionElements(
+        names=table.column('name').to_pylist(),
+        ids=[json.loads(id_) for id_ in table.column('id').to_pylist()],
+        properties=table.column('properties').to_pylist(),
+        wkb=table.column('geometry').to_pylist()
+    )
+
+
+@contextmanager
+def _gc_paused():
+    """Pause cyclic garbage collection, which otherwise runs repeatedly while building
+    the many lists and dicts which make up a large set of elements
+    """
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        yield
+    finally:
+        if enabled:
+            gc.enable()
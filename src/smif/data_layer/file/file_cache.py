@@ -0,0 +1,151 @@
+"""In-memory cache of parsed files, validated against each file's modification time
+"""
+import copy
+import hashlib
+import os
+
+# Folder, relative to a project folder, for files which can be regenerated from the project
+PROJECT_CACHE_FOLDER = '.smif'
+
+
+class ParsedFileCache(object):
+    """Parsed file contents, keyed by path
+
+    A cached entry is only used while the file's signature (modification time, size and
+    inode) is unchanged, so edits made outside smif are picked up on the next read.
+
+    Parameters
+    ----------
+    copy_on_read : bool, default=True
+        Return a deep copy of cached data, so callers are free to modify it
+    """
+    def __init__(self, copy_on_read=True):
+        self.copy_on_read = copy_on_read
+        self.hits = 0
+        self.misses = 0
+        # {path: (signature, data)}
+        self._entries = {}
+
+    def read(self, path, parse):
+        """Read parsed file contents, calling `parse(path)` only if the file has changed
+
+        Parameters
+        ----------
+        path : str
+        parse : function
+            Function which reads and parses the file at `path`
+
+        Raises
+        ------
+        FileNotFoundError
+            If the file does not exist
+        """
+        signature = file_signature(path)
+        try:
+            cached_signature, data = self._entries[path]
+        except KeyError:
+            cached_signature, data = None, None
+
+        if cached_signature == signature:
+            self.hits += 1
+        else:
+            self.misses += 1
+            data = parse(path)
+            self._entries[path] = (signature, data)
+
+        if self.copy_on_read:
+            return copy.deepcopy(data)
+        return data
+
+    def invalidate(self, path):
+        """Discard any cached contents of a file - call before writing or deleting it
+        """
+        self._entries.pop(path, None)
+
+    def clear(self):
+        """Discard all cached contents
+        """
+        self._entries = {}
+
+    def info(self):
+        """Report cache hits and misses
+
+        Returns
+        -------
+        dict
+            ``{'hits': int, 'misses': int}``
+        """
+        return {'hits': self.hits, 'misses': self.misses}
+
+    def entries(self):
+        """Cached entries, for saving to a snapshot
+
+        Returns
+        -------
+        dict
+            ``{path: (signature, data)}``
+        """
+        return dict(self._entries)
+
+    def load_entries(self, entries):
+        """Add previously saved entries - any which are out of date are ignored on read
+        """
+        self._entries.update(entries)
+
+
+def file_signature(path):
+    """Signature which changes whenever a file is modified or replaced
+
+    Parameters
+    ----------
+    path : str
+
+    Returns
+    -------
+    tuple
+        ``(mtime_ns, size, inode)``
+    """
+    stat = os.stat(path)
+    return (stat.st_mtime_ns, stat.st_size, stat.st_ino)
+
+
+def files_signature(paths):
+    """Signature of a set of files, for use as an HTTP entity tag, with their latest
+    modification time
+
+    Only the files are statted, not read. Include a file's folder among the paths to have
+    the signature change when files are added to or removed from the folder.
+
+    Parameters
+    ----------
+    paths : list[str]
+
+    Returns
+    -------
+    tuple
+        ``(digest, mtime)``, a hex digest and the latest modification time in seconds since
+        the epoch
+
+    Raises
+    ------
+    FileNotFoundError
+        If any file does not exist
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    latest = 0
+    for path in sorted(paths):
+        signature = file_signature(path)
+        digest.update(repr((path, signature)).encode('utf-8'))
+        latest = max(latest, signature[0])
+    return digest.hexdigest(), latest / 1e9
+
+
+def combine_signatures(*signatures):
+    """Combine signatures from :func:`files_signature`, or None if any is None
+    """
+    if any(signature is None for signature in signatures):
+        return None
+    digest = hashlib.blake2b(digest_size=16)
+    for signature_digest, _ in signatures:
+        digest.update(signature_digest.encode('utf-8'))
+    return digest.hexdigest(), max(mtime for _, mtime in signatures)
@@ -6,6 +6,7 @@ from logging import getLogger
 
 from ruamel.yaml import YAML  # type: ignore
 from smif.data_layer.abstract_config_store import ConfigStore
+from smif.data_layer.file.file_cache import ParsedFileCache, files_signature
 from smif.data_layer.validate import (validate_sos_model_config,
                                       validate_sos_model_format)
 from smif.exception import (SmifDataExistsError, SmifDataMismatchError,
@@ -45,10 +46,12 @@ class YamlConfigStore(ConfigStore):
 
             self.config_folders[folder] = dirname
 
-        # cache results of reading project_config (invalidate on write)
-        self._project_config_cache_invalid = True
-        # MUST ONLY access through self.read_project_config()
-        self._project_config_cache = None
+        # caches of parsed yaml files - MUST ONLY access through self._read_yaml,
+        # self._write_yaml and self._delete_yaml
+        self.caches = {
+            'project_config': ParsedFileCache(),
+            'config': ParsedFileCache()
+        }
 
         # ensure project config file exists
         try:
@@ -65,11 +68,23 @@ class YamlConfigStore(ConfigStore):
         dict
             The project configuration
         """
-        if self._project_config_cache_invalid:
+        return self._read_yaml(self.base_folder, 'project')
 
-            self._project_config_cache = _read_yaml_file(self.base_folder, 'project')
-            self._project_config_cache_invalid = False
-        return copy.deepcopy(self._project_config_cache)
+    def cache_info(self):
+        """Report cache hits and misses
+
+        Returns
+        -------
+        dict
+            ``{cache_name: {'hits': int, 'misses': int}}``
+        """
+        return {name: cache.info() for name, cache in self.caches.items()}
+
+    def clear_cache(self):
+        """Discard all parsed configuration held in memory
+        """
+        for cache in self.caches.values():
+            cache.clear()
 
     def _write_project_config(self, data):
         """Write the project configuration
@@ -79,9 +94,49 @@ class YamlConfigStore(ConfigStore):
         data: dict
             The project configuration
         """
-        self._project_config_cache_invalid = True
-        self._project_config_cache = None
-        _write_yaml_file(self.base_folder, 'project', data)
+        self._write_yaml(self.base_folder, 'project', data)
+
+    def _read_yaml(self, directory, name):
+        """Read a yaml config file, parsing it only if it has changed since last read
+
+        Returns a copy, so callers are free to modify the data.
+        """
+        path = os.path.join(directory, "{}.yml".format(name))
+        return self._cache_for(directory).read(path, _parse_yaml_file)
+
+    def _write_yaml(self, directory, name, data):
+        """Write a yaml config file, invalidating any cached copy
+        """
+        self._cache_for(directory).invalidate(os.path.join(directory, "{}.yml".format(name)))
+        _write_yaml_file(directory, name, data)
+
+    def _delete_yaml(self, directory, name):
+        """Delete a yaml config file, invalidating any cached copy
+        """
+        path = os.path.join(directory, "{}.yml".format(name))
+        self._cache_for(directory).invalidate(path)
+        os.remove(path)
+
+    def _cache_for(self, directory):
+        if directory == self.base_folder:
+            return self.caches['project_config']
+        return self.caches['config']
+
+    def read_signature(self, config_type, config_name=None):
+        folder = self.config_folders["%ss" % config_type]
+        if config_name is None:
+            # the folder's own signature changes as files are added or removed
+            paths = [folder] + [
+                os.path.join(folder, "{}.yml".format(name))
+                for name in _read_filenames_in_dir(folder, '.yml')
+            ]
+        else:
+            paths = [os.path.join(folder, "{}.yml".format(config_name))]
+        try:
+            return files_signature(paths)
+        except FileNotFoundError:
+            # leave reading the config to report it missing
+            return None
 
     def _read_config(self, config_type, config_name):
         """Read config item - used by decorators for existence/consistency checks
@@ -105,16 +160,16 @@ class YamlConfigStore(ConfigStore):
         return modelrun_config
 
     def _read_model_run(self, model_run_name):
-        return _read_yaml_file(self.config_folders['model_runs'], model_run_name)
+        return self._read_yaml(self.config_folders['model_runs'], model_run_name)
 
     def _overwrite_model_run(self, model_run_name, model_run):
-        _write_yaml_file(self.config_folders['model_runs'], model_run_name, model_run)
+        self._write_yaml(self.config_folders['model_runs'], model_run_name, model_run)
 
     def write_model_run(self, model_run):
         _assert_file_not_exists(self.config_folders, 'model_run', model_run['name'])
         config = copy.copy(model_run)
         config['strategies'] = []
-        _write_yaml_file(self.config_folders['model_runs'], config['name'], config)
+        self._write_yaml(self.config_folders['model_runs'], config['name'], config)
 
     def update_model_run(self, model_run_name, model_run):
         if model_run['name'] != model_run_name:
@@ -128,7 +183,7 @@ class YamlConfigStore(ConfigStore):
 
     def delete_model_run(self, model_run_name):
         _assert_file_exists(self.config_folders, 'model_run', model_run_name)
-        os.remove(os.path.join(self.config_folders['model_runs'], model_run_name + '.yml'))
+        self._delete_yaml(self.config_folders['model_runs'], model_run_name)
     # endregion
 
     # region System-of-system models
@@ -140,14 +195,14 @@ class YamlConfigStore(ConfigStore):
     def read_sos_model(self, sos_model_name):
         _assert_file_exists(self.config_folders, 'sos_model', sos_model_name)
 
-        data = _read_yaml_file(self.config_folders['sos_models'], sos_model_name)
+        data = self._read_yaml(self.config_folders['sos_models'], sos_model_name)
         if self.validation:
             validate_sos_model_format(data)
         return data
 
     def write_sos_model(self, sos_model):
         _assert_file_not_exists(self.config_folders, 'sos_model', sos_model['name'])
-        _write_yaml_file(self.config_folders['sos_models'], sos_model['name'], sos_model)
+        self._write_yaml(self.config_folders['sos_models'], sos_model['name'], sos_model)
 
     def update_sos_model(self, sos_model_name, sos_model):
         if sos_model['name'] != sos_model_name:
@@ -160,11 +215,11 @@ class YamlConfigStore(ConfigStore):
                 self.read_models(),
                 self.read_scenarios(),
             )
-        _write_yaml_file(self.config_folders['sos_models'], sos_model['name'], sos_model)
+        self._write_yaml(self.config_folders['sos_models'], sos_model['name'], sos_model)
 
     def delete_sos_model(self, sos_model_name):
         _assert_file_exists(self.config_folders, 'sos_model', sos_model_name)
-        os.remove(os.path.join(self.config_folders['sos_models'], sos_model_name + '.yml'))
+        self._delete_yaml(self.config_folders['sos_models'], sos_model_name)
     # endregion
 
     # region Models
@@ -176,7 +231,7 @@ class YamlConfigStore(ConfigStore):
     def read_model(self, model_name):
         _assert_file_exists(self.config_folders, 'sector_model', model_name)
 
-        model = _read_yaml_file(self.config_folders['sector_models'], model_name)
+        model = self._read_yaml(self.config_folders['sector_models'], model_name)
         return model
 
     def write_model(self, model):
@@ -187,7 +242,7 @@ class YamlConfigStore(ConfigStore):
             model['interventions'] = []
 
         model = _skip_coords(model, ('inputs', 'outputs', 'parameters'))
-        _write_yaml_file(self.config_folders['sector_models'], model['name'], model)
+        self._write_yaml(self.config_folders['sector_models'], model['name'], model)
 
     def update_model(self, model_name, model):
         if model['name'] != model_name:
@@ -199,7 +254,7 @@ class YamlConfigStore(ConfigStore):
         # ignore interventions and initial conditions which the app doesn't handle
         if model['interventions'] or model['initial_conditions']:
 
-            old_model = _read_yaml_file(self.config_folders['sector_models'], model['name'])
+            old_model = self._read_yaml(self.config_folders['sector_models'], model['name'])
 
         if model['interventions']:
             self.logger.warning("Ignoring interventions write")
@@ -211,12 +266,11 @@ class YamlConfigStore(ConfigStore):
 
         model = _skip_coords(model, ('inputs', 'outputs', 'parameters'))
 
-        _write_yaml_file(self.config_folders['sector_models'], model['name'], model)
+        self._write_yaml(self.config_folders['sector_models'], model['name'], model)
 
     def delete_model(self, model_name):
         _assert_file_exists(self.config_folders, 'sector_model', model_name)
-        os.remove(
-            os.path.join(self.config_folders['sector_models'], model_name + '.yml'))
+        self._delete_yaml(self.config_folders['sector_models'], model_name)
     # endregion
 
     # region Scenarios
@@ -227,23 +281,22 @@ class YamlConfigStore(ConfigStore):
     def read_scenario(self, scenario_name):
         _assert_file_exists(self.config_folders, 'scenario', scenario_name)
 
-        scenario = _read_yaml_file(self.config_folders['scenarios'], scenario_name)
+        scenario = self._read_yaml(self.config_folders['scenarios'], scenario_name)
         return scenario
 
     def write_scenario(self, scenario):
         _assert_file_not_exists(self.config_folders, 'scenario', scenario['name'])
         scenario = _skip_coords(scenario, ['provides'])
-        _write_yaml_file(self.config_folders['scenarios'], scenario['name'], scenario)
+        self._write_yaml(self.config_folders['scenarios'], scenario['name'], scenario)
 
     def update_scenario(self, scenario_name, scenario):
         _assert_file_exists(self.config_folders, 'scenario', scenario_name)
         scenario = _skip_coords(scenario, ['provides'])
-        _write_yaml_file(self.config_folders['scenarios'], scenario['name'], scenario)
+        self._write_yaml(self.config_folders['scenarios'], scenario['name'], scenario)
 
     def delete_scenario(self, scenario_name):
         _assert_file_exists(self.config_folders, 'scenario', scenario_name)
-        os.remove(
-            os.path.join(self.config_folders['scenarios'], "{}.yml".format(scenario_name)))
+        self._delete_yaml(self.config_folders['scenarios'], scenario_name)
     # endregion
 
     # region Scenario Variants
@@ -303,7 +356,10 @@ def _read_yaml_file(directory, name):
     directory : str
     name : str
     """
-    path = os.path.join(directory, "{}.yml".format(name))
+    return _parse_yaml_file(os.path.join(directory, "{}.yml".format(name)))
+
+
+def _parse_yaml_file(path):
     with open(path, 'r') as file_handle:
         return YAML().load(file_handle)
 
@@ -1,17 +1,23 @@
 """File-backed data store
 """
 import glob
+import json
 import os
+import shutil
 from abc import abstractmethod
 from logging import getLogger
 
 import numpy as np  # type: ignore
-import pandas  # type: ignore
-import pyarrow as pa  # type: ignore
-from smif.data_layer.abstract_data_store import DataStore
+from smif.data_layer.abstract_data_store import DataStore, ResultsWriter
 from smif.data_layer.data_array import DataArray
 from smif.exception import SmifDataMismatchError, SmifDataNotFoundError
 
+# pandas and pyarrow are imported where they are used, as they are slow to import and not
+# needed to list or locate results
+
+# Parquet schema metadata key, present for sparse data - cells not in the file are zero
+SPARSE_METADATA_KEY = 'smif_sparse'
+
 
 class FileDataStore(DataStore):
     """Abstract file data store
@@ -49,8 +55,8 @@ class FileDataStore(DataStore):
 
     # region Abstract methods
     @abstractmethod
-    def _read_data_array(self, path, spec, timestep=None):
-        """Read DataArray from file
+    def _read_data_array(self, path, spec, timestep=None, selection=None):
+        """Read DataArray from file, optionally selecting a subset of coordinates
         """
 
     @abstractmethod
@@ -58,6 +64,11 @@ class FileDataStore(DataStore):
         """Write DataArray to file
         """
 
+    @abstractmethod
+    def _open_data_array_writer(self, path, spec):
+        """Open a ResultsWriter to write a DataArray to file in chunks
+        """
+
     @abstractmethod
     def _read_list_of_dicts(self, path):
         """Read file to list[dict]
@@ -80,9 +91,9 @@ class FileDataStore(DataStore):
     # endregion
 
     # region Data Array
-    def read_scenario_variant_data(self, key, spec, timestep=None):
+    def read_scenario_variant_data(self, key, spec, timestep=None, selection=None):
         path = os.path.join(self.data_folders['scenarios'], key)
-        data = self._read_data_array(path, spec, timestep)
+        data = self._read_data_array(path, spec, timestep, selection)
         data.validate_as_full()
         return data
 
@@ -90,9 +101,9 @@ class FileDataStore(DataStore):
         path = os.path.join(self.data_folders['scenarios'], key)
         self._write_data_array(path, data, timestep)
 
-    def read_narrative_variant_data(self, key, spec, timestep=None):
+    def read_narrative_variant_data(self, key, spec, timestep=None, selection=None):
         path = os.path.join(self.data_folders['narratives'], key)
-        return self._read_data_array(path, spec, timestep)
+        return self._read_data_array(path, spec, timestep, selection)
 
     def write_narrative_variant_data(self, key, data, timestep=None):
         path = os.path.join(self.data_folders['narratives'], key)
@@ -215,7 +226,12 @@ class FileDataStore(DataStore):
     def write_coefficients(self, source_dim, destination_dim, data):
         results_path = self._get_coefficients_path(source_dim, destination_dim)
         header = "Conversion coefficients {}:{}".format(source_dim, destination_dim)
-        self._write_ndarray(results_path, data, header)
+        # write to a temporary file, with the same extension, and replace atomically, so
+        # model runs in other processes never read a partly written file
+        folder, filename = os.path.split(results_path)
+        tmp_path = os.path.join(folder, '.{}.{}'.format(os.getpid(), filename))
+        self._write_ndarray(tmp_path, data, header)
+        os.replace(tmp_path, results_path)
 
     def _get_coefficients_path(self, source_dim, destination_dim):
         path = os.path.join(
@@ -232,7 +248,7 @@ class FileDataStore(DataStore):
     # region Results
 
     def read_results(self, modelrun_id, model_name, output_spec, timestep,
-                     decision_iteration=None):
+                     decision_iteration=None, selection=None):
         if timestep is None:
             raise ValueError("You must pass a timestep argument")
 
@@ -242,7 +258,7 @@ class FileDataStore(DataStore):
         )
 
         try:
-            return self._read_data_array(results_path, output_spec)
+            return self._read_data_array(results_path, output_spec, selection=selection)
         except FileNotFoundError:
             key = str([modelrun_id, model_name, output_spec.name, timestep,
                        decision_iteration])
@@ -263,8 +279,44 @@ class FileDataStore(DataStore):
             timestep, decision_iteration
         )
         os.makedirs(os.path.dirname(results_path), exist_ok=True)
+        # results may be hard links shared with other model runs (see link_results), so
+        # write a new file rather than over the existing one
+        _remove_file(results_path)
         self._write_data_array(results_path, data_array)
 
+    def link_results(self, modelrun_name, to_modelrun_name, model_name, output_spec,
+                     timestep=None, decision_iteration=None):
+        """Hard link the results file into the other model run, or copy it if the file
+        system does not support links
+        """
+        source_path = self._get_results_path(
+            modelrun_name, model_name, output_spec.name, timestep, decision_iteration)
+        if not os.path.isfile(source_path):
+            key = str([modelrun_name, model_name, output_spec.name, timestep,
+                       decision_iteration])
+            raise SmifDataNotFoundError("Could not find results for {}".format(key))
+
+        results_path = self._get_results_path(
+            to_modelrun_name, model_name, output_spec.name, timestep, decision_iteration)
+        os.makedirs(os.path.dirname(results_path), exist_ok=True)
+        _remove_file(results_path)
+        try:
+            os.link(source_path, results_path)
+        except OSError:
+            shutil.copyfile(source_path, results_path)
+
+    def open_results_writer(self, output_spec, modelrun_id, model_name, timestep=None,
+                            decision_iteration=None):
+        if timestep is None:
+            raise NotImplementedError()
+
+        results_path = self._get_results_path(
+            modelrun_id, model_name, output_spec.name,
+            timestep, decision_iteration
+        )
+        os.makedirs(os.path.dirname(results_path), exist_ok=True)
+        return self._open_data_array_writer(results_path, output_spec)
+
     def available_results(self, modelrun_name):
         """List available results for a given model run
 
@@ -349,6 +401,28 @@ class FileDataStore(DataStore):
         return (timestep, decision_iteration, model_name, output_name)
     # endregion
 
+    # region Model run statistics
+    def read_model_run_stats(self, modelrun_name, stats_name):
+        path = self._get_model_run_stats_path(modelrun_name, stats_name)
+        try:
+            return self._read_list_of_dicts(path)
+        except FileNotFoundError:
+            msg = "Statistics '{}' not found for model run {}"
+            raise SmifDataNotFoundError(msg.format(stats_name, modelrun_name))
+
+    def write_model_run_stats(self, stats, modelrun_name, stats_name):
+        path = self._get_model_run_stats_path(modelrun_name, stats_name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._write_list_of_dicts(path, stats)
+
+    def _get_model_run_stats_path(self, modelrun_name, stats_name):
+        """Compose a filename for model run statistics:
+                results/<modelrun_name>/stats_<stats_name>.<ext>
+        """
+        filename = 'stats_{}.{}'.format(stats_name, self.ext)
+        return os.path.join(self.results_folder, modelrun_name, filename)
+    # endregion
+
     def _filter_on_timestep(self, timestep, dataframe, path, spec):
         if timestep is not None:
             if 'timestep' not in dataframe.columns:
@@ -382,15 +456,21 @@ class CSVDataStore(FileDataStore):
         self.ext = 'csv'
         self.coef_ext = 'txt.gz'
 
-    def _read_data_array(self, path, spec, timestep=None):
+    def _read_data_array(self, path, spec, timestep=None, selection=None):
         """Read DataArray from file
         """
+        import pandas  # type: ignore
+
+        selected_spec = spec.select(selection) if selection else spec
         try:
             dataframe = pandas.read_csv(path)
         except FileNotFoundError:
             raise SmifDataNotFoundError
 
         dataframe = self._filter_on_timestep(timestep, dataframe, path, spec)
+        if selection:
+            dataframe = _select_rows(dataframe, selection)
+        spec = selected_spec
 
         if spec.dims:
             data_array = DataArray.from_df(spec, dataframe)
@@ -412,9 +492,14 @@ class CSVDataStore(FileDataStore):
             dataframe['timestep'] = timestep
         dataframe.reset_index().to_csv(path, index=False)
 
+    def _open_data_array_writer(self, path, spec):
+        return _CSVResultsWriter(path, spec)
+
     def _read_list_of_dicts(self, path):
         """Read file to list[dict]
         """
+        import pandas  # type: ignore
+
         try:
             data = pandas.read_csv(path).to_dict('records')
         except pandas.errors.EmptyDataError:
@@ -424,13 +509,15 @@ class CSVDataStore(FileDataStore):
     def _write_list_of_dicts(self, path, data):
         """Write list[dict] to file
         """
+        import pandas  # type: ignore
+
         pandas.DataFrame.from_records(data).to_csv(path, index=False)
 
     def _read_ndarray(self, path):
         """Read numpy.ndarray
         """
         try:
-            return np.loadtxt(path)
+            return np.loadtxt(path, ndmin=2)
         except OSError:
             raise FileNotFoundError(path)
 
@@ -448,13 +535,47 @@ class ParquetDataStore(FileDataStore):
         self.ext = 'parquet'
         self.coef_ext = 'npy'
 
-    def _read_parquet_data_array(self, path, spec, timestep=None):
+    def _read_parquet_data_array(self, path, spec, timestep=None, selection=None):
+        import pyarrow.parquet as pq  # type: ignore
+
+        # check the selection before reading, so that ids which are not in the spec are
+        # reported as such, rather than filtering out every row
+        selected_spec = spec.select(selection) if selection else spec
+
+        parquet_file = pq.ParquetFile(path)
+        schema = parquet_file.schema_arrow
+        sparse = _sparse_metadata(schema)
+        # read only the columns needed, unless some are missing - then read all, so that
+        # DataArray.from_df reports the mismatch
+        columns = spec.dims + [spec.name]
+        if not set(columns).issubset(schema.names):
+            columns = None
+
+        if timestep is not None and 'timestep' in schema.names:
+            table = _read_timestep_table(
+                path, spec, columns, timestep, selection, sparse, schema.names)
+        elif timestep is not None:
+            # no timestep column to filter on - report the mismatch
+            table = pq.read_table(path, columns=columns)
+            self._filter_on_timestep(timestep, table.to_pandas(), path, spec)
+        else:
+            table = _read_selected_table(parquet_file, columns, selection)
 
-        dataframe = pandas.read_parquet(path, engine='pyarrow')
-        dataframe = self._filter_on_timestep(timestep, dataframe, path, spec)
+        spec = selected_spec
 
+        if spec.dims and columns is not None:
+            # fill data directly from Arrow, without building a DataFrame, dropping any rows
+            # outside the selection as their labels are looked up
+            subset_dims = [dim for dim in (selection or {}) if dim in spec.dims]
+            return DataArray.from_arrow(
+                spec, table, sparse=bool(sparse), subset_dims=subset_dims)
+
+        if selection:
+            table = _select_table_rows(table, selection)
+        dataframe = table.to_pandas()
         if spec.dims:
-            data_array = DataArray.from_df(spec, dataframe)
+            # some columns are missing, which DataArray.from_df reports
+            data_array = DataArray.from_df(spec, dataframe, sparse=bool(sparse))
         else:
             # zero-dimensional case (scalar)
             data = dataframe[spec.name]
@@ -465,11 +586,13 @@ class ParquetDataStore(FileDataStore):
 
         return data_array
 
-    def _read_data_array(self, path, spec, timestep=None):
+    def _read_data_array(self, path, spec, timestep=None, selection=None):
         """Read DataArray from file
         """
+        import pyarrow as pa  # type: ignore
+
         try:
-            data_array = self._read_parquet_data_array(path, spec, timestep)
+            data_array = self._read_parquet_data_array(path, spec, timestep, selection)
         except (pa.lib.ArrowIOError, OSError) as ex:
             msg = "Could not find data for {} at {}"
             raise SmifDataNotFoundError(msg.format(spec.name, path)) from ex
@@ -477,15 +600,57 @@ class ParquetDataStore(FileDataStore):
 
     def _write_data_array(self, path, data_array, timestep=None):
         """Write DataArray to file
+
+        Data is written with a row group for each timestep, so that reading a single
+        timestep reads only its row group. Dimension columns are written as categoricals
+        (dictionary-encoded), and values keep the spec dtype.
         """
-        dataframe = data_array.as_df()
+        import pyarrow as pa  # type: ignore
+        import pyarrow.parquet as pq  # type: ignore
+
+        if data_array.is_sparse and data_array.dims:
+            # write only the stored cells, and mark the file so that others read as zero
+            dataframe = _sparse_frame(data_array)
+            metadata = {'fill_value': 0}
+        else:
+            dataframe = _categorical_dims(data_array.as_df())
+            metadata = None
         if timestep is not None:
             dataframe['timestep'] = timestep
-        dataframe.to_parquet(path, engine='pyarrow', compression='gzip')
+        table = pa.Table.from_pandas(dataframe, preserve_index=False)
+
+        if metadata is not None:
+            # timesteps may have no stored cells, so record which are present
+            if timestep is not None:
+                metadata['timesteps'] = [timestep]
+            elif 'timestep' in data_array.dims:
+                metadata['timesteps'] = list(data_array.dim_names('timestep'))
+            table = table.replace_schema_metadata(dict(
+                table.schema.metadata, **{SPARSE_METADATA_KEY: json.dumps(metadata)}))
+
+        if 'timestep' not in table.column_names or not table.num_rows:
+            pq.write_table(table, path, compression='gzip')
+            return
+
+        # write each timestep as a row group, so reads of a single timestep can skip the
+        # others using the row group statistics
+        table = table.sort_by('timestep')
+        timesteps = table.column('timestep').to_numpy()
+        starts = np.flatnonzero(np.r_[True, timesteps[1:] != timesteps[:-1]])
+        ends = np.r_[starts[1:], len(timesteps)]
+        with pq.ParquetWriter(path, table.schema, compression='gzip') as writer:
+            for start, end in zip(starts, ends):
+                writer.write_table(table.slice(start, end - start), row_group_size=end - start)
+
+    def _open_data_array_writer(self, path, spec):
+        return _ParquetResultsWriter(path, spec)
 
     def _read_list_of_dicts(self, path):
         """Read file to list[dict]
         """
+        import pandas  # type: ignore
+        import pyarrow as pa  # type: ignore
+
         try:
             return pandas.read_parquet(path, engine='pyarrow').to_dict('records')
         except pa.lib.ArrowIOError as ex:
@@ -495,16 +660,19 @@ class ParquetDataStore(FileDataStore):
     def _write_list_of_dicts(self, path, data):
         """Write list[dict] to file
         """
+        import pandas  # type: ignore
+
         if data:
             pandas.DataFrame.from_records(data).to_parquet(path, engine='pyarrow')
         else:
             pandas.DataFrame(columns=['placeholder']).to_parquet(path, engine='pyarrow')
 
     def _read_ndarray(self, path):
-        """Read numpy.ndarray
+        """Read numpy.ndarray, memory-mapped read-only so that processes reading the same
+        file share its pages
         """
         try:
-            return np.load(path)
+            return np.load(path, mmap_mode='r')
         except OSError:
             raise FileNotFoundError(path)
 
@@ -514,6 +682,273 @@ class ParquetDataStore(FileDataStore):
         np.save(path, data)
 
 
+class _FileResultsWriter(ResultsWriter):
+    """Write chunks of results to a partial file, moved into place when the writer is
+    closed - so results are never read, or listed as available, part-written
+
+    If no chunks were written, no results are saved.
+    """
+    def __init__(self, path, output_spec):
+        super().__init__(output_spec)
+        self.path = path
+        self._partial_path = path + '.partial'
+
+    def write(self, data_array):
+        self._positions(data_array)
+        self._write_chunk(data_array)
+
+    def close(self):
+        if self._finish():
+            os.replace(self._partial_path, self.path)
+
+    def discard(self):
+        if self._finish():
+            os.remove(self._partial_path)
+
+    @abstractmethod
+    def _write_chunk(self, data_array):
+        """Append a chunk to the partial file
+        """
+
+    @abstractmethod
+    def _finish(self):
+        """Close the partial file, returning True if it was written
+        """
+
+
+class _CSVResultsWriter(_FileResultsWriter):
+    """Append chunks of results as rows of a CSV file
+    """
+    def __init__(self, path, output_spec):
+        super().__init__(path, output_spec)
+        self._file = None
+
+    def _write_chunk(self, data_array):
+        header = self._file is None
+        if header:
+            self._file = open(self._partial_path, 'w', newline='')
+        data_array.as_df().reset_index().to_csv(self._file, index=False, header=header)
+
+    def _finish(self):
+        if self._file is None:
+            return False
+        self._file.close()
+        self._file = None
+        return True
+
+
+class _ParquetResultsWriter(_FileResultsWriter):
+    """Append chunks of results as row groups of a Parquet file
+
+    The first chunk decides whether the file is written sparse - if so, later chunks are
+    written sparse too.
+    """
+    def __init__(self, path, output_spec):
+        super().__init__(path, output_spec)
+        self._writer = None
+        self._sparse = False
+
+    def _write_chunk(self, data_array):
+        import pyarrow as pa  # type: ignore
+        import pyarrow.parquet as pq  # type: ignore
+
+        if self._writer is None:
+            self._sparse = data_array.is_sparse and bool(data_array.dims)
+        if self._sparse:
+            dataframe = _sparse_frame(data_array)
+        else:
+            dataframe = _categorical_dims(data_array.as_df())
+        table = pa.Table.from_pandas(dataframe, preserve_index=False)
+
+        if self._writer is None:
+            schema = _chunk_schema(table.schema, self._sparse)
+            self._writer = pq.ParquetWriter(self._partial_path, schema, compression='gzip')
+        if table.num_rows:
+            # chunks may differ in dictionary index type, so cast to the file schema
+            self._writer.write_table(table.cast(self._writer.schema))
+
+    def _finish(self):
+        if self._writer is None:
+            return False
+        self._writer.close()
+        self._writer = None
+        return True
+
+
+def _chunk_schema(schema, sparse):
+    """Schema for a file written in chunks, from the schema of the first chunk
+
+    Dictionary (categorical) columns are given 32-bit indices, which fit the dimension
+    codes of any chunk, and pandas metadata, which describes only the first chunk, is
+    dropped.
+    """
+    import pyarrow as pa  # type: ignore
+
+    fields = []
+    for field in schema:
+        if pa.types.is_dictionary(field.type):
+            field = field.with_type(pa.dictionary(pa.int32(), field.type.value_type))
+        fields.append(field)
+    metadata = {SPARSE_METADATA_KEY: json.dumps({'fill_value': 0})} if sparse else None
+    return pa.schema(fields, metadata=metadata)
+
+
+def _selected_row_groups(parquet_file, selection):
+    """Row groups of a Parquet file which may hold rows in a selection, or None to read all
+
+    Results written in chunks have a row group for each chunk. The labels in each row group
+    are found by reading only the selected dimension columns, which are dictionary-encoded,
+    so that reading a chunk need not decode every other chunk.
+    """
+    dims = [dim for dim in (selection or {}) if dim in parquet_file.schema_arrow.names]
+    if not dims or parquet_file.metadata.num_row_groups < 2:
+        return None
+
+    selected = {dim: set(selection[dim]) for dim in dims}
+    row_groups = []
+    for index in range(parquet_file.metadata.num_row_groups):
+        table = parquet_file.read_row_group(index, columns=dims)
+        for dim in dims:
+            labels = set()
+            for chunk in table.column(dim).chunks:
+                values = chunk.dictionary if hasattr(chunk, 'dictionary') else chunk.unique()
+                labels.update(values.to_pylist())
+            if not labels & selected[dim]:
+                break
+        else:
+            row_groups.append(index)
+    return row_groups
+
+
+def _read_timestep_table(path, spec, columns, timestep, selection, sparse, names):
+    """Read the rows of a Parquet file for one timestep
+
+    Row groups whose timestep statistics exclude the timestep are skipped, and rows outside
+    the timestep or any selection are filtered as they are read.
+    """
+    import pyarrow.parquet as pq  # type: ignore
+
+    filters = [('timestep', '=', timestep)] + [
+        (dim, 'in', list(ids)) for dim, ids in (selection or {}).items() if dim in names
+    ]
+    table = pq.read_table(path, columns=columns, filters=filters)
+    if not table.num_rows and timestep not in sparse.get('timesteps', []):
+        raise SmifDataNotFoundError(
+            "Data for '{}' not found for timestep {}".format(spec.name, timestep))
+    if 'timestep' in table.column_names:
+        table = table.drop(['timestep'])
+    return table
+
+
+def _read_selected_table(parquet_file, columns, selection):
+    """Read a table from Parquet, skipping row groups outside any selection
+
+    Rows within the row groups read are not filtered here: that is left to
+    :meth:`DataArray.from_arrow`, which looks up the labels of each dictionary-encoded
+    dimension column once, and is faster than filtering as the file is read.
+    """
+    row_groups = _selected_row_groups(parquet_file, selection)
+    if row_groups is None:
+        return parquet_file.read(columns=columns)
+    return parquet_file.read_row_groups(row_groups, columns=columns)
+
+
+def _select_table_rows(table, selection):
+    """Filter Arrow table rows to those whose dimension labels are in a selection
+    """
+    import pyarrow as pa  # type: ignore
+
+    keep = None
+    for dim, ids in selection.items():
+        if dim not in table.column_names:
+            continue
+        ids = set(ids)
+        chunk_keep = []
+        for chunk in table.column(dim).chunks:
+            if not hasattr(chunk, 'dictionary'):
+                chunk = chunk.dictionary_encode()
+            labels = chunk.dictionary.to_pylist()
+            in_ids = np.array([label in ids for label in labels] + [False])
+            # null labels are looked up past the end of the dictionary, so are not selected
+            indices = chunk.indices.fill_null(len(in_ids) - 1).to_numpy(zero_copy_only=False)
+            chunk_keep.append(in_ids[indices])
+        in_selection = np.concatenate(chunk_keep) if chunk_keep else np.zeros(0, dtype=bool)
+        keep = in_selection if keep is None else keep & in_selection
+    if keep is None or keep.all():
+        return table
+    return table.filter(pa.array(keep))
+
+
+def _select_rows(dataframe, selection):
+    """Filter DataFrame rows to those whose dimension labels are in a selection
+
+    Dimension labels may be columns or index levels.
+    """
+    keep = None
+    for dim, ids in selection.items():
+        if dim in dataframe.columns:
+            labels = dataframe[dim]
+        elif dim in dataframe.index.names:
+            labels = dataframe.index.get_level_values(dim)
+        else:
+            # leave DataArray.from_df to report the missing dimension
+            continue
+        in_selection = np.asarray(labels.isin(list(ids)))
+        keep = in_selection if keep is None else keep & in_selection
+    if keep is None:
+        return dataframe
+    return dataframe[keep]
+
+
+def _sparse_frame(data_array):
+    """DataFrame of the stored cells of sparse data, with categorical dimension columns
+    """
+    import pandas  # type: ignore
+
+    coo = data_array.as_coo().sum_duplicates()
+    columns = {}
+    for dim_coords, coords in zip(coo.coords, data_array.coords):
+        if coords.name == 'timestep':
+            columns[coords.name] = np.asarray(coords.ids)[dim_coords]
+        else:
+            columns[coords.name] = pandas.Categorical.from_codes(
+                dim_coords, categories=coords.ids)
+    columns[data_array.name] = coo.values
+    return pandas.DataFrame(columns)
+
+
+def _sparse_metadata(schema):
+    """Sparse data metadata from a Parquet schema, or an empty dict for dense data
+    """
+    try:
+        return json.loads(schema.metadata[SPARSE_METADATA_KEY.encode('utf-8')])
+    except (KeyError, TypeError):
+        return {}
+
+
+def _categorical_dims(dataframe):
+    """Move dimension index levels to columns, as categoricals built from the index codes
+
+    Any 'timestep' level is kept as a plain column, so row group statistics can be used to
+    filter on it.
+    """
+    import pandas  # type: ignore
+
+    index = dataframe.index
+    if not isinstance(index, pandas.MultiIndex):
+        return dataframe.reset_index(drop=True)
+
+    columns = {}
+    for level, codes, name in zip(index.levels, index.codes, index.names):
+        if name == 'timestep':
+            columns[name] = level.take(codes)
+        else:
+            columns[name] = pandas.Categorical.from_codes(codes, categories=level)
+    for name in dataframe.columns:
+        columns[name] = dataframe[name].array
+    return pandas.DataFrame(columns)
+
+
 def _nest_keys(intervention):
     nested = {}
     for key, value in intervention.items():
@@ -540,8 +975,17 @@ def _unnest_keys(intervention):
     unnested = {}
     for key, value in intervention.items():
         if isinstance(value, dict):
-            for sub_key, sub_value in value:
+            for sub_key, sub_value in value.items():
                 unnested["{}_{}".format(key, sub_key)] = sub_value
         else:
             unnested[key] = value
     return unnested
+
+
+def _remove_file(path):
+    """Remove a file, if it exists
+    """
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
@@ -3,22 +3,21 @@
 import copy
 import json
 import os
-from functools import lru_cache
 from logging import getLogger
-from typing import Dict, List, Union
+from typing import TYPE_CHECKING, Dict, List, Union
 
-import pandas  # type: ignore
-from pandas import compat as pandas_compat
-from pandas.core import common as pandas_common  # type: ignore
 from ruamel.yaml import YAML  # type: ignore
 from smif.data_layer.abstract_metadata_store import MetadataStore
+from smif.data_layer.file.dimension_cache import DimensionCache
+from smif.data_layer.file.file_cache import (PROJECT_CACHE_FOLDER,
+                                             ParsedFileCache, files_signature)
+from smif.metadata.geometry import RegionElements
 from smif.exception import SmifDataNotFoundError, SmifDataReadError
 
-# Import fiona if available (optional dependency)
-try:
-    import fiona  # type: ignore
-except ImportError:
-    pass
+# pandas and fiona (an optional dependency) are imported where they are used, as they are
+# slow to import and not needed for dimensions which have already been read
+if TYPE_CHECKING:
+    import pandas  # type: ignore  # noqa: F401
 
 
 class FileMetadataStore(MetadataStore):
@@ -33,6 +32,32 @@ class FileMetadataStore(MetadataStore):
         self.data_folder = os.path.join(base_folder, 'data', 'dimensions')
         self.config_folder = os.path.join(base_folder, 'config', 'dimensions')
 
+        # caches of parsed dimension definitions and elements - dimension elements may be
+        # large, so are shared between readers rather than copied
+        self.caches = {
+            'dimension_config': ParsedFileCache(),
+            'dimension_file': ParsedFileCache(copy_on_read=False)
+        }
+        # parsed dimension elements saved to disk, for use by other processes
+        self.dimension_cache = DimensionCache(
+            os.path.join(base_folder, PROJECT_CACHE_FOLDER, 'dimensions'))
+
+    def cache_info(self):
+        """Report cache hits and misses
+
+        Returns
+        -------
+        dict
+            ``{cache_name: {'hits': int, 'misses': int}}``
+        """
+        return {name: cache.info() for name, cache in self.caches.items()}
+
+    def clear_cache(self):
+        """Discard all parsed dimensions held in memory
+        """
+        for cache in self.caches.values():
+            cache.clear()
+
     # region Units
     def read_unit_definitions(self) -> List[str]:
         try:
@@ -48,12 +73,31 @@ class FileMetadataStore(MetadataStore):
     # endregion
 
     # region Dimensions
+    def read_dimension_signature(self, dimension_name=None, skip_coords=False):
+        if dimension_name is None:
+            # the folder's own signature changes as files are added or removed
+            names = _read_filenames_in_dir(self.config_folder, '.yml')
+            paths = [self.config_folder]
+        else:
+            names = [dimension_name]
+            paths = []
+        try:
+            for name in names:
+                paths.append(os.path.join(self.config_folder, "{}.yml".format(name)))
+                if not skip_coords:
+                    elements = self._read_dimension_config(name)['elements']
+                    paths.append(os.path.join(self.data_folder, elements))
+            return files_signature(paths)
+        except FileNotFoundError:
+            # leave reading the dimension to report it missing
+            return None
+
     def read_dimensions(self, skip_coords=False) -> List[dict]:
         dim_names = _read_filenames_in_dir(self.config_folder, '.yml')
         return [self.read_dimension(name, skip_coords) for name in dim_names]
 
     def read_dimension(self, dimension_name: str, skip_coords=False):
-        dim = _read_yaml_file(self.config_folder, dimension_name)
+        dim = self._read_dimension_config(dimension_name)
         if skip_coords:
             del dim['elements']
         else:
@@ -69,12 +113,11 @@ class FileMetadataStore(MetadataStore):
         # refer to elements by filename and add to config
         dimension_with_ref = copy.copy(dimension)
         dimension_with_ref['elements'] = elements_filename
-        _write_yaml_file(self.config_folder, dimension['name'], dimension_with_ref)
+        self._write_dimension_config(dimension['name'], dimension_with_ref)
 
     def update_dimension(self, dimension_name: str, dimension: Dict):
         # look up elements filename and write elements
-
-        old_dim = _read_yaml_file(self.config_folder, dimension_name)
+        old_dim = self._read_dimension_config(dimension_name)
         elements_filename = old_dim['elements']
         elements = dimension['elements']
         self._write_dimension_file(elements_filename, elements)
@@ -83,23 +126,44 @@ class FileMetadataStore(MetadataStore):
         dimension_with_ref = copy.copy(dimension)
         dimension_with_ref['elements'] = elements_filename
 
-        _write_yaml_file(self.config_folder, dimension_name, dimension_with_ref)
+        self._write_dimension_config(dimension_name, dimension_with_ref)
 
     def delete_dimension(self, dimension_name: str):
         # read to find filename
-
-        old_dim = _read_yaml_file(self.config_folder, dimension_name)
+        old_dim = self._read_dimension_config(dimension_name)
         elements_filename = old_dim['elements']
         # remove elements data
-        os.remove(os.path.join(self.data_folder, elements_filename))
+        elements_path = os.path.join(self.data_folder, elements_filename)
+        self.caches['dimension_file'].invalidate(elements_path)
+        os.remove(elements_path)
         # remove description
-        os.remove(os.path.join(self.config_folder, "{}.yml".format(dimension_name)))
+        config_path = os.path.join(self.config_folder, "{}.yml".format(dimension_name))
+        self.caches['dimension_config'].invalidate(config_path)
+        os.remove(config_path)
+
+    def _read_dimension_config(self, dimension_name: str) -> Dict:
+        path = os.path.join(self.config_folder, "{}.yml".format(dimension_name))
+        return self.caches['dimension_config'].read(path, _parse_yaml_file)
+
+    def _write_dimension_config(self, dimension_name: str, dimension: Dict):
+        path = os.path.join(self.config_folder, "{}.yml".format(dimension_name))
+        self.caches['dimension_config'].invalidate(path)
+        _write_yaml_file(self.config_folder, dimension_name, dimension)
 
-    @lru_cache(maxsize=32)
     def _read_dimension_file(self, filename: str) -> List[Dict]:
         filepath = os.path.join(self.data_folder, filename)
-        filebasename, ext = os.path.splitext(filename)
+        if not os.path.exists(filepath):
+            # parse anyway, to raise the usual error for a missing file of this type
+            return self._parse_dimension_file(filepath)
+        return self.caches['dimension_file'].read(filepath, self._read_dimension_elements)
+
+    def _read_dimension_elements(self, filepath: str) -> List[Dict]:
+        return self.dimension_cache.read(filepath, self._parse_dimension_file)
+
+    def _parse_dimension_file(self, filepath: str) -> List[Dict]:
+        filebasename, ext = os.path.splitext(filepath)
         if ext == '.csv':
+            import pandas  # type: ignore
             dataframe = pandas.read_csv(filepath)
             data = _df_to_records(dataframe)
             if 'interval' in data[0]:
@@ -113,14 +177,14 @@ class FileMetadataStore(MetadataStore):
         return data
 
     def _write_dimension_file(self, filename: str, data: List[Dict]):
-        # lru_cache may now be invalid, so clear it
-        self._read_dimension_file.cache_clear()
         path = os.path.join(self.data_folder, filename)
+        self.caches['dimension_file'].invalidate(path)
         filebasename, ext = os.path.splitext(filename)
         if ext == '.csv':
             if 'interval' in data[0]:
                 data = self._stringify_interval(data)
-            pandas.DataFrame.from_records(data).to_csv(path, index=False)
+            import pandas  # type: ignore
+            pandas.DataFrame.from_records(list(data)).to_csv(path, index=False)
         elif ext in ('.geojson', '.shp'):
             raise NotImplementedError("Writing spatial dimensions not yet supported")
             # self._write_spatial_file(filepath)
@@ -154,42 +218,48 @@ class FileMetadataStore(MetadataStore):
     # endregion
 
     @staticmethod
-    def _read_spatial_file(filepath) -> List[Dict]:
+    def _read_spatial_file(filepath) -> Union[List[Dict], RegionElements]:
+        try:
+            import fiona  # type: ignore
+        except ImportError as ex:
+            msg = "Could not read spatial dimension definition '%s' " % (filepath)
+            msg += "Please install fiona to read geographic data files. Try running: \n"
+            msg += "    pip install smif[spatial]\n"
+            msg += "or:\n"
+            msg += "    conda install fiona shapely rtree\n"
+            raise SmifDataReadError(msg) from ex
         try:
             with fiona.drivers():
                 with fiona.open(filepath) as src:
                     data = []
                     for feature in src:
+                        # use plain GeoJSON-like dicts rather than fiona features
+                        feature = getattr(feature, '__geo_interface__', feature)
                         element = {
                             'name': feature['properties']['name'],
                             'feature': feature
                         }
                         data.append(element)
-            return data
-        except NameError as ex:
-            msg = "Could not read spatial dimension definition '%s' " % (filepath)
-            msg += "Please install fiona to read geographic data files. Try running: \n"
-            msg += "    pip install smif[spatial]\n"
-            msg += "or:\n"
-            msg += "    conda install fiona shapely rtree\n"
-            raise SmifDataReadError(msg) from ex
         except IOError as ex:
             msg = "Could not read spatial dimension definition '%s' " % (filepath)
             msg += "Please verify that the path is correct and "
             msg += "that the file is present on this location."
             raise SmifDataNotFoundError(msg) from ex
 
+        try:
+            return RegionElements.from_features(data)
+        except ImportError:
+            # without shapely, keep features as dicts
+            return data
 
-def _read_yaml_file(directory, name):
+
+def _parse_yaml_file(path):
     """Parse yaml config file into plain data (lists, dicts and simple values)
 
     Parameters
     ----------
-    directory : str
-    name : str
-        file basename (without yml extension)
+    path : str
     """
-    path = os.path.join(directory, "{}.yml".format(name))
     with open(path, 'r') as file_handle:
         return YAML().load(file_handle)
 
@@ -236,7 +306,7 @@ def _read_filenames_in_dir(path, extension):
     return files
 
 
-def _df_to_records(dataframe: pandas.DataFrame) -> List[Dict]:
+def _df_to_records(dataframe: 'pandas.DataFrame') -> List[Dict]:
     """Fix pandas conversion to list[dict] with python scalar values
 
     Ported here from future release of pandas 0.24.0
@@ -248,11 +318,13 @@ def _df_to_records(dataframe: pandas.DataFrame) -> List[Dict]:
     Note that this skips the pandas_common,maybe_box_datetimelike implementation, which may be
     desired but relies on more pandas internals so is not copied over (yet).
     """
+    from pandas.core import common as pandas_common  # type: ignore
+
     into_c = pandas_common.standardize_mapping(dict)
     return [
         into_c(
             (k, v)
-            for k, v in pandas_compat.iteritems(row._asdict())
+            for k, v in row._asdict().items()
         )
         for row in dataframe.itertuples(index=False)
     ]
@@ -0,0 +1,196 @@
+"""Snapshot of a file-based project, for fast loading
+
+Reading a large project means parsing hundreds of YAML files under ``config/`` and the
+dimension definitions under ``data/dimensions``, one at a time. A snapshot saves whatever has
+been parsed by a :class:`~smif.data_layer.file.YamlConfigStore` and a
+:class:`~smif.data_layer.file.FileMetadataStore` to a single file, along with the signature
+(modification time, size and inode) of each source file.
+
+When a project is opened, :func:`open_snapshot` loads the snapshot into the stores' caches.
+Nothing else is read until it is asked for, and each cached file is only used while its
+source is unchanged. When the process exits, the snapshot is saved again if the stores have
+read anything it did not hold, or any of its sources have changed - so the snapshot is
+built by the first command to open a project, and grows to cover what later commands use::
+
+    >>> config_store = YamlConfigStore(directory)
+    >>> metadata_store = FileMetadataStore(directory)
+    >>> open_snapshot(directory, config_store, metadata_store)
+    >>> # ... read and run, then on exit the snapshot is saved
+
+Snapshots are pickled, so are kept in the user's cache folder rather than in the project,
+where they could be replaced by anyone who shares the project: ``$SMIF_CACHE_DIR``, if set,
+otherwise ``smif/snapshots`` under ``$XDG_CACHE_HOME`` or ``~/.cache``. Each is named by a
+hash of the absolute path of its project folder.
+"""
+import atexit
+import hashlib
+import os
+import pickle
+from logging import getLogger
+
+import smif
+from smif.data_layer.file.file_cache import file_signature
+
+# Increment if the layout of a snapshot, or of any data cached in it, changes
+SNAPSHOT_FORMAT = 1
+
+LOGGER = getLogger(__name__)
+
+
+def snapshot_path(base_folder):
+    """Path of the snapshot of a project
+
+    Parameters
+    ----------
+    base_folder : str
+        Project folder
+
+    Returns
+    -------
+    str
+    """
+    folder = os.environ.get('SMIF_CACHE_DIR')
+    if not folder:
+        cache_home = os.environ.get('XDG_CACHE_HOME') or \
+            os.path.join(os.path.expanduser('~'), '.cache')
+        folder = os.path.join(cache_home, 'smif', 'snapshots')
+    digest = hashlib.blake2b(
+        os.path.abspath(base_folder).encode('utf-8'), digest_size=16).hexdigest()
+    return os.path.join(folder, '{}.pickle'.format(digest))
+
+
+def open_snapshot(base_folder, config_store, metadata_store, save_at_exit=True):
+    """Load a project snapshot into the stores' caches, if there is one
+
+    Only entries whose source files are unchanged are loaded. Nothing is read from the
+    project itself, so a file which cannot be read only causes an error when it is used.
+
+    Parameters
+    ----------
+    base_folder : str
+        Project folder
+    config_store : ~smif.data_layer.file.YamlConfigStore
+    metadata_store : ~smif.data_layer.file.FileMetadataStore
+    save_at_exit : bool, default=True
+        Save the snapshot when the process exits, if the stores' caches have changed
+
+    Returns
+    -------
+    bool
+        True if the snapshot exists and all of its sources are unchanged
+    """
+    caches = _caches(config_store, metadata_store)
+    snapshot = _load(base_folder)
+    up_to_date = snapshot is not None
+    if snapshot is not None:
+        for name, cache in caches.items():
+            entries = _current_entries(base_folder, snapshot['caches'].get(name, {}))
+            if len(entries) < len(snapshot['caches'].get(name, {})):
+                up_to_date = False
+            cache.load_entries(entries)
+
+    if save_at_exit:
+        loaded = _signatures(caches) if up_to_date else None
+        atexit.register(_save_if_changed, base_folder, config_store, metadata_store, loaded)
+    return up_to_date
+
+
+def _load(base_folder):
+    """Read the snapshot of a project, or None if there is no usable snapshot
+    """
+    path = snapshot_path(base_folder)
+    try:
+        with open(path, 'rb') as file_handle:
+            snapshot = pickle.load(file_handle)
+    except FileNotFoundError:
+        return None
+    except Exception as ex:  # a corrupt or incompatible snapshot is replaced when saved
+        LOGGER.warning("Ignoring unreadable project snapshot at %s: %s", path, ex)
+        return None
+
+    if snapshot.get('format') != SNAPSHOT_FORMAT or \
+            snapshot.get('smif_version') != smif.__version__ or \
+            snapshot.get('base_folder') != os.path.abspath(base_folder):
+        return None
+    return snapshot
+
+
+def save_snapshot(base_folder, config_store, metadata_store):
+    """Save the contents of the stores' caches as a project snapshot
+
+    Failure to write is logged rather than raised, so that read-only projects can still be
+    used.
+
+    Parameters
+    ----------
+    base_folder : str
+        Project folder
+    config_store : ~smif.data_layer.file.YamlConfigStore
+    metadata_store : ~smif.data_layer.file.FileMetadataStore
+    """
+    caches = {}
+    for name, cache in _caches(config_store, metadata_store).items():
+        entries = {}
+        for abs_path, entry in cache.entries().items():
+            if os.path.exists(abs_path):
+                entries[os.path.relpath(abs_path, base_folder)] = entry
+        caches[name] = entries
+    if not any(caches.values()):
+        return
+
+    snapshot = {
+        'format': SNAPSHOT_FORMAT,
+        'smif_version': smif.__version__,
+        'base_folder': os.path.abspath(base_folder),
+        'caches': caches
+    }
+
+    path = snapshot_path(base_folder)
+    tmp_path = '{}.{}.tmp'.format(path, os.getpid())
+    try:
+        # only the user may write snapshots, as loading one can run code
+        os.makedirs(os.path.dirname(path), mode=0o700, exist_ok=True)
+        with open(tmp_path, 'wb') as file_handle:
+            pickle.dump(snapshot, file_handle, protocol=pickle.HIGHEST_PROTOCOL)
+        # replace atomically, so concurrent readers see either the old or the new snapshot
+        os.replace(tmp_path, path)
+    except OSError as ex:
+        LOGGER.warning("Could not save project snapshot to %s: %s", path, ex)
+
+
+def _save_if_changed(base_folder, config_store, metadata_store, loaded):
+    """Save a snapshot unless the stores' caches hold just what was loaded from it
+    """
+    if _signatures(_caches(config_store, metadata_store)) != loaded:
+        save_snapshot(base_folder, config_store, metadata_store)
+
+
+def _signatures(caches):
+    return {
+        name: {path: signature for path, (signature, _) in cache.entries().items()}
+        for name, cache in caches.items()
+    }
+
+
+def _caches(config_store, metadata_store):
+    caches = {}
+    for prefix, store in (('config', config_store), ('metadata', metadata_store)):
+        for name, cache in store.caches.items():
+            caches['{}.{}'.format(prefix, name)] = cache
+    return caches
+
+
+def _current_entries(base_folder, entries):
+    """Filter saved cache entries to those whose source file is unchanged, with paths
+    relative to the project folder made absolute
+    """
+    current_entries = {}
+    for rel_path, (signature, data) in entries.items():
+        abs_path = os.path.join(base_folder, rel_path)
+        try:
+            current = file_signature(abs_path)
+        except FileNotFoundError:
+            current = None
+        if current == signature:
+            current_entries[abs_path] = (signature, data)
+    return current_entries
@@ -0,0 +1,302 @@
+"""Opt-in I/O instrumentation for the store
+
+:func:`instrument` wraps the public read/write methods of a store object so that every call
+is counted and timed. Statistics are collected in an :class:`IOStats` object, keyed by
+``<prefix>.<method>``, with call and error counts, bytes moved (for DataArray and
+numpy.ndarray data), total and maximum latency and a latency histogram.
+
+Cache hit rates are reported for:
+
+- conversion coefficients, where a ``read_coefficients`` call which raises
+  :class:`~smif.exception.SmifDataNotFoundError` is a miss
+- any caches reported by the ``cache_info()`` method of an instrumented object
+
+Usually accessed through :meth:`smif.data_layer.Store.instrument`::
+
+    >>> stats = store.instrument()
+    >>> store.read_scenario_variant_data('population', 'central', 'population', 2015)
+    >>> stats.as_dict()['methods']['data_store.read_scenario_variant_data']['calls']
+    1
+"""
+import json
+import threading
+import time
+from bisect import bisect_left
+from collections import OrderedDict
+from functools import wraps
+
+import numpy as np  # type: ignore
+from smif.data_layer.data_array import DataArray
+from smif.exception import SmifDataNotFoundError
+
+# Upper bounds of latency histogram buckets, in seconds
+LATENCY_BUCKETS = (1e-4, 1e-3, 1e-2, 1e-1, 1.0, 10.0)
+LATENCY_LABELS = ('<0.1ms', '<1ms', '<10ms', '<100ms', '<1s', '<10s', '>=10s')
+
+# Method name prefixes which are instrumented
+INSTRUMENTED_PREFIXES = (
+    'read_', 'write_', 'update_', 'delete_', 'available_', 'prepare_', 'get_', 'canonical_'
+)
+
+# Methods which act as a cache lookup, reporting a miss by raising SmifDataNotFoundError
+CACHE_METHODS = {
+    'read_coefficients': 'coefficients'
+}
+
+
+class MethodStats(object):
+    """Counters for calls to a single method
+    """
+    __slots__ = ('calls', 'errors', 'bytes', 'total_s', 'max_s', 'histogram')
+
+    def __init__(self):
+        self.calls = 0
+        self.errors = 0
+        self.bytes = 0
+        self.total_s = 0.0
+        self.max_s = 0.0
+        self.histogram = [0] * len(LATENCY_LABELS)
+
+    def as_dict(self):
+        """Serialise to dict representation
+        """
+        return OrderedDict([
+            ('calls', self.calls),
+            ('errors', self.errors),
+            ('bytes', self.bytes),
+            ('total_s', self.total_s),
+            ('mean_s', self.total_s / self.calls if self.calls else 0.0),
+            ('max_s', self.max_s),
+            ('histogram', OrderedDict(zip(LATENCY_LABELS, self.histogram)))
+        ])
+
+
+class IOStats(object):
+    """Collect I/O statistics for instrumented stores
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._methods = OrderedDict()
+        self._caches = OrderedDict()
+        # objects with a cache_info() method, along with a baseline taken when added
+        self._cache_sources = []
+
+    def record(self, method, seconds, nbytes=None, error=False):
+        """Record a call to a method
+
+        Parameters
+        ----------
+        method : str
+        seconds : float
+            Time taken by the call
+        nbytes : int, optional
+            Size of data read or written
+        error : bool, default=False
+            True if the call raised an exception
+        """
+        with self._lock:
+            try:
+                stats = self._methods[method]
+            except KeyError:
+                stats = self._methods[method] = MethodStats()
+            stats.calls += 1
+            if error:
+                stats.errors += 1
+            if nbytes:
+                stats.bytes += nbytes
+            stats.total_s += seconds
+            stats.max_s = max(stats.max_s, seconds)
+            stats.histogram[bisect_left(LATENCY_BUCKETS, seconds)] += 1
+
+    def record_cache(self, cache, hit):
+        """Record a cache lookup
+
+        Parameters
+        ----------
+        cache : str
+            Name of the cache
+        hit : bool
+        """
+        with self._lock:
+            try:
+                counts = self._caches[cache]
+            except KeyError:
+                counts = self._caches[cache] = {'hits': 0, 'misses': 0}
+            counts['hits' if hit else 'misses'] += 1
+
+    def add_cache_source(self, prefix, obj):
+        """Report caches from an object with a ``cache_info()`` method
+
+        ``cache_info()`` should return a dict of ``{cache_name: {'hits': int, 'misses':
+        int}}``. Only lookups made after the object is added are counted.
+        """
+        self._cache_sources.append((prefix, obj, obj.cache_info()))
+
+    def merge(self, stats):
+        """Add statistics recorded elsewhere, for example by another process
+
+        Parameters
+        ----------
+        stats : dict
+            As returned by :meth:`as_dict`
+        """
+        with self._lock:
+            for method, other in stats['methods'].items():
+                try:
+                    method_stats = self._methods[method]
+                except KeyError:
+                    method_stats = self._methods[method] = MethodStats()
+                method_stats.calls += other['calls']
+                method_stats.errors += other['errors']
+                method_stats.bytes += other['bytes']
+                method_stats.total_s += other['total_s']
+                method_stats.max_s = max(method_stats.max_s, other['max_s'])
+                for index, count in enumerate(other['histogram'].values()):
+                    method_stats.histogram[index] += count
+            for cache, other in stats['caches'].items():
+                counts = self._caches.setdefault(cache, {'hits': 0, 'misses': 0})
+                counts['hits'] += other['hits']
+                counts['misses'] += other['misses']
+
+    def reset(self):
+        """Discard all recorded statistics
+        """
+        with self._lock:
+            self._methods = OrderedDict()
+            self._caches = OrderedDict()
+            self._cache_sources = [
+                (prefix, obj, obj.cache_info()) for prefix, obj, _ in self._cache_sources
+            ]
+
+    @property
+    def methods(self):
+        """Statistics per method
+
+        Returns
+        -------
+        dict of {str: dict}
+        """
+        with self._lock:
+            return OrderedDict(
+                (name, stats.as_dict()) for name, stats in self._methods.items())
+
+    @property
+    def caches(self):
+        """Hits, misses and hit rate per cache
+
+        Returns
+        -------
+        dict of {str: dict}
+        """
+        with self._lock:
+            counts = OrderedDict(
+                (name, dict(cache_counts)) for name, cache_counts in self._caches.items())
+        for prefix, obj, baseline in self._cache_sources:
+            for name, current in obj.cache_info().items():
+                before = baseline.get(name, {'hits': 0, 'misses': 0})
+                counts['{}.{}'.format(prefix, name)] = {
+                    'hits': current['hits'] - before['hits'],
+                    'misses': current['misses'] - before['misses']
+                }
+        for cache_counts in counts.values():
+            lookups = cache_counts['hits'] + cache_counts['misses']
+            cache_counts['hit_rate'] = cache_counts['hits'] / lookups if lookups else None
+        return counts
+
+    def as_dict(self):
+        """Serialise to dict representation
+        """
+        return {
+            'methods': self.methods,
+            'caches': self.caches
+        }
+
+    def write_json(self, path):
+        """Write statistics to a JSON file
+
+        Parameters
+        ----------
+        path : str
+        """
+        with open(path, 'w') as file_handle:
+            json.dump(self.as_dict(), file_handle, indent=2)
+
+
+def instrument(obj, stats, prefix, record_caches=True):
+    """Record calls to the public read/write methods of an object
+
+    Methods are wrapped on the instance, so the object's type is unchanged. Call
+    :func:`uninstrument` to remove the wrappers.
+
+    Parameters
+    ----------
+    obj : object
+        Store, config store, metadata store or data store
+    stats : IOStats
+    prefix : str
+        Prefix for method names in the statistics, for example 'data_store'
+    record_caches : bool, default=True
+        Record cache lookups - set to False for objects which delegate to other
+        instrumented objects, to avoid counting lookups twice
+    """
+    for name in dir(type(obj)):
+        if not name.startswith(INSTRUMENTED_PREFIXES) or name in vars(obj):
+            continue
+        if callable(getattr(type(obj), name)):
+            method = getattr(obj, name)
+            cache = CACHE_METHODS.get(name) if record_caches else None
+            setattr(obj, name, _wrap(method, stats, '{}.{}'.format(prefix, name), cache))
+    if record_caches and hasattr(obj, 'cache_info'):
+        stats.add_cache_source(prefix, obj)
+
+
+def uninstrument(obj):
+    """Remove wrappers added by :func:`instrument`
+    """
+    for name, value in list(vars(obj).items()):
+        if hasattr(value, '__instrumented__'):
+            delattr(obj, name)
+
+
+def _wrap(method, stats, key, cache):
+    is_write = method.__name__.startswith(('write_', 'update_'))
+
+    @wraps(method)
+    def wrapper(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            result = method(*args, **kwargs)
+        except SmifDataNotFoundError:
+            stats.record(key, time.perf_counter() - start, error=True)
+            if cache:
+                stats.record_cache(cache, hit=False)
+            raise
+        except Exception:
+            stats.record(key, time.perf_counter() - start, error=True)
+            raise
+        elapsed = time.perf_counter() - start
+        if is_write:
+            nbytes = sum(_nbytes(arg) for arg in args) + \
+                sum(_nbytes(arg) for arg in kwargs.values())
+        else:
+            nbytes = _nbytes(result)
+        stats.record(key, elapsed, nbytes)
+        if cache:
+            stats.record_cache(cache, hit=True)
+        return result
+
+    wrapper.__instrumented__ = True
+    return wrapper
+
+
+def _nbytes(value):
+    """Size in bytes of array data, or zero for anything else
+    """
+    if isinstance(value, DataArray):
+        if value.is_sparse:
+            # measure without converting to dense, which would replace the sparse data
+            return value.as_coo().nbytes
+        return value.as_ndarray().nbytes
+    if isinstance(value, np.ndarray):
+        return value.nbytes
+    return 0
@@ -3,8 +3,9 @@
 from collections import OrderedDict
 from copy import copy, deepcopy
 
+import numpy as np  # type: ignore
 from smif.data_layer.abstract_config_store import ConfigStore
-from smif.data_layer.abstract_data_store import DataStore
+from smif.data_layer.abstract_data_store import DataStore, ResultsWriter
 from smif.data_layer.abstract_metadata_store import MetadataStore
 from smif.data_layer.data_array import DataArray
 from smif.exception import (SmifDataExistsError, SmifDataMismatchError,
@@ -256,21 +257,22 @@ class MemoryDataStore(DataStore):
         self._model_parameter_defaults = OrderedDict()
         self._coefficients = OrderedDict()
         self._results = OrderedDict()
+        self._model_run_stats = OrderedDict()
 
     # region Data Array
-    def read_scenario_variant_data(self, key, spec, timestep=None):
-        return self._read_data_array(key, spec, timestep)
+    def read_scenario_variant_data(self, key, spec, timestep=None, selection=None):
+        return self._read_data_array(key, spec, timestep, selection)
 
     def write_scenario_variant_data(self, key, data, timestep=None):
         self._write_data_array(key, data, timestep)
 
-    def read_narrative_variant_data(self, key, spec, timestep=None):
-        return self._read_data_array(key, spec, timestep)
+    def read_narrative_variant_data(self, key, spec, timestep=None, selection=None):
+        return self._read_data_array(key, spec, timestep, selection)
 
     def write_narrative_variant_data(self, key, data, timestep=None):
         self._write_data_array(key, data, timestep)
 
-    def _read_data_array(self, key, spec, timestep=None):
+    def _read_data_array(self, key, spec, timestep=None, selection=None):
         if timestep:
             try:
                 data = self._data_array[key, timestep]
@@ -291,6 +293,8 @@ class MemoryDataStore(DataStore):
             raise SmifDataMismatchError(
                 "Spec did not match reading {}, requested {}, got {}".format(
                     spec.name, spec, data.spec))
+        if selection:
+            data = data.select(selection)
         return data
 
     def _filter_timestep(self, data, read_spec, timestep):
@@ -375,7 +379,7 @@ class MemoryDataStore(DataStore):
 
     # region Results
     def read_results(self, modelrun_name, model_name, output_spec, timestep=None,
-                     decision_iteration=None):
+                     decision_iteration=None, selection=None):
         key = (modelrun_name, model_name, output_spec.name, timestep, decision_iteration)
 
         try:
@@ -383,12 +387,25 @@ class MemoryDataStore(DataStore):
         except KeyError:
             raise SmifDataNotFoundError("Cannot find results for {}".format(key))
 
-        return DataArray(output_spec, results)
+        data = DataArray(output_spec, *results)
+        if selection:
+            data = data.select(selection)
+        return data
 
     def write_results(self, data_array, modelrun_name, model_name, timestep=None,
                       decision_iteration=None):
         key = (modelrun_name, model_name, data_array.spec.name, timestep, decision_iteration)
-        self._results[key] = data_array.as_ndarray()
+        if data_array.is_sparse:
+            self._results[key] = (data_array.as_coo(), )
+        else:
+            # keep any mask of missing values, which integer data cannot hold as NaN
+            mask = data_array.mask
+            self._results[key] = (data_array.as_ndarray(), mask if mask.any() else None)
+
+    def open_results_writer(self, output_spec, modelrun_name, model_name, timestep=None,
+                            decision_iteration=None):
+        return _MemoryResultsWriter(
+            self, output_spec, modelrun_name, model_name, timestep, decision_iteration)
 
     def available_results(self, model_run_name):
         results_keys = [
@@ -400,6 +417,18 @@ class MemoryDataStore(DataStore):
         return results_keys
     # endregion
 
+    # region Model run statistics
+    def read_model_run_stats(self, modelrun_name, stats_name):
+        try:
+            return self._model_run_stats[(modelrun_name, stats_name)]
+        except KeyError:
+            msg = "Statistics '{}' not found for model run {}"
+            raise SmifDataNotFoundError(msg.format(stats_name, modelrun_name))
+
+    def write_model_run_stats(self, stats, modelrun_name, stats_name):
+        self._model_run_stats[(modelrun_name, stats_name)] = stats
+    # endregion
+
 
 def _variant_list_to_dict(config):
     config = copy(config)
@@ -433,3 +462,35 @@ def _skip_coords(config, keys):
             except KeyError:
                 pass
     return config
+
+
+class _MemoryResultsWriter(ResultsWriter):
+    """Assemble chunks of results into a single array, saved when the writer is closed
+    """
+    def __init__(self, store, output_spec, modelrun_name, model_name, timestep,
+                 decision_iteration):
+        super().__init__(output_spec)
+        self._store = store
+        self._key = (modelrun_name, model_name, timestep, decision_iteration)
+        self._data = None
+        self._mask = None
+
+    def write(self, data_array):
+        index = np.ix_(*self._positions(data_array))
+        if self._data is None:
+            self._data = np.zeros(self.spec.shape, dtype=data_array.data.dtype)
+            # cells not written are missing
+            self._mask = np.ones(self.spec.shape, dtype=bool)
+        self._data[index] = data_array.data
+        self._mask[index] = data_array.mask
+
+    def close(self):
+        if self._data is None:
+            return
+        mask = self._mask if self._mask.any() else None
+        self._store.write_results(DataArray(self.spec, self._data, mask), *self._key)
+        self.discard()
+
+    def discard(self):
+        self._data = None
+        self._mask = None
@@ -1,10 +1,19 @@
 """Results provides a common interface to access results from model runs.
 """
 
+from collections import OrderedDict, namedtuple
+from fnmatch import fnmatchcase
 from typing import Union
 
-import pandas as pd
+import numpy as np  # type: ignore
+from smif.data_layer.running_statistics import (RunningQuantile,
+                                                RunningStatistics)
 from smif.data_layer.store import Store
+from smif.exception import SmifDataMismatchError, SmifDataNotFoundError
+from smif.metadata import Spec
+
+# Statistics across model runs available from Results.aggregate
+STATISTICS = ('count', 'sum', 'mean', 'var', 'std', 'min', 'max')
 
 
 class Results:
@@ -84,6 +93,8 @@ class Results:
              timesteps: list = None,
              decisions: list = None,
              time_decision_tuples: list = None,
+             max_workers: int = None,
+             output_format: str = 'dataframe'
              ):
         """Return results from the store as a formatted pandas data frame. There are a number
         of ways of requesting specific timesteps/decisions. You can specify either:
@@ -121,6 +132,15 @@ class Results:
             the requested decision iterations
         time_decision_tuples: list
             a list of requested (timestep, decision) tuples
+        max_workers: int, optional
+            the number of threads used to read results - more threads help most where
+            storage is slow to respond, such as a network filesystem
+        output_format: str, default 'dataframe'
+            'dataframe' for a long :class:`pandas.DataFrame`, with a row for each model run,
+            timestep, decision and combination of dimension elements, and a column for each
+            output; 'arrow' for the same columns as a :class:`pyarrow.Table`; or 'xarray'
+            for a :class:`xarray.Dataset` with dimensions model_run, timestep, decision and
+            the output dimensions, where any combination not read is NaN
 
         Raises
         ------
@@ -135,8 +155,12 @@ class Results:
 
         Returns
         -------
-        pandas.DataFrame
+        pandas.DataFrame or pyarrow.Table or xarray.Dataset
+            In the long formats, model_run and dimension columns are categorical
+            (dictionary-encoded), timestep and decision columns are integers, and each output
+            column keeps the output dtype
         """
+        _check_output_format('read', output_format, ('dataframe', 'arrow', 'xarray'))
 
         self.validate_names(model_run_names, model_names, output_names)
 
@@ -146,7 +170,8 @@ class Results:
             output_names,
             timesteps,
             decisions,
-            time_decision_tuples
+            time_decision_tuples,
+            max_workers=max_workers
         )
 
         # Keep tabs on the units for each output
@@ -155,42 +180,320 @@ class Results:
                 res = results_dict[model_run_name][output_name]
                 self._output_units[res.name] = res.unit
 
-        # For each output, concatenate all requested model runs into a single data frame
-        formatted_frames = []
-        for output_name in output_names:
-            # Get each DataArray as a pandas data frame and concatenate, resetting the index to
-            # give back a flat data array
-            list_of_df = [results_dict[x][output_name].as_df() for x in model_run_names]
-            names_of_df = [x for x in results_dict.keys()]
+        if output_format == 'xarray':
+            return _results_as_dataset(results_dict, output_names)
+
+        columns = _results_as_columns(results_dict, output_names)
+        if output_format == 'arrow':
+            return _columns_as_table(columns)
+        return _columns_as_frame(columns)
+
+    def query(self,
+              model_name: str,
+              output_names: list,
+              model_runs: Union[str, list] = '*',
+              timesteps=None,
+              decisions=None,
+              coords: dict = None,
+              max_workers: int = None,
+              output_format: str = 'dataframe'
+              ):
+        """Return results which match a filter on model runs, timesteps, decisions and the
+        elements of each dimension
 
-            formatted_frames.append(
-                pd.concat(list_of_df, keys=names_of_df, names=['model_run']).reset_index())
+        For example, results for regions in the North West, timesteps 2030 to 2050 and
+        decision iterations 0 to 10, from all model runs whose names start 'ssp2_'::
+
+            >>> results.query(
+            ...     'energy_demand', ['energy_demand'],
+            ...     model_runs='ssp2_*', timesteps=(2030, 2050), decisions=(0, 10),
+            ...     coords={'lad': north_west_lads})
+
+        Results available for each model run are listed once, and filtered before any are
+        read. Dimension filters are passed down to each read, so only the matching data is
+        read from the store. Model runs with no matching results are left out.
+
+        Parameters
+        ----------
+        model_name: str
+            the sector model name
+        output_names: list
+            the requested output names (output specs must all match)
+        model_runs: str or list, default '*'
+            model run names or glob patterns, as for :func:`fnmatch.fnmatchcase`
+        timesteps: int or tuple or list, optional
+            a timestep, a (first, last) tuple of an inclusive range of timesteps, or a list
+            of timesteps and ranges - by default, all timesteps
+        decisions: int or tuple or list, optional
+            decision iterations, in the same form as timesteps - by default, all decision
+            iterations
+        coords: dict, optional
+            element names to read, by dimension name - by default, all elements
+        max_workers: int, optional
+            the number of threads used to read results
+        output_format: str, default 'dataframe'
+            as for :meth:`read`
+
+        Raises
+        ------
+        SmifDataNotFoundError
+            If the model is not found, or no model runs or results match
+        ValueError
+            If an output name is not an output of the model
 
-        # Append the other output columns to the first data frame
-        formatted_frame = formatted_frames.pop(0)
-        output_names.pop(0)
+        Returns
+        -------
+        pandas.DataFrame or pyarrow.Table or xarray.Dataset
+            As for :meth:`read`
+        """
+        _check_output_format('query', output_format, ('dataframe', 'arrow', 'xarray'))
+        if not output_names:
+            raise ValueError('Results.query() requires at least one output name')
+        self._model_outputs(model_name, output_names)
+
+        patterns = [model_runs] if isinstance(model_runs, str) else list(model_runs)
+        model_run_names = [
+            name for name in self.list_model_runs()
+            if any(fnmatchcase(name, pattern) for pattern in patterns)
+        ]
+        if not model_run_names:
+            raise SmifDataNotFoundError(
+                "No model runs match {}".format(patterns))
+
+        requests = self._plan_query(model_name, output_names, model_run_names,
+                                    _ValueFilter(timesteps), _ValueFilter(decisions))
+        if not requests:
+            raise SmifDataNotFoundError(
+                "No results for {} from {} match the query".format(output_names, model_name))
+
+        darrays = self._store.read_results_batch(
+            model_name, requests, selection=coords, max_workers=max_workers)
+        results_dict = OrderedDict()  # type: OrderedDict
+        for (model_run_name, output_name, _), darray in zip(requests, darrays):
+            results_dict.setdefault(model_run_name, OrderedDict())[output_name] = darray
+            self._output_units[output_name] = darray.unit
+
+        if output_format == 'xarray':
+            return _results_as_dataset(results_dict, output_names)
+        columns = _results_as_columns(results_dict, output_names)
+        if output_format == 'arrow':
+            return _columns_as_table(columns)
+        return _columns_as_frame(columns)
+
+    def _plan_query(self, model_name, output_names, model_run_names, timestep_filter,
+                    decision_filter):
+        """List the (timestep, decision) tuples to read for each model run and output,
+        leaving out model runs with no matching results
+
+        Returns
+        -------
+        list[tuple]
+            Each a (model_run_name, output_name, time_decision_tuples) tuple
+        """
+        requests = []
+        for model_run_name in model_run_names:
+            # list available results once for each model run
+            available = self._store.available_results(model_run_name)
+            run_requests = []
+            for output_name in output_names:
+                tuples = sorted(
+                    ((timestep, decision) for timestep, decision, model, output in available
+                     if model == model_name and output == output_name
+                     and timestep in timestep_filter and decision in decision_filter),
+                    key=_tuple_sort_key)
+                run_requests.append((model_run_name, output_name, tuples))
+            if any(tuples for _, _, tuples in run_requests):
+                requests.extend(run_requests)
+        return requests
 
-        for other_frame, output_name in zip(formatted_frames, output_names):
-            assert (formatted_frame['model_run'] == other_frame['model_run']).all()
-            assert (formatted_frame['timestep_decision'] == other_frame[
-                'timestep_decision']).all()
-            formatted_frame[output_name] = other_frame[output_name]
+    def aggregate(self,
+                  model_run_names: list,
+                  model_names: list,
+                  output_names: list,
+                  statistics: list = None,
+                  quantiles: list = None,
+                  over: list = None,
+                  groupings: dict = None,
+                  timesteps: list = None,
+                  decisions: list = None,
+                  time_decision_tuples: list = None,
+                  max_workers: int = None,
+                  output_format: str = 'dataframe'
+                  ):
+        """Return statistics of results across model runs, optionally summed over or within
+        groups of dimension elements
+
+        Results are read one model run at a time, reduced, then added to running statistics,
+        so memory use depends on the size of one model run's results, not on the number of
+        model runs. Mean and variance are exact (by Welford's algorithm); quantiles are
+        estimated by the P-squared algorithm, and are exact for up to five model runs.
+
+        For example, the mean and 5th and 95th percentiles across an ensemble of the total
+        demand in each country::
+
+            >>> results.aggregate(
+            ...     ensemble_run_names, ['energy_demand'], ['demand'],
+            ...     statistics=['mean'], quantiles=[0.05, 0.95],
+            ...     groupings={'lad': {'E07000128': 'England', 'W06000001': 'Wales', ...}})
+
+        Timesteps and decisions are selected as for :meth:`read`. Any missing values are
+        skipped, both in sums and in statistics.
+
+        Parameters
+        ----------
+        model_run_names: list
+            the requested model run names
+        model_names: list
+            the requested sector model names (exactly one required)
+        output_names: list
+            the requested output names (output specs must all match)
+        statistics: list, default ['mean']
+            statistics across model runs, any of 'count', 'sum', 'mean', 'var', 'std', 'min'
+            and 'max'
+        quantiles: list, optional
+            quantiles across model runs, each between 0 and 1
+        over: list, optional
+            names of dimensions to sum over, within each result
+        groupings: dict, optional
+            for any dimension, a dict from each element name to the name of a group - values
+            are summed within each group
+        timesteps: list
+            the requested timesteps
+        decisions: list
+            the requested decision iterations
+        time_decision_tuples: list
+            a list of requested (timestep, decision) tuples
+        max_workers: int, optional
+            the number of threads used to read the results of each model run
+        output_format: str, default 'dataframe'
+            'dataframe' for a long :class:`pandas.DataFrame` or 'arrow' for a
+            :class:`pyarrow.Table`
+
+        Returns
+        -------
+        pandas.DataFrame or pyarrow.Table
+            With columns for timestep, decision and each remaining (or grouped) dimension,
+            then a column for each output and statistic, named like 'demand_mean', or
+            'demand_p95' for the 0.95 quantile
+        """
+        if statistics is None:
+            statistics = ['mean']
+        quantiles = list(quantiles or [])
+        _validate_aggregate_options(statistics, output_format)
+        self.validate_names(model_run_names, model_names, output_names)
+        spec = self._output_spec(model_names[0], output_names)
+        reductions = _plan_reductions(spec, over or [], groupings or {})
+        shape = tuple(
+            len(reduction.labels) for reduction in reductions if reduction.labels is not None)
+
+        # running statistics for each output start with no (timestep, decision) tuples
+        running = OrderedDict(
+            (output_name, [RunningStatistics(shape + (0, ))] + [
+                RunningQuantile(quantile, shape + (0, )) for quantile in quantiles])
+            for output_name in output_names
+        )
+        tuple_positions = OrderedDict()  # type: OrderedDict
+
+        for model_run_name in model_run_names:
+            results = self._store.get_results(
+                [model_run_name], model_names[0], output_names, timesteps, decisions,
+                time_decision_tuples, max_workers=max_workers)[model_run_name]
 
-        # Unpack the timestep_decision tuples into individual columns and drop the combined
-        formatted_frame[['timestep', 'decision']] = pd.DataFrame(
-            formatted_frame['timestep_decision'].tolist(), index=formatted_frame.index)
+            for output_name, darray in results.items():
+                self._output_units[output_name] = darray.unit
+            _add_to_running(results, reductions, shape, running, tuple_positions)
 
-        formatted_frame = formatted_frame.drop(columns=['timestep_decision'])
+        columns = _aggregate_as_columns(
+            spec, reductions, list(tuple_positions), running, statistics)
+        if output_format == 'arrow':
+            return _columns_as_table(columns)
+        return _columns_as_frame(columns)
 
-        # Now reorder the columns. Want model_run then timestep then decision
-        cols = formatted_frame.columns.tolist()
+    def stream(self,
+               model_run_name: str,
+               model_name: str,
+               output_name: str,
+               timesteps=None,
+               decisions=None,
+               coords: dict = None,
+               batch_size: int = 65536):
+        """Stream results of one output from a model run, in long format, as Arrow record
+        batches
 
-        assert (cols[0] == 'model_run')
-        cols.insert(1, cols.pop(cols.index('timestep')))
-        cols.insert(2, cols.pop(cols.index('decision')))
-        assert (cols[0:3] == ['model_run', 'timestep', 'decision'])
+        Results are read from the store one (timestep, decision) at a time, as the batches
+        are consumed, so a large set of results can be sent on without being held in memory
+        at once::
 
-        return formatted_frame[cols]
+            >>> stream = results.stream('energy_central', 'energy_demand', 'gas_demand',
+            ...                         timesteps=(2020, 2030))
+            >>> stream.num_rows
+            3800
+            >>> for batch in stream.batches(start=1000, stop=2000):
+            ...     send(batch)
+
+        Parameters
+        ----------
+        model_run_name: str
+        model_name: str
+        output_name: str
+        timesteps: int or tuple or list, optional
+            as for :meth:`query`
+        decisions: int or tuple or list, optional
+            as for :meth:`query`
+        coords: dict, optional
+            element names to read, by dimension name - by default, all elements
+        batch_size: int, default 65536
+            the most rows in any batch
+
+        Raises
+        ------
+        SmifDataNotFoundError
+            If the model has no such output
+
+        Returns
+        -------
+        ResultStream
+        """
+        outputs = {
+            output['name']: output for output in self._store.read_model(model_name)['outputs']
+        }
+        if output_name not in outputs:
+            msg = "Output '{}' not found in sector model '{}'"
+            raise SmifDataNotFoundError(msg.format(output_name, model_name))
+
+        requests = self._plan_query(model_name, [output_name], [model_run_name],
+                                    _ValueFilter(timesteps), _ValueFilter(decisions))
+        tuples = requests[0][2] if requests else []
+        stream = ResultStream(self._store, model_run_name, model_name,
+                              Spec.from_dict(outputs[output_name]), tuples,
+                              batch_size=batch_size)
+        if coords:
+            stream = stream.select(coords)
+        return stream
+
+    def _model_outputs(self, model_name, output_names):
+        """Configuration of a model's outputs, by name, checking all `output_names` are
+        among them
+        """
+        outputs = {
+            output['name']: output for output in self._store.read_model(model_name)['outputs']
+        }
+        for output_name in output_names:
+            if output_name not in outputs:
+                msg = '{} is not an output of sector model {}.'
+                raise ValueError(msg.format(output_name, model_name))
+        return outputs
+
+    def _output_spec(self, model_name, output_names):
+        """Spec of the first of a model's outputs, checking all are numeric
+        """
+        outputs = self._model_outputs(model_name, output_names)
+        for output_name in output_names:
+            dtype = outputs[output_name]['dtype']
+            if not _is_numeric(dtype):
+                msg = "Results.aggregate() requires numeric outputs, but '{}' has dtype {}"
+                raise ValueError(msg.format(output_name, dtype))
+        return Spec.from_dict(outputs[output_names[0]])
 
     def get_units(self, output_name: str):
         """ Return the units of a given output.
@@ -221,3 +524,615 @@ class Results:
             raise ValueError(
                 'Results.read() requires at least one output name'
             )
+
+
+# A column of results in long format - categorical where `categories` is given, in which
+# case `values` are codes, with missing values marked in `mask` (or None if none missing)
+_Column = namedtuple('_Column', ['name', 'values', 'mask', 'categories'])
+
+
+class ResultStream(object):
+    """Results of one output from a model run, as a stream of Arrow record batches
+
+    Rows are ordered by (timestep, decision), then by the elements of each dimension in
+    turn. Each batch has columns timestep, decision, each dimension (dictionary-encoded) and
+    the output, and holds rows from only one (timestep, decision), so no batch spans two reads
+    from the store.
+
+    Parameters
+    ----------
+    store : Store
+    model_run_name : str
+    model_name : str
+    output_spec : smif.metadata.spec.Spec
+    tuples : list[tuple]
+        (timestep, decision) tuples to read
+    selection : dict, optional
+        element names to read, by dimension name
+    batch_size : int, default 65536
+
+    Attributes
+    ----------
+    spec : smif.metadata.spec.Spec
+        The output spec, with any selection applied
+    num_rows : int
+    schema : pyarrow.Schema
+    """
+    def __init__(self, store, model_run_name, model_name, output_spec, tuples,
+                 selection=None, batch_size=65536):
+        if batch_size < 1:
+            raise ValueError("ResultStream batch_size must be at least 1, got {}".format(
+                batch_size))
+        self._store = store
+        self.model_run_name = model_run_name
+        self.model_name = model_name
+        self.output_spec = output_spec
+        self.tuples = list(tuples)
+        self.selection = selection
+        self.batch_size = batch_size
+        self.spec = output_spec.select(selection) if selection else output_spec
+        self._num_cells = int(np.prod(self.spec.shape))
+        self._dictionaries = None
+
+    def select(self, selection):
+        """Stream of a subset of the elements of some dimensions
+
+        Parameters
+        ----------
+        selection : dict[str, list]
+            Map from dimension name to the names of the elements to select, in order
+
+        Returns
+        -------
+        ResultStream
+        """
+        return ResultStream(self._store, self.model_run_name, self.model_name,
+                            self.output_spec, self.tuples, selection, self.batch_size)
+
+    @property
+    def num_rows(self):
+        return self._num_cells * len(self.tuples)
+
+    @property
+    def schema(self):
+        import pyarrow as pa  # type: ignore
+
+        fields = [pa.field('timestep', pa.int64()), pa.field('decision', pa.int64())]
+        for dim, dictionary in zip(self.spec.dims, self._dim_dictionaries()):
+            fields.append(pa.field(dim, pa.dictionary(pa.int32(), dictionary.type)))
+        fields.append(pa.field(self.spec.name, _arrow_type(self.spec.dtype)))
+        return pa.schema(fields)
+
+    def batches(self, start=0, stop=None):
+        """Record batches of rows from `start` up to, but not including, `stop`
+
+        Only the results which hold these rows are read.
+
+        Parameters
+        ----------
+        start : int, default 0
+        stop : int, optional
+            By default, the end of the stream
+
+        Yields
+        ------
+        pyarrow.RecordBatch
+        """
+        stop = self.num_rows if stop is None else min(stop, self.num_rows)
+        if start >= stop:
+            return
+        schema = self.schema
+        first, last = start // self._num_cells, (stop - 1) // self._num_cells
+        for index in range(first, last + 1):
+            timestep, decision = self.tuples[index]
+            darray = self._store.read_results(
+                self.model_run_name, self.model_name, self.output_spec, timestep, decision,
+                selection=self.selection)
+            offset = index * self._num_cells
+            rows = range(max(start - offset, 0), min(stop - offset, self._num_cells))
+            for batch_start in range(rows.start, rows.stop, self.batch_size):
+                batch_stop = min(batch_start + self.batch_size, rows.stop)
+                yield self._batch(schema, darray, timestep, decision, batch_start, batch_stop)
+
+    def _batch(self, schema, darray, timestep, decision, start, stop):
+        """Rows `start` to `stop` of a single result as a record batch
+        """
+        import pyarrow as pa  # type: ignore
+
+        num_rows = stop - start
+        positions = np.unravel_index(np.arange(start, stop), self.spec.shape) \
+            if self.spec.dims else ()
+        arrays = [_constant_array(timestep, num_rows), _constant_array(decision, num_rows)]
+        for dim_positions, dictionary in zip(positions, self._dim_dictionaries()):
+            arrays.append(pa.DictionaryArray.from_arrays(
+                pa.array(dim_positions.astype('int32')), dictionary))
+
+        values = darray.data.reshape(-1)[start:stop]
+        mask = darray.mask.reshape(-1)[start:stop]
+        arrays.append(pa.array(values, mask=mask if mask.any() else None,
+                               type=schema.field(self.spec.name).type))
+        return pa.RecordBatch.from_arrays(arrays, schema=schema)
+
+    def _dim_dictionaries(self):
+        import pyarrow as pa  # type: ignore
+
+        if self._dictionaries is None:
+            self._dictionaries = [pa.array(self.spec.dim_names(dim)) for dim in self.spec.dims]
+        return self._dictionaries
+
+
+def _constant_array(value, length):
+    """Arrow int64 array of a repeated value, all null if the value is None
+    """
+    import pyarrow as pa  # type: ignore
+
+    if value is None:
+        return pa.nulls(length, type=pa.int64())
+    return pa.array(np.full(length, value, dtype='int64'))
+
+
+def _arrow_type(dtype):
+    """Arrow type of the values of an output
+    """
+    import pyarrow as pa  # type: ignore
+
+    dtype = np.dtype(dtype)
+    if dtype.kind in 'OUS':
+        return pa.string()
+    return pa.from_numpy_dtype(dtype)
+
+
+def _results_as_columns(results_dict, output_names):
+    """Lay out results in long format, one row for each model run, (timestep, decision) and
+    combination of dimension elements
+
+    Columns are filled directly from each result's data, without building a row of Python
+    objects for each value. Each result is dropped from `results_dict` once copied, to keep
+    peak memory low.
+
+    Returns
+    -------
+    list[_Column]
+        Columns for model_run, timestep, decision, each dimension and each output
+    """
+    model_run_names = list(results_dict)
+    spec = results_dict[model_run_names[0]][output_names[0]].spec
+    dims, dim_shape = spec.dims[:-1], spec.shape[:-1]
+
+    run_tuples = _run_tuples(results_dict, output_names)
+    num_cells = int(np.prod(dim_shape))
+    num_rows = sum(num_cells * len(tuples) for tuples in run_tuples.values())
+
+    run_codes = np.empty(num_rows, dtype=_code_dtype(len(model_run_names)))
+    dim_codes = [np.empty(num_rows, dtype=_code_dtype(size)) for size in dim_shape]
+    timestep = np.empty(num_rows, dtype='int64')
+    timestep_mask = np.zeros(num_rows, dtype=bool)
+    decision = np.empty(num_rows, dtype='int64')
+    decision_mask = np.zeros(num_rows, dtype=bool)
+    values = OrderedDict()  # type: OrderedDict
+    value_masks = OrderedDict()  # type: OrderedDict
+
+    start = 0
+    for run_index, (model_run_name, tuples) in enumerate(run_tuples.items()):
+        shape = dim_shape + (len(tuples), )
+        rows = slice(start, start + num_cells * len(tuples))
+        start = rows.stop
+
+        run_codes[rows] = run_index
+        for axis, codes in enumerate(dim_codes):
+            _fill_along_axis(codes[rows], shape, axis, np.arange(shape[axis]))
+        timesteps = [timestep_ for timestep_, _ in tuples]
+        decisions = [decision_ for _, decision_ in tuples]
+        _fill_along_axis(timestep[rows], shape, -1, _fill_none(timesteps))
+        _fill_along_axis(timestep_mask[rows], shape, -1, _is_none(timesteps))
+        _fill_along_axis(decision[rows], shape, -1, _fill_none(decisions))
+        _fill_along_axis(decision_mask[rows], shape, -1, _is_none(decisions))
+
+        for output_name in output_names:
+            darray = results_dict[model_run_name].pop(output_name)
+            if output_name not in values:
+                values[output_name] = np.empty(num_rows, dtype=darray.data.dtype)
+                value_masks[output_name] = np.zeros(num_rows, dtype=bool)
+            if darray.data.dtype.kind in 'biu':
+                # missing values are marked by the mask alone
+                values[output_name][rows] = darray.data.reshape(-1)
+            else:
+                values[output_name][rows] = darray.as_filled().reshape(-1)
+            value_masks[output_name][rows] = darray.mask.reshape(-1)
+
+    columns = [
+        _Column('model_run', run_codes, None, model_run_names),
+        _Column('timestep', timestep, _any_or_none(timestep_mask), None),
+        _Column('decision', decision, _any_or_none(decision_mask), None)
+    ]
+    for dim, codes in zip(dims, dim_codes):
+        columns.append(_Column(dim, codes, None, spec.dim_names(dim)))
+    for output_name, output_values in values.items():
+        mask = _any_or_none(value_masks.get(output_name))
+        columns.append(_Column(output_name, output_values, mask, None))
+    return columns
+
+
+def _run_tuples(results_dict, output_names):
+    """The (timestep, decision) tuples read for each model run, which must be the same for
+    every output
+
+    Returns
+    -------
+    OrderedDict
+        Lists of tuples, by model run name
+    """
+    run_tuples = OrderedDict()  # type: OrderedDict
+    for model_run_name, results in results_dict.items():
+        tuples = results[output_names[0]].dim_names('timestep_decision')
+        for output_name in output_names[1:]:
+            if results[output_name].dim_names('timestep_decision') != tuples:
+                msg = "Results for '{}' and '{}' in model run '{}' are not available for " \
+                      "the same timesteps and decisions"
+                raise SmifDataMismatchError(
+                    msg.format(output_names[0], output_name, model_run_name))
+        run_tuples[model_run_name] = tuples
+    return run_tuples
+
+
+def _check_output_format(method, output_format, output_formats):
+    if output_format not in output_formats:
+        msg = "Results.{}() output_format must be {}, got '{}'"
+        raise ValueError(msg.format(method, _or_list(output_formats), output_format))
+
+
+def _or_list(items):
+    """Format a list of options as "'a', 'b' or 'c'"
+    """
+    quoted = ["'{}'".format(item) for item in items]
+    return ' or '.join([', '.join(quoted[:-1]), quoted[-1]]) if len(quoted) > 1 else quoted[0]
+
+
+def _validate_aggregate_options(statistics, output_format):
+    _check_output_format('aggregate', output_format, ('dataframe', 'arrow'))
+    for statistic in statistics:
+        if statistic not in STATISTICS:
+            msg = "Results.aggregate() statistics must be in {}, got '{}'"
+            raise ValueError(msg.format(STATISTICS, statistic))
+
+
+def _add_to_running(results, reductions, shape, running, tuple_positions):
+    """Reduce the results of one model run and add them to running statistics
+
+    Parameters
+    ----------
+    results : dict
+        DataArray by output name, each with a last 'timestep_decision' dimension
+    reductions : list[_Reduction]
+    shape : tuple
+        Shape of each reduced result, without the 'timestep_decision' dimension
+    running : dict
+        Lists of running statistics by output name, each with a last axis for each tuple in
+        `tuple_positions` - extended for any tuple not seen before
+    tuple_positions : dict
+        Position of each (timestep, decision) tuple along the last axis of the running
+        statistics - updated with any new tuples
+    """
+    new_tuples = [
+        tuple_ for darray in results.values()
+        for tuple_ in darray.dim_names('timestep_decision')
+        if tuple_ not in tuple_positions
+    ]
+    for tuple_ in new_tuples:
+        tuple_positions.setdefault(tuple_, len(tuple_positions))
+    if new_tuples:
+        for output_statistics in running.values():
+            for statistic in output_statistics:
+                statistic.grow(len(tuple_positions) - statistic.count.shape[-1])
+
+    for output_name, darray in results.items():
+        values, present = _reduce(darray, reductions)
+        positions = [
+            tuple_positions[tuple_] for tuple_ in darray.dim_names('timestep_decision')]
+        all_values = np.zeros(shape + (len(tuple_positions), ))
+        all_present = np.zeros(shape + (len(tuple_positions), ), dtype=bool)
+        all_values[..., positions] = values
+        all_present[..., positions] = present
+        for statistic in running[output_name]:
+            statistic.update(all_values, all_present)
+
+
+class _ValueFilter(object):
+    """Match timesteps or decision iterations against values and inclusive ranges
+
+    Parameters
+    ----------
+    spec : int or tuple or list, optional
+        A value, a (first, last) tuple, or a list of values and tuples - None matches any
+        value
+    """
+    def __init__(self, spec):
+        self.any = spec is None
+        if isinstance(spec, tuple):
+            spec = [spec]
+        elif self.any or not hasattr(spec, '__iter__'):
+            spec = [] if self.any else [spec]
+        self.values = set()
+        self.ranges = []
+        for item in spec:
+            if isinstance(item, tuple):
+                first, last = item
+                self.ranges.append((first, last))
+            else:
+                self.values.add(item)
+
+    def __contains__(self, value):
+        if self.any:
+            return True
+        if value is None:
+            return value in self.values
+        return value in self.values or \
+            any(first <= value <= last for first, last in self.ranges)
+
+
+# How each dimension is reduced - `indicator` is None where a dimension is kept, otherwise a
+# matrix from elements to groups, and `labels` are the names of elements or groups, or None
+# where a dimension is summed over
+_Reduction = namedtuple('_Reduction', ['indicator', 'labels'])
+
+
+def _plan_reductions(spec, over, groupings):
+    """Plan how to reduce each dimension of a spec
+
+    Parameters
+    ----------
+    spec : smif.metadata.spec.Spec
+    over : list
+        Names of dimensions to sum over
+    groupings : dict
+        Dicts from element to group name, by dimension name
+
+    Returns
+    -------
+    list[_Reduction]
+    """
+    for dim in list(over) + list(groupings):
+        if dim not in spec.dims:
+            msg = "Cannot aggregate over '{}', which is not a dimension of '{}' - expected " \
+                  "one of {}"
+            raise ValueError(msg.format(dim, spec.name, spec.dims))
+    for dim in groupings:
+        if dim in over:
+            msg = "Cannot both sum over and group dimension '{}'"
+            raise ValueError(msg.format(dim))
+
+    reductions = []
+    for dim in spec.dims:
+        names = spec.dim_names(dim)
+        if dim in over:
+            reductions.append(_Reduction(np.ones((len(names), 1)), None))
+        elif dim in groupings:
+            grouping = groupings[dim]
+            missing = [name for name in names if name not in grouping]
+            if missing:
+                msg = "Grouping for dimension '{}' has no group for elements {}"
+                raise ValueError(msg.format(dim, missing))
+            groups = list(OrderedDict.fromkeys(grouping[name] for name in names))
+            group_positions = {group: position for position, group in enumerate(groups)}
+            indicator = np.zeros((len(names), len(groups)))
+            indicator[np.arange(len(names)), [group_positions[grouping[name]]
+                                              for name in names]] = 1
+            reductions.append(_Reduction(indicator, groups))
+        else:
+            reductions.append(_Reduction(None, names))
+    return reductions
+
+
+def _reduce(darray, reductions):
+    """Sum the values of a result over or within groups of its dimensions, skipping missing
+    values
+
+    Parameters
+    ----------
+    darray : DataArray
+        With one extra, last, 'timestep_decision' dimension
+    reductions : list[_Reduction]
+        One for each dimension, other than the last
+
+    Returns
+    -------
+    tuple(numpy.ndarray, numpy.ndarray)
+        Sums, and a mask which is False where no value contributed to a sum
+    """
+    values = darray.as_filled().astype(np.float64)
+    present = ~np.isnan(values)
+    values[~present] = 0
+    counts = present.astype(np.float64)
+    for axis in reversed(range(len(reductions))):
+        reduction = reductions[axis]
+        if reduction.indicator is None:
+            continue
+        values = np.moveaxis(
+            np.tensordot(values, reduction.indicator, axes=([axis], [0])), -1, axis)
+        counts = np.moveaxis(
+            np.tensordot(counts, reduction.indicator, axes=([axis], [0])), -1, axis)
+        if reduction.labels is None:
+            values = values.squeeze(axis)
+            counts = counts.squeeze(axis)
+    return values, counts > 0
+
+
+def _aggregate_as_columns(spec, reductions, tuples, running, statistics):
+    """Lay out aggregated results in long format, one row for each (timestep, decision) and
+    combination of remaining dimension elements
+
+    Returns
+    -------
+    list[_Column]
+    """
+    dims = [dim for dim, reduction in zip(spec.dims, reductions)
+            if reduction.labels is not None]
+    labels = [reduction.labels for reduction in reductions if reduction.labels is not None]
+    order = sorted(range(len(tuples)), key=lambda position: _tuple_sort_key(tuples[position]))
+    tuples = [tuples[position] for position in order]
+    shape = tuple(len(dim_labels) for dim_labels in labels) + (len(tuples), )
+    num_rows = int(np.prod(shape))
+
+    timesteps = [timestep for timestep, _ in tuples]
+    decisions = [decision for _, decision in tuples]
+    columns = []
+    for name, tuple_labels in [('timestep', timesteps), ('decision', decisions)]:
+        column = np.empty(num_rows, dtype='int64')
+        mask = np.empty(num_rows, dtype=bool)
+        _fill_along_axis(column, shape, -1, _fill_none(tuple_labels))
+        _fill_along_axis(mask, shape, -1, _is_none(tuple_labels))
+        columns.append(_Column(name, column, _any_or_none(mask), None))
+    for axis, (dim, dim_labels) in enumerate(zip(dims, labels)):
+        codes = np.empty(num_rows, dtype=_code_dtype(len(dim_labels)))
+        _fill_along_axis(codes, shape, axis, np.arange(len(dim_labels)))
+        columns.append(_Column(dim, codes, None, dim_labels))
+
+    for output_name, (running_statistics, *running_quantiles) in running.items():
+        for statistic in statistics:
+            values = running_statistics.statistic(statistic)[..., order]
+            name = '{}_{}'.format(output_name, statistic)
+            columns.append(_Column(name, values.reshape(-1), None, None))
+        for running_quantile in running_quantiles:
+            values = running_quantile.value()[..., order]
+            name = '{}_p{:g}'.format(output_name, running_quantile.quantile * 100)
+            columns.append(_Column(name, values.reshape(-1), None, None))
+    return columns
+
+
+def _columns_as_frame(columns):
+    """Long-format columns as a :class:`pandas.DataFrame`, with categorical columns, and
+    nullable integer or boolean columns where values are missing
+    """
+    import pandas as pd  # type: ignore
+
+    data = OrderedDict()  # type: OrderedDict
+    for column in columns:
+        if column.categories is not None:
+            data[column.name] = pd.Categorical.from_codes(
+                column.values, categories=column.categories)
+        elif column.mask is not None and column.values.dtype.kind == 'b':
+            data[column.name] = pd.arrays.BooleanArray(column.values, column.mask)
+        elif column.mask is not None and column.values.dtype.kind in 'iu':
+            data[column.name] = pd.arrays.IntegerArray(column.values, column.mask)
+        else:
+            data[column.name] = column.values
+    return pd.DataFrame(data, copy=False)
+
+
+def _columns_as_table(columns):
+    """Long-format columns as a :class:`pyarrow.Table`, with dictionary-encoded columns
+    """
+    import pyarrow as pa  # type: ignore
+
+    arrays = []
+    for column in columns:
+        if column.categories is not None:
+            arrays.append(pa.DictionaryArray.from_arrays(
+                pa.array(column.values), pa.array(list(column.categories))))
+        else:
+            arrays.append(pa.array(column.values, mask=column.mask))
+    return pa.Table.from_arrays(arrays, names=[column.name for column in columns])
+
+
+def _results_as_dataset(results_dict, output_names):
+    """Results as a :class:`xarray.Dataset` with dimensions model_run, timestep, decision and
+    the output dimensions
+
+    Integer outputs are converted to float, and boolean or other outputs to object, so that
+    any combination of timestep and decision not read can be NaN (or None).
+    """
+    import xarray as xr  # type: ignore
+
+    model_run_names = list(results_dict)
+    spec = results_dict[model_run_names[0]][output_names[0]].spec
+    dims, dim_shape = spec.dims[:-1], spec.shape[:-1]
+
+    all_tuples = {
+        tuple_
+        for results in results_dict.values()
+        for darray in results.values()
+        for tuple_ in darray.dim_names('timestep_decision')
+    }
+    timesteps = _sorted_labels({timestep for timestep, _ in all_tuples})
+    decisions = _sorted_labels({decision for _, decision in all_tuples})
+    timestep_index = {timestep: index for index, timestep in enumerate(timesteps)}
+    decision_index = {decision: index for index, decision in enumerate(decisions)}
+
+    coords = OrderedDict([
+        ('model_run', model_run_names),
+        ('timestep', timesteps),
+        ('decision', decisions)
+    ])  # type: OrderedDict
+    for dim in dims:
+        coords[dim] = spec.dim_names(dim)
+
+    data_vars = OrderedDict()  # type: OrderedDict
+    for output_name in output_names:
+        output_spec = results_dict[model_run_names[0]][output_name].spec
+        dtype = results_dict[model_run_names[0]][output_name].data.dtype
+        if dtype.kind in 'iuf':
+            data = np.full((len(model_run_names), len(timesteps), len(decisions)) + dim_shape,
+                           np.nan, dtype=np.result_type(dtype, np.float64))
+        else:
+            data = np.full((len(model_run_names), len(timesteps), len(decisions)) + dim_shape,
+                           None, dtype=object)
+
+        for run_index, model_run_name in enumerate(model_run_names):
+            darray = results_dict[model_run_name][output_name]
+            tuples = darray.dim_names('timestep_decision')
+            timestep_positions = [timestep_index[timestep] for timestep, _ in tuples]
+            decision_positions = [decision_index[decision] for _, decision in tuples]
+            data[run_index, timestep_positions, decision_positions] = \
+                np.moveaxis(darray.as_filled(), -1, 0)
+
+        data_vars[output_name] = (
+            list(coords), data, {'unit': output_spec.unit})
+
+    return xr.Dataset(data_vars, coords=coords)
+
+
+def _fill_along_axis(column, shape, axis, labels):
+    """Fill a flat column, viewed as an array of `shape`, with labels varying along `axis`
+    """
+    view_shape = [1] * len(shape)
+    view_shape[axis] = -1
+    column.reshape(shape)[...] = np.asarray(labels).reshape(view_shape)
+
+
+def _code_dtype(num_categories):
+    """Smallest signed integer dtype for codes of a number of categories
+    """
+    return np.result_type(np.int8, np.min_scalar_type(num_categories))
+
+
+def _fill_none(labels):
+    return [0 if label is None else label for label in labels]
+
+
+def _is_none(labels):
+    return [label is None for label in labels]
+
+
+def _any_or_none(mask):
+    if mask is None or not mask.any():
+        return None
+    return mask
+
+
+def _sorted_labels(labels):
+    """Sort labels, with None last
+    """
+    return sorted(labels, key=lambda label: (label is None, label))
+
+
+def _tuple_sort_key(tuple_):
+    """Sort (timestep, decision) tuples, with None last
+    """
+    return tuple((label is None, label) for label in tuple_)
+
+
+def _is_numeric(dtype):
+    try:
+        return np.dtype(dtype).kind in 'biuf'
+    except TypeError:
+        return False
@@ -0,0 +1,235 @@
+"""Online statistics of arrays, updated one observation at a time
+
+Each statistic holds its state for every cell of an array, and is updated with a whole array
+of observations (one for each cell) at once, so a reduction across many model runs needs
+memory in proportion to the size of one result, not to the number of runs::
+
+    >>> stats = RunningStatistics((2, ))
+    >>> median = RunningQuantile(0.5, (2, ))
+    >>> for run in runs:
+    ...     stats.update(run.data, present=~run.mask)
+    ...     median.update(run.data, present=~run.mask)
+    >>> stats.mean, stats.variance(), median.value()
+
+Cells may be missing from any update, in which case their state is unchanged. The last axis
+may be extended with :meth:`grow`, for cells which are only found part way through.
+"""
+import numpy as np  # type: ignore
+
+
+class RunningStatistics(object):
+    """Count, sum, mean, variance, minimum and maximum of each cell
+
+    Mean and variance are updated with Welford's algorithm, which is numerically stable
+    however many observations there are.
+
+    Parameters
+    ----------
+    shape : tuple
+    """
+    def __init__(self, shape):
+        self.count = np.zeros(shape, dtype='int64')
+        self.sum = np.zeros(shape)
+        self.mean = np.zeros(shape)
+        self.min = np.full(shape, np.inf)
+        self.max = np.full(shape, -np.inf)
+        self._m2 = np.zeros(shape)
+
+    def update(self, values, present=None):
+        """Add one observation to each cell
+
+        Parameters
+        ----------
+        values : numpy.ndarray
+        present : numpy.ndarray, optional
+            Boolean array, False where a cell has no observation
+        """
+        values = np.asarray(values, dtype=np.float64)
+        if present is None:
+            present = np.ones(values.shape, dtype=bool)
+        values = np.where(present, values, 0)
+
+        self.count += present
+        delta = values - self.mean
+        self.mean += np.where(present, delta / np.maximum(self.count, 1), 0)
+        self._m2 += np.where(present, delta * (values - self.mean), 0)
+        self.sum += values
+        self.min = np.where(present, np.minimum(self.min, values), self.min)
+        self.max = np.where(present, np.maximum(self.max, values), self.max)
+
+    def grow(self, size):
+        """Extend the last axis by `size` cells, with no observations
+        """
+        self.count = _grow(self.count, size, 0)
+        self.sum = _grow(self.sum, size, 0)
+        self.mean = _grow(self.mean, size, 0)
+        self.min = _grow(self.min, size, np.inf)
+        self.max = _grow(self.max, size, -np.inf)
+        self._m2 = _grow(self._m2, size, 0)
+
+    def variance(self, ddof=1):
+        """Variance of each cell, NaN where there are no more than `ddof` observations
+        """
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return np.where(self.count > ddof, self._m2 / (self.count - ddof), np.nan)
+
+    def statistic(self, name):
+        """Value of a statistic by name, NaN where a cell has no observations
+
+        Parameters
+        ----------
+        name : str
+            One of 'count', 'sum', 'mean', 'var', 'std', 'min' or 'max'
+
+        Returns
+        -------
+        numpy.ndarray
+        """
+        if name == 'count':
+            return self.count
+        if name == 'var':
+            return self.variance()
+        if name == 'std':
+            return np.sqrt(self.variance())
+        if name not in ('sum', 'mean', 'min', 'max'):
+            raise ValueError("Unknown statistic '{}'".format(name))
+        return np.where(self.count > 0, getattr(self, name), np.nan)
+
+
+class RunningQuantile(object):
+    """Estimate a quantile of each cell with the P-squared algorithm
+
+    Five markers are kept for each cell, and adjusted as each observation arrives, so memory
+    does not depend on the number of observations (see Jain and Chlamtac, 1985, "The P2
+    algorithm for dynamic calculation of quantiles and histograms without storing
+    observations"). Until a cell has five observations, its quantile is exact.
+
+    Parameters
+    ----------
+    quantile : float
+        Between 0 and 1
+    shape : tuple
+    """
+    def __init__(self, quantile, shape):
+        if not 0 <= quantile <= 1:
+            raise ValueError("Quantile must be between 0 and 1, got {}".format(quantile))
+        self.quantile = quantile
+        self.count = np.zeros(shape, dtype='int64')
+        self._heights = np.zeros((5, ) + tuple(shape))
+        self._positions = np.tile(
+            np.arange(1.0, 6.0).reshape((5, ) + (1, ) * len(shape)), (1, ) + tuple(shape))
+
+    def update(self, values, present=None):
+        """Add one observation to each cell
+
+        Parameters
+        ----------
+        values : numpy.ndarray
+        present : numpy.ndarray, optional
+            Boolean array, False where a cell has no observation
+        """
+        values = np.asarray(values, dtype=np.float64)
+        if present is None:
+            present = np.ones(values.shape, dtype=bool)
+
+        # the first five observations of each cell are kept, then sorted to start the markers
+        filling = present & (self.count < 5)
+        if filling.any():
+            index = np.nonzero(filling)
+            self._heights[(self.count[index], ) + index] = values[index]
+            self.count[index] += 1
+            started = filling & (self.count == 5)
+            if started.any():
+                self._heights[:, started] = np.sort(self._heights[:, started], axis=0)
+
+        adjusting = present & ~filling & (self.count >= 5)
+        if adjusting.any():
+            index = np.nonzero(adjusting)
+            heights = self._heights[(slice(None), ) + index]
+            positions = self._positions[(slice(None), ) + index]
+            count = self.count[index]
+            _p2_update(heights, positions, values[index], count + 1, self.quantile)
+            self._heights[(slice(None), ) + index] = heights
+            self._positions[(slice(None), ) + index] = positions
+            self.count[index] += 1
+
+    def grow(self, size):
+        """Extend the last axis by `size` cells, with no observations
+        """
+        self.count = _grow(self.count, size, 0)
+        self._heights = _grow(self._heights, size, 0)
+        new_positions = np.tile(
+            np.arange(1.0, 6.0).reshape((5, ) + (1, ) * (self.count.ndim - 1) + (1, )),
+            (1, ) + self.count.shape[:-1] + (size, ))
+        self._positions = np.concatenate([self._positions, new_positions], axis=-1)
+
+    def value(self):
+        """Quantile of each cell, NaN where a cell has no observations
+
+        Returns
+        -------
+        numpy.ndarray
+        """
+        result = self._heights[2].copy()
+        for count in range(5):
+            # exact quantile of the observations so far
+            index = np.nonzero(self.count == count)
+            if not len(index[0]):
+                continue
+            if count == 0:
+                result[index] = np.nan
+            else:
+                observed = self._heights[(slice(0, count), ) + index]
+                result[index] = np.quantile(observed, self.quantile, axis=0)
+        return result
+
+
+def _p2_update(heights, positions, values, count, quantile):
+    """Update P-squared markers in place with one observation for each column
+
+    Parameters
+    ----------
+    heights, positions : numpy.ndarray
+        Marker heights and positions, each of shape (5, n)
+    values : numpy.ndarray
+        Shape (n, )
+    count : numpy.ndarray
+        Number of observations of each column, including this one
+    quantile : float
+    """
+    # extend the extreme markers, and find the cell k with heights[k] <= value < heights[k+1]
+    heights[0] = np.minimum(heights[0], values)
+    heights[4] = np.maximum(heights[4], values)
+    cell = np.clip((values >= heights[1:4]).sum(axis=0), 0, 3)
+    positions[1:] += np.arange(1, 5).reshape((4, 1)) > cell
+
+    desired = 1 + (count - 1) * np.array(
+        [0, quantile / 2, quantile, (1 + quantile) / 2, 1]).reshape((5, 1))
+    for i in (1, 2, 3):
+        offset = desired[i] - positions[i]
+        move = ((offset >= 1) & (positions[i + 1] - positions[i] > 1)) | \
+            ((offset <= -1) & (positions[i - 1] - positions[i] < -1))
+        if not move.any():
+            continue
+        step = np.sign(offset)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            parabolic = heights[i] + step / (positions[i + 1] - positions[i - 1]) * (
+                (positions[i] - positions[i - 1] + step) * (heights[i + 1] - heights[i])
+                / (positions[i + 1] - positions[i])
+                + (positions[i + 1] - positions[i] - step) * (heights[i] - heights[i - 1])
+                / (positions[i] - positions[i - 1])
+            )
+            neighbour_heights = np.where(step > 0, heights[i + 1], heights[i - 1])
+            neighbour_positions = np.where(step > 0, positions[i + 1], positions[i - 1])
+            linear = heights[i] + step * (neighbour_heights - heights[i]) \
+                / (neighbour_positions - positions[i])
+        use_parabolic = (heights[i - 1] < parabolic) & (parabolic < heights[i + 1])
+        heights[i] = np.where(move, np.where(use_parabolic, parabolic, linear), heights[i])
+        positions[i] = np.where(move, positions[i] + step, positions[i])
+
+
+def _grow(array, size, fill_value):
+    """Extend the last axis of an array by `size`, filled with `fill_value`
+    """
+    extra = np.full(array.shape[:-1] + (size, ), fill_value, dtype=array.dtype)
+    return np.concatenate([array, extra], axis=-1)
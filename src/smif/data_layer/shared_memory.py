@@ -0,0 +1,346 @@
+"""Share arrays between processes through shared memory, without copying or pickling them
+
+A :class:`SharedDataPlane` is created by the process which coordinates others, and passed to
+each worker process as it starts (as an argument of :class:`multiprocessing.Process`, or in
+the ``initargs`` of a pool). Any process may then publish a
+:class:`~smif.data_layer.data_array.DataArray` or :class:`numpy.ndarray` under a key, and any
+other attach to it::
+
+    >>> plane = SharedDataPlane()
+    >>> plane.publish('energy_demand/2010', results)
+    >>> # in another process
+    >>> data = plane.attach('energy_demand/2010')
+    >>> data.as_ndarray().sum()
+    >>> plane.release('energy_demand/2010')
+
+Each key is held in a shared memory segment of its own, with the data in the segment's
+buffer - attached arrays are read-only views of the same memory, so attaching costs the same
+however large the data. Segments are reference counted: publishing holds one reference, each
+:meth:`SharedDataPlane.attach` another, and each :meth:`SharedDataPlane.release` drops one.
+The segment is removed when the last reference is released. Arrays from :meth:`attach` must
+not be used after they are released.
+
+When the plane is closed in the process which created it, any segments left over, for
+example by a worker which failed, are removed.
+"""
+import hashlib
+import multiprocessing
+import os
+import pickle
+import struct
+import uuid
+from multiprocessing import resource_tracker, shared_memory
+
+import numpy as np  # type: ignore
+from smif.data_layer.data_array import DataArray
+from smif.data_layer.sparse_array import COOArray
+from smif.exception import (SmifDataExistsError, SmifDataMismatchError,
+                            SmifDataNotFoundError)
+
+# Each segment starts with its reference count and the length of the pickled description of
+# its arrays, followed by the description, then each array aligned to _ALIGNMENT bytes
+_HEADER = struct.Struct('<qq')
+_REFERENCES = struct.Struct('<q')
+_ALIGNMENT = 64
+
+# Folder in which shared memory segments are visible as files, where there is one (Linux)
+_SHM_FOLDER = '/dev/shm'
+
+
+class SharedDataPlane(object):
+    """Publish and attach to arrays in shared memory by key
+
+    Parameters
+    ----------
+    prefix : str, optional
+        Prefix of the names of shared memory segments, by default unique to this plane
+    lock : multiprocessing.Lock, optional
+        Lock shared by all processes using the plane, guarding reference counts
+
+    Attributes
+    ----------
+    prefix : str
+    """
+    def __init__(self, prefix=None, lock=None):
+        self.prefix = prefix or 'smif{}_'.format(uuid.uuid4().hex[:8])
+        self._lock = lock or multiprocessing.Lock()
+        self._owner = True
+        self._attached = {}
+        self._published = set()
+        self._closing = []
+
+    def __getstate__(self):
+        # other processes start with none of this process's attachments
+        return {'prefix': self.prefix, 'lock': self._lock}
+
+    def __setstate__(self, state):
+        self.prefix = state['prefix']
+        self._lock = state['lock']
+        self._owner = False
+        self._attached = {}
+        self._published = set()
+        self._closing = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def __contains__(self, key):
+        try:
+            segment = _open_segment(self._segment_name(key))
+        except FileNotFoundError:
+            return False
+        with self._lock:
+            references = _REFERENCES.unpack_from(segment.buf, 0)[0]
+        segment.close()
+        return references > 0
+
+    def publish(self, key, data):
+        """Copy data into shared memory under `key`
+
+        The plane holds one reference to the data, until :meth:`release` is called once for
+        `key` by any process.
+
+        Parameters
+        ----------
+        key : str
+        data : DataArray or numpy.ndarray
+            Numeric or boolean data - arrays of objects cannot be shared
+
+        Raises
+        ------
+        SmifDataExistsError
+            If data is already published under `key`
+        """
+        description, arrays = _describe(data)
+        for array in arrays:
+            if array.dtype.hasobject:
+                msg = "Cannot share data of dtype {} for '{}'"
+                raise SmifDataMismatchError(msg.format(array.dtype, key))
+
+        encoded = pickle.dumps(description, protocol=pickle.HIGHEST_PROTOCOL)
+        offsets, size = _layout(len(encoded), [array.nbytes for array in arrays])
+        try:
+            segment = _open_segment(self._segment_name(key), create=True, size=size)
+        except FileExistsError:
+            raise SmifDataExistsError("Data is already published for '{}'".format(key))
+
+        _HEADER.pack_into(segment.buf, 0, 1, len(encoded))
+        segment.buf[_HEADER.size:_HEADER.size + len(encoded)] = encoded
+        for array, offset in zip(arrays, offsets):
+            view = np.ndarray(array.shape, array.dtype, buffer=segment.buf, offset=offset)
+            view[...] = array
+            del view
+        segment.close()
+        self._published.add(segment.name)
+
+    def attach(self, key, spec=None):
+        """Attach to data published under `key`
+
+        Each call holds a reference to the data, until :meth:`release` is called.
+
+        Parameters
+        ----------
+        key : str
+        spec : smif.metadata.Spec, optional
+            Spec of the data, if known, to use instead of the published spec
+
+        Returns
+        -------
+        DataArray or numpy.ndarray
+            As published, with read-only arrays backed by the shared memory
+
+        Raises
+        ------
+        SmifDataNotFoundError
+            If nothing is published under `key`
+        """
+        try:
+            segment, count = self._attached[key]
+        except KeyError:
+            try:
+                segment = _open_segment(self._segment_name(key))
+            except FileNotFoundError:
+                raise SmifDataNotFoundError("No data published for '{}'".format(key))
+            count = 0
+
+        with self._lock:
+            references = _REFERENCES.unpack_from(segment.buf, 0)[0]
+            if references < 1:
+                # released by its last user while being attached
+                if not count:
+                    segment.close()
+                raise SmifDataNotFoundError("No data published for '{}'".format(key))
+            _REFERENCES.pack_into(segment.buf, 0, references + 1)
+        self._attached[key] = (segment, count + 1)
+
+        return _read(segment, spec)
+
+    def release(self, key):
+        """Drop a reference to the data under `key`, held by :meth:`publish` or
+        :meth:`attach` - the data is removed from shared memory with the last reference
+
+        Parameters
+        ----------
+        key : str
+        """
+        try:
+            segment, count = self._attached.pop(key)
+        except KeyError:
+            try:
+                segment = _open_segment(self._segment_name(key))
+            except FileNotFoundError:
+                raise SmifDataNotFoundError("No data published for '{}'".format(key))
+            count = 1
+
+        with self._lock:
+            references = _REFERENCES.unpack_from(segment.buf, 0)[0] - 1
+            _REFERENCES.pack_into(segment.buf, 0, max(references, 0))
+            if references < 1:
+                _unlink_segment(segment)
+
+        if count > 1:
+            self._attached[key] = (segment, count - 1)
+        else:
+            self._closing.append(segment)
+        self._close_segments()
+
+    def close(self):
+        """Release every reference held by attachments in this process
+
+        When called in the process which created the plane, also remove any data left
+        in shared memory.
+        """
+        for key in list(self._attached):
+            while key in self._attached:
+                self.release(key)
+        self._close_segments()
+        if not self._owner:
+            return
+
+        names = set(self._published)
+        if os.path.isdir(_SHM_FOLDER):
+            names.update(
+                name for name in os.listdir(_SHM_FOLDER) if name.startswith(self.prefix))
+        for name in names:
+            try:
+                segment = _open_segment(name)
+            except FileNotFoundError:
+                continue
+            _unlink_segment(segment)
+            segment.close()
+        self._published = set()
+
+    def _close_segments(self):
+        """Close released segments, except those which arrays from :meth:`attach` still
+        use - these stay mapped until the arrays are gone, and closing is tried again later
+        """
+        closing = []
+        for segment in self._closing:
+            try:
+                segment.close()
+            except BufferError:
+                closing.append(segment)
+        self._closing = closing
+
+    def _segment_name(self, key):
+        digest = hashlib.blake2b(str(key).encode('utf-8'), digest_size=8).hexdigest()
+        return self.prefix + digest
+
+
+def _describe(data):
+    """Description of data, and the arrays which hold it
+    """
+    if isinstance(data, DataArray):
+        if data.is_sparse:
+            sparse = data.as_coo()
+            arrays = [np.ascontiguousarray(sparse.coords),
+                      np.ascontiguousarray(sparse.values)]
+            kind = 'sparse'
+        else:
+            arrays = [np.ascontiguousarray(data.data)]
+            mask = data.mask
+            if mask.any():
+                arrays.append(np.ascontiguousarray(mask))
+            kind = 'dense'
+        return {'type': kind, 'spec': data.spec, 'arrays': _shapes(arrays)}, arrays
+    array = np.ascontiguousarray(data)
+    return {'type': 'ndarray', 'arrays': _shapes([array])}, [array]
+
+
+def _shapes(arrays):
+    return [(array.dtype.str, array.shape) for array in arrays]
+
+
+def _layout(description_size, sizes):
+    """Offset of each array in a segment, and the size of the segment
+    """
+    offsets = []
+    end = _HEADER.size + description_size
+    for size in sizes:
+        start = -(-end // _ALIGNMENT) * _ALIGNMENT
+        offsets.append(start)
+        end = start + size
+    # segments may not be empty
+    return offsets, max(end, 1)
+
+
+def _read(segment, spec):
+    """Build a DataArray or array from the buffer of a segment, without copying
+    """
+    _, description_size = _HEADER.unpack_from(segment.buf, 0)
+    description = pickle.loads(
+        bytes(segment.buf[_HEADER.size:_HEADER.size + description_size]))
+    spec = spec or description.get('spec')
+
+    arrays = _views(segment, description_size, description['arrays'])
+    if description['type'] == 'ndarray':
+        return arrays[0]
+    if description['type'] == 'sparse':
+        coords, values = arrays
+        return DataArray(spec, COOArray(coords, values, spec.shape))
+    return DataArray(spec, *arrays)
+
+
+def _views(segment, description_size, shapes):
+    sizes = [np.dtype(dtype).itemsize * int(np.prod(shape)) for dtype, shape in shapes]
+    offsets, _ = _layout(description_size, sizes)
+    # arrays from numpy.frombuffer keep the memoryview, which holds an export of the
+    # segment's memory map, so the segment cannot be closed while they are in use
+    buffer = memoryview(segment.buf)
+    views = []
+    for (dtype, shape), offset in zip(shapes, offsets):
+        count = int(np.prod(shape))
+        view = np.frombuffer(buffer, dtype, count, offset).reshape(shape)
+        view.flags.writeable = False
+        views.append(view)
+    return views
+
+
+def _open_segment(name, create=False, size=0):
+    """Open a shared memory segment, which this module removes itself when no longer used,
+    rather than leave to the resource tracker
+    """
+    try:
+        return shared_memory.SharedMemory(name, create=create, size=size, track=False)
+    except TypeError:
+        # before Python 3.13, segments are always tracked
+        segment = shared_memory.SharedMemory(name, create=create, size=size)
+        if os.name == 'posix':
+            resource_tracker.unregister(segment._name, 'shared_memory')
+        return segment
+
+
+def _unlink_segment(segment):
+    if os.name != 'posix':
+        # removed once no process has it open
+        return
+    if getattr(segment, '_track', True):
+        # unlinking unregisters a tracked segment, so balance the unregister on opening
+        resource_tracker.register(segment._name, 'shared_memory')
+    try:
+        segment.unlink()
+    except FileNotFoundError:
+        pass
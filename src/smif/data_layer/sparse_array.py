@@ -0,0 +1,185 @@
+"""Sparse (coordinate format) arrays, for data which is mostly zero
+
+A :class:`COOArray` holds only the explicitly set cells of an n-dimensional array: their
+integer positions along each dimension and their values. Every other cell has the
+``fill_value`` (zero)::
+
+    >>> array = COOArray([[0, 2], [1, 0]], [5.0, 7.0], shape=(3, 2))
+    >>> array.todense()
+    array([[0., 5.],
+           [0., 0.],
+           [7., 0.]])
+
+A :class:`~smif.data_layer.data_array.DataArray` may be created from a :class:`COOArray`,
+or from a ``sparse.COO`` or ``scipy.sparse`` array, in which case it is held sparse until
+its dense data is accessed.
+"""
+import numpy as np  # type: ignore
+
+
+class COOArray(object):
+    """Sparse array in coordinate (COO) format
+
+    Parameters
+    ----------
+    coords : numpy.ndarray
+        Integer array of shape ``(ndim, nnz)``, the position of each value along each
+        dimension
+    values : numpy.ndarray
+        Array of shape ``(nnz,)``
+    shape : tuple
+    fill_value : scalar, default=0
+        Value of every cell not in `coords` - only zero is supported
+
+    Attributes
+    ----------
+    nnz : int
+        Number of cells stored explicitly
+    """
+    def __init__(self, coords, values, shape, fill_value=0):
+        shape = tuple(int(size) for size in shape)
+        values = np.asarray(values)
+        coords = np.asarray(coords, dtype='int64').reshape((len(shape), len(values)))
+        if fill_value != 0:
+            raise ValueError("COOArray only supports a fill_value of zero")
+        for dim_coords, size in zip(coords, shape):
+            if len(dim_coords) and (dim_coords.min() < 0 or dim_coords.max() >= size):
+                raise IndexError("COOArray coords out of range for shape {}".format(shape))
+
+        self.coords = coords
+        self.values = values
+        self.shape = shape
+        self.fill_value = fill_value
+
+    @classmethod
+    def from_dense(cls, array):
+        """Create from a dense array, keeping non-zero cells
+
+        Parameters
+        ----------
+        array : numpy.ndarray
+        """
+        array = np.asarray(array)
+        coords = np.array(np.nonzero(array), dtype='int64').reshape((array.ndim, -1))
+        return cls(coords, array[tuple(coords)], array.shape)
+
+    @classmethod
+    def from_sparse(cls, array):
+        """Create from a ``sparse.COO`` or ``scipy.sparse`` array, or a COOArray
+
+        Returns
+        -------
+        COOArray
+        """
+        if isinstance(array, cls):
+            return array
+        if hasattr(array, 'tocoo') and not hasattr(array, 'coords'):
+            # scipy.sparse matrix
+            array = array.tocoo()
+            return cls([array.row, array.col], array.data, array.shape)
+        # sparse.COO
+        return cls(array.coords, array.data, array.shape,
+                   fill_value=getattr(array, 'fill_value', 0))
+
+    @property
+    def nnz(self):
+        return len(self.values)
+
+    @property
+    def ndim(self):
+        return len(self.shape)
+
+    @property
+    def dtype(self):
+        return self.values.dtype
+
+    @property
+    def nbytes(self):
+        return self.coords.nbytes + self.values.nbytes
+
+    def astype(self, dtype):
+        """Copy with values cast to `dtype`
+        """
+        return COOArray(self.coords, self.values.astype(dtype), self.shape)
+
+    def flat_coords(self):
+        """Position of each value in the flattened (C order) array
+        """
+        if not self.shape:
+            return np.zeros(self.nnz, dtype='int64')
+        return np.ravel_multi_index(tuple(self.coords), self.shape)
+
+    def sum_duplicates(self):
+        """Copy with the values of any repeated coords summed, sorted by position
+        """
+        flat = self.flat_coords()
+        unique, inverse = np.unique(flat, return_inverse=True)
+        if len(unique) == len(flat) and np.all(flat[:-1] < flat[1:]):
+            return self
+        values = np.zeros(len(unique), dtype=self.values.dtype)
+        np.add.at(values, inverse, self.values)
+        coords = np.array(np.unravel_index(unique, self.shape), dtype='int64')
+        return COOArray(coords, values, self.shape)
+
+    def todense(self):
+        """Dense :class:`numpy.ndarray`
+        """
+        dense = np.zeros(self.shape, dtype=self.values.dtype)
+        np.add.at(dense, tuple(self.coords), self.values)
+        return dense
+
+    def contract(self, coefficients, axis):
+        """Multiply by a matrix of coefficients along one axis
+
+        Equivalent to :meth:`smif.convert.adaptor.Adaptor.convert_with_coefficients` on the
+        dense array, without making it dense.
+
+        Parameters
+        ----------
+        coefficients : numpy.ndarray
+            Array of shape ``(self.shape[axis], n)``
+        axis : int
+
+        Returns
+        -------
+        COOArray
+            With dimension `axis` of length ``n``
+        """
+        coefficients = np.asarray(coefficients)
+        if coefficients.shape[0] != self.shape[axis]:
+            msg = "Coefficients do not match dimension to convert: {} != {}"
+            raise ValueError(msg.format(coefficients.shape[0], self.shape[axis]))
+
+        rows = coefficients[self.coords[axis]]
+        value_idx, to_idx = np.nonzero(rows)
+        coords = self.coords[:, value_idx]
+        coords[axis] = to_idx
+        values = self.values[value_idx] * rows[value_idx, to_idx]
+        shape = self.shape[:axis] + (coefficients.shape[1],) + self.shape[axis + 1:]
+        return COOArray(coords, values, shape).sum_duplicates()
+
+    def __array__(self, dtype=None):
+        dense = self.todense()
+        return dense if dtype is None else dense.astype(dtype)
+
+    def __eq__(self, other):
+        if not isinstance(other, COOArray):
+            return NotImplemented
+        return self.shape == other.shape \
+            and np.array_equal(self.todense(), other.todense())
+
+    __hash__ = None
+
+    def __repr__(self):
+        return "<COOArray shape={} nnz={} dtype={}>".format(self.shape, self.nnz, self.dtype)
+
+
+def is_sparse(data):
+    """Check for a COOArray, ``sparse.COO`` or ``scipy.sparse`` array
+    """
+    if isinstance(data, COOArray):
+        return True
+    if isinstance(data, np.ndarray):
+        return False
+    module = type(data).__module__ or ''
+    return module.split('.')[0] in ('sparse', 'scipy') and hasattr(data, 'shape')
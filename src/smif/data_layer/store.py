@@ -18,6 +18,7 @@ import itertools
 import logging
 import os
 from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from copy import deepcopy
 from operator import itemgetter
 from typing import Dict, List, Optional
@@ -28,10 +29,16 @@ from smif.data_layer.abstract_data_store import DataStore
 from smif.data_layer.abstract_metadata_store import MetadataStore
 from smif.data_layer.file import (CSVDataStore, FileMetadataStore,
                                   ParquetDataStore, YamlConfigStore)
+from smif.data_layer.file.file_cache import combine_signatures
+from smif.data_layer.file.snapshot import open_snapshot
+from smif.data_layer.instrument import IOStats, instrument
+from smif.data_layer.sparse_array import COOArray
 from smif.data_layer.validate import (validate_sos_model_config,
                                       validate_sos_model_format)
-from smif.exception import SmifDataNotFoundError
+from smif.exception import (SmifDataExistsError, SmifDataMismatchError,
+                            SmifDataNotFoundError)
 from smif.metadata.spec import Spec
+from smif.profiling import PROFILER
 
 
 class Store():
@@ -52,10 +59,22 @@ class Store():
         self.data_store = data_store
         # base folder for any relative paths to models
         self.model_base_folder = str(model_base_folder)
+        # I/O statistics, if instrumented
+        self.io_stats = None
+        # plane through which scenario data is shared with other processes, if any
+        self._shared_data = None
 
     @classmethod
     def from_dict(cls, config):
         """Create Store from configuration dict
+
+        Parameters
+        ----------
+        config : dict
+            With keys 'interface' ('local_csv' or 'local_parquet'), 'dir' (the project
+            folder) and optionally 'snapshot' (default True) to load project configuration
+            from a saved snapshot, and save it on exit, see
+            :mod:`smif.data_layer.file.snapshot`
         """
 
         try:
@@ -83,17 +102,110 @@ class Store():
                 'Unsupported interface "{}". Supply local_csv or local_parquet'.format(
                     interface))
 
+        config_store = YamlConfigStore(directory)
+        metadata_store = FileMetadataStore(directory)
+        if config.get('snapshot', True):
+            open_snapshot(directory, config_store, metadata_store)
+
         return cls(
-            config_store=YamlConfigStore(directory),
-            metadata_store=FileMetadataStore(directory),
+            config_store=config_store,
+            metadata_store=metadata_store,
             data_store=data_store,
             model_base_folder=directory
         )
 
+    def instrument(self, stats=None):
+        """Record call counts, bytes and latency for reads and writes through the store
+
+        Wraps the public methods of this store and of its config, metadata and data stores.
+        Calling again returns the existing statistics.
+
+        Parameters
+        ----------
+        stats : ~smif.data_layer.instrument.IOStats, optional
+            Collect statistics into an existing object
+
+        Returns
+        -------
+        ~smif.data_layer.instrument.IOStats
+        """
+        if self.io_stats is None:
+            self.io_stats = stats or IOStats()
+            instrument(self, self.io_stats, 'store', record_caches=False)
+            instrument(self.config_store, self.io_stats, 'config_store')
+            instrument(self.metadata_store, self.io_stats, 'metadata_store')
+            instrument(self.data_store, self.io_stats, 'data_store')
+        return self.io_stats
+
+    def share_data(self, plane):
+        """Share scenario data with other processes using the same plane
+
+        Scenario data is read from the data store by the first process to ask for it, and
+        published to the plane. Other processes copy the published data out of shared
+        memory rather than read it again from the data store, so each process gets data it
+        may change, just as when reading without a plane.
+
+        Parameters
+        ----------
+        plane : ~smif.data_layer.shared_memory.SharedDataPlane
+        """
+        self._shared_data = plane
+
+    def _read_shared(self, key, read):
+        """Copy data from the shared data plane, calling `read()` to read and publish it if
+        no process has yet
+        """
+        plane = self._shared_data
+        try:
+            shared = plane.attach(key)
+        except SmifDataNotFoundError:
+            data = read()
+            try:
+                plane.publish(key, data)
+            except (SmifDataExistsError, SmifDataMismatchError):
+                # published by another process meanwhile, or arrays of objects which
+                # cannot be shared
+                pass
+            return data
+
+        try:
+            return _copy_data_array(shared)
+        finally:
+            # views of shared memory must be gone before the segment is released
+            del shared
+            plane.release(key)
+
     #
     # CONFIG
     #
 
+    def read_config_signature(self, config_type, config_name=None, skip_coords=False):
+        """Read a signature which changes whenever configuration is modified, without
+        reading the configuration itself - for example, to answer a conditional request
+
+        Parameters
+        ----------
+        config_type : str
+            One of 'model_run', 'sos_model', 'sector_model', 'scenario' or 'dimension'
+        config_name : str, optional
+            A single item, otherwise all items of the type
+        skip_coords : bool, default False
+            If True, ignore changes to dimension elements
+
+        Returns
+        -------
+        tuple or None
+            ``(digest, mtime)``, a hex digest and the time last modified in seconds since
+            the epoch - or None if the stores cannot tell cheaply
+        """
+        if config_type == 'dimension':
+            return self.metadata_store.read_dimension_signature(config_name, skip_coords)
+        signature = self.config_store.read_signature(config_type, config_name)
+        if skip_coords or config_type not in ('sector_model', 'scenario'):
+            return signature
+        # coords of inputs, outputs and parameters are read from the dimensions
+        return combine_signatures(signature, self.metadata_store.read_dimension_signature())
+
     # region Model runs
     def read_model_runs(self):
         """Read all system-of-system model runs
@@ -526,8 +638,8 @@ class Store():
     #
 
     # region Scenario Variant Data
-    def read_scenario_variant_data(
-            self, scenario_name, variant_name, variable, timestep=None) -> DataArray:
+    def read_scenario_variant_data(self, scenario_name, variant_name, variable,
+                                   timestep=None, selection=None) -> DataArray:
         """Read scenario data file
 
         Parameters
@@ -537,6 +649,9 @@ class Store():
         variable : str
         timestep : int (optional)
             If None, read data for all timesteps
+        selection : dict[str, list] (optional)
+            Map from dimension name to the ids of the elements to read - if given, only
+            that subset of the data is read
 
         Returns
         -------
@@ -548,7 +663,16 @@ class Store():
         scenario = self.read_scenario(scenario_name)
         spec_dict = _pick_from_list(scenario['provides'], variable)
         spec = Spec.from_dict(spec_dict)
-        return self.data_store.read_scenario_variant_data(key, spec, timestep)
+        with PROFILER.span('Store.read_scenario_variant_data', scenario_name,
+                           variant=variant_name, variable=variable, timestep=timestep):
+            if self._shared_data is None:
+                return self.data_store.read_scenario_variant_data(
+                    key, spec, timestep, selection)
+            shared_key = repr(('scenario', key, timestep, sorted((selection or {}).items())))
+            return self._read_shared(
+                shared_key,
+                lambda: self.data_store.read_scenario_variant_data(
+                    key, spec, timestep, selection))
 
     def write_scenario_variant_data(self, scenario_name, variant_name, data, timestep=None):
         """Write scenario data file
@@ -569,7 +693,7 @@ class Store():
 
     # region Narrative Data
     def read_narrative_variant_data(self, sos_model_name, narrative_name, variant_name,
-                                    parameter_name, timestep=None):
+                                    parameter_name, timestep=None, selection=None):
         """Read narrative data file
 
         Parameters
@@ -580,6 +704,8 @@ class Store():
         parameter_name : str
         timestep : int (optional)
             If None, read data for all timesteps
+        selection : dict[str, list] (optional)
+            Map from dimension name to the ids of the elements to read
 
         Returns
         -------
@@ -614,7 +740,9 @@ class Store():
                 parameter_name, sos_model['sector_models']))
         spec = Spec.from_dict(spec_dict)
 
-        return self.data_store.read_narrative_variant_data(key, spec, timestep)
+        with PROFILER.span('Store.read_narrative_variant_data', narrative_name,
+                           variant=variant_name, parameter=parameter_name, timestep=timestep):
+            return self.data_store.read_narrative_variant_data(key, spec, timestep, selection)
 
     def write_narrative_variant_data(self, sos_model_name, narrative_name, variant_name,
                                      data, timestep=None):
@@ -659,7 +787,9 @@ class Store():
         except KeyError:
             path = 'default__{}__{}.csv'.format(model_name, parameter_name)
         key = self._key_from_data(path, model_name, parameter_name)
-        return self.data_store.read_model_parameter_default(key, spec)
+        with PROFILER.span('Store.read_model_parameter_default', model_name,
+                           model=model_name, parameter=parameter_name):
+            return self.data_store.read_model_parameter_default(key, spec)
 
     def write_model_parameter_default(self, model_name, parameter_name, data):
         """Write default data for a sector model parameter
@@ -820,7 +950,9 @@ class Store():
         -----
         To be called from :class:`~smif.convert.adaptor.Adaptor` implementations.
         """
-        return self.data_store.read_coefficients(source_dim, destination_dim)
+        with PROFILER.span('Store.read_coefficients', source_dim,
+                           destination_dim=destination_dim):
+            return self.data_store.read_coefficients(source_dim, destination_dim)
 
     def write_coefficients(self, source_dim: str, destination_dim: str, data: np.ndarray):
         """Writes coefficients to the store
@@ -841,7 +973,9 @@ class Store():
         -----
         To be called from :class:`~smif.convert.adaptor.Adaptor` implementations.
         """
-        self.data_store.write_coefficients(source_dim, destination_dim, data)
+        with PROFILER.span('Store.write_coefficients', source_dim,
+                           destination_dim=destination_dim):
+            self.data_store.write_coefficients(source_dim, destination_dim, data)
     # endregion
 
     # region Results
@@ -850,7 +984,8 @@ class Store():
                      model_name: str,
                      output_spec: Spec,
                      timestep: Optional[int] = None,
-                     decision_iteration: Optional[int] = None) -> DataArray:
+                     decision_iteration: Optional[int] = None,
+                     selection: Optional[Dict[str, List]] = None) -> DataArray:
         """Return results of a `model_name` in `model_run_name` for a given `output_name`
 
         Parameters
@@ -860,13 +995,20 @@ class Store():
         output_spec : smif.metadata.Spec
         timestep : int, default=None
         decision_iteration : int, default=None
+        selection : dict[str, list], default=None
+            Map from dimension name to the ids of the elements to read - if given, only
+            that subset of the data is read
 
         Returns
         -------
         ~smif.data_layer.data_array.DataArray
         """
-        return self.data_store.read_results(
-            model_run_name, model_name, output_spec, timestep, decision_iteration)
+        with PROFILER.span('Store.read_results', model_name, model=model_name,
+                           output=output_spec.name, timestep=timestep,
+                           decision_iteration=decision_iteration):
+            return self.data_store.read_results(
+                model_run_name, model_name, output_spec, timestep, decision_iteration,
+                selection)
 
     def write_results(self, data_array, model_run_name, model_name, timestep=None,
                       decision_iteration=None):
@@ -880,8 +1022,51 @@ class Store():
         timestep : int, optional
         decision_iteration : int, optional
         """
-        self.data_store.write_results(
-            data_array, model_run_name, model_name, timestep, decision_iteration)
+        with PROFILER.span('Store.write_results', model_name, model=model_name,
+                           output=data_array.name, timestep=timestep,
+                           decision_iteration=decision_iteration):
+            self.data_store.write_results(
+                data_array, model_run_name, model_name, timestep, decision_iteration)
+
+    def open_results_writer(self, output_spec, model_run_name, model_name, timestep=None,
+                            decision_iteration=None):
+        """Open a writer to write results of a `model_name` in `model_run_name` in chunks
+
+        Each chunk is a DataArray whose spec selects a subset of the coordinates of
+        `output_spec`, so the whole output need never be held in memory at once.
+
+        Parameters
+        ----------
+        output_spec : smif.metadata.Spec
+        model_run_name : str
+        model_name : str
+        timestep : int, optional
+        decision_iteration : int, optional
+
+        Returns
+        -------
+        ~smif.data_layer.abstract_data_store.ResultsWriter
+            To be used as a context manager - results are saved once it is closed
+        """
+        return self.data_store.open_results_writer(
+            output_spec, model_run_name, model_name, timestep, decision_iteration)
+
+    def link_results(self, model_run_name, to_model_run_name, model_name, output_spec,
+                     timestep=None, decision_iteration=None):
+        """Share results of a `model_name` in `model_run_name` with `to_model_run_name`
+
+        Parameters
+        ----------
+        model_run_name : str
+        to_model_run_name : str
+        model_name : str
+        output_spec : smif.metadata.Spec
+        timestep : int, optional
+        decision_iteration : int, optional
+        """
+        self.data_store.link_results(
+            model_run_name, to_model_run_name, model_name, output_spec, timestep,
+            decision_iteration)
 
     def available_results(self, model_run_name):
         """List available results from a model run
@@ -990,7 +1175,8 @@ class Store():
         # For each sector model, get the outputs and create the tuples
         for model_name in sos_config['sector_models']:
 
-            model_config = self.read_model(model_name)
+            # only output names are needed, so skip reading dimension elements
+            model_config = self.read_model(model_name, skip_coords=True)
             outputs = model_config['outputs']
 
             for output, t in itertools.product(outputs, timesteps):
@@ -1018,64 +1204,101 @@ class Store():
         return self.canonical_expected_results(
             model_run_name) - self.canonical_available_results(model_run_name)
 
-    def _get_result_darray_internal(self, model_run_name, model_name, output_name,
-                                    time_decision_tuples):
-        """Internal implementation for `get_result_darray`, after the unique list of
-        (timestep, decision) tuples has been generated and validated.
-
-        This method gets the spec for the output defined by the model_run_name, model_name
-        and output_name and expands the spec to include an additional dimension for the list of
-        tuples.
+    def _output_spec(self, model_name, output_name):
+        """Spec of a model output
+        """
+        for output in self.read_model(model_name)['outputs']:
+            if output['name'] == output_name:
+                return Spec.from_dict(output)
+        msg = "Output '{}' was not found in the outputs of model '{}'"
+        raise SmifDataNotFoundError(msg.format(output_name, model_name))
 
-        Then, for each tuple, the data array from the corresponding read_results call is
-        stacked, and together with the new spec this information is returned as a new
-        DataArray.
+    def read_results_batch(self, model_name, requests, selection=None, max_workers=None):
+        """Read results for many model runs, outputs and (timestep, decision) tuples at once
 
         Parameters
         ----------
-        model_run_name : str
         model_name : str
-        output_name : str
-        time_decision_tuples : list of unique (timestep, decision) tuples
+        requests : list[tuple]
+            Each a (model_run_name, output_name, time_decision_tuples) tuple
+        selection : dict, optional
+            Element names to read, by dimension name - passed to each read, so only the
+            selected data is read
+        max_workers : int, optional
+            the number of threads used to read results
 
         Returns
         -------
-        DataArray with expanded spec and data for each (timestep, decision) tuple
+        list[DataArray]
+            One for each request, with an extra, last, 'timestep_decision' dimension
         """
+        output_specs = {}  # type: Dict
+        planned = []
+        for model_run_name, output_name, time_decision_tuples in requests:
+            if output_name not in output_specs:
+                output_specs[output_name] = self._output_spec(model_name, output_name)
+            planned.append(
+                (model_run_name, output_specs[output_name], time_decision_tuples))
+        return self._read_result_darrays(model_name, planned, selection, max_workers)
 
-        # Get the output spec given the name of the sector model and output
-        output_spec = None
-        model = self.read_model(model_name)
-
-        for output in model['outputs']:
-
-            # Ignore if the output name doesn't match
-            if output_name != output['name']:
-                continue
-
-            output_spec = Spec.from_dict(output)
-
-        assert output_spec, "Output name was not found in model outputs"
+    def _read_result_darrays(self, model_name, requests, selection=None, max_workers=None):
+        """Read results for many model runs, outputs and (timestep, decision) tuples
 
-        # Read the results for each (timestep, decision) tuple and stack them
-        list_of_numpy_arrays = []
+        Every read is planned up front, then the reads run concurrently on a pool of
+        threads. Each result is written directly into a buffer preallocated for its output,
+        with a 'timestep_decision' dimension added last.
 
-        for t, d in time_decision_tuples:
-            d_array = self.read_results(model_run_name, model_name, output_spec, t, d)
-            list_of_numpy_arrays.append(d_array.data)
-
-        stacked_data = np.vstack(list_of_numpy_arrays)
-        data = np.transpose(stacked_data)
-
-        # Add new dimensions to the data spec
-        output_dict = output_spec.as_dict()
-        output_dict['dims'].append('timestep_decision')
-        output_dict['coords']['timestep_decision'] = time_decision_tuples
-
-        output_spec = Spec.from_dict(output_dict)
+        Parameters
+        ----------
+        model_name : str
+        requests : list[tuple]
+            Each a (model_run_name, output_spec, time_decision_tuples) tuple
+        selection : dict, optional
+            Element names to read, by dimension name
+        max_workers : int, optional
+            Number of threads, by default as for
+            :class:`concurrent.futures.ThreadPoolExecutor`
 
-        # Create a new DataArray from the modified spec and stacked data
-        return DataArray(output_spec, np.reshape(data, output_spec.shape))
+        Returns
+        -------
+        list[DataArray]
+            One for each request, with data for each (timestep, decision) tuple
+        """
+        buffers = []
+        reads = []
+        for model_run_name, output_spec, time_decision_tuples in requests:
+            selected_spec = output_spec.select(selection) if selection else output_spec
+            output_dict = selected_spec.as_dict()
+            output_dict['dims'] = output_dict['dims'] + ['timestep_decision']
+            output_dict['coords'] = dict(
+                output_dict['coords'], timestep_decision=time_decision_tuples)
+            spec = Spec.from_dict(output_dict)
+
+            data = np.empty(spec.shape, dtype=_buffer_dtype(output_spec.dtype))
+            mask = np.zeros(spec.shape, dtype=bool)
+            buffers.append((spec, data, mask))
+            for index, (timestep, decision) in enumerate(time_decision_tuples):
+                reads.append(
+                    (model_run_name, output_spec, timestep, decision, data, mask, index))
+
+        def read(model_run_name, output_spec, timestep, decision, data, mask, index):
+            result = self.read_results(
+                model_run_name, model_name, output_spec, timestep, decision,
+                selection=selection)
+            data[..., index] = result.data
+            mask[..., index] = result.mask
+
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = [executor.submit(read, *args) for args in reads]
+            try:
+                for future in futures:
+                    future.result()
+            except BaseException:
+                for future in futures:
+                    future.cancel()
+                raise
+
+        return [DataArray(spec, data, mask) for spec, data, mask in buffers]
 
     def get_result_darray(self, model_run_name, model_name, output_name, timesteps=None,
                           decision_iterations=None, time_decision_tuples=None):
@@ -1119,51 +1342,13 @@ class Store():
         -------
         DataArray with expanded spec and the data requested
         """
-        available = self.available_results(model_run_name)
-
-        # Build up the necessary list of tuples
-        if not timesteps and not decision_iterations and not time_decision_tuples:
-            list_of_tuples = [
-                (t, d) for t, d, m, out in available
-                if m == model_name and out == output_name
-            ]
-
-        elif timesteps and not decision_iterations and not time_decision_tuples:
-            list_of_tuples = [
-                (t, d) for t, d, m, out in available
-                if m == model_name and out == output_name and t in timesteps
-            ]
-
-        elif decision_iterations and not timesteps and not time_decision_tuples:
-            list_of_tuples = [
-                (t, d) for t, d, m, out in available
-                if m == model_name and out == output_name and d in decision_iterations
-            ]
-
-        elif time_decision_tuples and not timesteps and not decision_iterations:
-            list_of_tuples = [
-                (t, d) for t, d, m, out in available
-                if m == model_name and out == output_name and (t, d) in time_decision_tuples
-            ]
-
-        elif timesteps and decision_iterations and not time_decision_tuples:
-            t_d = list(itertools.product(timesteps, decision_iterations))
-            list_of_tuples = [
-                (t, d) for t, d, m, out in available
-                if m == model_name and out == output_name and (t, d) in t_d
-            ]
-
-        else:
-            msg = "Expected either timesteps, or decisions, or (timestep, decision) " + \
-                  "tuples, or timesteps and decisions, or none of the above."
-            raise ValueError(msg)
-
-        if not list_of_tuples:
-            raise SmifDataNotFoundError("None of the requested data is available.")
-
-        return self._get_result_darray_internal(
-            model_run_name, model_name, output_name, sorted(list_of_tuples)
-        )
+        list_of_tuples = _select_time_decision_tuples(
+            self.available_results(model_run_name), model_name, output_name, timesteps,
+            decision_iterations, time_decision_tuples)
+        output_spec = self._output_spec(model_name, output_name)
+        darray, = self._read_result_darrays(
+            model_name, [(model_run_name, output_spec, list_of_tuples)])
+        return darray
 
     def get_results(self,
                     model_run_names: list,
@@ -1172,10 +1357,14 @@ class Store():
                     timesteps: list = None,
                     decisions: list = None,
                     time_decision_tuples: list = None,
+                    max_workers: Optional[int] = None
                     ):
         """Return data for multiple timesteps and decision iterations for a given output from
         a given sector model for multiple model runs.
 
+        All the results required are listed before any are read, then read concurrently -
+        see `max_workers`.
+
         Parameters
         ----------
         model_run_names: list[str]
@@ -1190,6 +1379,8 @@ class Store():
             the requested decision iterations
         time_decision_tuples: list[tuple]
             a list of requested (timestep, decision) tuples
+        max_workers: int, optional
+            the number of threads used to read results
 
         Returns
         -------
@@ -1208,30 +1399,66 @@ class Store():
 
         # The spec for each requested output must be the same. We check they have the same
         # coordinates
-        coords = [Spec.from_dict(output).coords for output in outputs if
-                  output['name'] in output_names]
+        output_specs = {
+            output['name']: Spec.from_dict(output) for output in outputs
+            if output['name'] in output_names
+        }
+        coords = [spec.coords for spec in output_specs.values()]
 
         for coord in coords:
             if coord != coords[0]:
                 raise ValueError('Different outputs must have the same coordinates')
 
+        # Plan all the reads required, listing available results once for each model run
+        requests = []
+        for model_run_name in model_run_names:
+            available = self.available_results(model_run_name)
+            for output_name in output_names:
+                list_of_tuples = _select_time_decision_tuples(
+                    available, model_name, output_name, timesteps, decisions,
+                    time_decision_tuples)
+                requests.append((model_run_name, output_specs[output_name], list_of_tuples))
+
         # Now actually obtain the requested results
+        darrays = iter(self._read_result_darrays(
+            model_name, requests, max_workers=max_workers))
         results_dict = OrderedDict()  # type: OrderedDict
         for model_run_name in model_run_names:
             results_dict[model_run_name] = OrderedDict()
             for output_name in output_names:
-                results_dict[model_run_name][output_name] = self.get_result_darray(
-                    model_run_name,
-                    model_name,
-                    output_name,
-                    timesteps,
-                    decisions,
-                    time_decision_tuples
-                )
+                results_dict[model_run_name][output_name] = next(darrays)
         return results_dict
 
     # endregion
 
+    # region Model run statistics
+    def read_model_run_stats(self, model_run_name, stats_name) -> List[Dict]:
+        """Read statistics recorded while running a model run
+
+        Parameters
+        ----------
+        model_run_name : str
+        stats_name : str
+            Kind of statistics, for example 'jobs'
+
+        Returns
+        -------
+        list[dict]
+        """
+        return self.data_store.read_model_run_stats(model_run_name, stats_name)
+
+    def write_model_run_stats(self, stats, model_run_name, stats_name):
+        """Write statistics recorded while running a model run
+
+        Parameters
+        ----------
+        stats : list[dict]
+        model_run_name : str
+        stats_name : str
+        """
+        self.data_store.write_model_run_stats(stats, model_run_name, stats_name)
+    # endregion
+
     # region data store utilities
     def _key_from_data(self, path, *args):
         """Return path or generate a unique key for a given set of args
@@ -1243,6 +1470,74 @@ class Store():
     # endregion
 
 
+def _select_time_decision_tuples(available, model_name, output_name, timesteps=None,
+                                 decision_iterations=None, time_decision_tuples=None):
+    """Select the sorted (timestep, decision) tuples of available results which match a
+    request - see :meth:`Store.get_result_darray`
+    """
+    # Build up the necessary list of tuples
+    if not timesteps and not decision_iterations and not time_decision_tuples:
+        list_of_tuples = [
+            (t, d) for t, d, m, out in available
+            if m == model_name and out == output_name
+        ]
+
+    elif timesteps and not decision_iterations and not time_decision_tuples:
+        list_of_tuples = [
+            (t, d) for t, d, m, out in available
+            if m == model_name and out == output_name and t in timesteps
+        ]
+
+    elif decision_iterations and not timesteps and not time_decision_tuples:
+        list_of_tuples = [
+            (t, d) for t, d, m, out in available
+            if m == model_name and out == output_name and d in decision_iterations
+        ]
+
+    elif time_decision_tuples and not timesteps and not decision_iterations:
+        list_of_tuples = [
+            (t, d) for t, d, m, out in available
+            if m == model_name and out == output_name and (t, d) in time_decision_tuples
+        ]
+
+    elif timesteps and decision_iterations and not time_decision_tuples:
+        t_d = list(itertools.product(timesteps, decision_iterations))
+        list_of_tuples = [
+            (t, d) for t, d, m, out in available
+            if m == model_name and out == output_name and (t, d) in t_d
+        ]
+
+    else:
+        msg = "Expected either timesteps, or decisions, or (timestep, decision) " + \
+              "tuples, or timesteps and decisions, or none of the above."
+        raise ValueError(msg)
+
+    if not list_of_tuples:
+        raise SmifDataNotFoundError("None of the requested data is available.")
+
+    return sorted(list_of_tuples)
+
+
+def _copy_data_array(data_array):
+    """Copy a DataArray, with arrays of its own which may be written to
+    """
+    if data_array.is_sparse:
+        sparse = data_array.as_coo()
+        return DataArray(data_array.spec, COOArray(
+            sparse.coords.copy(), sparse.values.copy(), sparse.shape))
+    return DataArray(data_array.spec, data_array.data.copy(), data_array.mask.copy())
+
+
+def _buffer_dtype(dtype):
+    """Spec dtype as the :class:`numpy.dtype` of a buffer to hold its data
+    """
+    try:
+        dtype = np.dtype(dtype)
+    except TypeError:
+        return np.dtype(object)
+    return dtype if dtype.kind in 'biuf' else np.dtype(object)
+
+
 def _pick_from_list(list_of_dicts, name):
     for item in list_of_dicts:
         if 'name' in item and item['name'] == name:
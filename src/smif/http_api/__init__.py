@@ -35,6 +35,12 @@ Actions are triggered by sending an empty POST::
 
     curl -d '{}' http://localhost:5000/api/v1/model_runs/20170918_energy_water/start
 
+Results are streamed as Arrow IPC, or as JSON if requested, filtered by timestep, decision
+and dimension elements::
+
+    curl -H "Accept: application/json" \
+        "http://localhost:5000/api/v1/results/ev_central/energy_demand/gas?timestep=2020:2030"
+
 """
 
 # import classes for access like ::
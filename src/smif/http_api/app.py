@@ -1,5 +1,6 @@
 from flask import Flask
 from smif.http_api.register import (register_api_endpoints,
+                                    register_compression,
                                     register_error_handlers, register_routes)
 
 
@@ -19,5 +20,6 @@ def create_app(static_folder, template_folder, data_interface, scheduler):
     register_routes(app)
     register_api_endpoints(app)
     register_error_handlers(app)
+    register_compression(app)
 
     return app
@@ -1,15 +1,28 @@
 """HTTP API endpoint
 """
+import base64
+import binascii
+import hashlib
+import io
+import json
+import re
 from collections import defaultdict
 
 import dateutil.parser
 import smif
-from flask import current_app, jsonify, request
+from flask import Response, current_app, jsonify, request
 from flask.views import MethodView
+from smif.data_layer.results import Results
+from smif.metadata import RegionElements
 from smif.exception import (SmifDataError, SmifDataInputError,
                             SmifDataNotFoundError, SmifException,
                             SmifValidationError)
 
+ARROW_STREAM_MIMETYPE = 'application/vnd.apache.arrow.stream'
+
+# Query parameters of the results endpoint - any others select dimension elements
+_RESULTS_PARAMETERS = ('timestep', 'decision', 'format', 'limit', 'token')
+
 
 class SmifAPI(MethodView):
     """Implement operations for Smif
@@ -31,6 +44,83 @@ class SmifAPI(MethodView):
         return response
 
 
+class IOStatsAPI(MethodView):
+    """Report I/O statistics for the store, if instrumented
+    """
+    def get(self):
+        """Get statistics
+        all: GET /api/v1/io_stats/
+        """
+        io_stats = getattr(current_app.config.data_interface, 'io_stats', None)
+        if io_stats is None:
+            data = {}
+        else:
+            data = io_stats.as_dict()
+
+        response = jsonify({
+            'data': data,
+            'error': {}
+        })
+        return response
+
+    def delete(self):
+        """Reset statistics
+        all: DELETE /api/v1/io_stats/
+        """
+        io_stats = getattr(current_app.config.data_interface, 'io_stats', None)
+        if io_stats is not None:
+            io_stats.reset()
+
+        response = jsonify({})
+        return response
+
+
+class ResultsAPI(MethodView):
+    """Read results from the store, streamed as Arrow IPC or JSON
+    """
+    def get(self, model_run_name, model_name=None, output_name=None):
+        """Get results
+        available: GET /api/v1/results/<model_run_name>/
+        one output: GET /api/v1/results/<model_run_name>/<model_name>/<output_name>
+
+        Results of one output may be filtered by timestep and decision (each a value or an
+        inclusive range ``first:last``, and repeated for more than one) and by the elements
+        of any dimension (repeated for more than one)::
+
+            GET /api/v1/results/run/energy_demand/gas_demand?timestep=2020:2030&lad=E07000008
+
+        The response is an Arrow IPC stream, unless JSON is preferred in the Accept header or
+        with ``format=json``, and is sent in batches as results are read. Rows of large
+        responses may be fetched in parts, either with a Range header (``Range: rows=0-999``)
+        or up to ``limit`` rows at a time, passing the ``X-Continuation-Token`` header of
+        each response as ``token`` to fetch the next.
+        """
+        data_interface = current_app.config.data_interface
+        # report a missing model run, rather than finding no results
+        data_interface.read_model_run(model_run_name)
+        if model_name is None or output_name is None:
+            response = jsonify({
+                'data': _available_results(data_interface.available_results(model_run_name)),
+                'error': {}
+            })
+            return response
+
+        try:
+            timesteps = _parse_int_filter(request.args.getlist('timestep'), 'timestep')
+            decisions = _parse_int_filter(request.args.getlist('decision'), 'decision')
+            stream = Results(data_interface).stream(
+                model_run_name, model_name, output_name,
+                timesteps=timesteps, decisions=decisions)
+            selection = _parse_selection(request.args, stream.spec)
+            if selection:
+                stream = stream.select(selection)
+            output_format = _results_format(request)
+        except (KeyError, ValueError) as ex:
+            return _bad_request(ex)
+
+        return _results_response(stream, output_format)
+
+
 class ModelRunAPI(MethodView):
     """Implement CRUD operations for model_run configuration data
     """
@@ -167,29 +257,16 @@ class SosModelAPI(MethodView):
         """Get sos_model
         all: GET /api/v1/sos_models/
         one: GET /api/vi/sos_models/name
+        fields: GET /api/v1/sos_models/?fields=name,description
         """
-        # return str(current_app.config)
         data_interface = current_app.config.data_interface
 
-        try:
+        def read(skip_coords):
             if sos_model_name is None:
-                data = []
-                data = data_interface.read_sos_models()
-            else:
-                data = {}
-                data = data_interface.read_sos_model(sos_model_name)
-
-            response = jsonify({
-                'data': data,
-                'error': {}
-            })
-        except SmifException as err:
-            response = jsonify({
-                'data': data,
-                'error': parse_exceptions(err)
-            })
+                return data_interface.read_sos_models()
+            return data_interface.read_sos_model(sos_model_name)
 
-        return response
+        return _get_config('sos_model', sos_model_name, read, coords_keys=())
 
     def post(self):
         """Create a sos_model:
@@ -250,28 +327,17 @@ class SectorModelAPI(MethodView):
         """Get sector_models
         all: GET /api/v1/sector_models/
         one: GET /api/vi/sector_models/name
+        fields: GET /api/v1/sector_models/?fields=name,description
         """
-        # return str(current_app.config)
         data_interface = current_app.config.data_interface
 
-        try:
+        def read(skip_coords):
             if sector_model_name is None:
-                data = []
-                data = data_interface.read_models(skip_coords=True)
-            else:
-                data = {}
-                data = data_interface.read_model(sector_model_name, skip_coords=True)
+                return data_interface.read_models(skip_coords=skip_coords)
+            return data_interface.read_model(sector_model_name, skip_coords=skip_coords)
 
-            response = jsonify({
-                'data': data,
-                'error': {}
-            })
-        except SmifException as err:
-            response = jsonify({
-                'data': data,
-                'error': parse_exceptions(err)
-            })
-        return response
+        return _get_config('sector_model', sector_model_name, read,
+                           coords_keys=('inputs', 'outputs', 'parameters'))
 
     def post(self):
         """Create a sector_model:
@@ -334,29 +400,16 @@ class ScenarioAPI(MethodView):
         """Get scenarios
         all: GET /api/v1/scenarios/
         one: GET /api/vi/scenarios/name
+        fields: GET /api/v1/scenarios/?fields=name,description
         """
-        # return str(current_app.config)
         data_interface = current_app.config.data_interface
 
-        try:
+        def read(skip_coords):
             if scenario_name is None:
-                data = []
-                data = data_interface.read_scenarios(skip_coords=True)
-            else:
-                data = {}
-                data = data_interface.read_scenario(scenario_name, skip_coords=True)
+                return data_interface.read_scenarios(skip_coords=skip_coords)
+            return data_interface.read_scenario(scenario_name, skip_coords=skip_coords)
 
-            response = jsonify({
-                'data': data,
-                'error': {}
-            })
-        except SmifException as err:
-            response = jsonify({
-                'data': data,
-                'error': parse_exceptions(err)
-            })
-
-        return response
+        return _get_config('scenario', scenario_name, read, coords_keys=('provides', ))
 
     def post(self):
         """Create a scenario:
@@ -419,29 +472,16 @@ class DimensionAPI(MethodView):
         """Get dimensions
         all: GET /api/v1/dimensions/
         one: GET /api/vi/dimensions/name
+        fields: GET /api/v1/dimensions/?fields=name,description
         """
-        # return str(current_app.config)
         data_interface = current_app.config.data_interface
 
-        try:
+        def read(skip_coords):
             if dimension_name is None:
-                data = []
-                data = data_interface.read_dimensions(skip_coords=True)
-            else:
-                data = {}
-                data = data_interface.read_dimension(dimension_name, skip_coords=True)
-
-            response = jsonify({
-                'data': data,
-                'error': {}
-            })
-        except SmifException as err:
-            response = jsonify({
-                'data': data,
-                'error': parse_exceptions(err)
-            })
+                return data_interface.read_dimensions(skip_coords=skip_coords)
+            return data_interface.read_dimension(dimension_name, skip_coords=skip_coords)
 
-        return response
+        return _get_config('dimension', dimension_name, read, coords_keys=('elements', ))
 
     def post(self):
         """Create a dimension:
@@ -497,6 +537,318 @@ class DimensionAPI(MethodView):
         return response
 
 
+def _get_config(config_type, config_name, read, coords_keys=()):
+    """Respond to a GET of configuration data
+
+    Responses carry an ETag and Last-Modified date, from the store's signature of the
+    configuration where it can tell cheaply, so that a request for unchanged configuration is
+    answered with 304 Not Modified before anything is read. Otherwise the ETag is a digest
+    of the response.
+
+    Items may be limited to some top-level ``fields``. The coordinates of dimensions are
+    skipped, unless asked for with ``skip_coords=false`` and not left out by ``fields``.
+
+    Parameters
+    ----------
+    config_type : str
+    config_name : str or None
+        A single item, or None for all items
+    read : function
+        Called with `skip_coords` to read the item or items
+    coords_keys : tuple, optional
+        Top-level keys which hold coordinates
+    """
+    data_interface = current_app.config.data_interface
+    fields = _fields_arg(request.args)
+    skip_coords = request.args.get('skip_coords', 'true').lower() not in ('false', '0') \
+        or (fields is not None and not set(coords_keys) & set(fields))
+
+    signature = data_interface.read_config_signature(config_type, config_name, skip_coords)
+    if signature is not None and _not_modified(signature):
+        response = current_app.response_class(status=304)
+        return _with_signature(response, signature)
+
+    data = [] if config_name is None else {}
+    try:
+        data = _select_fields(read(skip_coords), fields)
+        if not skip_coords:
+            data = _with_plain_elements(data)
+        response = jsonify({
+            'data': data,
+            'error': {}
+        })
+    except SmifException as err:
+        return jsonify({
+            'data': data,
+            'error': parse_exceptions(err)
+        })
+    return _with_signature(response, signature).make_conditional(request)
+
+
+def _fields_arg(args):
+    if 'fields' not in args:
+        return None
+    return [field for field in args['fields'].split(',') if field]
+
+
+def _select_fields(data, fields):
+    """Limit an item, or each of a list of items, to some top-level fields
+    """
+    if fields is None:
+        return data
+    if isinstance(data, list):
+        return [_select_fields(item, fields) for item in data]
+    return {key: value for key, value in data.items() if key in fields}
+
+
+def _with_plain_elements(data):
+    """Convert any :class:`~smif.metadata.RegionElements` in configuration data to lists
+    of GeoJSON-like features, which can be serialised as JSON
+    """
+    if isinstance(data, RegionElements):
+        return data.to_list()
+    if isinstance(data, dict):
+        return {key: _with_plain_elements(value) for key, value in data.items()}
+    if isinstance(data, list):
+        return [_with_plain_elements(item) for item in data]
+    return data
+
+
+def _etag(digest):
+    """Entity tag of a signature digest, which also varies with the query
+    """
+    tag = hashlib.blake2b(digest.encode('utf-8'), digest_size=16)
+    tag.update(request.query_string)
+    return tag.hexdigest()
+
+
+def _not_modified(signature):
+    digest, mtime = signature
+    if request.if_none_match:
+        return request.if_none_match.contains_weak(_etag(digest))
+    if request.if_modified_since:
+        return int(mtime) <= request.if_modified_since.timestamp()
+    return False
+
+
+def _with_signature(response, signature):
+    """Add a weak ETag (compressed responses are not byte-for-byte the same) and any
+    Last-Modified date, and have clients check before reusing a response
+    """
+    if signature is None:
+        response.add_etag(weak=True)
+    else:
+        digest, mtime = signature
+        response.set_etag(_etag(digest), weak=True)
+        response.last_modified = int(mtime)
+    response.cache_control.no_cache = True
+    return response
+
+
+def _available_results(available):
+    """List available results as JSON-friendly dicts
+    """
+    return [
+        {
+            'timestep': timestep,
+            'decision': decision,
+            'model_name': model_name,
+            'output_name': output_name
+        }
+        for timestep, decision, model_name, output_name in sorted(
+            available, key=lambda item: tuple((value is None, value) for value in item))
+    ]
+
+
+def _parse_int_filter(values, name):
+    """Parse timestep or decision query parameters, each a value or a 'first:last' range
+    """
+    if not values:
+        return None
+    parsed = []
+    for value in values:
+        try:
+            if ':' in value:
+                first, last = value.split(':', 1)
+                parsed.append((int(first), int(last)))
+            else:
+                parsed.append(int(value))
+        except ValueError:
+            msg = "Could not parse {} '{}', expected an integer or a range 'first:last'"
+            raise ValueError(msg.format(name, value))
+    return parsed
+
+
+def _parse_selection(args, spec):
+    """Parse dimension element query parameters, matching element names as strings
+    """
+    selection = {}
+    for dim in args:
+        if dim in _RESULTS_PARAMETERS:
+            continue
+        if dim not in spec.dims:
+            msg = "Unknown query parameter '{}', expected one of {} or a dimension of {}"
+            raise ValueError(msg.format(dim, list(_RESULTS_PARAMETERS), spec.dims))
+        names = {str(name): name for name in spec.dim_names(dim)}
+        unknown = [name for name in args.getlist(dim) if name not in names]
+        if unknown:
+            msg = "Could not select {} from dim '{}' in Spec '{}'"
+            raise ValueError(msg.format(unknown, dim, spec.name))
+        selection[dim] = [names[name] for name in args.getlist(dim)]
+    return selection
+
+
+def _results_format(request_):
+    """Choose Arrow or JSON, by the format query parameter or the Accept header
+    """
+    output_format = request_.args.get('format')
+    if output_format is None:
+        best = request_.accept_mimetypes.best_match(
+            [ARROW_STREAM_MIMETYPE, 'application/json'], default=ARROW_STREAM_MIMETYPE)
+        output_format = 'json' if best == 'application/json' else 'arrow'
+    if output_format not in ('arrow', 'json'):
+        raise ValueError("Results format must be 'arrow' or 'json', got '{}'".format(
+            output_format))
+    return output_format
+
+
+def _results_response(stream, output_format):
+    """Stream the rows requested by a Range header, or by a continuation token and limit
+    """
+    num_rows = stream.num_rows
+    headers = {'Accept-Ranges': 'rows', 'X-Total-Rows': str(num_rows)}
+    status = 200
+    try:
+        if 'Range' in request.headers:
+            start, stop = _parse_row_range(request.headers['Range'], num_rows)
+            headers['Content-Range'] = 'rows {}-{}/{}'.format(start, stop - 1, num_rows)
+            status = 206
+        else:
+            start = _decode_token(request.args.get('token'))
+            stop = _limit_stop(start, request.args.get('limit'), num_rows)
+    except _RangeNotSatisfiable as ex:
+        response = jsonify({'message': str(ex)})
+        response.status_code = 416
+        response.headers['Content-Range'] = 'rows */{}'.format(num_rows)
+        return response
+    except ValueError as ex:
+        return _bad_request(ex)
+
+    token = _encode_token(stop) if status == 200 and stop < num_rows else None
+    if token is not None:
+        headers['X-Continuation-Token'] = token
+
+    batches = stream.batches(start, stop)
+    if output_format == 'arrow':
+        body = _arrow_chunks(stream.schema, batches)
+        mimetype = ARROW_STREAM_MIMETYPE
+    else:
+        body = _json_chunks(batches, token)
+        mimetype = 'application/json'
+    return Response(body, status=status, headers=headers, mimetype=mimetype)
+
+
+class _RangeNotSatisfiable(ValueError):
+    pass
+
+
+def _parse_row_range(header, num_rows):
+    """Parse a Range header with the unit 'rows', as 'first-last', 'first-' or '-count'
+
+    Returns
+    -------
+    tuple
+        (start, stop) rows, with stop exclusive
+    """
+    match = re.match(r'^rows=(\d*)-(\d*)$', header.strip())
+    if match is None or match.group(1) == match.group(2) == '':
+        raise ValueError("Could not parse Range '{}', expected 'rows=first-last'".format(
+            header))
+    first, last = match.groups()
+    if first == '':
+        start, stop = max(num_rows - int(last), 0), num_rows
+    else:
+        start = int(first)
+        stop = num_rows if last == '' else min(int(last) + 1, num_rows)
+    if start >= stop:
+        raise _RangeNotSatisfiable("Range '{}' not satisfiable for {} rows".format(
+            header, num_rows))
+    return start, stop
+
+
+def _limit_stop(start, limit, num_rows):
+    """Row to stop at, after at most `limit` rows from `start`
+    """
+    if limit is None:
+        return num_rows
+    msg = "Results limit must be a positive integer, got '{}'".format(limit)
+    try:
+        limit = int(limit)
+    except ValueError:
+        raise ValueError(msg)
+    if limit < 1:
+        raise ValueError(msg)
+    return min(start + limit, num_rows)
+
+
+def _encode_token(start):
+    return base64.urlsafe_b64encode(json.dumps({'start': start}).encode('utf-8')).decode()
+
+
+def _decode_token(token):
+    if token is None:
+        return 0
+    try:
+        start = json.loads(base64.urlsafe_b64decode(token.encode('utf-8')).decode())['start']
+    except (binascii.Error, UnicodeDecodeError, ValueError, KeyError, TypeError):
+        raise ValueError("Could not read continuation token '{}'".format(token))
+    if not isinstance(start, int) or start < 0:
+        raise ValueError("Could not read continuation token '{}'".format(token))
+    return start
+
+
+def _arrow_chunks(schema, batches):
+    """Write record batches to an Arrow IPC stream, yielding the bytes of each as written
+    """
+    import pyarrow as pa  # type: ignore
+
+    sink = io.BytesIO()
+    with pa.ipc.new_stream(sink, schema) as writer:
+        for batch in batches:
+            writer.write_batch(batch)
+            yield _take_bytes(sink)
+    yield _take_bytes(sink)
+
+
+def _take_bytes(sink):
+    value = sink.getvalue()
+    sink.seek(0)
+    sink.truncate()
+    return value
+
+
+def _json_chunks(batches, token):
+    """Write record batches as JSON ``{"data": [<row>, ...], "next": <token>}``, yielding
+    the text of each batch as written
+    """
+    yield '{"data": ['
+    separator = ''
+    for batch in batches:
+        rows = batch.to_pylist()
+        if rows:
+            yield separator + ', '.join(json.dumps(row) for row in rows)
+            separator = ', '
+    yield '], "next": {}, "error": {{}}}}'.format(json.dumps(token))
+
+
+def _bad_request(error):
+    """Return 400 Bad Request with a message
+    """
+    response = jsonify({"message": str(error)})
+    response.status_code = 400
+    return response
+
+
 def check_timestamp(data):
     """Check for timestamp and parse to datetime object
     """
@@ -1,10 +1,13 @@
+import gzip
 import logging
+
 import jinja2.exceptions
-from flask import jsonify, render_template
+from flask import jsonify, render_template, request
 from smif.exception import (SmifDataExistsError, SmifDataMismatchError,
                             SmifDataNotFoundError)
-from smif.http_api.crud import (DimensionAPI, ModelRunAPI, ScenarioAPI,
-                                SectorModelAPI, SmifAPI, SosModelAPI)
+from smif.http_api.crud import (DimensionAPI, IOStatsAPI, ModelRunAPI,
+                                ResultsAPI, ScenarioAPI, SectorModelAPI,
+                                SmifAPI, SosModelAPI)
 
 
 def register_routes(app):
@@ -54,6 +57,14 @@ def register_api_endpoints(app):
                  key='scenario_name', key_type='string')
     register_api(app, DimensionAPI, 'dimension_api', '/api/v1/dimensions/',
                  key='dimension_name', key_type='string')
+    app.add_url_rule('/api/v1/io_stats/', view_func=IOStatsAPI.as_view('io_stats_api'),
+                     methods=['GET', 'DELETE'])
+    results_view = ResultsAPI.as_view('results_api')
+    app.add_url_rule('/api/v1/results/<string:model_run_name>/', view_func=results_view,
+                     methods=['GET'])
+    app.add_url_rule(
+        '/api/v1/results/<string:model_run_name>/<string:model_name>/<string:output_name>',
+        view_func=results_view, methods=['GET'])
 
 
 def register_error_handlers(app):
@@ -84,6 +95,58 @@ def register_error_handlers(app):
         return response
 
 
+# Responses smaller than this are sent uncompressed, as compressing saves little
+COMPRESS_MIN_SIZE = 1024
+
+_COMPRESSIBLE_MIMETYPES = ('application/json', 'application/javascript', 'image/svg+xml')
+
+
+def register_compression(app, min_size=COMPRESS_MIN_SIZE):
+    """Compress responses with brotli (if installed) or gzip, where the client accepts it
+    """
+    @app.after_request
+    def compress(response):
+        return compress_response(response, min_size)
+
+
+def compress_response(response, min_size=COMPRESS_MIN_SIZE):
+    """Compress a text or JSON response, as accepted by the current request
+
+    Streamed and file responses, and those already encoded, are left as they are.
+    """
+    if response.direct_passthrough or response.is_streamed or \
+            response.status_code != 200 or 'Content-Encoding' in response.headers:
+        return response
+    if not (response.mimetype.startswith('text/') or
+            response.mimetype in _COMPRESSIBLE_MIMETYPES):
+        return response
+    response.vary.add('Accept-Encoding')
+
+    data = response.get_data()
+    if len(data) < min_size:
+        return response
+    encodings = ['br', 'gzip'] if _import_brotli() is not None else ['gzip']
+    encoding = request.accept_encodings.best_match(encodings)
+    if encoding == 'br':
+        response.set_data(_import_brotli().compress(data, quality=4))
+    elif encoding == 'gzip':
+        response.set_data(gzip.compress(data, compresslevel=6))
+    else:
+        return response
+    response.headers['Content-Encoding'] = encoding
+    return response
+
+
+def _import_brotli():
+    """Import brotli, an optional dependency, or return None
+    """
+    try:
+        import brotli  # type: ignore
+    except ImportError:
+        return None
+    return brotli
+
+
 def register_api(app, view, endpoint, url, key='id', key_type='int',
                  action=None, action_type=None):
     """Register a MethodView as an endpoint with CRUD operations at a URL
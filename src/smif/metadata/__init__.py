@@ -7,14 +7,17 @@
   :class:`~smif.metadata.coordinates.Coordinates` correspond to ElementSets under the
   `OGC® Open Modelling Interface (OpenMI) Interface Standard
   <http://www.opengeospatial.org/standards/openmi>`_
+- :class:`~smif.metadata.geometry.RegionElements` hold the elements of spatial dimensions,
+  with geometry stored compactly
 """
 
 # import classes here if they should be accessed at the subpackage level, for example ::
 #         from smif.metadata import Spec
 from smif.metadata.coordinates import Coordinates
+from smif.metadata.geometry import RegionElements
 from smif.metadata.timestep import RelativeTimestep
 from smif.metadata.spec import Spec
 
 # Define what should be imported as * ::
 #         from smif.metadata import *
-__all__ = ['Coordinates', 'RelativeTimestep', 'Spec']
+__all__ = ['Coordinates', 'RegionElements', 'RelativeTimestep', 'Spec']
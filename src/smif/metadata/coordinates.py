@@ -28,6 +28,15 @@ Activities (ISIC), revision 4 would be a categorical dimension::
     ... ])
 
 """
+import hashlib
+import numbers
+from weakref import WeakValueDictionary
+
+import numpy as np  # type: ignore
+from smif.metadata.geometry import RegionElements
+
+# Interned Coordinates, by (name, fingerprint) - entries are dropped once no Spec uses them
+_INTERNED = WeakValueDictionary()  # type: WeakValueDictionary
 
 
 class Coordinates(object):
@@ -48,7 +57,12 @@ class Coordinates(object):
     ids : list
         List of labels
     elements : list[dict]
-        List of labels with metadata
+        List of labels with metadata - for regions, this may be a
+        :class:`~smif.metadata.geometry.RegionElements`, which holds geometry compactly
+    index : dict
+        Map from element id to position
+    fingerprint : str
+        Digest of the elements, equal for Coordinates with equal elements
 
     Parameters
     ----------
@@ -67,21 +81,109 @@ class Coordinates(object):
         or a list of dicts with a 'name' key
     """
     def __init__(self, name, elements):
-        self.name = name
+        self._name = name
+        self._interned = False
         self._ids = None
         self._elements = None
         self._set_elements(elements)
+        # computed on first use
+        self._fingerprint = None
+        self._index = None
+
+    @classmethod
+    def intern(cls, name, elements):
+        """Create Coordinates, or return an existing instance with identical content
+
+        Specs which describe data on the same dimension can then share a single set of
+        Coordinates, along with its fingerprint and position map. Interned Coordinates are
+        shared, so cannot be renamed, and their elements must not be changed.
+
+        Parameters
+        ----------
+        name : str
+        elements : list
+
+        Returns
+        -------
+        Coordinates
+        """
+        candidate = cls(name, elements)
+        key = (name, candidate.fingerprint)
+        try:
+            return _INTERNED[key]
+        except KeyError:
+            candidate._interned = True
+            _INTERNED[key] = candidate
+            return candidate
 
     def __eq__(self, other):
+        if self is other:
+            return True
+        if not isinstance(other, Coordinates):
+            return NotImplemented
         return self.name == other.name \
-            and self.elements == other.elements
+            and self.fingerprint == other.fingerprint
 
     def __hash__(self):
-        return hash(tuple(frozenset(e.items()) for e in self._elements))
+        return hash((self.name, self.fingerprint))
 
     def __repr__(self):
         return "<Coordinates name='{}' elements={}>".format(self.name, self.ids)
 
+    @property
+    def name(self):
+        """Dimension name
+        """
+        return self._name
+
+    @name.setter
+    def name(self, name):
+        """Rename, unless shared by interning
+        """
+        if self._interned:
+            msg = "Cannot rename Coordinates '{}', which are shared by interning - create " \
+                  "new Coordinates instead"
+            raise AttributeError(msg.format(self._name))
+        self._name = name
+
+    @property
+    def fingerprint(self):
+        """Digest of the coordinate elements, computed once
+
+        Coordinates with equal elements have equal fingerprints, so comparing or hashing
+        Coordinates does not need to visit every element.
+        """
+        if self._fingerprint is None:
+            self._fingerprint = _fingerprint(self._elements)
+        return self._fingerprint
+
+    @property
+    def index(self):
+        """Map from element id to position along the dimension, computed once
+
+        Returns
+        -------
+        dict
+        """
+        if self._index is None:
+            self._index = {id_: position for position, id_ in enumerate(self._ids)}
+        return self._index
+
+    def positions(self, ids):
+        """Positions of element ids along the dimension
+
+        Parameters
+        ----------
+        ids : iterable
+
+        Returns
+        -------
+        numpy.ndarray
+            Integer positions, -1 for any id not in these coordinates
+        """
+        index = self.index
+        return np.fromiter((index.get(id_, -1) for id_ in ids), dtype='int64')
+
     @property
     def elements(self):
         """Elements are a list of dicts with at least a 'name' key
@@ -113,6 +215,12 @@ class Coordinates(object):
         except TypeError:
             raise ValueError("Coordinate.elements must be finite in length")
 
+        if isinstance(elements, RegionElements):
+            # names are held separately from geometry, so avoid building each element
+            self._ids = elements.names
+            self._elements = elements
+            return
+
         try:
             self._ids = [e['name'] for e in elements]
             self._elements = elements
@@ -134,6 +242,49 @@ class Coordinates(object):
 
     @dim.setter
     def dim(self, dim):
-        """Set name as dim
+        """Set name as dim, unless shared by interning
         """
         self.name = dim
+
+
+def _fingerprint(elements):
+    """Digest of coordinate elements
+
+    Elements which compare equal give the same digest: mappings are compared by sorted
+    items, lists and tuples alike, and numbers by value.
+    """
+    if isinstance(elements, RegionElements):
+        return elements.fingerprint
+    if elements and 'feature' in elements[0]:
+        try:
+            # compare features by geometry, as for RegionElements
+            return RegionElements.from_features(elements).fingerprint
+        except (ImportError, KeyError, TypeError, ValueError, AttributeError):
+            pass
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(repr(_canonical(elements)).encode('utf-8'))
+    return digest.hexdigest()
+
+
+def _canonical(value):
+    """Convert nested data to a form whose repr is equal for values which compare equal
+    """
+    if isinstance(value, str) or value is None:
+        return value
+    if isinstance(value, np.ndarray):
+        return _canonical(value.tolist())
+    if isinstance(value, (numbers.Number, np.bool_)):
+        try:
+            as_float = float(value)
+        except (TypeError, OverflowError):
+            return repr(value)
+        # ints beyond float precision would collide
+        if as_float.is_integer() and abs(as_float) >= 2**53:
+            return repr(value)
+        return as_float
+    if isinstance(value, (list, tuple)):
+        return [_canonical(item) for item in value]
+    if hasattr(value, '__getitem__') and hasattr(value, '__iter__'):
+        # dict or other mapping
+        return sorted(((repr(key), _canonical(value[key])) for key in value))
+    return repr(value)
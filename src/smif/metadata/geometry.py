@@ -0,0 +1,262 @@
+"""Compact geometry for the elements of spatial dimensions
+
+Spatial dimension elements are GeoJSON-like features, which are large when held as nested
+Python dicts and lists. :class:`RegionElements` holds the names, ids and properties of a set
+of regions as light lists, and their geometries as a single buffer of WKB, referenced by
+index. It behaves as a read-only list of ``{'name': ..., 'feature': {...}}`` dicts, building
+each feature only when it is accessed::
+
+    >>> elements = RegionElements.from_features(features)
+    >>> elements.names
+    ['oxford', 'cherwell']
+    >>> elements[0]['feature']['geometry']['type']
+    'Polygon'
+
+Shapely geometries can be read directly, without building GeoJSON::
+
+    >>> elements.geometries()
+    array([<POLYGON ((...))>, <POLYGON ((...))>], dtype=object)
+
+Reading geometry requires shapely, which is an optional dependency.
+"""
+import hashlib
+import json
+from collections.abc import Sequence
+
+import numpy as np  # type: ignore
+
+
+class RegionElements(Sequence):
+    """Region elements, with geometry held as WKB
+
+    Instances should not be changed once created, so they are shared rather than copied by
+    :func:`copy.copy` and :func:`copy.deepcopy`.
+
+    Parameters
+    ----------
+    names : list
+        Region names
+    ids : list
+        Feature ids (may be None)
+    properties : list[str]
+        Feature properties, each encoded as JSON
+    wkb : list[bytes]
+        Feature geometry as WKB (may be None)
+    """
+    def __init__(self, names, ids, properties, wkb):
+        self.names = list(names)
+        self.ids = list(ids)
+        self._properties = list(properties)
+        if not len(self.names) == len(self.ids) == len(self._properties) == len(wkb):
+            raise ValueError("RegionElements names, ids, properties and wkb must be the "
+                             "same length")
+
+        lengths = [0 if geometry is None else len(geometry) for geometry in wkb]
+        self._offsets = np.zeros(len(lengths) + 1, dtype='int64')
+        np.cumsum(lengths, out=self._offsets[1:])
+        self._wkb = b''.join(geometry for geometry in wkb if geometry is not None)
+        self._fingerprint = None
+
+    @classmethod
+    def from_features(cls, elements):
+        """Create from a list of ``{'name': ..., 'feature': {...}}`` dicts
+
+        Parameters
+        ----------
+        elements : list[dict]
+            Each with a name and a GeoJSON-like feature
+        """
+        import shapely  # type: ignore
+        from shapely.geometry import shape  # type: ignore
+
+        features = [element['feature'] for element in elements]
+        geometries = [
+            shape(feature['geometry']) if feature.get('geometry') else None
+            for feature in features
+        ]
+        return cls(
+            names=[element['name'] for element in elements],
+            ids=[feature.get('id') for feature in features],
+            properties=[json.dumps(feature.get('properties')) for feature in features],
+            wkb=shapely.to_wkb(geometries)
+        )
+
+    @property
+    def fingerprint(self):
+        """Digest of names, ids, properties and geometry, computed once
+        """
+        if self._fingerprint is None:
+            digest = hashlib.blake2b(digest_size=16)
+            digest.update(json.dumps([self.names, self.ids, self._properties]).encode('utf-8'))
+            digest.update(self._offsets.tobytes())
+            digest.update(self._wkb)
+            self._fingerprint = digest.hexdigest()
+        return self._fingerprint
+
+    @property
+    def nbytes(self):
+        """Size of the geometry buffer, in bytes
+        """
+        return len(self._wkb) + self._offsets.nbytes
+
+    def wkb(self, index=None):
+        """Geometry as WKB
+
+        Parameters
+        ----------
+        index : int, optional
+            Position of a single region, otherwise return all
+
+        Returns
+        -------
+        bytes or list[bytes]
+            None for any region without a geometry
+        """
+        if index is not None:
+            start, end = self._offsets[index], self._offsets[index + 1]
+            return self._wkb[start:end] if end > start else None
+        return [self.wkb(i) for i in range(len(self))]
+
+    def take(self, indices):
+        """Select regions by position
+
+        Parameters
+        ----------
+        indices : list[int]
+
+        Returns
+        -------
+        RegionElements
+        """
+        return RegionElements(
+            names=[self.names[i] for i in indices],
+            ids=[self.ids[i] for i in indices],
+            properties=[self._properties[i] for i in indices],
+            wkb=[self.wkb(i) for i in indices]
+        )
+
+    def geometries(self):
+        """Geometry as an array of shapely geometries
+
+        Returns
+        -------
+        numpy.ndarray
+        """
+        import shapely  # type: ignore
+        return shapely.from_wkb(self.wkb())
+
+    def properties(self, index):
+        """Feature properties of a single region
+
+        Returns
+        -------
+        dict
+        """
+        return json.loads(self._properties[index])
+
+    def to_list(self):
+        """Build all elements as a list of dicts with GeoJSON-like features
+
+        Returns
+        -------
+        list[dict]
+        """
+        geometries = geometries_to_geojson(self.geometries())
+        return [
+            self._element(index, geometry) for index, geometry in enumerate(geometries)
+        ]
+
+    def _element(self, index, geometry):
+        return {
+            'name': self.names[index],
+            'feature': {
+                'geometry': geometry,
+                'id': self.ids[index],
+                'properties': self.properties(index),
+                'type': 'Feature'
+            }
+        }
+
+    def __len__(self):
+        return len(self.names)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("RegionElements index out of range")
+
+        import shapely  # type: ignore
+        geometry, = geometries_to_geojson(shapely.from_wkb([self.wkb(index)]))
+        return self._element(index, geometry)
+
+    def __iter__(self):
+        return iter(self.to_list())
+
+    def __eq__(self, other):
+        if isinstance(other, RegionElements):
+            return self is other or self.fingerprint == other.fingerprint
+        if isinstance(other, list):
+            # compare geometry as WKB, as GeoJSON coordinates may be lists or tuples
+            try:
+                other = RegionElements.from_features(other)
+            except (KeyError, TypeError, ValueError, AttributeError):
+                return False
+            return self == other
+        return NotImplemented
+
+    __hash__ = None
+
+    def __copy__(self):
+        return self
+
+    def __deepcopy__(self, memo):
+        return self
+
+    def __repr__(self):
+        return "<RegionElements names={} nbytes={}>".format(self.names, self.nbytes)
+
+
+def geometries_to_geojson(geometries):
+    """Convert an array of shapely geometries to GeoJSON-like dicts
+
+    Polygon and multipolygon coordinates are converted in bulk, which is several times
+    faster than converting one geometry at a time.
+
+    Parameters
+    ----------
+    geometries : numpy.ndarray
+        Array of shapely geometries, or None
+
+    Returns
+    -------
+    list[dict]
+    """
+    import shapely  # type: ignore
+    from shapely.geometry import mapping  # type: ignore
+
+    converted = [None] * len(geometries)
+    type_ids = shapely.get_type_id(geometries)
+    bulk_types = {
+        shapely.GeometryType.POLYGON: 'Polygon',
+        shapely.GeometryType.MULTIPOLYGON: 'MultiPolygon'
+    }
+    for type_id, type_name in bulk_types.items():
+        idx = np.flatnonzero(type_ids == type_id)
+        if not len(idx):
+            continue
+        _, coords, offsets = shapely.to_ragged_array(geometries[idx])
+        # nest coordinates into rings, then polygons (then multipolygons)
+        nested = coords.tolist()
+        for offset in offsets:
+            offset = offset.tolist()
+            nested = [nested[start:end] for start, end in zip(offset[:-1], offset[1:])]
+        for i, coordinates in zip(idx, nested):
+            converted[i] = {'type': type_name, 'coordinates': coordinates}
+
+    # any other geometries, one at a time (missing geometries have type id -1)
+    for i in np.flatnonzero(~np.isin(type_ids, list(bulk_types) + [-1])):
+        converted[i] = mapping(geometries[i])
+    return converted
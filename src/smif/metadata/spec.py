@@ -84,6 +84,7 @@ class Spec(object):
 
         self._dims = dims
         self._coords = coords
+        self._coords_by_dim = {coord.dim: coord for coord in coords}
 
         if dtype is None:
             raise ValueError("Spec.dtype must be provided, in {}".format(self._name))
@@ -135,7 +136,8 @@ class Spec(object):
             msg = "Spec.dims must match the keys in coords, in {}"
             raise ValueError(msg.format(self._name))
 
-        coords = [Coordinates(dim, coords[dim]) for dim in dims]
+        # specs of data on the same dimension share Coordinates, so compare cheaply
+        coords = [Coordinates.intern(dim, coords[dim]) for dim in dims]
 
         return coords, dims
 
@@ -237,13 +239,62 @@ class Spec(object):
             msg = "Expected string as argument, instead received {}"
             raise TypeError(msg.format(type(dim)))
 
-        if dim not in self.dims:
+        if dim not in self._dims:
             raise KeyError("Could not find dim '{}' in Spec '{}'".format(dim, self._name))
 
+        try:
+            return self._coords_by_dim[dim]
+        except KeyError:
+            msg = "Coords not found for dim '{}', in Spec '{}'"
+            raise KeyError(msg.format(dim, self._name))
+
+    def select(self, selection):
+        """Spec for a subset of the coordinates of some dimensions
+
+        Parameters
+        ----------
+        selection : dict[str, list]
+            Map from dimension name to the ids of the elements to select, in order
+
+        Returns
+        -------
+        Spec
+
+        Raises
+        ------
+        KeyError
+            If a dimension is not in this Spec
+        ValueError
+            If an id is not in the coordinates of its dimension, or is repeated
+        """
+        for dim in selection:
+            self.dim_coords(dim)
+
+        coords = []
         for coord in self._coords:
-            if coord.dim == dim:
-                return coord
-        raise KeyError("Coords not found for dim '{}', in Spec '{}'".format(dim, self._name))
+            if coord.dim not in selection:
+                coords.append(coord)
+                continue
+            ids = list(selection[coord.dim])
+            positions = coord.positions(ids)
+            if (positions < 0).any():
+                missing = [id_ for id_, position in zip(ids, positions) if position < 0]
+                msg = "Could not select {} from dim '{}' in Spec '{}'"
+                raise ValueError(msg.format(missing, coord.dim, self._name))
+            if len(set(positions.tolist())) != len(ids):
+                msg = "Selection from dim '{}' in Spec '{}' contains repeated ids"
+                raise ValueError(msg.format(coord.dim, self._name))
+            coords.append(Coordinates.intern(coord.dim, _take(coord.elements, positions)))
+
+        return Spec(
+            name=self._name,
+            description=self._description,
+            coords=coords,
+            dtype=self._dtype,
+            abs_range=self._abs_range,
+            exp_range=self._exp_range,
+            unit=self._unit
+        )
 
     def dim_names(self, dim: str):
         """Names of each coordinate in a given dimension
@@ -262,16 +313,17 @@ class Spec(object):
         return self._unit
 
     def __eq__(self, other):
+        # Coordinates compare by fingerprint, so this does not visit every element
         return self.dtype == other.dtype \
             and self.dims == other.dims \
-            and self.coords == other.coords \
+            and self._coords == other._coords \
             and self.unit == other.unit
 
     def __hash__(self):
         return hash((
             self.dtype,
-            tuple(self.dims),
-            tuple(self.coords),
+            tuple(self._dims),
+            tuple(self._coords),
             self.unit
         ))
 
@@ -293,6 +345,15 @@ class Spec(object):
             raise ValueError(msg.format(range_, self._name))
 
 
+def _take(elements, positions):
+    """Select coordinate elements by position
+    """
+    if hasattr(elements, 'take'):
+        # RegionElements
+        return elements.take(positions.tolist())
+    return [elements[position] for position in positions]
+
+
 def _is_sequence(obj):
     """Check for iterable object that is not a string ('strip' is a method on str)
     """
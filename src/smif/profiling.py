@@ -0,0 +1,528 @@
+"""Instrumentation to record where time is spent during a model run.
+
+A :class:`Profiler` records a tree of timed :class:`Span` objects. Each span measures
+monotonic wall-clock time (:func:`time.perf_counter_ns`) and CPU time of the thread that
+opened it, and records the process and thread it ran on, so that nested operations can be
+reconstructed per track.
+
+Spans are usually opened with the :meth:`Profiler.span` context manager::
+
+    >>> from smif.profiling import PROFILER
+    >>> with PROFILER.span('Store.read_results', 'energy_demand', model='energy_demand'):
+    ...     read_some_results()
+
+Recorded spans can be exported in the `Chrome trace event format
+<https://docs.google.com/document/d/1CvAClvFfyA5R-PhYUmn5OOQtYMH4h6I0nSsKchNAySU>`_
+(viewable in ``chrome://tracing`` or https://ui.perfetto.dev), as plain JSON, or
+aggregated into a table of totals per operation (and optionally per model).
+
+Only the most recent spans are kept (``Profiler(max_spans=...)``), so that long model runs
+do not accumulate an unbounded record. Totals per operation and model are kept as each span
+closes, so the aggregated table covers every span, including those no longer kept.
+
+Each span also records how far it raised the peak resident set size of the process - the
+growth of the process's lifetime high-water mark between the span starting and stopping,
+which is zero for a span which stayed below the peak reached by earlier work. If
+memory tracking is switched on (``Profiler(track_memory=True)``), spans additionally record
+the net change in memory allocated by Python (via :mod:`tracemalloc`) and the peak
+allocation above the level at which the span started. Tracing allocations slows down
+execution noticeably, so it is off by default.
+"""
+import json
+import os
+import threading
+import sys
+import time
+import tracemalloc
+from collections import OrderedDict, deque
+from contextlib import contextmanager
+
+try:
+    import resource
+except ImportError:
+    # resource is only available on Unix
+    resource = None
+
+try:
+    _thread_time_ns = time.thread_time_ns
+except AttributeError:
+    # thread_time_ns is not available on all platforms, fall back to process CPU time
+    _thread_time_ns = time.process_time_ns
+
+
+def peak_rss():
+    """Peak resident set size of the current process in bytes, or None if unknown
+    """
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    if sys.platform == 'darwin':
+        # macOS reports bytes, Linux reports kilobytes
+        return peak
+    return peak * 1024
+
+
+class Span(object):
+    """A single timed operation
+
+    Attributes
+    ----------
+    operation : str
+        Name of the operation, for example ``'Store.read_results'``
+    key : str
+        Identifier for this instance of the operation, for example a job id
+    parent : Span or None
+        The span which was open on the same thread when this span started
+    depth : int
+        Nesting depth (zero for top-level spans)
+    pid : int
+        Process id
+    tid : int
+        Thread id
+    start_ns : int
+        Start time, from :func:`time.perf_counter_ns`
+    stop_ns : int or None
+        Stop time, or None if the span is still open
+    meta : dict
+        Any additional metadata (for example model name)
+    rss_start : int or None
+        Peak resident set size of the process in bytes, over its lifetime so far, recorded
+        when the span started
+    rss_peak : int or None
+        Peak resident set size of the process in bytes, over its lifetime so far, recorded
+        when the span stopped
+    """
+    __slots__ = ('operation', 'key', 'parent', 'depth', 'pid', 'tid', 'start_ns', 'stop_ns',
+                 'cpu_start_ns', 'cpu_stop_ns', 'meta', 'mem_start', 'mem_stop', 'mem_peak',
+                 'rss_start', 'rss_peak')
+
+    def __init__(self, operation, key, parent=None, meta=None, track_memory=False):
+        self.operation = operation
+        self.key = key
+        self.parent = parent
+        self.depth = 0 if parent is None else parent.depth + 1
+        self.pid = os.getpid()
+        self.tid = threading.get_ident()
+        self.meta = meta or {}
+        self.stop_ns = None
+        self.cpu_stop_ns = None
+        self.mem_stop = None
+        self.rss_peak = None
+        if track_memory and tracemalloc.is_tracing():
+            current, peak = tracemalloc.get_traced_memory()
+            if parent is not None and parent.mem_peak is not None:
+                # hand the peak so far to the parent before resetting it for this span
+                parent.mem_peak = max(parent.mem_peak, peak)
+            tracemalloc.reset_peak()
+            self.mem_start = self.mem_peak = current
+        else:
+            self.mem_start = self.mem_peak = None
+        self.rss_start = peak_rss()
+        self.cpu_start_ns = _thread_time_ns()
+        self.start_ns = time.perf_counter_ns()
+
+    def __repr__(self):
+        return "<Span operation='{}' key='{}' wall_ns={}>".format(
+            self.operation, self.key, self.wall_ns)
+
+    @property
+    def closed(self):
+        """True if the span has been stopped
+        """
+        return self.stop_ns is not None
+
+    @property
+    def wall_ns(self):
+        """Elapsed wall-clock time in nanoseconds (None if still open)
+        """
+        if self.stop_ns is None:
+            return None
+        return self.stop_ns - self.start_ns
+
+    @property
+    def cpu_ns(self):
+        """Elapsed CPU time of the thread in nanoseconds (None if still open)
+        """
+        if self.cpu_stop_ns is None:
+            return None
+        return self.cpu_stop_ns - self.cpu_start_ns
+
+    @property
+    def alloc_delta(self):
+        """Net change in memory allocated by Python in bytes (None if not tracked)
+        """
+        if self.mem_stop is None:
+            return None
+        return self.mem_stop - self.mem_start
+
+    @property
+    def alloc_peak(self):
+        """Peak memory allocated by Python above the level at start, in bytes (None if not
+        tracked)
+        """
+        if self.mem_stop is None:
+            return None
+        return self.mem_peak - self.mem_start
+
+    @property
+    def rss_growth(self):
+        """Growth in the peak resident set size of the process while the span was open, in
+        bytes (None if still open or unknown)
+        """
+        if self.rss_peak is None or self.rss_start is None:
+            return None
+        return self.rss_peak - self.rss_start
+
+    def stop(self):
+        """Stop timing
+        """
+        self.stop_ns = time.perf_counter_ns()
+        self.cpu_stop_ns = _thread_time_ns()
+        if self.mem_start is not None and tracemalloc.is_tracing():
+            current, peak = tracemalloc.get_traced_memory()
+            self.mem_stop = current
+            self.mem_peak = max(self.mem_peak, peak)
+            if self.parent is not None and self.parent.mem_peak is not None:
+                self.parent.mem_peak = max(self.parent.mem_peak, self.mem_peak)
+        self.rss_peak = peak_rss()
+
+    def as_dict(self):
+        """Serialise to dict representation
+        """
+        return {
+            'operation': self.operation,
+            'key': self.key,
+            'depth': self.depth,
+            'pid': self.pid,
+            'tid': self.tid,
+            'start_ns': self.start_ns,
+            'wall_ns': self.wall_ns,
+            'cpu_ns': self.cpu_ns,
+            'alloc_delta': self.alloc_delta,
+            'alloc_peak': self.alloc_peak,
+            'rss_peak': self.rss_peak,
+            'rss_growth': self.rss_growth,
+            'meta': self.meta
+        }
+
+
+class Profiler(object):
+    """Record a tree of timed spans
+
+    Each thread keeps its own stack of open spans, so nesting is tracked per thread without
+    scanning previously recorded spans.
+
+    Parameters
+    ----------
+    enabled : bool, default=True
+        If False, :meth:`start` and :meth:`span` do no work
+    track_memory : bool, default=False
+        If True, start :mod:`tracemalloc` (if it is not already tracing) and record memory
+        allocated during each span
+    max_spans : int or None, default=10000
+        Number of most recent spans to keep, or None to keep every span - totals per
+        operation and model are kept for every span regardless
+    """
+    # span fields which are totalled as spans close
+    TOTALLED = ('operation', 'model')
+
+    def __init__(self, enabled=True, track_memory=False, max_spans=10000):
+        self.enabled = enabled
+        self.track_memory = track_memory
+        self._spans = deque(maxlen=max_spans)
+        self._totals = OrderedDict()
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def _stack(self):
+        try:
+            return self._local.stack
+        except AttributeError:
+            self._local.stack = []
+            return self._local.stack
+
+    @property
+    def spans(self):
+        """Recorded spans, up to the most recent `max_spans`, in the order they were started
+        """
+        with self._lock:
+            return list(self._spans)
+
+    def clear(self):
+        """Discard all recorded spans and totals
+        """
+        with self._lock:
+            self._spans.clear()
+            self._totals = OrderedDict()
+        self._local = threading.local()
+
+    def start(self, operation, key='', **meta):
+        """Start a span, nested under the innermost open span on this thread
+
+        Parameters
+        ----------
+        operation : str
+        key : str, optional
+        meta
+            Any additional metadata to record
+
+        Returns
+        -------
+        Span or None
+            None if the profiler is disabled
+        """
+        if not self.enabled:
+            return None
+        stack = self._stack()
+        parent = stack[-1] if stack else None
+        if self.track_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+        span = Span(operation, key, parent, meta, self.track_memory)
+        stack.append(span)
+        with self._lock:
+            self._spans.append(span)
+        return span
+
+    def stop(self, span_or_operation, key=''):
+        """Stop a span
+
+        Parameters
+        ----------
+        span_or_operation : Span or str
+            A span returned from :meth:`start`, or the name of an operation, in which case the
+            innermost open span on this thread matching operation and key is stopped
+        key : str, optional
+
+        Returns
+        -------
+        Span or None
+        """
+        if span_or_operation is None:
+            return None
+        stack = self._stack()
+        if isinstance(span_or_operation, Span):
+            span = span_or_operation
+        else:
+            span = None
+            for candidate in reversed(stack):
+                if candidate.operation == span_or_operation and candidate.key == key:
+                    span = candidate
+                    break
+            if span is None:
+                return None
+        stopped = span.closed
+        span.stop()
+        if not stopped:
+            self._add_to_totals(span)
+        # close the span, along with any children left open
+        if span in stack:
+            while stack:
+                if stack.pop() is span:
+                    break
+        return span
+
+    @contextmanager
+    def span(self, operation, key='', **meta):
+        """Context manager to time a block of code
+
+        Parameters
+        ----------
+        operation : str
+        key : str, optional
+        meta
+            Any additional metadata to record
+
+        Yields
+        ------
+        Span or None
+            None if the profiler is disabled
+        """
+        span = self.start(operation, key, **meta)
+        try:
+            yield span
+        finally:
+            self.stop(span)
+
+    def _add_to_totals(self, span):
+        group_key = tuple(_span_field(span, field) for field in self.TOTALLED)
+        with self._lock:
+            try:
+                group = self._totals[group_key]
+            except KeyError:
+                group = self._totals[group_key] = _new_group()
+            _add_to_group(group, span)
+
+    def aggregate(self, group_by=('operation',)):
+        """Aggregate closed spans into totals
+
+        Grouping by 'operation' and 'model' covers every span closed since the profiler was
+        cleared. Grouping by any other field covers only the spans still kept.
+
+        Parameters
+        ----------
+        group_by : tuple[str], default=('operation',)
+            Span attributes (or metadata keys, such as 'model') to group by
+
+        Returns
+        -------
+        list[dict]
+            One dict per group with keys from `group_by` and 'count', 'wall_total_s',
+            'wall_mean_s', 'wall_max_s', 'cpu_total_s', 'alloc_peak_max' and
+            'rss_growth_max' (memory in bytes, None if not recorded), sorted by descending
+            total wall time
+        """
+        if set(group_by) <= set(self.TOTALLED):
+            groups = self._aggregate_totals(group_by)
+        else:
+            groups = OrderedDict()
+            for span in self.spans:
+                if not span.closed:
+                    continue
+                group_key = tuple(_span_field(span, field) for field in group_by)
+                try:
+                    group = groups[group_key]
+                except KeyError:
+                    group = groups[group_key] = _new_group()
+                _add_to_group(group, span)
+
+        table = []
+        for group_key, group in groups.items():
+            row = OrderedDict(zip(group_by, group_key))
+            row['count'] = group['count']
+            row['wall_total_s'] = group['wall'] / 1e9
+            row['wall_mean_s'] = group['wall'] / group['count'] / 1e9
+            row['wall_max_s'] = group['wall_max'] / 1e9
+            row['cpu_total_s'] = group['cpu'] / 1e9
+            row['alloc_peak_max'] = group['alloc_peak']
+            row['rss_growth_max'] = group['rss_growth']
+            table.append(row)
+        return sorted(table, key=lambda row: row['wall_total_s'], reverse=True)
+
+    def _aggregate_totals(self, group_by):
+        """Merge totals kept per operation and model into groups
+        """
+        positions = [self.TOTALLED.index(field) for field in group_by]
+        groups = OrderedDict()
+        with self._lock:
+            totals = [(key, dict(total)) for key, total in self._totals.items()]
+        for total_key, total in totals:
+            group_key = tuple(total_key[position] for position in positions)
+            try:
+                group = groups[group_key]
+            except KeyError:
+                groups[group_key] = total
+                continue
+            group['count'] += total['count']
+            group['wall'] += total['wall']
+            group['wall_max'] = max(group['wall_max'], total['wall_max'])
+            group['cpu'] += total['cpu']
+            group['alloc_peak'] = _max_or_none(group['alloc_peak'], total['alloc_peak'])
+            group['rss_growth'] = _max_or_none(group['rss_growth'], total['rss_growth'])
+        return groups
+
+    def as_chrome_trace(self):
+        """Export closed spans as Chrome trace events
+
+        Returns
+        -------
+        dict
+            With a 'traceEvents' list of complete ('X') events, timestamps in microseconds
+        """
+        spans = [span for span in self.spans if span.closed]
+        origin = min((span.start_ns for span in spans), default=0)
+        events = []
+        for span in spans:
+            args = {'key': span.key, 'cpu_ms': span.cpu_ns / 1e6}
+            if span.alloc_peak is not None:
+                args['alloc_peak'] = span.alloc_peak
+                args['alloc_delta'] = span.alloc_delta
+            args.update(span.meta)
+            events.append({
+                'name': span.operation,
+                'cat': span.operation.split('.')[0],
+                'ph': 'X',
+                'ts': (span.start_ns - origin) / 1e3,
+                'dur': span.wall_ns / 1e3,
+                'pid': span.pid,
+                'tid': span.tid,
+                'args': _jsonable(args)
+            })
+        return {'traceEvents': events, 'displayTimeUnit': 'ms'}
+
+    def write_chrome_trace(self, path):
+        """Write closed spans to a Chrome trace JSON file
+
+        Parameters
+        ----------
+        path : str
+        """
+        with open(path, 'w') as file_handle:
+            json.dump(self.as_chrome_trace(), file_handle)
+
+    def write_json(self, path, group_by=('operation',)):
+        """Write closed spans and aggregated totals to a JSON file
+
+        Parameters
+        ----------
+        path : str
+        group_by : tuple[str], default=('operation',)
+        """
+        spans = []
+        for span in self.spans:
+            if span.closed:
+                span_dict = span.as_dict()
+                span_dict['meta'] = _jsonable(span_dict['meta'])
+                spans.append(span_dict)
+        data = {
+            'spans': spans,
+            'aggregate': self.aggregate(group_by)
+        }
+        with open(path, 'w') as file_handle:
+            json.dump(data, file_handle, indent=2)
+
+
+def _new_group():
+    return {'count': 0, 'wall': 0, 'wall_max': 0, 'cpu': 0, 'alloc_peak': None,
+            'rss_growth': None}
+
+
+def _add_to_group(group, span):
+    """Add a closed span to running totals
+    """
+    group['count'] += 1
+    group['wall'] += span.wall_ns
+    group['wall_max'] = max(group['wall_max'], span.wall_ns)
+    group['cpu'] += span.cpu_ns
+    group['alloc_peak'] = _max_or_none(group['alloc_peak'], span.alloc_peak)
+    group['rss_growth'] = _max_or_none(group['rss_growth'], span.rss_growth)
+
+
+def _span_field(span, field):
+    """Read a span attribute or metadata value by name
+    """
+    if field in Span.__slots__:
+        return getattr(span, field)
+    return span.meta.get(field)
+
+
+def _max_or_none(a, b):
+    """Maximum of two values, ignoring None
+    """
+    if a is None:
+        return b
+    if b is None:
+        return a
+    return max(a, b)
+
+
+def _jsonable(data):
+    """Convert any values which json cannot serialise to strings
+    """
+    return {
+        key: value if isinstance(value, (str, int, float, bool, type(None))) else str(value)
+        for key, value in data.items()
+    }
+
+
+# Default profiler, shared by smif components
+PROFILER = Profiler()
@@ -1,7 +1,9 @@
 """Test command line interface
 """
 
+import json
 import os
+import shutil
 import subprocess
 import sys
 from tempfile import TemporaryDirectory
@@ -9,7 +11,9 @@ from unittest.mock import call, patch
 
 import smif
 from pytest import fixture
-from smif.cli import confirm, parse_arguments, setup_project_folder
+from smif.cli import (confirm, generate_project_folder, parse_arguments,
+                      setup_project_folder)
+from smif.data_layer.file.snapshot import snapshot_path
 
 
 @fixture
@@ -101,6 +105,63 @@ def test_fixture_batch_run(tmp_sample_project):
     assert "Model run 'energy_central' complete" in str(output.stdout)
 
 
+def test_fixture_batch_run_parallel(tmp_sample_project):
+    """Test running the multiple modelruns in parallel worker processes
+    """
+    config_dir = tmp_sample_project
+    io_stats_path = os.path.join(config_dir, "io_stats.json")
+    output = subprocess.run(["smif", "run", "-v", "-b", "-j", "2", "-d", config_dir,
+                             "--io-stats", io_stats_path,
+                             os.path.join(config_dir, "batchfile")],
+                            stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    print(output.stdout.decode("utf-8"))
+    print(output.stderr.decode("utf-8"), file=sys.stderr)
+    assert output.returncode == 0
+    assert "Model run 'energy_water_cp_cr' complete" in str(output.stdout)
+    assert "Model run 'energy_central' complete" in str(output.stdout)
+
+    with open(io_stats_path) as stats_file:
+        stats = json.load(stats_file)
+    assert stats['methods']['store.write_results']['calls'] > 0
+
+
+def test_fixture_failed_run_profile(tmp_sample_project, tmpdir):
+    """A failed run should still be profiled
+    """
+    config_dir = tmp_sample_project
+    profile = str(tmpdir.join('profile.json'))
+    output = subprocess.run(["smif", "run", "-d", config_dir, "no_such_model_run",
+                             "--profile", profile],
+                            stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    assert output.returncode != 0
+
+    with open(profile) as file_handle:
+        operations = [row['operation'] for row in json.load(file_handle)['aggregate']]
+    assert 'run_model_runs' in operations
+
+
+def test_fixture_sweep_run(tmp_sample_project):
+    """Test running a model run which sweeps over scenario variants
+    """
+    config_dir = tmp_sample_project
+    model_run_path = os.path.join(config_dir, "config", "model_runs", "energy_central.yml")
+    with open(model_run_path) as model_run_file:
+        config = model_run_file.read()
+    with open(model_run_path, 'w') as model_run_file:
+        model_run_file.write(config)
+        model_run_file.write(
+            "sweep:\n  scenarios:\n    population: [population_low, population_high]\n")
+
+    output = subprocess.run(["smif", "run", "-v", "-d", config_dir, "energy_central"],
+                            stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    print(output.stdout.decode("utf-8"))
+    print(output.stderr.decode("utf-8"), file=sys.stderr)
+    assert output.returncode == 0
+    assert "Model run 'energy_central' complete" in str(output.stdout)
+    for model_run in ("energy_central_0", "energy_central_1"):
+        assert os.path.isdir(os.path.join(config_dir, "results", model_run))
+
+
 def test_fixture_list_runs(tmp_sample_project):
     """Test running the filesystem-based single_run fixture
     """
@@ -115,6 +176,44 @@ def test_fixture_list_runs(tmp_sample_project):
     assert "energy_central *" in str(output.stdout)
 
 
+def test_list_runs_broken_dimension(tmpdir):
+    """Listing model runs should not read dimensions, so a missing dimension file is no
+    obstacle, and should not write to the project
+    """
+    project = str(tmpdir.join('project'))
+    subprocess.run(["smif", "setup", "-d", project], stdout=subprocess.PIPE)
+    shutil.rmtree(os.path.join(project, 'data', 'dimensions', 'uk_nations_shp'))
+
+    output = subprocess.run(["smif", "list", "-d", project], stdout=subprocess.PIPE,
+                            stderr=subprocess.PIPE)
+    assert output.returncode == 0, output.stderr
+    assert "energy_central" in str(output.stdout)
+    assert "energy_water_cp_cr" in str(output.stdout)
+    assert not os.path.exists(os.path.join(project, '.smif'))
+
+
+def test_list_builds_snapshot(tmpdir):
+    """Listing model runs should save a snapshot of what it read, and save it again once a
+    source file changes
+    """
+    project = str(tmpdir.join('project'))
+    subprocess.run(["smif", "setup", "-d", project], stdout=subprocess.PIPE)
+    path = snapshot_path(project)
+
+    subprocess.run(["smif", "list", "-d", project], stdout=subprocess.PIPE)
+    assert os.path.exists(path)
+    mtime = os.stat(path).st_mtime_ns
+
+    subprocess.run(["smif", "list", "-d", project], stdout=subprocess.PIPE)
+    assert os.stat(path).st_mtime_ns == mtime
+
+    model_run_path = os.path.join(project, 'config', 'model_runs', 'energy_central.yml')
+    with open(model_run_path, 'a') as file_handle:
+        file_handle.write('\n')
+    subprocess.run(["smif", "list", "-d", project], stdout=subprocess.PIPE)
+    assert os.stat(path).st_mtime_ns != mtime
+
+
 def test_fixture_available_results(tmp_sample_project):
     """Test cli for listing available results
     """
@@ -204,6 +303,18 @@ def test_setup_project_folder():
             assert os.path.exists(folder_path)
 
 
+def test_generate_project_folder():
+    """Test a generated project can be listed
+    """
+    with TemporaryDirectory() as project_folder:
+        args = get_args(['generate', '-d', project_folder, '--models', '2', '--regions', '4'])
+        generate_project_folder(args)
+
+        output = subprocess.run(["smif", "list", "-d", project_folder],
+                                stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        assert 'synthetic' in str(output.stdout)
+
+
 @patch('builtins.input', return_value='y')
 def test_confirm_yes(input):
     assert confirm()
@@ -0,0 +1,53 @@
+"""Test that commands which only read configuration do not import heavy dependencies
+"""
+import subprocess
+import sys
+
+from pytest import fixture, mark
+from smif.controller.setup import copy_project_folder
+
+HEAVY_MODULES = [
+    'fiona', 'flask', 'networkx', 'pandas', 'pint', 'pkg_resources', 'psycopg2', 'pyarrow',
+    'rtree', 'shapely', 'xarray', 'smif.controller', 'smif.http_api'
+]
+
+
+def _imported_modules(code):
+    """Run code in a fresh interpreter, return which of HEAVY_MODULES it imported
+    """
+    code += "\nimport sys\n" \
+        "print('imported:' + ','.join(m for m in {!r} if m in sys.modules))" \
+        .format(HEAVY_MODULES)
+    output = subprocess.run([sys.executable, '-c', code],
+                            stdout=subprocess.PIPE, check=True, universal_newlines=True)
+    imported = output.stdout.split('imported:')[-1].strip()
+    return [name for name in imported.split(',') if name]
+
+
+@fixture(scope='module')
+def sample_project(tmpdir_factory):
+    project = str(tmpdir_factory.mktemp('startup').join('project'))
+    copy_project_folder(project)
+    return project
+
+
+def test_import_cli():
+    assert _imported_modules("import smif.cli") == []
+
+
+@mark.parametrize('command', [
+    ['list'],
+    ['list', '-c'],
+    ['available_results', 'energy_central'],
+    ['missing_results', 'energy_central'],
+])
+def test_read_only_commands(sample_project, command):
+    code = "from smif.cli import main; main({!r})".format(
+        command[:1] + ['-d', sample_project] + command[1:])
+    assert _imported_modules(code) == []
+
+
+def test_import_one_adaptor():
+    assert 'pint' not in _imported_modules(
+        "from smif.convert import IntervalAdaptor")
+    assert _imported_modules("import smif.convert") == []
@@ -26,6 +26,14 @@ logging.basicConfig(filename='test_logs.log',
                     filemode='w')
 
 
+@fixture(scope='session', autouse=True)
+def snapshot_folder(tmp_path_factory):
+    """Keep project snapshots, saved as tests and the commands they run exit, out of the
+    user's cache folder - left set for the rest of the session, as snapshots are saved at exit
+    """
+    os.environ['SMIF_CACHE_DIR'] = str(tmp_path_factory.mktemp('snapshots'))
+
+
 @fixture
 def empty_store():
     """Store fixture
@@ -0,0 +1,104 @@
+"""Test generation of synthetic projects
+"""
+import os
+
+from pytest import fixture, mark, raises
+from smif.controller.build import build_model_run, get_model_run_definition
+from smif.controller.generate import (DATA_STORES, MODEL_RUN_NAME,
+                                      even_intervals, generate_project,
+                                      grid_regions)
+from smif.data_layer import Store
+from smif.data_layer.file import FileMetadataStore, YamlConfigStore
+
+
+def _area(feature):
+    ring = feature['geometry']['coordinates'][0]
+    return abs(sum(
+        x0 * y1 - x1 * y0 for (x0, y0), (x1, y1) in zip(ring[:-1], ring[1:]))) / 2
+
+
+def _store(directory, interface):
+    data_store_class, _ = DATA_STORES[interface]
+    return Store(
+        config_store=YamlConfigStore(directory),
+        metadata_store=FileMetadataStore(directory),
+        data_store=data_store_class(directory),
+        model_base_folder=directory
+    )
+
+
+@fixture
+def project_folder(tmpdir):
+    return str(tmpdir.join('synthetic'))
+
+
+class TestDimensions():
+    @mark.parametrize('n', [1, 4, 7, 10, 16])
+    def test_coarse_regions_cover_fine(self, n):
+        fine, coarse = grid_regions(n, cell_size=1)
+        assert len(fine) == n
+        assert len(coarse) < n or n == 1
+        assert sum(_area(feature) for feature in fine) == n
+        assert sum(_area(feature) for feature in coarse) == n
+
+    def test_even_intervals(self):
+        intervals = even_intervals(5)
+        assert len(intervals) == 5
+        assert intervals[0]['interval'] == [['PT0H', 'PT1752H']]
+        assert intervals[-1]['interval'][0][1] == 'PT8760H'
+
+
+class TestGenerate():
+    def test_summary(self, project_folder):
+        summary = generate_project(project_folder, models=5, regions=9, intervals=2,
+                                   timesteps=2, fan_in=3, adaptor_every=2)
+        assert summary['models'] == 5
+        assert summary['regions'] == 9
+        assert summary['coarse_regions'] == 4
+        assert summary['interventions'] == 50
+        # model_001 and model_003 run on coarse regions: one adaptor for each of their
+        # fine sources and one to each of their fine sinks
+        assert summary['adaptors'] == 4
+
+    def test_config(self, project_folder):
+        generate_project(project_folder, models=3, regions=4, intervals=2, timesteps=4,
+                         adaptor_every=0)
+        store = _store(project_folder, 'local_csv')
+
+        model_run = store.read_model_run(MODEL_RUN_NAME)
+        assert model_run['timesteps'] == [2010, 2015, 2020, 2025]
+
+        sos_model = store.read_sos_model(model_run['sos_model'])
+        assert sos_model['sector_models'] == ['model_000', 'model_001', 'model_002']
+        sinks = [(dep['source'], dep['sink']) for dep in sos_model['model_dependencies']]
+        assert sinks == [
+            ('model_000', 'model_001'), ('model_000', 'model_002'), ('model_001', 'model_002')
+        ]
+
+        assert len(store.read_interventions('model_002')) == 10
+        assert store.read_initial_conditions('model_002') == [
+            {'name': 'model_002_asset_0', 'build_year': 2000}
+        ]
+
+    @mark.parametrize('interface', list(DATA_STORES))
+    def test_run(self, project_folder, interface):
+        generate_project(project_folder, models=3, regions=4, intervals=2, timesteps=2,
+                         adaptor_every=2, interface=interface)
+        store = _store(project_folder, interface)
+
+        model_run = build_model_run(get_model_run_definition(store, MODEL_RUN_NAME))
+        model_run.run(store)
+
+        results = store.available_results(MODEL_RUN_NAME)
+        # three models and two adaptors with one output each, for two timesteps
+        assert len(results) == 10
+        assert os.path.exists(os.path.join(project_folder, 'models', 'synthetic.py'))
+
+    def test_invalid(self, project_folder):
+        with raises(ValueError) as ex:
+            generate_project(project_folder, interface='unknown')
+        assert "Interface 'unknown' not recognised" in str(ex.value)
+
+        with raises(ValueError) as ex:
+            generate_project(project_folder, models=0)
+        assert "Expected at least one of 'models'" in str(ex.value)
@@ -1,10 +1,15 @@
 """Test ModelRunScheduler and JobScheduler
 """
+import multiprocessing
+from queue import Empty
 from unittest.mock import Mock, patch
 
 import networkx
 from pytest import fixture, raises
-from smif.controller.scheduler import JobScheduler, ModelRunScheduler
+from smif.controller.scheduler import (JobScheduler, MemoryBudget,
+                                       ModelRunScheduler, SharedMemoryBudget,
+                                       estimate_model_memory, estimate_spec_memory)
+from smif.metadata import Spec
 from smif.model import ModelOperation, ScenarioModel, SectorModel
 
 
@@ -13,6 +18,12 @@ class EmptySectorModel(SectorModel):
         return data
 
 
+def _reserve_and_release(budget, nbytes, queue):
+    budget.reserve(nbytes)
+    queue.put(budget.in_use)
+    budget.release(nbytes)
+
+
 class TestModelRunScheduler():
     @patch('smif.controller.scheduler.subprocess.Popen')
     def test_single_modelrun(self, mock_popen):
@@ -217,3 +228,77 @@ class TestJobScheduler():
 
         assert isinstance(err, ValueError)
         assert scheduler.get_status(job_id)['status'] == 'failed'
+
+    def test_job_stats(self, job_graph, scheduler):
+        job_id, err = scheduler.add(job_graph)
+
+        assert err is None
+        stats = scheduler.get_job_stats(job_id)
+        assert [job['job_id'] for job in stats] == ['a', 'b']
+        assert stats[0]['operation'] == 'before_model_run'
+        assert stats[1]['model'] == 'b'
+        assert stats[1]['wall_s'] >= 0
+        assert stats[1]['estimated_bytes'] == 0
+        assert stats[1]['rss_growth_bytes'] >= 0
+
+    def test_memory_budget_released(self, job_graph, scheduler):
+        scheduler.memory_budget = MemoryBudget(1024)
+        job_id, err = scheduler.add(job_graph)
+
+        assert err is None
+        assert scheduler.memory_budget.in_use == 0
+
+
+class TestMemoryBudget():
+    def test_estimate_spec_memory(self):
+        spec = Spec(name='spec', dims=['a', 'b'], coords={'a': [1, 2, 3], 'b': [1, 2]},
+                    dtype='float')
+        assert estimate_spec_memory(spec) == 3 * 2 * 8
+
+        spec = Spec(name='spec', dims=['a'], coords={'a': [1, 2, 3]}, dtype='int32')
+        assert estimate_spec_memory(spec) == 3 * 4
+
+    def test_estimate_model_memory(self):
+        model = EmptySectorModel('model')
+        model.add_input(Spec(name='input', dims=['a'], coords={'a': [1, 2]}, dtype='float'))
+        model.add_output(Spec(name='output', dims=['a'], coords={'a': [1, 2]}, dtype='float'))
+        assert estimate_model_memory(model) == 32
+
+    def test_reserve_release(self):
+        budget = MemoryBudget(100)
+
+        assert budget.reserve(60)
+        assert not budget.fits(60)
+        assert not budget.reserve(60)
+        assert budget.in_use == 60
+
+        budget.release(60)
+        assert budget.in_use == 0
+        assert budget.reserve(60)
+
+    def test_oversized_job_runs_alone(self):
+        budget = MemoryBudget(100)
+
+        assert budget.reserve(200)
+        assert not budget.fits(1)
+        budget.release(200)
+        assert budget.fits(1)
+
+    def test_shared_between_processes(self):
+        """A job in another process waits for reserved memory to be released
+        """
+        context = multiprocessing.get_context('spawn')
+        budget = SharedMemoryBudget(100, context)
+        queue = context.Queue()
+        assert budget.reserve(60)
+
+        process = context.Process(target=_reserve_and_release, args=(budget, 60, queue))
+        process.start()
+        with raises(Empty):
+            queue.get(timeout=2)
+        budget.release(60)
+        assert queue.get(timeout=60) == 60
+        process.join(60)
+
+        assert process.exitcode == 0
+        assert budget.in_use == 0
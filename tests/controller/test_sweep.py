@@ -0,0 +1,207 @@
+from unittest.mock import Mock
+
+from pytest import fixture, raises
+from smif.controller.sweep import (SweepRunner, _run_context, expand_sweep,
+                                   write_sweep_model_runs)
+from smif.exception import SmifDataNotFoundError, SmifValidationError
+from smif.metadata import Spec
+from smif.model import ScenarioModel, SectorModel, SosModel
+
+
+class EmptySectorModel(SectorModel):
+    def simulate(self, data):
+        return data
+
+
+@fixture(scope='function')
+def sweep_config():
+    return {
+        'name': 'sweep',
+        'description': 'Energy demand',
+        'timesteps': [2010, 2015],
+        'sos_model': 'energy',
+        'scenarios': {'population': 'central', 'climate': 'central'},
+        'narratives': {'technology': ['high_tech']},
+        'strategies': [],
+        'sweep': {
+            'scenarios': {'climate': ['dry', 'wet']},
+            'narratives': {'technology': ['low_tech', ['high_tech', 'smart']]}
+        }
+    }
+
+
+def make_model_run(name, climate, strategies=None):
+    """Model run of a population scenario -> population model -> demand model <- climate
+    scenario
+    """
+    sos_model = SosModel('energy')
+    population = ScenarioModel('population')
+    population.scenario = 'central'
+    population.add_output(Spec('population', dtype='float'))
+    climate_scenario = ScenarioModel('climate')
+    climate_scenario.scenario = climate
+    climate_scenario.add_output(Spec('temperature', dtype='float'))
+
+    population_model = EmptySectorModel('population_model')
+    population_model.add_input(Spec('population', dtype='float'))
+    population_model.add_output(Spec('households', dtype='float'))
+    demand_model = EmptySectorModel('demand_model')
+    demand_model.add_input(Spec('households', dtype='float'))
+    demand_model.add_input(Spec('temperature', dtype='float'))
+
+    for model in (population, climate_scenario, population_model, demand_model):
+        sos_model.add_model(model)
+    sos_model.add_dependency(population, 'population', population_model, 'population')
+    sos_model.add_dependency(population_model, 'households', demand_model, 'households')
+    sos_model.add_dependency(climate_scenario, 'temperature', demand_model, 'temperature')
+
+    model_run = Mock()
+    model_run.name = name
+    model_run.strategies = strategies or []
+    model_run.sos_model = sos_model
+    model_run.scenarios = {'population': 'central', 'climate': climate}
+    model_run.narratives = {}
+    model_run.model_horizon = [2010, 2015]
+    model_run.initialised = False
+    return model_run
+
+
+def build_graph(model_runs):
+    runner = SweepRunner()
+    bundle = {'decision_iterations': [0], 'timesteps': [2010, 2015]}
+    contexts = {model_run.name: _run_context(model_run) for model_run in model_runs}
+    return runner.build_sweep_job_graph(
+        [(model_run, bundle) for model_run in model_runs], {}, contexts)
+
+
+class TestExpandSweep():
+    def test_product(self, sweep_config):
+        actual = expand_sweep(sweep_config)
+
+        assert [config['name'] for config in actual] == \
+            ['sweep_0', 'sweep_1', 'sweep_2', 'sweep_3']
+        assert [config['scenarios']['climate'] for config in actual] == \
+            ['dry', 'dry', 'wet', 'wet']
+        assert [config['narratives']['technology'] for config in actual] == \
+            [['low_tech'], ['high_tech', 'smart']] * 2
+        assert actual[1]['description'] == \
+            'Energy demand (climate=dry, technology=high_tech+smart)'
+        for config in actual:
+            assert 'sweep' not in config
+            assert config['scenarios']['population'] == 'central'
+        # the swept model run is unchanged
+        assert sweep_config['scenarios']['climate'] == 'central'
+
+    def test_sample(self, sweep_config):
+        sweep_config['sweep']['scenarios']['climate'] = ['a', 'b', 'c', 'd', 'e']
+        sweep_config['sweep']['samples'] = 3
+        sweep_config['sweep']['seed'] = 1
+
+        actual = expand_sweep(sweep_config)
+        assert len(actual) == 3
+        assert actual == expand_sweep(sweep_config)
+        combinations = set(
+            (config['scenarios']['climate'], tuple(config['narratives']['technology']))
+            for config in actual
+        )
+        assert len(combinations) == 3
+
+    def test_sample_more_than_product(self, sweep_config):
+        sweep_config['sweep']['samples'] = 10
+        assert len(expand_sweep(sweep_config)) == 4
+
+    def test_nothing_to_sweep(self, sweep_config):
+        sweep_config['sweep'] = {'scenarios': {}}
+        with raises(SmifValidationError):
+            expand_sweep(sweep_config)
+
+    def test_no_variants(self, sweep_config):
+        sweep_config['sweep']['scenarios']['climate'] = []
+        with raises(SmifValidationError) as ex:
+            expand_sweep(sweep_config)
+        assert "no variants for scenario 'climate'" in str(ex.value)
+
+    def test_write_sweep_model_runs(self, sweep_config):
+        store = Mock()
+        store.read_model_run.side_effect = [SmifDataNotFoundError, {}, {}, {}]
+        store.read_strategies.return_value = [
+            {'type': 'pre-specified-planning', 'filename': 'build.csv', 'interventions': []}
+        ]
+
+        actual = write_sweep_model_runs(store, sweep_config)
+
+        assert actual == ['sweep_0', 'sweep_1', 'sweep_2', 'sweep_3']
+        assert store.write_model_run.call_count == 1
+        assert store.update_model_run.call_count == 3
+        store.write_strategies.assert_called_with(
+            'sweep_3', [{'type': 'pre-specified-planning', 'filename': 'build.csv'}])
+
+
+class TestSweepJobGraph():
+    def test_share_identical_jobs(self):
+        """Only the demand model depends on the climate scenario, so the population model
+        and scenario jobs are shared
+        """
+        job_graph = build_graph([make_model_run('dry', 'dry'), make_model_run('wet', 'wet')])
+
+        for timestep in (2010, 2015):
+            for model_name in ('population', 'population_model'):
+                job_id = 'dry_simulate_{}_0_{}'.format(timestep, model_name)
+                assert job_graph.nodes[job_id]['shared_with'] == ['wet']
+                assert 'wet_simulate_{}_0_{}'.format(timestep, model_name) not in job_graph
+            for model_name in ('climate', 'demand_model'):
+                job_id = 'wet_simulate_{}_0_{}'.format(timestep, model_name)
+                assert job_graph.nodes[job_id]['shared_with'] == []
+
+        # each model run still initialises its own models
+        assert 'wet_before_model_run_population_model' in job_graph
+        # demand in the second model run reads households shared from the first
+        assert job_graph.has_edge('dry_simulate_2010_0_population_model',
+                                  'wet_simulate_2010_0_demand_model')
+        # and models run through timesteps in order
+        assert job_graph.has_edge('wet_simulate_2010_0_demand_model',
+                                  'wet_simulate_2015_0_demand_model')
+
+    def test_identical_model_runs(self):
+        job_graph = build_graph([make_model_run('a', 'dry'), make_model_run('b', 'dry')])
+        simulate_jobs = [job for job in job_graph.nodes.values()
+                         if job['current_timestep'] is not None]
+        assert len(simulate_jobs) == 8
+        assert all(job['shared_with'] == ['b'] for job in simulate_jobs)
+
+    def test_decisions_not_shared(self):
+        """Sector model jobs are not shared where decisions may depend on results
+        """
+        strategies = [{'type': 'rule-based', 'classname': 'Rules'}]
+        job_graph = build_graph([make_model_run('a', 'dry', strategies),
+                                 make_model_run('b', 'dry', strategies)])
+
+        assert job_graph.nodes['a_simulate_2010_0_population']['shared_with'] == ['b']
+        assert job_graph.nodes['a_simulate_2010_0_population_model']['shared_with'] == []
+        assert 'b_simulate_2010_0_population_model' in job_graph
+
+    def test_run_shares_results(self):
+        """Results of shared jobs are linked into each other model run
+        """
+        store = Mock()
+        store.read_model_run.return_value = {
+            'sos_model': 'energy', 'narratives': {}, 'scenarios': {}}
+        store.read_sos_model.return_value = {
+            'name': 'energy', 'model_dependencies': [], 'scenario_dependencies': []}
+        store.read_strategies.return_value = []
+        store.read_all_initial_conditions.return_value = []
+        store.read_interventions.return_value = {}
+        model_runs = [make_model_run('dry', 'dry'), make_model_run('wet', 'wet')]
+
+        SweepRunner().solve_model_runs(model_runs, store)
+
+        linked = set(
+            (call[0][0], call[0][1], call[0][2], call[0][4])
+            for call in store.link_results.call_args_list
+        )
+        assert linked == {
+            ('dry', 'wet', 'population_model', 2010),
+            ('dry', 'wet', 'population_model', 2015)
+        }
+        written = set(call[0][1] for call in store.write_model_run_stats.call_args_list)
+        assert written == {'dry', 'wet'}
@@ -4,6 +4,9 @@ different operations
 import numpy as np
 from pytest import mark
 from smif.convert.adaptor import Adaptor
+from smif.data_layer.data_array import DataArray
+from smif.data_layer.sparse_array import COOArray
+from smif.metadata import Spec
 
 
 class TestPerformConversion:
@@ -113,3 +116,30 @@ class TestPerformConversion:
         )
         actual = Adaptor.convert_with_coefficients(actual, coefficients, 2)
         np.testing.assert_allclose(actual, expected)
+
+
+class SumAdaptor(Adaptor):
+    """Sum all values along the converted dimension
+    """
+    def generate_coefficients(self, from_spec, to_spec):
+        return np.ones((from_spec.shape[0], 1))
+
+
+def test_convert_sparse():
+    """Sparse data should be converted without being made dense
+    """
+    from_spec = Spec(name='capacity', dims=['intervention', 'region'],
+                     coords={'intervention': ['a', 'b', 'c'], 'region': ['x', 'y']},
+                     dtype='float')
+    to_spec = Spec(name='capacity', dims=['total', 'region'],
+                   coords={'total': ['all'], 'region': ['x', 'y']}, dtype='float')
+    adaptor = SumAdaptor('sum')
+    coefficients = adaptor.generate_coefficients(from_spec, to_spec)
+    data = DataArray(from_spec, COOArray([[0, 2, 2], [1, 0, 1]], [1.0, 2.0, 3.0], (3, 2)))
+
+    actual = adaptor.convert(data, to_spec, coefficients)
+    assert isinstance(actual, COOArray)
+    expected = adaptor.convert(DataArray(from_spec, data.as_coo().todense()), to_spec,
+                               coefficients)
+    np.testing.assert_allclose(actual.todense(), expected)
+    np.testing.assert_allclose(expected, [[2.0, 4.0]])
@@ -9,6 +9,7 @@ from smif.convert.region import RegionAdaptor, RegionSet
 from smif.convert.register import NDimensionalRegister
 from smif.data_layer.data_array import DataArray
 from smif.metadata import Spec
+from smif.metadata.geometry import RegionElements
 
 
 @fixture(scope='function')
@@ -69,6 +70,18 @@ class TestRegionAdaptor:
         expected = np.array([48])  # area zero
         assert np.allclose(actual, expected)
 
+    def test_aggregate_region_elements(self, regions_rect, regions_half_squares):
+        """Coefficients should be generated from compact region elements
+        """
+        adaptor = RegionAdaptor('test-square-half')
+        from_spec = Spec(name='test-var', dtype='float', dims=['half_squares'], coords={
+            'half_squares': RegionElements.from_features(regions_half_squares)})
+        to_spec = Spec(name='test-var', dtype='float', dims=['rect'], coords={
+            'rect': RegionElements.from_features(regions_rect)})
+
+        actual_coefficients = adaptor.generate_coefficients(from_spec, to_spec)
+        np.testing.assert_allclose(actual_coefficients, np.ones((2, 1)), rtol=1e-3)
+
     def test_half_to_one_region_pass_through_time(self, regions_rect, regions_half_squares):
         """Convert from half a region to one region, pass through time
         """
@@ -149,6 +162,13 @@ class TestRegionSet():
         assert rset[1].name == 'half'
         assert rset[2].name == 'two'
 
+    def test_create_from_region_elements(self, regions):
+        """Compact region elements should give the same regions
+        """
+        rset = RegionSet('test', RegionElements.from_features(regions))
+        assert rset.get_entry_names() == ['unit', 'half', 'two']
+        assert rset[1].shape.equals(RegionSet('test', regions)[1].shape)
+
     def test_get_names(self, regions):
         rset = RegionSet('test', regions)
         actual = rset.get_entry_names()
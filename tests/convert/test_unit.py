@@ -5,6 +5,7 @@ from unittest.mock import Mock
 import numpy as np
 from smif.convert.unit import UnitAdaptor
 from smif.data_layer.data_array import DataArray
+from smif.data_layer.sparse_array import COOArray
 from smif.metadata import Spec
 
 
@@ -70,3 +71,24 @@ def test_convert_custom():
     actual = data_handle.set_results.call_args[0][1]
     expected = np.array([2], dtype=float)
     np.testing.assert_allclose(actual, expected)
+
+
+def test_convert_sparse():
+    """Convert sparse data without making it dense, unless the unit has an offset
+    """
+    adaptor = UnitAdaptor('test-sparse')
+    spec = Spec(name='test_variable', dims=['a'], coords={'a': [1, 2, 3]}, dtype='float',
+                unit='liter')
+    data_array = DataArray(spec, COOArray([[1]], [2.0], (3,)))
+
+    to_spec = Spec(name='test_variable', dims=['a'], coords={'a': [1, 2, 3]},
+                   dtype='float', unit='milliliter')
+    actual = adaptor.convert(data_array, to_spec, None)
+    assert isinstance(actual, COOArray)
+    np.testing.assert_allclose(actual.todense(), [0, 2000, 0])
+
+    spec = Spec(name='t', dims=['a'], coords={'a': [1, 2, 3]}, dtype='float', unit='degC')
+    to_spec = Spec(name='t', dims=['a'], coords={'a': [1, 2, 3]}, dtype='float',
+                   unit='kelvin')
+    actual = adaptor.convert(DataArray(spec, COOArray([[1]], [2.0], (3,))), to_spec, None)
+    np.testing.assert_allclose(actual, [273.15, 275.15, 273.15])
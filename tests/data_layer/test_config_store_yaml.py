@@ -375,3 +375,81 @@ class TestScenarios:
         with raises(SmifDataNotFoundError) as ex:
             config_handler.read_scenario('missing')
         assert "Scenario 'missing' not found" in str(ex)
+
+
+class TestCache:
+    """Parsed config should be cached, and re-read when the file changes
+    """
+    def test_read_cached(self, get_sector_model, config_handler):
+        """Repeated reads should hit the cache and return independent copies
+        """
+        name = get_sector_model['name']
+        first = config_handler.read_model(name)
+        expected = dict(first)
+        misses = config_handler.cache_info()['config']['misses']
+
+        first['description'] = 'modified by caller'
+        second = config_handler.read_model(name)
+
+        assert second == expected
+        assert config_handler.cache_info()['config']['misses'] == misses
+        assert config_handler.cache_info()['config']['hits'] >= 1
+
+    def test_invalidate_on_update(self, get_sector_model, config_handler):
+        """Updates through the store should be visible on the next read
+        """
+        name = get_sector_model['name']
+        config_handler.read_model(name)
+
+        model = dict(get_sector_model)
+        model['description'] = 'updated'
+        config_handler.update_model(name, model)
+        assert config_handler.read_model(name)['description'] == 'updated'
+
+        config_handler.delete_model(name)
+        with raises(SmifDataNotFoundError):
+            config_handler.read_model(name)
+
+    def test_invalidate_on_external_edit(self, setup_folder_structure, sample_scenarios,
+                                         config_handler):
+        """Edits made to a file outside the store should be visible on the next read
+        """
+        name = sample_scenarios[0]['name']
+        config_handler.read_scenario(name)
+
+        other = YamlConfigStore(str(setup_folder_structure))
+        scenario = other.read_scenario(name)
+        scenario['description'] = 'edited elsewhere, with a longer description'
+        other.update_scenario(name, scenario)
+
+        actual = config_handler.read_scenario(name)
+        assert actual['description'] == 'edited elsewhere, with a longer description'
+
+
+class TestSignature:
+    """Signatures should change whenever config is written, without reading it
+    """
+    def test_signature_of_one(self, get_sector_model, config_handler):
+        name = get_sector_model['name']
+        digest, mtime = config_handler.read_signature('sector_model', name)
+        assert config_handler.read_signature('sector_model', name) == (digest, mtime)
+        assert mtime > 0
+
+        model = dict(get_sector_model)
+        model['description'] = 'updated, with a longer description'
+        config_handler.update_model(name, model)
+        assert config_handler.read_signature('sector_model', name)[0] != digest
+
+    def test_signature_of_all(self, get_sector_model, config_handler):
+        before = config_handler.read_signature('sector_model')
+        model = dict(get_sector_model)
+        model['name'] = 'another_model'
+        config_handler.write_model(model)
+        written = config_handler.read_signature('sector_model')
+        assert written != before
+
+        config_handler.delete_model('another_model')
+        assert config_handler.read_signature('sector_model') != written
+
+    def test_signature_missing(self, config_handler):
+        assert config_handler.read_signature('sector_model', 'does_not_exist') is None
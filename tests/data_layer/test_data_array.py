@@ -5,8 +5,9 @@ import numpy
 import pandas as pd
 import xarray as xr
 from numpy.testing import assert_array_equal
-from pytest import fixture, raises
+from pytest import fixture, importorskip, raises
 from smif.data_layer.data_array import DataArray, show_null
+from smif.data_layer.sparse_array import COOArray
 from smif.exception import SmifDataNotFoundError, SmifDataMismatchError
 from smif.metadata import Spec
 
@@ -351,6 +352,221 @@ class TestDataFrameInterop():
         msg_alt = "Data for 'test' contains duplicate values at [{'b': 4, 'a': 2}]"
         assert msg in str(ex) or msg_alt in str(ex)
 
+    def test_from_df_dtype(self):
+        """Should keep the data dtype if every value is provided
+        """
+        spec = Spec(
+            name='test',
+            dims=['a', 'b'],
+            coords={'a': [1, 2], 'b': ['x', 'y']},
+            dtype='int'
+        )
+        df = pd.DataFrame([
+            {'a': 2, 'b': 'y', 'test': 3},
+            {'a': 1, 'b': 'y', 'test': 1},
+            {'a': 2, 'b': 'x', 'test': 2},
+            {'a': 1, 'b': 'x', 'test': 0},
+        ]).set_index(['b', 'a'])
+        actual = DataArray.from_df(spec, df)
+        assert actual.data.dtype == df['test'].dtype
+        assert_array_equal(actual.data, numpy.array([[0, 1], [2, 3]]))
+
+        # missing values in integer data are masked, rather than upcast to float NaN
+        actual = DataArray.from_df(spec, df.iloc[:3])
+        assert actual.data.dtype.kind == 'i'
+        assert_array_equal(actual.mask, [[True, False], [False, False]])
+        assert_array_equal(actual.as_filled(), numpy.array([[numpy.nan, 1], [2, 3]]))
+
+    def test_from_df_unused_levels(self):
+        """Should ignore index level values which do not appear in the data
+        """
+        spec = Spec(name='test', dims=['a', 'b'], coords={'a': [1], 'b': [1, 2]},
+                    dtype='float')
+        df = pd.DataFrame([
+            {'a': 1, 'b': 1, 'test': 1.0},
+            {'a': 3, 'b': 2, 'test': 2.0},
+        ]).set_index(['a', 'b'])
+        actual = DataArray.from_df(spec, df[df.index.get_level_values('a') == 1])
+        assert_array_equal(actual.data, numpy.array([[1.0, numpy.nan]]))
+
+
+class TestDtype():
+    """Data should be kept in the spec dtype, with missing values in an explicit mask
+    """
+    def _spec(self, dtype):
+        return Spec(name='test', dims=['a'], coords={'a': ['x', 'y', 'z']}, dtype=dtype)
+
+    def test_cast_to_spec_dtype(self):
+        for dtype in ('float32', 'int16', 'bool'):
+            data = numpy.array([1, 0, 1], dtype='float64' if dtype == 'float32' else 'int64')
+            if dtype == 'bool':
+                data = data.astype(bool)
+            actual = DataArray(self._spec(dtype), data)
+            assert actual.data.dtype == numpy.dtype(dtype)
+
+    def test_no_lossy_cast(self):
+        """Float data should not be truncated to an integer spec dtype
+        """
+        actual = DataArray(self._spec('int16'), numpy.array([0.5, 1, 2]))
+        assert actual.data.dtype == numpy.dtype('float64')
+
+    def test_out_of_range(self):
+        with raises(SmifDataMismatchError) as ex:
+            DataArray(self._spec('int16'), numpy.array([0, 1, 2**20]))
+        assert "outside the range of dtype int16" in str(ex)
+
+    def test_explicit_mask(self):
+        spec = self._spec('int16')
+        da = DataArray(spec, numpy.array([1, 0, 3]), mask=[False, True, False])
+        assert da.data.dtype == numpy.dtype('int16')
+        assert_array_equal(da.mask, [False, True, False])
+        assert_array_equal(da.as_filled(), [1, numpy.nan, 3])
+        assert da == DataArray(spec, numpy.array([1, 99, 3]), mask=[False, True, False])
+        assert da != DataArray(spec, numpy.array([1, 0, 3]))
+
+        with raises(SmifDataMismatchError):
+            da.validate_as_full()
+
+        df = da.as_df()
+        assert str(df['test'].dtype) == 'Int16'
+        assert df['test'].isna().tolist() == [False, True, False]
+        assert DataArray.from_df(spec, df) == da
+
+    def test_update_masked(self):
+        spec = self._spec('int16')
+        da = DataArray(spec, numpy.array([1, 2, 3]))
+        da.update(DataArray(spec, numpy.array([0, 20, 0]), mask=[True, False, True]))
+        assert_array_equal(da.data, [1, 20, 3])
+        assert da.data.dtype == numpy.dtype('int16')
+        assert not da.mask.any()
+
+
+class TestSparse():
+    """DataArray may hold sparse data, until dense data is needed
+    """
+    def _spec(self):
+        return Spec(name='test', dims=['a', 'b'],
+                    coords={'a': ['a1', 'a2', 'a3'], 'b': ['b1', 'b2']}, dtype='float32')
+
+    def test_hold_sparse(self):
+        coo = COOArray([[0, 2], [1, 0]], [1.0, 2.0], shape=(3, 2))
+        da = DataArray(self._spec(), coo)
+        assert da.is_sparse
+        assert da.shape == (3, 2)
+        assert da.as_coo().values.dtype == numpy.dtype('float32')
+        da.validate_as_full()
+
+        expected = DataArray(self._spec(), numpy.array([[0, 1], [0, 0], [2, 0]]))
+        assert da == expected
+        assert da.is_sparse
+        assert_array_equal(da.as_df().values.ravel(), [0, 1, 0, 0, 2, 0])
+
+        # access to dense data converts
+        assert_array_equal(da.data, expected.data)
+        assert not da.is_sparse
+
+    def test_shape_mismatch(self):
+        with raises(SmifDataMismatchError):
+            DataArray(self._spec(), COOArray([[0]], [1.0], shape=(3,)))
+
+    def test_from_df_sparse(self):
+        df = pd.DataFrame({'a': ['a3'], 'b': ['b1'], 'test': [2.0]}).set_index(['a', 'b'])
+        da = DataArray.from_df(self._spec(), df, sparse=True)
+        assert da.is_sparse
+        assert_array_equal(da.data, [[0, 0], [0, 0], [2, 0]])
+
+
+class TestSelect():
+    """Select a subset of coordinates
+    """
+    def _spec(self):
+        return Spec(name='test', dims=['a', 'b'],
+                    coords={'a': ['a1', 'a2', 'a3'], 'b': ['b1', 'b2']}, dtype='float')
+
+    def test_select_dense(self):
+        da = DataArray(self._spec(), numpy.arange(6.0).reshape((3, 2)),
+                       mask=[[False, False], [False, True], [False, False]])
+        actual = da.select({'a': ['a3', 'a2']})
+        assert actual.spec.dim_names('a') == ['a3', 'a2']
+        assert_array_equal(actual.data, [[4, 5], [2, 3]])
+        assert_array_equal(actual.mask, [[False, False], [False, True]])
+
+    def test_select_sparse(self):
+        da = DataArray(self._spec(), COOArray([[0, 2, 2], [1, 0, 1]], [1.0, 2.0, 3.0],
+                                              shape=(3, 2)))
+        actual = da.select({'a': ['a3', 'a2'], 'b': ['b2']})
+        assert actual.is_sparse
+        assert actual.shape == (2, 1)
+        assert_array_equal(actual.data, [[3], [0]])
+
+
+class TestFromArrow():
+    """Create from an Arrow table, as read from Parquet
+    """
+    def _spec(self):
+        return Spec(name='test', dims=['a', 'b'],
+                    coords={'a': ['a1', 'a2', 'a3'], 'b': ['b1', 'b2']}, dtype='float')
+
+    def _table(self, a, b, values):
+        pa = importorskip('pyarrow')
+        return pa.table({'a': a, 'b': b, 'test': values})
+
+    def test_plain_columns(self):
+        table = self._table(['a3', 'a1', 'a2'], ['b2', 'b1', 'b1'], [1.0, 2.0, 3.0])
+        actual = DataArray.from_arrow(self._spec(), table)
+        nan = numpy.nan
+        assert_array_equal(actual.as_filled(), [[2, nan], [3, nan], [nan, 1]])
+        assert_array_equal(actual.mask, [[False, True], [False, True], [True, False]])
+
+    def test_dictionary_columns(self):
+        table = self._table(['a3', 'a1', 'a2'], ['b2', 'b1', 'b1'], [1.0, 2.0, 3.0])
+        encoded = table.set_column(0, 'a', table.column('a').dictionary_encode())
+        expected = DataArray.from_arrow(self._spec(), table)
+        assert DataArray.from_arrow(self._spec(), encoded) == expected
+        # positions of known labels are reused
+        assert DataArray.from_arrow(self._spec(), encoded) == expected
+
+    def test_matches_from_df(self):
+        table = self._table(['a1', 'a1', 'a2', 'a3'], ['b1', 'b2', 'b2', 'b1'],
+                            [1.0, 2.0, 3.0, 4.0])
+        df = table.to_pandas().set_index(['a', 'b'])
+        assert DataArray.from_arrow(self._spec(), table) == \
+            DataArray.from_df(self._spec(), df)
+
+    def test_sparse(self):
+        table = self._table(['a3', 'a1'], ['b2', 'b1'], [1.0, 2.0])
+        actual = DataArray.from_arrow(self._spec(), table, sparse=True)
+        assert actual.is_sparse
+        assert_array_equal(actual.data, [[2, 0], [0, 0], [0, 1]])
+
+    def test_unexpected_label(self):
+        table = self._table(['a1', 'a4'], ['b1', 'b1'], [1.0, 2.0])
+        with raises(SmifDataMismatchError) as ex:
+            DataArray.from_arrow(self._spec(), table)
+        assert "unexpected values in the set of coordinates for dimension 'a': ['a4']" \
+            in str(ex.value)
+
+    def test_subset_dims(self):
+        table = self._table(['a1', 'a4', 'a2'], ['b1', 'b1', 'b2'], [1.0, 2.0, 3.0])
+        actual = DataArray.from_arrow(self._spec(), table, subset_dims=['a'])
+        nan = numpy.nan
+        assert_array_equal(actual.as_filled(), [[1, nan], [nan, 3], [nan, nan]])
+        # labels outside the spec are still unexpected along other dimensions
+        with raises(SmifDataMismatchError):
+            DataArray.from_arrow(self._spec(), table, subset_dims=['b'])
+
+    def test_duplicates(self):
+        table = self._table(['a1', 'a1'], ['b1', 'b1'], [1.0, 2.0])
+        with raises(SmifDataMismatchError) as ex:
+            DataArray.from_arrow(self._spec(), table)
+        assert "contains duplicate values at [{'a': 'a1', 'b': 'b1'}]" in str(ex.value)
+
+    def test_missing_column(self):
+        table = self._table(['a1'], ['b1'], [1.0]).drop(['b'])
+        with raises(SmifDataMismatchError) as ex:
+            DataArray.from_arrow(self._spec(), table)
+        assert "expected a data column called 'test'" in str(ex.value)
+
 
 class TestMissingData:
 
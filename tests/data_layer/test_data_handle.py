@@ -303,6 +303,31 @@ class TestDataHandle():
         assert actual.name == 'population'
         np.testing.assert_equal(actual, input_da)
 
+    def test_get_data_selection(self, mock_store, mock_model):
+        """should read a subset of coordinates, with a reduced spec
+        """
+        data_handle = DataHandle(mock_store, 3, 2015, [2015, 2020], mock_model)
+        input_spec = mock_model.inputs['population']
+        lads = input_spec.dim_names('lad')
+
+        actual = data_handle.get_data("population", selection={'lad': lads[1:]})
+        assert actual.name == 'population'
+        assert actual.spec.dim_names('lad') == lads[1:]
+        np.testing.assert_equal(actual.data, [[2.0]])
+
+    def test_iter_data(self, mock_store, mock_model):
+        """should read input data in chunks along one dimension
+        """
+        data_handle = DataHandle(mock_store, 3, 2015, [2015, 2020], mock_model)
+        lads = mock_model.inputs['population'].dim_names('lad')
+
+        chunks = list(data_handle.iter_data("population", 'lad', 1))
+        assert [chunk.spec.dim_names('lad') for chunk in chunks] == [[lad] for lad in lads]
+        np.testing.assert_equal([chunk.data for chunk in chunks], [[[1.0]], [[2.0]]])
+
+        with raises(ValueError):
+            data_handle.iter_data("population", 'lad', 0)
+
     def test_get_data_from_model_output(self, mock_store, mock_model):
         """should allow read access to input data from model results
         """
@@ -492,6 +517,39 @@ class TestDataHandle():
         np.testing.assert_equal(actual.as_ndarray(), data)
         assert actual == da
 
+    def test_set_data_in_chunks(self, mock_store, mock_model):
+        """should allow write access to output data in chunks along one dimension
+        """
+        data = np.random.rand(2, 8)
+        data_handle = DataHandle(mock_store, 1, 2015, [2015, 2020], mock_model)
+        spec = mock_model.outputs['gas_demand']
+
+        with data_handle.open_results_writer('gas_demand', spec.dims[0]) as writer:
+            writer.write(data[:1])
+            writer.write(data[1:])
+        actual = mock_store.read_results(1, 'energy_demand', spec, 2015)
+        assert actual == DataArray(spec, data)
+
+    def test_set_data_in_chunks_incomplete(self, mock_store, mock_model):
+        """should save no results unless every chunk is written
+        """
+        data = np.random.rand(2, 8)
+        data_handle = DataHandle(mock_store, 1, 2015, [2015, 2020], mock_model)
+        spec = mock_model.outputs['gas_demand']
+
+        with raises(SmifDataMismatchError) as ex:
+            with data_handle.open_results_writer('gas_demand', spec.dims[0]) as writer:
+                writer.write(data[:1])
+        assert "Wrote 1 of 2 elements" in str(ex.value)
+
+        writer = data_handle.open_results_writer('gas_demand', spec.dims[0])
+        with raises(SmifDataMismatchError) as ex:
+            writer.write(np.random.rand(3, 8))
+        assert "runs past the end" in str(ex.value)
+
+        with raises(SmifDataNotFoundError):
+            mock_store.read_results(1, 'energy_demand', spec, 2015)
+
     def test_set_data_with_square_brackets_raises(self, mock_store, mock_model):
         """should allow dict-like write access to output data
         """
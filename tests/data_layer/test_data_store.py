@@ -1,14 +1,17 @@
 """Test all DataStore implementations
 """
+import os
 from copy import deepcopy
 
 import numpy as np
 from pytest import fixture, mark, param, raises
 from smif.data_layer.data_array import DataArray
 from smif.data_layer.database_interface import DbDataStore
-from smif.data_layer.file.file_data_store import CSVDataStore, ParquetDataStore
+from smif.data_layer.file.file_data_store import (CSVDataStore, ParquetDataStore,
+                                                  _selected_row_groups)
 from smif.data_layer.memory_interface import MemoryDataStore
-from smif.exception import SmifDataNotFoundError
+from smif.data_layer.sparse_array import COOArray
+from smif.exception import SmifDataMismatchError, SmifDataNotFoundError
 from smif.metadata import Spec
 
 
@@ -126,6 +129,61 @@ class TestDataArray():
         actual = handler.read_scenario_variant_data('key', spec, 2010)
         assert actual == expected
 
+    def test_dtypes(self, handler):
+        """Should read data back in the spec dtype, with missing integer values masked
+        """
+        for dtype, data in (('float32', [0.5, 1.5, 2.5]), ('int16', [1, 2, 3]),
+                            ('bool', [True, False, True])):
+            spec = Spec(name='test', dims=['zones'], coords={'zones': ['a', 'b', 'c']},
+                        dtype=dtype)
+            expected = DataArray(spec, np.array(data))
+            handler.write_scenario_variant_data('key', expected, 2010)
+            actual = handler.read_scenario_variant_data('key', spec, 2010)
+            assert actual == expected
+            assert actual.data.dtype == np.dtype(dtype)
+
+        spec = Spec(name='test', dims=['zones'], coords={'zones': ['a', 'b', 'c']},
+                    dtype='int16')
+        expected = DataArray(spec, np.array([1, 0, 3]), mask=[False, True, False])
+        handler.write_narrative_variant_data('key', expected, 2010)
+        actual = handler.read_narrative_variant_data('key', spec, 2010)
+        assert actual == expected
+        assert actual.data.dtype == np.dtype('int16')
+
+    def test_read_selection(self, handler):
+        """Read a subset of coordinates, for one or all timesteps
+        """
+        spec = Spec(name='test', dims=['zones', 'sector'],
+                    coords={'zones': ['a', 'b', 'c'], 'sector': ['x', 'y']}, dtype='float')
+        spec_with_t = Spec(name='test', dims=['timestep', 'zones', 'sector'],
+                           coords={'timestep': [2010, 2015], 'zones': ['a', 'b', 'c'],
+                                   'sector': ['x', 'y']}, dtype='float')
+        data = np.arange(6.0).reshape((3, 2))
+        handler.write_scenario_variant_data(
+            'key', DataArray(spec_with_t, np.stack([data, data + 10])))
+
+        selection = {'zones': ['c', 'a']}
+        actual = handler.read_scenario_variant_data('key', spec, 2015, selection)
+        assert actual.spec == spec.select(selection)
+        np.testing.assert_array_equal(actual.data, [[14, 15], [10, 11]])
+
+        actual = handler.read_scenario_variant_data('key', spec, 2010, {'sector': ['y']})
+        np.testing.assert_array_equal(actual.data, [[1], [3], [5]])
+
+    def test_read_selection_missing_id(self, handler):
+        """Selecting an id which is not in the spec is reported the same way by every store
+        """
+        spec = Spec(name='test', dims=['zones'], coords={'zones': ['a', 'b']}, dtype='float')
+        spec_with_t = Spec(name='test', dims=['timestep', 'zones'],
+                           coords={'timestep': [2010, 2015], 'zones': ['a', 'b']},
+                           dtype='float')
+        handler.write_scenario_variant_data(
+            'key', DataArray(spec_with_t, np.arange(4.0).reshape((2, 2))))
+
+        with raises(ValueError) as ex:
+            handler.read_scenario_variant_data('key', spec, 2015, {'zones': ['zz']})
+        assert "Could not select ['zz'] from dim 'zones'" in str(ex.value)
+
 
 class TestInitialConditions():
     """Read and write initial conditions
@@ -216,6 +274,82 @@ class TestResults():
         assert handler.available_results('test_modelrun') == \
             [(2010, 0, 'energy', sample_results.spec.name)]
 
+    def test_read_write_sparse_results(self, handler):
+        spec = Spec(name='capacity', dims=['intervention', 'region'],
+                    coords={'intervention': ['a', 'b', 'c'], 'region': ['x', 'y']},
+                    dtype='float')
+        expected = DataArray(spec, COOArray([[1, 2], [0, 1]], [5.0, 7.0], spec.shape))
+        handler.write_results(expected, 'test_modelrun', 'energy', timestep=2010)
+        actual = handler.read_results('test_modelrun', 'energy', spec, 2010)
+        assert actual == expected
+        if not isinstance(handler, CSVDataStore):
+            assert actual.is_sparse
+
+    def test_read_results_selection(self, handler):
+        spec = Spec(name='capacity', dims=['intervention', 'region'],
+                    coords={'intervention': ['a', 'b', 'c'], 'region': ['x', 'y']},
+                    dtype='float')
+        data = DataArray(spec, np.arange(6.0).reshape((3, 2)))
+        handler.write_results(data, 'test_modelrun', 'energy', timestep=2010)
+
+        selection = {'intervention': ['b'], 'region': ['y', 'x']}
+        actual = handler.read_results('test_modelrun', 'energy', spec, 2010,
+                                      selection=selection)
+        assert actual == data.select(selection)
+        np.testing.assert_array_equal(actual.data, [[3, 2]])
+
+    def test_write_results_in_chunks(self, handler):
+        spec = Spec(name='demand', dims=['building', 'hour'],
+                    coords={'building': ['a', 'b', 'c'], 'hour': [1, 2]}, dtype='float32')
+        data = np.arange(6, dtype='float32').reshape((3, 2))
+
+        with handler.open_results_writer(spec, 'test_modelrun', 'energy', 2010) as writer:
+            writer.write(DataArray(spec.select({'building': ['a', 'b']}), data[:2]))
+            writer.write(DataArray(spec.select({'building': ['c']}), data[2:]))
+
+        actual = handler.read_results('test_modelrun', 'energy', spec, 2010)
+        assert actual == DataArray(spec, data)
+        actual = handler.read_results('test_modelrun', 'energy', spec, 2010,
+                                      selection={'building': ['c']})
+        np.testing.assert_array_equal(actual.data, [[4, 5]])
+
+    def test_write_results_in_chunks_discarded(self, handler):
+        """Results should not be saved if writing fails part way
+        """
+        spec = Spec(name='demand', dims=['building'], coords={'building': ['a', 'b']},
+                    dtype='float')
+        with raises(SmifDataMismatchError):
+            with handler.open_results_writer(spec, 'test_modelrun', 'energy', 2010) as writer:
+                writer.write(DataArray(spec.select({'building': ['a']}), np.array([1.0])))
+                other = Spec(name='demand', dims=['building'], coords={'building': ['z']},
+                             dtype='float')
+                writer.write(DataArray(other, np.array([1.0])))
+
+        with raises(SmifDataNotFoundError):
+            handler.read_results('test_modelrun', 'energy', spec, 2010)
+        assert handler.available_results('test_modelrun') == []
+
+    def test_link_results(self, handler, sample_results):
+        output_spec = sample_results.spec
+        handler.write_results(sample_results, 'test_modelrun', 'energy', 2010, 0)
+
+        handler.link_results('test_modelrun', 'other_modelrun', 'energy', output_spec, 2010, 0)
+        actual = handler.read_results('other_modelrun', 'energy', output_spec, 2010, 0)
+        assert actual == sample_results
+        assert handler.available_results('other_modelrun') == \
+            [(2010, 0, 'energy', output_spec.name)]
+
+        # writing over linked results leaves the original unchanged
+        changed = DataArray(output_spec, sample_results.data * 2)
+        handler.write_results(changed, 'other_modelrun', 'energy', 2010, 0)
+        actual = handler.read_results('test_modelrun', 'energy', output_spec, 2010, 0)
+        assert actual == sample_results
+
+    def test_link_results_missing(self, handler, sample_results):
+        with raises(SmifDataNotFoundError):
+            handler.link_results('test_modelrun', 'other_modelrun', 'energy',
+                                 sample_results.spec, 2010, 0)
+
     def test_read_results_raises(self, handler, sample_results):
         modelrun_name = 'test_modelrun'
         model_name = 'energy'
@@ -226,3 +360,135 @@ class TestResults():
 
         with raises(SmifDataNotFoundError):
             handler.read_results(modelrun_name, model_name, output_spec, 2020)
+
+
+class TestModelRunStats():
+    """Read/write statistics recorded during a model run
+    """
+    def test_read_write_stats(self, handler):
+        expected = [
+            {'job_id': 'a', 'model': 'energy', 'wall_s': 0.5, 'estimated_bytes': 80},
+            {'job_id': 'b', 'model': 'water', 'wall_s': 1.5, 'estimated_bytes': 16},
+        ]
+        handler.write_model_run_stats(expected, 'test_modelrun', 'jobs')
+        actual = handler.read_model_run_stats('test_modelrun', 'jobs')
+        assert actual == expected
+
+    def test_stats_do_not_affect_available_results(self, handler):
+        handler.write_model_run_stats([{'job_id': 'a'}], 'test_modelrun', 'jobs')
+        assert handler.available_results('test_modelrun') == []
+
+    def test_read_missing_stats(self, handler):
+        with raises(SmifDataNotFoundError):
+            handler.read_model_run_stats('test_modelrun', 'jobs')
+
+
+class TestParquetRowGroups():
+    """Parquet data is written with a row group per timestep (or per chunk of results), and
+    read by timestep
+    """
+    @fixture
+    def store(self, setup_empty_folder_structure):
+        return ParquetDataStore(setup_empty_folder_structure)
+
+    @fixture
+    def spec(self):
+        return Spec(name='test', dims=['region'], coords={'region': ['a', 'b']},
+                    dtype='float')
+
+    def _write_timeseries(self, store, spec):
+        spec_with_t = Spec(
+            name=spec.name,
+            dims=['region', 'timestep'],
+            coords={'region': spec.dim_names('region'), 'timestep': [2015, 2010, 2020]},
+            dtype='float'
+        )
+        data = np.array([[0, 1, 2], [3, 4, 5]], dtype='float')
+        store.write_scenario_variant_data('key', DataArray(spec_with_t, data))
+        return os.path.join(store.data_folders['scenarios'], 'key')
+
+    def test_row_group_per_timestep(self, store, spec):
+        import pyarrow.parquet as pq
+        path = self._write_timeseries(store, spec)
+
+        metadata = pq.ParquetFile(path).metadata
+        assert metadata.num_row_groups == 3
+        stats = [metadata.row_group(i).column(
+            metadata.schema.names.index('timestep')).statistics for i in range(3)]
+        assert [(stat.min, stat.max) for stat in stats] == \
+            [(2010, 2010), (2015, 2015), (2020, 2020)]
+
+        actual = store.read_scenario_variant_data('key', spec, 2010)
+        np.testing.assert_array_equal(actual.as_ndarray(), [1, 4])
+        with raises(SmifDataNotFoundError):
+            store.read_scenario_variant_data('key', spec, 2011)
+
+    def test_categorical_dims(self, store, spec):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+        path = self._write_timeseries(store, spec)
+
+        schema = pq.read_schema(path)
+        assert pa.types.is_dictionary(schema.field('region').type)
+        assert pa.types.is_integer(schema.field('timestep').type)
+
+    def test_sparse(self, store, spec):
+        """Sparse data should be written as its stored cells only
+        """
+        import pyarrow.parquet as pq
+        spec_with_t = Spec(
+            name=spec.name,
+            dims=['timestep', 'region'],
+            coords={'timestep': [2010, 2015, 2020], 'region': spec.dim_names('region')},
+            dtype='float'
+        )
+        data = DataArray(spec_with_t, COOArray([[2], [1]], [3.0], spec_with_t.shape))
+        store.write_scenario_variant_data('key', data)
+
+        path = os.path.join(store.data_folders['scenarios'], 'key')
+        assert pq.ParquetFile(path).metadata.num_rows == 1
+        actual = store.read_scenario_variant_data('key', spec, 2020)
+        assert actual.is_sparse
+        np.testing.assert_array_equal(actual.as_ndarray(), [0, 3])
+        # a timestep with no stored cells is all zero, rather than missing
+        np.testing.assert_array_equal(
+            store.read_scenario_variant_data('key', spec, 2010).as_ndarray(), [0, 0])
+        with raises(SmifDataNotFoundError):
+            store.read_scenario_variant_data('key', spec, 2011)
+
+    def test_row_group_per_chunk(self, store):
+        """Results written in chunks should have a row group for each chunk, whatever the
+        size of each chunk's dimension codes
+        """
+        import pyarrow.parquet as pq
+
+        spec = Spec(name='demand', dims=['building'],
+                    coords={'building': ['b{}'.format(i) for i in range(300)]}, dtype='float')
+        data = np.arange(300.0)
+        with store.open_results_writer(spec, 'test_modelrun', 'energy', 2010) as writer:
+            writer.write(DataArray(spec.select({'building': ['b0']}), data[:1]))
+            writer.write(DataArray(spec.select({'building': spec.dim_names('building')[1:]}),
+                                   data[1:]))
+
+        path = store._get_results_path('test_modelrun', 'energy', 'demand', 2010)
+        assert pq.ParquetFile(path).metadata.num_row_groups == 2
+        # reads of a selection skip row groups without any selected labels
+        assert _selected_row_groups(pq.ParquetFile(path), {'building': ['b5']}) == [1]
+        actual = store.read_results('test_modelrun', 'energy', spec, 2010)
+        np.testing.assert_array_equal(actual.data, data)
+
+    def test_read_single_row_group_file(self, store, spec):
+        """Files written as a single row group, with timestep in the index, should be read
+        """
+        import pandas as pd
+        dataframe = pd.DataFrame({
+            'region': ['a', 'b', 'a', 'b'],
+            'timestep': [2010, 2010, 2015, 2015],
+            'test': [0.0, 1.0, 2.0, 3.0],
+            'unused': ['w', 'x', 'y', 'z']
+        }).set_index(['region', 'timestep'])
+        path = os.path.join(store.data_folders['scenarios'], 'key')
+        dataframe.to_parquet(path, engine='pyarrow', compression='gzip')
+
+        actual = store.read_scenario_variant_data('key', spec, 2015)
+        np.testing.assert_array_equal(actual.as_ndarray(), [2, 3])
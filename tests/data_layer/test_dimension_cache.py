@@ -0,0 +1,142 @@
+"""Test persistent cache of parsed dimension elements
+"""
+import json
+import os
+
+from pytest import fixture, importorskip, mark
+from smif.controller.setup import copy_project_folder
+from smif.data_layer.file import FileMetadataStore
+from smif.data_layer.file.dimension_cache import DimensionCache
+from smif.metadata.geometry import RegionElements
+
+
+@fixture
+def cache(tmpdir):
+    return DimensionCache(str(tmpdir.join('cache')))
+
+
+@fixture
+def source(tmpdir):
+    path = str(tmpdir.join('source.csv'))
+    with open(path, 'w') as file_handle:
+        file_handle.write('name,interval\n1,"[[""PT0H"", ""PT8760H""]]"\n')
+    return path
+
+
+def _fail(path):
+    raise AssertionError("Unexpected parse of {}".format(path))
+
+
+def _features():
+    square = [[0.0, 0.0], [1.0, 0.0], [1.0, 1.0], [0.0, 1.0], [0.0, 0.0]]
+    hole = [[0.2, 0.2], [0.2, 0.4], [0.4, 0.4], [0.2, 0.2]]
+    shifted = [[x + 2, y] for x, y in square]
+    geometries = [
+        {'type': 'Polygon', 'coordinates': [square, hole]},
+        {'type': 'MultiPolygon', 'coordinates': [[square], [shifted]]},
+        {'type': 'Point', 'coordinates': [0.5, 0.5]},
+        None
+    ]
+    return [
+        {
+            'name': 'region_{}'.format(i),
+            'feature': {
+                'geometry': geometry,
+                'id': str(i),
+                'properties': {'name': 'region_{}'.format(i), 'population': i * 100},
+                'type': 'Feature'
+            }
+        }
+        for i, geometry in enumerate(geometries)
+    ]
+
+
+def _plain(data):
+    """Compare as JSON, where tuples and lists are equivalent
+    """
+    return json.loads(json.dumps(data))
+
+
+class TestDimensionCache():
+    def test_records_round_trip(self, cache, source):
+        elements = [{'name': 1, 'interval': [['PT0H', 'PT8760H']]}]
+        assert cache.read(source, lambda path: elements) == elements
+        assert cache.read(source, _fail) == elements
+
+    def test_spatial_round_trip(self, cache, source):
+        elements = _features()
+        cache.read(source, lambda path: elements)
+        actual = cache.read(source, _fail)
+        assert isinstance(actual, RegionElements)
+        assert _plain(list(actual)) == _plain(elements)
+
+    def test_keyed_by_content(self, cache, source):
+        cache.read(source, lambda path: [{'name': 'a'}])
+        first_path = cache.cache_path(source)
+
+        with open(source, 'a') as file_handle:
+            file_handle.write('2,"[]"\n')
+
+        assert cache.cache_path(source) != first_path
+        assert cache.read(source, lambda path: [{'name': 'b'}]) == [{'name': 'b'}]
+
+    def test_corrupt_cache_file(self, cache, source):
+        os.makedirs(cache.folder)
+        with open(cache.cache_path(source), 'wb') as file_handle:
+            file_handle.write(b'not arrow')
+
+        assert cache.read(source, lambda path: [{'name': 'a'}]) == [{'name': 'a'}]
+        assert cache.read(source, _fail) == [{'name': 'a'}]
+
+    def test_not_representable(self, cache, source):
+        """Elements which cannot be stored in Arrow should be returned, but not cached
+        """
+        elements = [{'name': 'a'}, {'name': 1}]
+        assert cache.read(source, lambda path: elements) == elements
+        assert not os.path.exists(cache.cache_path(source))
+
+    def test_records_not_uniform(self, cache, source):
+        """Records with different keys should not be cached, as Arrow would fill in the
+        missing keys
+        """
+        elements = [{'name': 'a', 'desc': 'x'}, {'name': 'b'}]
+        assert cache.read(source, lambda path: elements) == elements
+        assert not os.path.exists(cache.cache_path(source))
+        assert cache.read(source, lambda path: elements) == elements
+
+    def test_records_keep_types(self, cache, source):
+        """Values which Arrow would convert to another type should not be cached
+        """
+        elements = [{'name': 'a', 'value': 1}, {'name': 'b', 'value': 2.5}]
+        assert cache.read(source, lambda path: elements) == elements
+        assert not os.path.exists(cache.cache_path(source))
+
+    def test_spatial_keep_id_types(self, cache, source):
+        elements = _features()
+        for i, element in enumerate(elements):
+            element['feature']['id'] = i if i % 2 else None
+        cache.read(source, lambda path: elements)
+        actual = cache.read(source, _fail)
+        assert actual.ids == [None, 1, None, 3]
+
+
+@mark.parametrize('filename', [
+    'annual_intervals.csv', 'uk_nations_shp/regions.shp', 'oxfordshire/regions.geojson'])
+def test_cached_as_parsed(tmpdir, filename):
+    """Elements read from the cache should equal those parsed from sample project files
+    """
+    importorskip('fiona')
+    project = str(tmpdir.join('project'))
+    copy_project_folder(project)
+    store = FileMetadataStore(project)
+    path = os.path.join(store.data_folder, filename)
+    cache = DimensionCache(str(tmpdir.join('cache')))
+
+    parsed = store._parse_dimension_file(path)
+    cache.read(path, store._parse_dimension_file)
+    cached = cache.read(path, _fail)
+    if isinstance(parsed, RegionElements):
+        assert isinstance(cached, RegionElements)
+        assert cached.fingerprint == parsed.fingerprint
+    else:
+        assert repr(cached) == repr(parsed)
@@ -0,0 +1,154 @@
+"""Test I/O instrumentation of the store
+"""
+import json
+
+import numpy as np
+from pytest import fixture, raises
+from smif.data_layer.data_array import DataArray
+from smif.data_layer.file import YamlConfigStore
+from smif.data_layer.instrument import IOStats, instrument, uninstrument
+from smif.data_layer.memory_interface import MemoryDataStore
+from smif.data_layer.sparse_array import COOArray
+from smif.exception import SmifDataNotFoundError
+from smif.metadata import Spec
+
+
+@fixture
+def stats():
+    return IOStats()
+
+
+@fixture
+def results():
+    spec = Spec(name='energy_use', dims=['a'], coords={'a': [1, 2, 3]}, dtype='float')
+    return DataArray(spec, np.array([1, 2, 3], dtype='float'))
+
+
+class TestIOStats():
+    def test_record(self, stats):
+        stats.record('data_store.read_results', 0.002, nbytes=24)
+        stats.record('data_store.read_results', 0.5, error=True)
+
+        actual = stats.methods['data_store.read_results']
+        assert actual['calls'] == 2
+        assert actual['errors'] == 1
+        assert actual['bytes'] == 24
+        assert actual['max_s'] == 0.5
+        assert actual['histogram']['<10ms'] == 1
+        assert actual['histogram']['<1s'] == 1
+
+    def test_record_cache(self, stats):
+        stats.record_cache('coefficients', hit=False)
+        stats.record_cache('coefficients', hit=True)
+        stats.record_cache('coefficients', hit=True)
+        stats.record_cache('coefficients', hit=True)
+
+        assert stats.caches['coefficients'] == {'hits': 3, 'misses': 1, 'hit_rate': 0.75}
+
+    def test_merge(self, stats):
+        stats.record('data_store.read_results', 0.002, nbytes=24)
+        stats.record_cache('coefficients', hit=True)
+        other = IOStats()
+        other.record('data_store.read_results', 0.5, nbytes=8)
+        other.record('data_store.write_results', 0.002)
+        other.record_cache('coefficients', hit=False)
+
+        stats.merge(other.as_dict())
+
+        actual = stats.methods['data_store.read_results']
+        assert actual['calls'] == 2
+        assert actual['bytes'] == 32
+        assert actual['max_s'] == 0.5
+        assert actual['histogram']['<10ms'] == 1
+        assert actual['histogram']['<1s'] == 1
+        assert stats.methods['data_store.write_results']['calls'] == 1
+        assert stats.caches['coefficients'] == {'hits': 1, 'misses': 1, 'hit_rate': 0.5}
+
+    def test_reset(self, stats):
+        stats.record('data_store.read_results', 0.002)
+        stats.reset()
+        assert stats.as_dict() == {'methods': {}, 'caches': {}}
+
+    def test_write_json(self, stats, tmpdir):
+        stats.record('data_store.read_results', 0.002, nbytes=24)
+        path = str(tmpdir.join('io_stats.json'))
+        stats.write_json(path)
+        with open(path) as file_handle:
+            actual = json.load(file_handle)
+        assert actual['methods']['data_store.read_results']['bytes'] == 24
+
+
+class TestInstrument():
+    def test_read_write(self, stats, results):
+        store = MemoryDataStore()
+        instrument(store, stats, 'data_store')
+
+        store.write_results(results, 'test_modelrun', 'energy', 2010)
+        store.read_results('test_modelrun', 'energy', results.spec, 2010)
+        with raises(SmifDataNotFoundError):
+            store.read_results('test_modelrun', 'energy', results.spec, 2015)
+
+        methods = stats.methods
+        assert methods['data_store.write_results']['calls'] == 1
+        assert methods['data_store.write_results']['bytes'] == 24
+        assert methods['data_store.read_results']['calls'] == 2
+        assert methods['data_store.read_results']['errors'] == 1
+        assert methods['data_store.read_results']['bytes'] == 24
+        # type is unchanged
+        assert isinstance(store, MemoryDataStore)
+
+    def test_coefficients_cache(self, stats):
+        store = MemoryDataStore()
+        instrument(store, stats, 'data_store')
+
+        with raises(SmifDataNotFoundError):
+            store.read_coefficients('from', 'to')
+        store.write_coefficients('from', 'to', np.ones((2, 2)))
+        store.read_coefficients('from', 'to')
+
+        assert stats.caches['coefficients'] == {'hits': 1, 'misses': 1, 'hit_rate': 0.5}
+
+    def test_cache_info_source(self, stats, setup_folder_structure):
+        config_store = YamlConfigStore(str(setup_folder_structure))
+        config_store.read_project_config()
+        instrument(config_store, stats, 'config_store')
+
+        config_store.read_project_config()
+        config_store.read_project_config()
+
+        assert stats.caches['config_store.project_config']['hits'] == 2
+        assert stats.caches['config_store.project_config']['misses'] == 0
+
+    def test_uninstrument(self, stats, results):
+        store = MemoryDataStore()
+        instrument(store, stats, 'data_store')
+        uninstrument(store)
+
+        store.write_results(results, 'test_modelrun', 'energy', 2010)
+        assert stats.methods == {}
+
+
+class TestStoreInstrument():
+    def test_instrument_store(self, empty_store, results):
+        stats = empty_store.instrument()
+        assert empty_store.instrument() is stats
+
+        empty_store.write_results(results, 'test_modelrun', 'energy', 2010)
+
+        methods = stats.methods
+        assert methods['store.write_results']['calls'] == 1
+        assert methods['data_store.write_results']['calls'] == 1
+
+    def test_sparse_stays_sparse(self, empty_store):
+        """Measuring sparse data should not convert it to dense
+        """
+        spec = Spec(name='energy_use', dims=['a', 'b'],
+                    coords={'a': list(range(1000)), 'b': list(range(1000))}, dtype='float')
+        sparse = COOArray(np.array([[0, 999], [1, 2]]), np.array([1.0, 2.0]), (1000, 1000))
+        results = DataArray(spec, sparse)
+        stats = empty_store.instrument()
+
+        empty_store.write_results(results, 'test_modelrun', 'energy', 2010)
+
+        assert results.is_sparse
+        assert stats.methods['store.write_results']['bytes'] == sparse.nbytes
@@ -38,6 +38,27 @@ def handler(init_handler, unit_definitions, dimension, sample_dimensions):
     return handler
 
 
+class TestSignature():
+    """Signatures should change whenever dimensions are written, if the store can tell
+    """
+    def test_dimension_signature(self, handler, dimension):
+        signature = handler.read_dimension_signature('category')
+        if signature is None:
+            # the store cannot tell cheaply
+            return
+        all_dims = handler.read_dimension_signature()
+        assert handler.read_dimension_signature('category') == signature
+
+        dimension = dict(dimension)
+        dimension['elements'] = dimension['elements'] + [{'name': 4}]
+        handler.update_dimension('category', dimension)
+        assert handler.read_dimension_signature('category') != signature
+        assert handler.read_dimension_signature() != all_dims
+
+    def test_dimension_signature_missing(self, handler):
+        assert handler.read_dimension_signature('does_not_exist') is None
+
+
 class TestUnits():
     """Read units definitions
     """
@@ -6,9 +6,9 @@ from collections import OrderedDict
 
 import numpy as np
 import pandas as pd
-from pytest import fixture, raises
+from pytest import fixture, importorskip, raises
 from smif.data_layer import DataArray, Results
-from smif.exception import SmifDataNotFoundError
+from smif.exception import SmifDataMismatchError, SmifDataNotFoundError
 from smif.metadata import Spec
 
 
@@ -264,12 +264,12 @@ class TestSomeResults:
 
         expected = pd.DataFrame(
             OrderedDict([
-                ('model_run', 'model_run_1'),
+                ('model_run', pd.Categorical(['model_run_1'] * 14)),
                 ('timestep', [2010, 2015, 2015, 2015, 2020, 2020, 2020,
                               2010, 2015, 2015, 2015, 2020, 2020, 2020]),
                 ('decision', [0, 0, 1, 2, 0, 1, 2, 0, 0, 1, 2, 0, 1, 2]),
-                ('sample_dim', ['a', 'a', 'a', 'a', 'a', 'a', 'a',
-                                'b', 'b', 'b', 'b', 'b', 'b', 'b']),
+                ('sample_dim', pd.Categorical(['a', 'a', 'a', 'a', 'a', 'a', 'a',
+                                               'b', 'b', 'b', 'b', 'b', 'b', 'b'])),
                 ('sample_output', 0.0),
             ])
         )
@@ -285,12 +285,354 @@ class TestSomeResults:
 
         expected = pd.DataFrame(
             OrderedDict([
-                ('model_run', ['model_run_1'] * 10 + ['model_run_2'] * 10),
+                ('model_run', pd.Categorical(['model_run_1'] * 10 + ['model_run_2'] * 10)),
                 ('timestep', [2010, 2015, 2020, 2025, 2030] * 4),
                 ('decision', 0),
-                ('sample_dim', ['a'] * 5 + ['b'] * 5 + ['a'] * 5 + ['b'] * 5),
+                ('sample_dim', pd.Categorical(['a'] * 5 + ['b'] * 5 + ['a'] * 5 + ['b'] * 5)),
                 ('sample_output', 0.0),
             ])
         )
 
         pd.testing.assert_frame_equal(results_data, expected)
+
+
+@fixture
+def results_two_outputs(empty_store):
+    """Results fixture with an integer and a float output over two dimensions
+    """
+    for name, elements in [('lad', ['x', 'y', 'z']), ('hour', [0, 1])]:
+        empty_store.write_dimension({
+            'name': name, 'elements': [{'name': element} for element in elements]})
+    outputs = [
+        Spec(name='count', dims=['lad', 'hour'], dtype='int64', unit='people',
+             coords={'lad': ['x', 'y', 'z'], 'hour': [0, 1]}),
+        Spec(name='flow', dims=['lad', 'hour'], dtype='float', unit='Ml',
+             coords={'lad': ['x', 'y', 'z'], 'hour': [0, 1]})
+    ]
+    empty_store.write_model({
+        'name': 'a_model',
+        'inputs': [],
+        'outputs': [spec.as_dict() for spec in outputs],
+        'parameters': []
+    })
+    for model_run_name in ['run_1', 'run_2']:
+        empty_store.write_model_run({'name': model_run_name})
+
+    for model_run_name, timestep, decision in [('run_1', 2010, 0), ('run_1', 2015, 1),
+                                               ('run_2', 2015, 0)]:
+        offset = timestep + decision * 100
+        mask = np.zeros((3, 2), dtype=bool)
+        mask[1, 0] = model_run_name == 'run_2'
+        empty_store.write_results(
+            DataArray(outputs[0], np.arange(6).reshape((3, 2)) + offset, mask),
+            model_run_name, 'a_model', timestep, decision)
+        empty_store.write_results(
+            DataArray(outputs[1], np.arange(6.0).reshape((3, 2)) / 2),
+            model_run_name, 'a_model', timestep, decision)
+
+    return Results(store=empty_store)
+
+
+class TestReadFormats:
+
+    def _read(self, results, **kwargs):
+        return results.read(
+            model_run_names=['run_1', 'run_2'],
+            model_names=['a_model'],
+            output_names=['count', 'flow'],
+            **kwargs
+        )
+
+    def test_dataframe(self, results_two_outputs):
+        actual = self._read(results_two_outputs)
+
+        assert list(actual.columns) == \
+            ['model_run', 'timestep', 'decision', 'lad', 'hour', 'count', 'flow']
+        assert len(actual) == 18
+        assert list(actual['model_run'].cat.categories) == ['run_1', 'run_2']
+        assert list(actual['lad'].cat.categories) == ['x', 'y', 'z']
+        assert list(actual['hour'].cat.categories) == [0, 1]
+        assert actual['timestep'].dtype == np.dtype('int64')
+        assert actual['decision'].dtype == np.dtype('int64')
+        assert actual['flow'].dtype == np.dtype('float64')
+        # the missing count is kept as a null integer
+        assert actual['count'].dtype == pd.Int64Dtype()
+
+        # rows vary by model run, then each dimension, then (timestep, decision)
+        run_1 = actual[actual['model_run'] == 'run_1']
+        assert list(run_1['timestep']) == [2010, 2015] * 6
+        assert list(run_1['decision']) == [0, 1] * 6
+        assert list(run_1['lad']) == ['x'] * 4 + ['y'] * 4 + ['z'] * 4
+        assert list(run_1['hour']) == [0, 0, 1, 1] * 3
+        assert list(run_1['count']) == [
+            2010, 2115, 2011, 2116, 2012, 2117, 2013, 2118, 2014, 2119, 2015, 2120]
+
+        run_2 = actual[actual['model_run'] == 'run_2']
+        assert run_2['count'].isna().tolist() == [False, False, True, False, False, False]
+        assert list(run_2['flow']) == [0.0, 0.5, 1.0, 1.5, 2.0, 2.5]
+
+    def test_arrow(self, results_two_outputs):
+        pa = importorskip('pyarrow')
+        actual = self._read(results_two_outputs, output_format='arrow')
+
+        assert actual.column_names == \
+            ['model_run', 'timestep', 'decision', 'lad', 'hour', 'count', 'flow']
+        assert pa.types.is_dictionary(actual.schema.field('lad').type)
+        assert actual.schema.field('count').type == pa.int64()
+        assert actual.column('count').null_count == 1
+        expected = self._read(results_two_outputs)
+        assert actual.column('count').to_pylist() == \
+            [None if pd.isna(value) else value for value in expected['count']]
+        pd.testing.assert_frame_equal(
+            actual.to_pandas().drop(columns=['count']), expected.drop(columns=['count']))
+
+    def test_float_mask(self, results_two_outputs):
+        """Float values marked missing by a mask should be read as missing, whatever value
+        is held for them
+        """
+        store = results_two_outputs._store
+        spec = store._output_spec('a_model', 'flow')
+        mask = np.zeros((3, 2), dtype=bool)
+        mask[2, 1] = True
+        store.write_results(DataArray(spec, np.arange(6.0).reshape((3, 2)), mask),
+                            'run_2', 'a_model', 2015, 0)
+
+        actual = self._read(results_two_outputs)
+        run_2 = actual[actual['model_run'] == 'run_2']
+        assert run_2['flow'].isna().tolist() == [False, False, False, False, False, True]
+
+        importorskip('pyarrow')
+        table = self._read(results_two_outputs, output_format='arrow')
+        assert table.column('flow').null_count == 1
+
+    def test_xarray(self, results_two_outputs):
+        actual = self._read(results_two_outputs, output_format='xarray')
+
+        assert actual['count'].dims == ('model_run', 'timestep', 'decision', 'lad', 'hour')
+        assert list(actual['timestep'].values) == [2010, 2015]
+        assert list(actual['decision'].values) == [0, 1]
+        assert actual['flow'].attrs['unit'] == 'Ml'
+
+        np.testing.assert_equal(
+            actual['count'].sel(model_run='run_1', timestep=2015, decision=1).values,
+            np.arange(6).reshape((3, 2)) + 2115)
+        # combinations not read, and missing values, are NaN
+        assert np.isnan(actual['count'].sel(model_run='run_2', timestep=2010).values).all()
+        assert np.isnan(actual['count'].sel(
+            model_run='run_2', timestep=2015, decision=0, lad='y', hour=0).item())
+
+    def test_output_format_error(self, results_two_outputs):
+        with raises(ValueError) as ex:
+            self._read(results_two_outputs, output_format='csv')
+        assert "output_format must be 'dataframe', 'arrow' or 'xarray'" in str(ex.value)
+
+    def test_outputs_for_different_timesteps(self, results_two_outputs):
+        store = results_two_outputs._store
+        spec = store._output_spec('a_model', 'flow')
+        store.write_results(DataArray(spec, np.zeros((3, 2))), 'run_2', 'a_model', 2020, 0)
+        with raises(SmifDataMismatchError) as ex:
+            self._read(results_two_outputs)
+        assert "Results for 'count' and 'flow' in model run 'run_2' are not available for " \
+            "the same timesteps and decisions" in str(ex.value)
+
+
+class TestAggregate:
+
+    def test_sum_over(self, results_two_outputs):
+        actual = results_two_outputs.aggregate(
+            model_run_names=['run_1', 'run_2'],
+            model_names=['a_model'],
+            output_names=['count'],
+            statistics=['mean', 'count'],
+            over=['hour']
+        )
+
+        assert list(actual.columns) == \
+            ['timestep', 'decision', 'lad', 'count_mean', 'count_count']
+        assert list(actual['lad'].cat.categories) == ['x', 'y', 'z']
+        assert list(actual['timestep']) == [2010, 2015, 2015] * 3
+        assert list(actual['decision']) == [0, 0, 1] * 3
+        assert list(actual['lad']) == ['x'] * 3 + ['y'] * 3 + ['z'] * 3
+        # run_2 is missing one value for lad y, which is skipped
+        assert list(actual['count_mean']) == \
+            [4021, 4031, 4231, 4025, 2018, 4235, 4029, 4039, 4239]
+        assert list(actual['count_count']) == [1] * 9
+        assert results_two_outputs.get_units('count') == 'people'
+
+    def test_across_runs(self, results_two_outputs):
+        store = results_two_outputs._store
+        spec = store._output_spec('a_model', 'flow')
+        store.write_results(DataArray(spec, np.full((3, 2), 4.0)), 'run_2', 'a_model', 2010, 0)
+
+        actual = results_two_outputs.aggregate(
+            model_run_names=['run_1', 'run_2'],
+            model_names=['a_model'],
+            output_names=['flow'],
+            statistics=['mean', 'std', 'min', 'max', 'sum'],
+            quantiles=[0.5],
+            groupings={'lad': {'x': 'north', 'y': 'north', 'z': 'south'}},
+            over=['hour'],
+            timesteps=[2010]
+        )
+
+        assert list(actual.columns) == [
+            'timestep', 'decision', 'lad', 'flow_mean', 'flow_std', 'flow_min', 'flow_max',
+            'flow_sum', 'flow_p50']
+        assert list(actual['lad']) == ['north', 'south']
+        # run_1 sums to 3.0 (north) and 4.5 (south), run_2 to 16.0 and 8.0
+        np.testing.assert_allclose(actual['flow_mean'], [9.5, 6.25])
+        np.testing.assert_allclose(
+            actual['flow_std'], np.std([[3, 4.5], [16, 8]], axis=0, ddof=1))
+        np.testing.assert_allclose(actual['flow_min'], [3.0, 4.5])
+        np.testing.assert_allclose(actual['flow_max'], [16.0, 8.0])
+        np.testing.assert_allclose(actual['flow_sum'], [19.0, 12.5])
+        np.testing.assert_allclose(actual['flow_p50'], [9.5, 6.25])
+
+    def test_arrow(self, results_two_outputs):
+        importorskip('pyarrow')
+        actual = results_two_outputs.aggregate(
+            ['run_1', 'run_2'], ['a_model'], ['count', 'flow'], output_format='arrow')
+        assert actual.column_names == \
+            ['timestep', 'decision', 'lad', 'hour', 'count_mean', 'flow_mean']
+        assert actual.num_rows == 18
+
+    def test_errors(self, results_two_outputs):
+        def aggregate(**kwargs):
+            return results_two_outputs.aggregate(['run_1'], ['a_model'], ['count'], **kwargs)
+
+        with raises(ValueError) as ex:
+            aggregate(statistics=['median'])
+        assert "statistics must be in" in str(ex.value)
+
+        with raises(ValueError) as ex:
+            aggregate(over=['region'])
+        assert "Cannot aggregate over 'region', which is not a dimension of 'count'" \
+            in str(ex.value)
+
+        with raises(ValueError) as ex:
+            aggregate(groupings={'lad': {'x': 'north'}})
+        assert "Grouping for dimension 'lad' has no group for elements ['y', 'z']" \
+            in str(ex.value)
+
+        with raises(ValueError) as ex:
+            aggregate(output_format='xarray')
+        assert "output_format must be 'dataframe' or 'arrow'" in str(ex.value)
+
+
+class TestQuery:
+
+    def test_query(self, results_two_outputs):
+        actual = results_two_outputs.query(
+            'a_model', ['count'],
+            model_runs='run_*',
+            timesteps=(2012, 2020),
+            coords={'lad': ['z', 'x']}
+        )
+
+        assert list(actual.columns) == \
+            ['model_run', 'timestep', 'decision', 'lad', 'hour', 'count']
+        assert list(actual['lad'].cat.categories) == ['z', 'x']
+        assert list(actual['model_run']) == ['run_1'] * 4 + ['run_2'] * 4
+        assert list(actual['timestep']) == [2015] * 8
+        assert list(actual['decision']) == [1] * 4 + [0] * 4
+        assert list(actual['lad']) == ['z', 'z', 'x', 'x'] * 2
+        assert list(actual['count']) == [2119, 2120, 2115, 2116, 2019, 2020, 2015, 2016]
+
+    def test_values_and_ranges(self, results_two_outputs):
+        actual = results_two_outputs.query(
+            'a_model', ['flow'],
+            model_runs=['run_1', 'other'],
+            timesteps=[2010, (2014, 2016)],
+            decisions=0
+        )
+        assert set(actual['model_run']) == {'run_1'}
+        assert set(zip(actual['timestep'], actual['decision'])) == {(2010, 0)}
+
+    def test_runs_without_matches_left_out(self, results_two_outputs):
+        actual = results_two_outputs.query('a_model', ['flow'], decisions=[1])
+        assert list(actual['model_run'].cat.categories) == ['run_1']
+
+    def test_selection_pushed_down(self, results_two_outputs, monkeypatch):
+        data_store = results_two_outputs._store.data_store
+        read_results = data_store.read_results
+        selections = []
+
+        def recording_read_results(*args):
+            selections.append(args[-1])
+            return read_results(*args)
+
+        monkeypatch.setattr(data_store, 'read_results', recording_read_results)
+        results_two_outputs.query(
+            'a_model', ['count'], model_runs='run_1', coords={'hour': [1]})
+        assert selections == [{'hour': [1]}, {'hour': [1]}]
+
+    def test_not_found(self, results_two_outputs):
+        with raises(SmifDataNotFoundError) as ex:
+            results_two_outputs.query('a_model', ['count'], model_runs='ssp2_*')
+        assert "No model runs match ['ssp2_*']" in str(ex.value)
+
+        with raises(SmifDataNotFoundError) as ex:
+            results_two_outputs.query('a_model', ['count'], timesteps=(2040, 2050))
+        assert "No results for ['count'] from a_model match the query" in str(ex.value)
+
+    def test_unknown_names(self, results_two_outputs):
+        with raises(ValueError) as ex:
+            results_two_outputs.query('a_model', ['count', 'nope'])
+        assert 'nope is not an output of sector model a_model' in str(ex.value)
+
+        with raises(SmifDataNotFoundError):
+            results_two_outputs.query('no_model', ['count'])
+
+
+class TestStream:
+
+    def test_stream(self, results_two_outputs):
+        stream = results_two_outputs.stream('run_1', 'a_model', 'count')
+        assert stream.num_rows == 12
+        assert stream.schema.names == ['timestep', 'decision', 'lad', 'hour', 'count']
+
+        batches = list(stream.batches())
+        assert len(batches) == 2
+        first = batches[0].to_pydict()
+        assert first['timestep'] == [2010] * 6
+        assert first['lad'] == ['x', 'x', 'y', 'y', 'z', 'z']
+        assert first['hour'] == [0, 1, 0, 1, 0, 1]
+        assert first['count'] == [2010, 2011, 2012, 2013, 2014, 2015]
+
+    def test_rows_and_batches(self, results_two_outputs, monkeypatch):
+        store = results_two_outputs._store
+        reads = []
+        read_results = store.read_results
+
+        def recording_read_results(model_run_name, model_name, output_spec, timestep,
+                                   decision, selection=None):
+            reads.append(timestep)
+            return read_results(model_run_name, model_name, output_spec, timestep, decision,
+                                selection=selection)
+
+        monkeypatch.setattr(store, 'read_results', recording_read_results)
+        stream = results_two_outputs.stream('run_1', 'a_model', 'flow', batch_size=4)
+        batches = list(stream.batches(start=7, stop=12))
+
+        # only the second result is read, in batches of at most four rows
+        assert reads == [2015]
+        assert [batch.num_rows for batch in batches] == [4, 1]
+        assert batches[0].to_pydict()['flow'] == [0.5, 1.0, 1.5, 2.0]
+        assert list(stream.batches(start=12)) == []
+
+    def test_filters_and_missing(self, results_two_outputs):
+        stream = results_two_outputs.stream(
+            'run_2', 'a_model', 'count', timesteps=2015, coords={'lad': ['y'], 'hour': [0]})
+        assert stream.num_rows == 1
+        batch, = stream.batches()
+        assert batch.to_pydict() == {
+            'timestep': [2015], 'decision': [0], 'lad': ['y'], 'hour': [0], 'count': [None]}
+
+        stream = results_two_outputs.stream('run_2', 'a_model', 'count', timesteps=2010)
+        assert stream.num_rows == 0
+        assert list(stream.batches()) == []
+
+    def test_output_not_found(self, results_two_outputs):
+        with raises(SmifDataNotFoundError) as ex:
+            results_two_outputs.stream('run_1', 'a_model', 'pressure')
+        assert "Output 'pressure' not found in sector model 'a_model'" in str(ex.value)
@@ -0,0 +1,100 @@
+"""Test online statistics
+"""
+import numpy as np
+from numpy.testing import assert_allclose, assert_array_equal
+from pytest import fixture, raises
+from smif.data_layer.running_statistics import RunningQuantile, RunningStatistics
+
+
+@fixture
+def observations():
+    """500 observations of a (3, 4) array, with some missing
+    """
+    rng = np.random.RandomState(42)
+    values = rng.normal(size=(500, 3, 4)) * np.array([[1], [2], [5]]) + 10
+    present = rng.rand(500, 3, 4) > 0.1
+    return values, present
+
+
+class TestRunningStatistics():
+    def test_matches_numpy(self, observations):
+        values, present = observations
+        stats = RunningStatistics((3, 4))
+        for value, value_present in zip(values, present):
+            stats.update(value, value_present)
+
+        masked = np.ma.masked_array(values, ~present)
+        assert_array_equal(stats.count, present.sum(axis=0))
+        assert_allclose(stats.statistic('sum'), masked.sum(axis=0))
+        assert_allclose(stats.statistic('mean'), masked.mean(axis=0))
+        assert_allclose(stats.statistic('var'), masked.var(axis=0, ddof=1))
+        assert_allclose(stats.statistic('std'), masked.std(axis=0, ddof=1))
+        assert_array_equal(stats.statistic('min'), masked.min(axis=0))
+        assert_array_equal(stats.statistic('max'), masked.max(axis=0))
+
+    def test_no_observations(self):
+        stats = RunningStatistics((2, ))
+        stats.update([1.0, 5.0], [True, False])
+        assert_array_equal(stats.statistic('count'), [1, 0])
+        assert_array_equal(stats.statistic('mean'), [1.0, np.nan])
+        assert_array_equal(stats.statistic('var'), [np.nan, np.nan])
+
+    def test_grow(self):
+        stats = RunningStatistics((2, 0))
+        stats.grow(1)
+        stats.update([[1.0], [2.0]])
+        stats.grow(1)
+        stats.update([[3.0, 4.0], [5.0, 6.0]])
+        assert_array_equal(stats.statistic('mean'), [[2.0, 4.0], [3.5, 6.0]])
+        assert_array_equal(stats.statistic('count'), [[2, 1], [2, 1]])
+
+    def test_unknown_statistic(self):
+        with raises(ValueError) as ex:
+            RunningStatistics((1, )).statistic('mode')
+        assert "Unknown statistic 'mode'" in str(ex.value)
+
+
+class TestRunningQuantile():
+    def test_estimate(self, observations):
+        """P-squared estimates should be close to exact quantiles, within a small fraction of
+        the standard deviation of each cell
+        """
+        values, present = observations
+        for quantile in (0.05, 0.5, 0.95):
+            running = RunningQuantile(quantile, (3, 4))
+            for value, value_present in zip(values, present):
+                running.update(value, value_present)
+
+            exact = np.array([
+                [np.quantile(values[present[:, i, j], i, j], quantile) for j in range(4)]
+                for i in range(3)
+            ])
+            scale = np.array([[1], [2], [5]])
+            assert np.all(np.abs(running.value() - exact) / scale < 0.25)
+
+    def test_exact_for_few_observations(self):
+        running = RunningQuantile(0.5, (2, ))
+        running.update([1.0, 7.0])
+        running.update([3.0, 0.0], [True, False])
+        running.update([2.0, 0.0], [True, False])
+        assert_array_equal(running.value(), [2.0, 7.0])
+
+    def test_no_observations(self):
+        running = RunningQuantile(0.5, (2, ))
+        running.update([1.0, 0.0], [True, False])
+        assert_array_equal(running.value(), [1.0, np.nan])
+
+    def test_grow(self):
+        running = RunningQuantile(0.5, (0, ))
+        running.grow(1)
+        for value in range(10):
+            running.update([float(value)])
+        running.grow(1)
+        running.update([0.0, 3.0])
+        assert running.value().shape == (2, )
+        assert running.value()[1] == 3.0
+
+    def test_quantile_range(self):
+        with raises(ValueError) as ex:
+            RunningQuantile(95, (1, ))
+        assert "Quantile must be between 0 and 1, got 95" in str(ex.value)
@@ -0,0 +1,136 @@
+"""Test SharedDataPlane
+"""
+# pylint: disable=redefined-outer-name
+import multiprocessing
+
+import numpy
+from numpy.testing import assert_array_equal
+from pytest import fixture, raises
+from smif.data_layer.data_array import DataArray
+from smif.data_layer.shared_memory import SharedDataPlane
+from smif.data_layer.sparse_array import COOArray
+from smif.exception import (SmifDataExistsError, SmifDataMismatchError,
+                            SmifDataNotFoundError)
+from smif.metadata import Spec
+
+
+@fixture
+def spec():
+    return Spec(
+        name='population',
+        dims=['lad', 'age'],
+        coords={'lad': ['a', 'b', 'c'], 'age': ['child', 'adult']},
+        dtype='float'
+    )
+
+
+@fixture
+def plane():
+    plane = SharedDataPlane()
+    yield plane
+    plane.close()
+
+
+def _attach_and_sum(plane, key, queue):
+    data = plane.attach(key)
+    plane.attach(key)
+    queue.put(float(data.as_ndarray().sum()))
+    del data
+    plane.release(key)
+    plane.publish('from_child', numpy.arange(3))
+    plane.close()
+
+
+class TestSharedDataPlane():
+    def test_roundtrip(self, plane, spec):
+        expected = DataArray(spec, numpy.arange(6, dtype='float').reshape((3, 2)))
+        plane.publish('population', expected)
+
+        actual = plane.attach('population')
+        assert actual == expected
+        assert actual.spec == spec
+
+    def test_roundtrip_missing(self, plane, spec):
+        data = numpy.arange(6, dtype='float').reshape((3, 2))
+        mask = numpy.zeros((3, 2), dtype=bool)
+        mask[1, 1] = True
+        plane.publish('population', DataArray(spec, data, mask))
+
+        actual = plane.attach('population')
+        assert_array_equal(actual.mask, mask)
+
+    def test_roundtrip_sparse(self, plane, spec):
+        sparse = COOArray(numpy.array([[0, 2], [1, 0]]), numpy.array([1.0, 2.0]), (3, 2))
+        plane.publish('population', DataArray(spec, sparse))
+
+        actual = plane.attach('population')
+        assert actual.is_sparse
+        assert_array_equal(actual.as_coo().coords, sparse.coords)
+        assert_array_equal(actual.as_ndarray(), sparse.todense())
+
+    def test_roundtrip_ndarray(self, plane):
+        plane.publish('coefficients', numpy.eye(4, dtype='int32'))
+        actual = plane.attach('coefficients')
+        assert actual.dtype == numpy.dtype('int32')
+        assert_array_equal(actual, numpy.eye(4))
+
+    def test_zero_copy(self, plane, spec):
+        plane.publish('population', DataArray(spec, numpy.ones((3, 2))))
+
+        first = plane.attach('population').as_ndarray()
+        second = plane.attach('population').as_ndarray()
+        assert numpy.shares_memory(first, second)
+        with raises(ValueError):
+            first[0, 0] = 2
+
+    def test_reference_count(self, plane):
+        plane.publish('key', numpy.arange(3))
+        data = plane.attach('key')
+        plane.release('key')
+        assert 'key' in plane
+        assert_array_equal(data, [0, 1, 2])
+
+        del data
+        plane.release('key')
+        assert 'key' not in plane
+        with raises(SmifDataNotFoundError):
+            plane.attach('key')
+
+    def test_publish_exists(self, plane):
+        plane.publish('key', numpy.arange(3))
+        with raises(SmifDataExistsError):
+            plane.publish('key', numpy.arange(3))
+
+    def test_object_dtype(self, plane):
+        with raises(SmifDataMismatchError):
+            plane.publish('key', numpy.array(['a', None], dtype=object))
+        assert 'key' not in plane
+
+    def test_close(self, spec):
+        with SharedDataPlane() as plane:
+            plane.publish('a', numpy.arange(3))
+            plane.publish('b', DataArray(spec, numpy.ones((3, 2))))
+            plane.attach('b')
+        assert 'a' not in plane
+        assert 'b' not in plane
+
+    def test_between_processes(self, spec):
+        """The plane is pickled for a spawned process, which attaches, publishes and closes
+        without removing data published by others
+        """
+        context = multiprocessing.get_context('spawn')
+        plane = SharedDataPlane(lock=context.Lock())
+        plane.publish('population', DataArray(spec, numpy.ones((3, 2))))
+        queue = context.Queue()
+
+        process = context.Process(target=_attach_and_sum, args=(plane, 'population', queue))
+        process.start()
+        assert queue.get(timeout=60) == 6
+        process.join(60)
+
+        assert process.exitcode == 0
+        assert 'population' in plane
+        assert_array_equal(plane.attach('from_child'), [0, 1, 2])
+        plane.close()
+        assert 'population' not in plane
+        assert 'from_child' not in plane
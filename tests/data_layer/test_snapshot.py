@@ -0,0 +1,142 @@
+"""Test compiled project snapshots
+"""
+import os
+import shutil
+from unittest.mock import patch
+
+from pytest import fixture
+from smif.controller.setup import copy_project_folder
+from smif.data_layer.file import FileMetadataStore, YamlConfigStore
+from smif.data_layer.file.snapshot import (open_snapshot, save_snapshot,
+                                           snapshot_path)
+
+
+@fixture
+def project(tmpdir):
+    project = str(tmpdir.join('project'))
+    copy_project_folder(project)
+    return project
+
+
+def _open(project):
+    config_store = YamlConfigStore(project)
+    metadata_store = FileMetadataStore(project)
+    loaded = open_snapshot(project, config_store, metadata_store, save_at_exit=False)
+    return loaded, config_store, metadata_store
+
+
+def _read_and_save(project):
+    """Open a project, read models and dimensions, as a model run would, and save
+    """
+    loaded, config_store, metadata_store = _open(project)
+    config_store.read_models()
+    metadata_store.read_dimensions()
+    save_snapshot(project, config_store, metadata_store)
+    return loaded
+
+
+def _misses(store):
+    return sum(info['misses'] for info in store.cache_info().values())
+
+
+class TestSnapshot():
+    def test_save_then_load(self, project):
+        """A snapshot should hold what was read, then be read instead of config
+        """
+        loaded, _, _ = _open(project)
+        assert not loaded
+        assert not os.path.exists(snapshot_path(project))
+
+        _read_and_save(project)
+        assert os.path.exists(snapshot_path(project))
+
+        loaded, config_store, metadata_store = _open(project)
+        assert loaded
+        expected = YamlConfigStore(project).read_models()
+        assert config_store.read_models() == expected
+        assert metadata_store.read_dimensions()
+        # nothing parsed except project.yml, which is read when the store is created
+        assert _misses(config_store) == 1
+        assert _misses(metadata_store) == 0
+
+    def test_open_reads_nothing(self, project):
+        """Opening should not read the project, so a broken file only matters when used
+        """
+        _read_and_save(project)
+        shutil.rmtree(os.path.join(project, 'data', 'dimensions', 'uk_nations_shp'))
+
+        loaded, config_store, metadata_store = _open(project)
+        assert not loaded
+        assert config_store.read_model_runs()
+        assert _misses(metadata_store) == 0
+
+    def test_changed_source(self, project):
+        """A changed config file should be read again, and saved
+        """
+        _read_and_save(project)
+        config_store = YamlConfigStore(project)
+        model = config_store.read_model('water_supply')
+        model['description'] = 'Changed description, for a new snapshot'
+        config_store.update_model('water_supply', model)
+
+        loaded, config_store, _ = _open(project)
+        assert not loaded
+        assert config_store.read_model('water_supply')['description'] == \
+            'Changed description, for a new snapshot'
+
+        _read_and_save(project)
+        assert _open(project)[0]
+
+        model['name'] = 'water_supply_copy'
+        config_store.write_model(model)
+        _, config_store, _ = _open(project)
+        assert 'water_supply_copy' in [model['name'] for model in config_store.read_models()]
+
+    def test_outside_project(self, project):
+        """A snapshot should not be saved in the project, where others could replace it
+        """
+        _read_and_save(project)
+        path = snapshot_path(project)
+        assert not os.path.abspath(path).startswith(os.path.abspath(project))
+        assert os.stat(os.path.dirname(path)).st_mode & 0o777 == 0o700
+
+        # a snapshot of a project moved into the same folder is not used
+        moved = project + '_moved'
+        shutil.move(project, moved)
+        shutil.copy(path, snapshot_path(moved))
+        assert not _open(moved)[0]
+
+    def test_save_at_exit(self, project):
+        """On exit, a snapshot should be saved if it was missing or anything new was read
+        """
+        def open_and_exit(read):
+            config_store = YamlConfigStore(project)
+            metadata_store = FileMetadataStore(project)
+            with patch('smif.data_layer.file.snapshot.atexit') as mock_atexit:
+                open_snapshot(project, config_store, metadata_store)
+            read(config_store)
+            save, *args = mock_atexit.register.call_args[0]
+            save(*args)
+
+        open_and_exit(lambda config_store: config_store.read_model_runs())
+        assert _open(project)[0]
+
+        mtime = os.stat(snapshot_path(project)).st_mtime_ns
+        open_and_exit(lambda config_store: config_store.read_model_runs())
+        assert os.stat(snapshot_path(project)).st_mtime_ns == mtime
+
+        open_and_exit(lambda config_store: config_store.read_models())
+        _, config_store, _ = _open(project)
+        config_store.read_model_runs()
+        config_store.read_models()
+        assert _misses(config_store) == 1
+
+    def test_ignore_corrupt(self, project):
+        """An unreadable snapshot should be ignored, and replaced when saved
+        """
+        os.makedirs(os.path.dirname(snapshot_path(project)), exist_ok=True)
+        with open(snapshot_path(project), 'wb') as file_handle:
+            file_handle.write(b'not a snapshot')
+
+        assert not _read_and_save(project)
+        assert _open(project)[0]
@@ -0,0 +1,54 @@
+"""Test sparse COO arrays
+"""
+import numpy as np
+from pytest import raises
+from smif.convert.adaptor import Adaptor
+from smif.data_layer.sparse_array import COOArray, is_sparse
+
+
+def _dense():
+    data = np.zeros((3, 4, 2))
+    data[0, 1, 0] = 1.5
+    data[2, 3, 1] = -2.0
+    data[1, 0, 1] = 4.0
+    return data
+
+
+class TestCOOArray():
+    def test_dense_round_trip(self):
+        dense = _dense()
+        coo = COOArray.from_dense(dense)
+        assert coo.nnz == 3
+        assert coo.shape == (3, 4, 2)
+        np.testing.assert_array_equal(coo.todense(), dense)
+        np.testing.assert_array_equal(np.asarray(coo), dense)
+
+    def test_sum_duplicates(self):
+        coo = COOArray([[1, 0, 1], [0, 1, 0]], [1.0, 2.0, 3.0], shape=(2, 2))
+        summed = coo.sum_duplicates()
+        assert summed.nnz == 2
+        np.testing.assert_array_equal(summed.todense(), [[0, 2], [4, 0]])
+        np.testing.assert_array_equal(coo.todense(), [[0, 2], [4, 0]])
+
+    def test_contract(self):
+        """Should match dense conversion with coefficients along any axis
+        """
+        dense = _dense()
+        coo = COOArray.from_dense(dense)
+        for axis, size in enumerate(dense.shape):
+            coefficients = np.arange(size * 3, dtype=float).reshape((size, 3)) / 10
+            expected = Adaptor.convert_with_coefficients(dense, coefficients, axis)
+            actual = coo.contract(coefficients, axis)
+            np.testing.assert_allclose(actual.todense(), expected)
+
+        with raises(ValueError):
+            coo.contract(np.ones((5, 1)), 0)
+
+    def test_out_of_range(self):
+        with raises(IndexError):
+            COOArray([[0, 3]], [1, 2], shape=(3,))
+
+    def test_is_sparse(self):
+        assert is_sparse(COOArray.from_dense(_dense()))
+        assert not is_sparse(_dense())
+        assert not is_sparse([1, 2])
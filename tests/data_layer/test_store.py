@@ -11,7 +11,8 @@ from smif.data_layer.data_array import DataArray
 from smif.data_layer.memory_interface import (MemoryConfigStore,
                                               MemoryDataStore,
                                               MemoryMetadataStore)
-from smif.exception import SmifDataNotFoundError
+from smif.data_layer.shared_memory import SharedDataPlane
+from smif.exception import SmifDataMismatchError, SmifDataNotFoundError
 from smif.metadata import Spec
 
 
@@ -196,6 +197,29 @@ class TestStoreMetadata():
         assert store.read_dimensions() == []
 
 
+class TestStoreConfigSignature():
+    def test_memory_store(self, store):
+        assert store.read_config_signature('sector_model') is None
+
+    def test_coords_from_dimensions(self, setup_folder_structure, get_sector_model,
+                                    sample_dimensions):
+        store = Store.from_dict({
+            'interface': 'local_csv', 'dir': str(setup_folder_structure), 'snapshot': False})
+        for dim in sample_dimensions:
+            store.write_dimension(dim)
+        store.write_model(get_sector_model)
+        name = get_sector_model['name']
+        skipped = store.read_config_signature('sector_model', name, skip_coords=True)
+        with_coords = store.read_config_signature('sector_model', name)
+
+        dim = dict(sample_dimensions[0])
+        dim['elements'] = dim['elements'] + [{'name': 'an_extra_element'}]
+        store.update_dimension(dim['name'], dim)
+
+        assert store.read_config_signature('sector_model', name, skip_coords=True) == skipped
+        assert store.read_config_signature('sector_model', name) != with_coords
+
+
 class TestStoreData():
     def test_scenario_variant_data(self, store, sample_dimensions, scenario,
                                    sample_scenario_data):
@@ -217,6 +241,31 @@ class TestStoreData():
         )
         assert actual == scenario_variant_data
 
+    def test_scenario_variant_data_shared(self, store, sample_dimensions, scenario,
+                                          sample_scenario_data):
+        for dim in sample_dimensions:
+            store.write_dimension(dim)
+        store.write_scenario(scenario)
+        key = next(iter(sample_scenario_data))
+        scenario_name, variant_name, variable = key
+        store.write_scenario_variant_data(
+            scenario_name, variant_name, sample_scenario_data[key]
+        )
+        with SharedDataPlane() as plane:
+            store.share_data(plane)
+            store.instrument()
+            first = store.read_scenario_variant_data(scenario_name, variant_name, variable)
+            second = store.read_scenario_variant_data(scenario_name, variant_name, variable)
+
+            assert second == sample_scenario_data[key]
+            methods = store.io_stats.as_dict()['methods']
+            assert methods['data_store.read_scenario_variant_data']['calls'] == 1
+
+            # copied out of shared memory, which is no longer attached
+            assert not np.shares_memory(first.data, second.data)
+            second.data[0] = -1
+            assert not plane._attached
+
     def test_narrative_variant_data(self, store, sample_dimensions, get_sos_model,
                                     get_sector_model, energy_supply_sector_model,
                                     sample_narrative_data):
@@ -394,6 +443,89 @@ class TestStoreData():
         pass
 
 
+class TestStoreReadManyResults():
+    """Read results for several model runs, timesteps and decision iterations at once
+    """
+    @fixture
+    def output_spec(self):
+        return Spec(name='flow', dims=['lad', 'hour'], dtype='int64',
+                    coords={'lad': ['a', 'b', 'c'], 'hour': [0, 1]})
+
+    @fixture
+    def results_store(self, store, output_spec):
+        for dim in output_spec.coords:
+            store.write_dimension({'name': dim.name, 'elements': dim.elements})
+        store.write_model({
+            'name': 'water',
+            'inputs': [],
+            'outputs': [output_spec.as_dict()],
+            'parameters': []
+        })
+        for run, timestep, decision in [('run_1', 2010, 0), ('run_1', 2015, 0),
+                                        ('run_1', 2015, 1), ('run_2', 2010, 0)]:
+            data = np.arange(6).reshape((3, 2)) + timestep * 10 + decision
+            mask = None
+            if run == 'run_2':
+                data = data * -1
+                mask = np.zeros((3, 2), dtype=bool)
+                mask[2, 1] = True
+            store.write_results(
+                DataArray(output_spec, data, mask), run, 'water', timestep, decision)
+        return store
+
+    def test_get_result_darray(self, results_store):
+        actual = results_store.get_result_darray('run_1', 'water', 'flow')
+        assert actual.dims == ['lad', 'hour', 'timestep_decision']
+        assert actual.dim_names('timestep_decision') == [(2010, 0), (2015, 0), (2015, 1)]
+        assert actual.shape == (3, 2, 3)
+        for index, (timestep, decision) in enumerate([(2010, 0), (2015, 0), (2015, 1)]):
+            numpy.testing.assert_equal(
+                actual.data[..., index],
+                np.arange(6).reshape((3, 2)) + timestep * 10 + decision)
+
+    def test_get_result_darray_filtered(self, results_store):
+        actual = results_store.get_result_darray(
+            'run_1', 'water', 'flow', decision_iterations=[1])
+        assert actual.dim_names('timestep_decision') == [(2015, 1)]
+
+        with raises(SmifDataNotFoundError):
+            results_store.get_result_darray('run_1', 'water', 'flow', timesteps=[2050])
+
+    def test_get_results_threads(self, results_store):
+        expected = results_store.get_results(['run_1', 'run_2'], 'water', ['flow'],
+                                             max_workers=1)
+        actual = results_store.get_results(['run_1', 'run_2'], 'water', ['flow'],
+                                           max_workers=4)
+        assert list(actual) == ['run_1', 'run_2']
+        assert actual == expected
+
+        run_2 = actual['run_2']['flow']
+        assert run_2.data.dtype == np.dtype('int64')
+        numpy.testing.assert_equal(
+            run_2.mask[..., 0], [[False, False], [False, False], [False, True]])
+        assert run_2.data[0, 1, 0] == -20101
+
+    def test_read_results_batch(self, results_store):
+        first, second = results_store.read_results_batch(
+            'water',
+            [('run_1', 'flow', [(2015, 1)]), ('run_2', 'flow', [(2010, 0)])],
+            selection={'lad': ['c', 'a']}
+        )
+        assert first.dims == ['lad', 'hour', 'timestep_decision']
+        assert first.dim_names('lad') == ['c', 'a']
+        numpy.testing.assert_equal(first.data[..., 0], [[20155, 20156], [20151, 20152]])
+        numpy.testing.assert_equal(second.mask[..., 0], [[False, True], [False, False]])
+
+    def test_get_results_read_error(self, results_store):
+        """Errors from any read are raised
+        """
+        wrong_spec = Spec(name='flow', dims=['lad'], coords={'lad': ['a', 'b']}, dtype='int64')
+        results_store.data_store.write_results(
+            DataArray(wrong_spec, np.zeros(2, dtype='int64')), 'run_1', 'water', 2020, 0)
+        with raises(SmifDataMismatchError):
+            results_store.get_results(['run_1'], 'water', ['flow'], max_workers=2)
+
+
 class TestWrongRaises:
 
     def test_narrative_variant(self, store, sample_dimensions,
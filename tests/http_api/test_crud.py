@@ -1,16 +1,21 @@
 """Test HTTP API application
 """
 import datetime
+import gzip
 import json
 import os
 from unittest.mock import Mock
 
+import numpy
 import pytest
 import smif
 from flask import current_app
+from smif.data_layer.data_array import DataArray
+from smif.data_layer.instrument import IOStats
 from smif.data_layer.store import Store
 from smif.exception import SmifDataNotFoundError
 from smif.http_api import create_app
+from smif.metadata import Spec
 
 
 @pytest.fixture
@@ -78,7 +83,8 @@ def mock_data_interface(model_run, get_sos_model, get_sector_model,
         'read_scenarios.side_effect': [[get_scenario]],
         'read_scenario.side_effect':  read_scenario,
         'read_dimensions.side_effect': [[get_dimension]],
-        'read_dimension.side_effect':  read_dimension
+        'read_dimension.side_effect':  read_dimension,
+        'read_config_signature.return_value': None
     }
     return Mock(spec=Store, **attrs)
 
@@ -650,3 +656,272 @@ def test_delete_dimension(client, get_dimension):
         get_dimension['name'])
 
     assert response.status_code == 200
+
+
+def test_get_io_stats_not_instrumented(client):
+    """GET I/O stats returns empty data if the store is not instrumented
+    """
+    current_app.config.data_interface.io_stats = None
+    response = client.get('/api/v1/io_stats/')
+
+    assert response.status_code == 200
+    data = parse_json(response)
+    assert data['data'] == {}
+
+
+def test_get_io_stats(client):
+    """GET and reset I/O stats
+    """
+    io_stats = IOStats()
+    io_stats.record('data_store.read_results', 0.01, nbytes=8)
+    current_app.config.data_interface.io_stats = io_stats
+
+    response = client.get('/api/v1/io_stats/')
+    data = parse_json(response)
+    assert data['data']['methods']['data_store.read_results']['calls'] == 1
+
+    response = client.delete('/api/v1/io_stats/')
+    assert response.status_code == 200
+    assert io_stats.methods == {}
+
+
+@pytest.fixture
+def results_client(mock_scheduler, empty_store):
+    """Return an API client for an app with results in a memory store
+    """
+    for name, elements in [('lad', ['x', 'y', 'z']), ('hour', [0, 1])]:
+        empty_store.write_dimension({
+            'name': name, 'elements': [{'name': element} for element in elements]})
+    spec = Spec(name='flow', dims=['lad', 'hour'], dtype='float', unit='Ml',
+                coords={'lad': ['x', 'y', 'z'], 'hour': [0, 1]})
+    empty_store.write_model({
+        'name': 'a_model', 'inputs': [], 'outputs': [spec.as_dict()], 'parameters': []})
+    empty_store.write_model_run({'name': 'run_1'})
+    for timestep in [2010, 2015]:
+        empty_store.write_results(
+            DataArray(spec, numpy.arange(6.0).reshape((3, 2)) + timestep),
+            'run_1', 'a_model', timestep, 0)
+
+    test_app = create_app(
+        static_folder=os.path.join(os.path.dirname(__file__), '..', 'fixtures', 'http'),
+        template_folder=os.path.join(os.path.dirname(__file__), '..', 'fixtures', 'http'),
+        data_interface=empty_store,
+        scheduler=mock_scheduler
+    )
+    with test_app.app_context():
+        yield test_app.test_client()
+
+
+def parse_arrow(response):
+    """Parse an Arrow IPC stream response
+    """
+    pa = pytest.importorskip('pyarrow')
+    return pa.ipc.open_stream(response.data).read_all()
+
+
+def test_get_available_results(results_client):
+    """GET available results of a model run
+    """
+    response = results_client.get('/api/v1/results/run_1/')
+    data = parse_json(response)
+    assert data['data'] == [
+        {'timestep': 2010, 'decision': 0, 'model_name': 'a_model', 'output_name': 'flow'},
+        {'timestep': 2015, 'decision': 0, 'model_name': 'a_model', 'output_name': 'flow'}
+    ]
+
+
+def test_get_results_arrow(results_client):
+    """GET results as an Arrow IPC stream
+    """
+    response = results_client.get('/api/v1/results/run_1/a_model/flow')
+
+    assert response.status_code == 200
+    assert response.mimetype == 'application/vnd.apache.arrow.stream'
+    assert response.headers['X-Total-Rows'] == '12'
+    table = parse_arrow(response)
+    assert table.column_names == ['timestep', 'decision', 'lad', 'hour', 'flow']
+    assert table.column('timestep').to_pylist() == [2010] * 6 + [2015] * 6
+    assert table.column('flow').to_pylist()[5:7] == [2015.0, 2015.0]
+
+
+def test_get_results_json_filtered(results_client):
+    """GET results as JSON, filtered by timestep and dimension elements
+    """
+    response = results_client.get(
+        '/api/v1/results/run_1/a_model/flow?timestep=2012:2020&lad=z&hour=1',
+        headers={'Accept': 'application/json'})
+
+    assert response.status_code == 200
+    data = parse_json(response)
+    assert data['data'] == [
+        {'timestep': 2015, 'decision': 0, 'lad': 'z', 'hour': 1, 'flow': 2020.0}]
+    assert data['next'] is None
+
+
+def test_get_results_continuation(results_client):
+    """GET results in parts with a limit and continuation tokens
+    """
+    url = '/api/v1/results/run_1/a_model/flow?format=json&limit=5'
+    rows = []
+    response = results_client.get(url)
+    while True:
+        data = parse_json(response)
+        rows.extend(data['data'])
+        token = response.headers.get('X-Continuation-Token')
+        assert data['next'] == token
+        if token is None:
+            break
+        response = results_client.get(url + '&token=' + token)
+
+    assert len(rows) == 12
+    assert [row['flow'] for row in rows[4:7]] == [2014.0, 2015.0, 2015.0]
+
+
+def test_get_results_range(results_client):
+    """GET a range of rows
+    """
+    response = results_client.get(
+        '/api/v1/results/run_1/a_model/flow', headers={'Range': 'rows=4-7'})
+    assert response.status_code == 206
+    assert response.headers['Content-Range'] == 'rows 4-7/12'
+    assert parse_arrow(response).column('flow').to_pylist() == [2014, 2015, 2015, 2016]
+
+    response = results_client.get(
+        '/api/v1/results/run_1/a_model/flow', headers={'Range': 'rows=20-'})
+    assert response.status_code == 416
+    assert response.headers['Content-Range'] == 'rows */12'
+
+
+def test_get_results_bad_request(results_client):
+    """GET results with invalid query parameters
+    """
+    for query in ['timestep=soon', 'region=x', 'lad=w', 'format=csv', 'limit=0',
+                  'token=nonsense']:
+        response = results_client.get('/api/v1/results/run_1/a_model/flow?' + query)
+        assert response.status_code == 400, query
+        assert parse_json(response)['message']
+
+
+def test_get_results_not_found(results_client):
+    """GET results of a missing model run or output
+    """
+    response = results_client.get('/api/v1/results/run_2/a_model/flow')
+    assert response.status_code == 404
+    response = results_client.get('/api/v1/results/run_1/a_model/pressure')
+    assert response.status_code == 404
+
+
+def test_get_config_not_modified(client, get_sector_model):
+    """GET unchanged config with a matching ETag, without reading it again
+    """
+    data_interface = current_app.config.data_interface
+    data_interface.read_config_signature.return_value = ('0123abcd', 1500000000.5)
+
+    response = client.get('/api/v1/sector_models/')
+    assert response.status_code == 200
+    etag = response.headers['ETag']
+    assert etag.startswith('W/')
+    assert response.headers['Last-Modified'] == 'Fri, 14 Jul 2017 02:40:00 GMT'
+    data_interface.read_config_signature.assert_called_with('sector_model', None, True)
+
+    response = client.get('/api/v1/sector_models/', headers={'If-None-Match': etag})
+    assert response.status_code == 304
+    assert data_interface.read_models.call_count == 1
+
+    # the ETag varies with the query
+    data_interface.read_models.side_effect = [[get_sector_model]]
+    response = client.get('/api/v1/sector_models/?fields=name',
+                          headers={'If-None-Match': etag})
+    assert response.status_code == 200
+
+
+def test_get_config_etag_of_response(client, get_scenario):
+    """GET config from a store which cannot tell if it has changed, with an ETag digest of
+    the response
+    """
+    name = get_scenario['name']
+    response = client.get('/api/v1/scenarios/{}'.format(name))
+    etag = response.headers['ETag']
+
+    response = client.get('/api/v1/scenarios/{}'.format(name),
+                          headers={'If-None-Match': etag})
+    assert response.status_code == 304
+
+
+def test_get_config_fields(client, get_sector_model):
+    """GET config limited to some fields, skipping coords
+    """
+    response = client.get('/api/v1/sector_models/?fields=name,description')
+    data = parse_json(response)
+    assert data['data'] == [{
+        'name': get_sector_model['name'],
+        'description': get_sector_model['description']
+    }]
+    current_app.config.data_interface.read_models.assert_called_with(skip_coords=True)
+
+
+def test_get_config_with_coords(client, get_sector_model):
+    """GET config with coords
+    """
+    client.get('/api/v1/sector_models/?skip_coords=false')
+    current_app.config.data_interface.read_models.assert_called_with(skip_coords=False)
+
+
+def test_get_config_compressed(client, get_sector_model):
+    """GET config compressed with gzip, if accepted
+    """
+    response = client.get('/api/v1/sector_models/', headers={'Accept-Encoding': 'gzip'})
+
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert 'Accept-Encoding' in response.headers['Vary']
+    data = json.loads(gzip.decompress(response.data).decode('utf-8'))
+    assert data['data'] == [get_sector_model]
+
+
+@pytest.fixture(scope='module')
+def project_client(tmpdir_factory):
+    """Return an API client for an app serving the sample project, which has region
+    dimensions
+    """
+    from smif.controller.setup import copy_project_folder
+    project = str(tmpdir_factory.mktemp('http').join('project'))
+    copy_project_folder(project)
+    store = Store.from_dict({'interface': 'local_csv', 'dir': project})
+
+    test_app = create_app(
+        static_folder=os.path.join(os.path.dirname(__file__), '..', 'fixtures', 'http'),
+        template_folder=os.path.join(os.path.dirname(__file__), '..', 'fixtures', 'http'),
+        data_interface=store,
+        scheduler=Mock()
+    )
+    with test_app.app_context():
+        yield test_app.test_client()
+
+
+@pytest.mark.parametrize('url', [
+    '/api/v1/dimensions/?skip_coords=false',
+    '/api/v1/dimensions/country?skip_coords=false',
+    '/api/v1/sector_models/?skip_coords=false',
+    '/api/v1/scenarios/?skip_coords=false',
+    '/api/v1/sector_models/?skip_coords=false&fields=name,inputs',
+])
+def test_get_config_region_coords(project_client, url):
+    """GET configuration with the elements of region dimensions, as GeoJSON features
+    """
+    response = project_client.get(url)
+    assert response.status_code == 200
+    data = parse_json(response)
+    assert data['error'] == {}
+
+    def features(item):
+        if isinstance(item, list):
+            return [feature for value in item for feature in features(value)]
+        if isinstance(item, dict):
+            if 'feature' in item:
+                return [item['feature']]
+            return [feature for value in item.values() for feature in features(value)]
+        return []
+
+    region_features = features(data['data'])
+    assert region_features
+    assert all(feature['type'] == 'Feature' for feature in region_features)
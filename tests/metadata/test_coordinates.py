@@ -145,3 +145,57 @@ class TestCoordinates():
         assert a != c
         assert a != d
         assert a != e
+
+    def test_eq_equivalent_elements(self):
+        """Equality should not depend on dict key order, list or tuple, or int or float
+        """
+        a = Coordinates('name', [
+            {'name': 1, 'interval': [['PT0H', 'PT1H']], 'note': 'meta'}
+        ])
+        b = Coordinates('name', [
+            OrderedDict([('note', 'meta'), ('interval', (('PT0H', 'PT1H'),)), ('name', 1.0)])
+        ])
+        c = Coordinates('name', [
+            CustomMapping([('name', 1), ('interval', [['PT0H', 'PT1H']]), ('note', 'meta')])
+        ])
+        assert a == b == c
+        assert hash(a) == hash(b) == hash(c)
+
+    def test_hash(self):
+        """Equal Coordinates should hash equal, so can be used in sets and as dict keys
+        """
+        a = Coordinates('name', [1, 2, 3])
+        b = Coordinates('name', [{'name': 1}, {'name': 2}, {'name': 3}])
+        assert hash(a) == hash(b)
+        assert len({a, b, Coordinates('name', [1, 2])}) == 2
+
+    def test_intern(self):
+        """Interned Coordinates with equal elements should be the same instance
+        """
+        a = Coordinates.intern('name', ['a', 'b', 'c'])
+        b = Coordinates.intern('name', [{'name': 'a'}, {'name': 'b'}, {'name': 'c'}])
+        c = Coordinates.intern('other', ['a', 'b', 'c'])
+        d = Coordinates.intern('name', ['a', 'b'])
+        assert a is b
+        assert a is not c
+        assert a is not d
+        assert a == Coordinates('name', ['a', 'b', 'c'])
+
+    def test_interned_cannot_be_renamed(self):
+        """Interned Coordinates are shared, so renaming one would rename every Spec using it
+        """
+        a = Coordinates.intern('name', ['a', 'b', 'c'])
+        with raises(AttributeError) as ex:
+            a.name = 'other'
+        assert "Cannot rename Coordinates 'name'" in str(ex.value)
+        with raises(AttributeError):
+            a.dim = 'other'
+        assert a.name == 'name'
+        assert Coordinates.intern('name', ['a', 'b', 'c']) is a
+
+    def test_index(self):
+        """Should look up element positions by id
+        """
+        coords = Coordinates('name', ['c', 'a', 'b'])
+        assert coords.index == {'c': 0, 'a': 1, 'b': 2}
+        assert coords.positions(['a', 'b', 'z', 'c']).tolist() == [1, 2, -1, 0]
@@ -0,0 +1,104 @@
+"""Test compact geometry for spatial dimension elements
+"""
+import copy
+import pickle
+
+from pytest import fixture, raises
+from smif.metadata import Coordinates
+from smif.metadata.geometry import RegionElements
+
+
+@fixture
+def features():
+    return [
+        {
+            'name': 'a',
+            'feature': {
+                'geometry': {
+                    'type': 'Polygon',
+                    'coordinates': [[[0.0, 0.0], [0.0, 1.0], [1.0, 1.0], [0.0, 0.0]]]
+                },
+                'id': '0',
+                'properties': {'name': 'a', 'code': 'E01'},
+                'type': 'Feature'
+            }
+        },
+        {
+            'name': 'b',
+            'feature': {
+                'geometry': {
+                    'type': 'MultiPolygon',
+                    'coordinates': [
+                        [[[1.0, 0.0], [1.0, 1.0], [2.0, 1.0], [1.0, 0.0]]],
+                        [[[3.0, 0.0], [3.0, 1.0], [4.0, 1.0], [3.0, 0.0]]]
+                    ]
+                },
+                'id': '1',
+                'properties': {'name': 'b', 'code': 'E02'},
+                'type': 'Feature'
+            }
+        },
+        {
+            'name': 'c',
+            'feature': {
+                'geometry': None,
+                'id': None,
+                'properties': {'name': 'c', 'code': 'E03'},
+                'type': 'Feature'
+            }
+        }
+    ]
+
+
+@fixture
+def elements(features):
+    return RegionElements.from_features(features)
+
+
+class TestRegionElements():
+    def test_names(self, elements):
+        assert elements.names == ['a', 'b', 'c']
+        assert len(elements) == 3
+
+    def test_build_on_demand(self, elements, features):
+        assert elements[0] == features[0]
+        assert elements[-1] == features[-1]
+        assert elements[1:] == features[1:]
+        assert elements.to_list() == features
+        assert list(elements) == features
+        with raises(IndexError):
+            elements[3]
+
+    def test_geometries(self, elements):
+        geometries = elements.geometries()
+        assert geometries[0].area == 0.5
+        assert geometries[1].area == 1.0
+        assert geometries[2] is None
+        assert elements.wkb(2) is None
+
+    def test_equality(self, elements, features):
+        assert elements == RegionElements.from_features(features)
+        assert elements == features
+        assert features == elements
+        features[0]['feature']['properties']['code'] = 'changed'
+        assert elements != features
+        assert elements != [1, 2, 3]
+
+    def test_shared_not_copied(self, elements):
+        assert copy.copy(elements) is elements
+        assert copy.deepcopy({'elements': elements})['elements'] is elements
+
+    def test_take(self, elements, features):
+        subset = elements.take([2, 0])
+        assert subset.names == ['c', 'a']
+        assert subset == [features[2], features[0]]
+        assert subset.wkb(0) is None
+
+    def test_pickle(self, elements):
+        assert pickle.loads(pickle.dumps(elements)) == elements
+
+    def test_coordinates(self, elements, features):
+        coords = Coordinates('regions', elements)
+        assert coords.ids == ['a', 'b', 'c']
+        assert coords.elements is elements
+        assert coords == Coordinates('regions', features)
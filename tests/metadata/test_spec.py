@@ -347,3 +347,50 @@ class TestSpec():
         assert a != c
         assert a != d
         assert a != e
+
+    def test_hash(self):
+        """Equal specs should hash equal
+        """
+        a = Spec(name='a', dims=['countries'], coords={'countries': ['England', 'Wales']},
+                 dtype='int', unit='people')
+        b = Spec(name='b', coords=[Coordinates('countries', ['England', 'Wales'])],
+                 dtype='int', unit='people')
+        assert a == b
+        assert hash(a) == hash(b)
+        assert len({a, b}) == 1
+
+    def test_coords_from_dict_shared(self):
+        """Specs created with equal coords should share Coordinates
+        """
+        a = Spec(name='a', dims=['countries'], coords={'countries': ['England', 'Wales']},
+                 dtype='int')
+        b = Spec(name='b', dims=['countries'], coords={'countries': ['England', 'Wales']},
+                 dtype='float')
+        assert a.dim_coords('countries') is b.dim_coords('countries')
+
+    def test_select(self):
+        """Selecting a subset of ids should reduce the coords of that dim only
+        """
+        spec = Spec(name='population', dims=['countries', 'age'],
+                    coords={'countries': ['England', 'Scotland', 'Wales'],
+                            'age': ['young', 'old']},
+                    dtype='int', unit='people', abs_range=(0, 100))
+        actual = spec.select({'countries': ['Wales', 'England']})
+        assert actual.dims == ['countries', 'age']
+        assert actual.dim_names('countries') == ['Wales', 'England']
+        assert actual.dim_coords('age') is spec.dim_coords('age')
+        assert actual.shape == (2, 2)
+        assert (actual.name, actual.dtype, actual.unit, actual.abs_range) == \
+            ('population', 'int', 'people', (0, 100))
+
+    def test_select_errors(self):
+        spec = Spec(name='population', dims=['countries'],
+                    coords={'countries': ['England', 'Scotland', 'Wales']}, dtype='int')
+        with raises(KeyError):
+            spec.select({'age': ['young']})
+        with raises(ValueError) as ex:
+            spec.select({'countries': ['England', 'France']})
+        assert "Could not select ['France'] from dim 'countries'" in str(ex.value)
+        with raises(ValueError) as ex:
+            spec.select({'countries': ['Wales', 'Wales']})
+        assert "repeated ids" in str(ex.value)
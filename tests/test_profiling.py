@@ -0,0 +1,211 @@
+"""Test Profiler spans, nesting and export
+"""
+import json
+import logging
+import threading
+import tracemalloc
+from unittest.mock import patch
+
+import smif.cli.log
+from pytest import fixture
+from smif.profiling import Profiler
+
+
+@fixture
+def profiler():
+    return Profiler()
+
+
+class TestSpans():
+    def test_span_times(self, profiler):
+        with profiler.span('op', 'key') as span:
+            sum(range(1000))
+
+        assert span.closed
+        assert span.wall_ns > 0
+        assert span.cpu_ns >= 0
+        assert profiler.spans == [span]
+
+    def test_nesting(self, profiler):
+        with profiler.span('outer') as outer:
+            with profiler.span('inner') as inner:
+                pass
+            with profiler.span('sibling') as sibling:
+                pass
+        with profiler.span('next') as next_:
+            pass
+
+        assert outer.depth == 0
+        assert inner.parent is outer
+        assert inner.depth == 1
+        assert sibling.parent is outer
+        assert next_.parent is None
+
+    def test_start_stop_by_name(self, profiler):
+        profiler.start('outer', 'a')
+        profiler.start('inner', 'b')
+        inner = profiler.stop('inner', 'b')
+        outer = profiler.stop('outer', 'a')
+
+        assert inner.closed and outer.closed
+        assert inner.parent is outer
+
+    def test_stop_parent_closes_children_on_stack(self, profiler):
+        outer = profiler.start('outer')
+        profiler.start('left_open')
+        profiler.stop(outer)
+        with profiler.span('after') as after:
+            pass
+
+        assert after.parent is None
+
+    def test_threads_have_separate_tracks(self, profiler):
+        spans = {}
+
+        def work(name):
+            with profiler.span('thread_op', name) as span:
+                spans[name] = span
+
+        with profiler.span('main'):
+            thread = threading.Thread(target=work, args=('worker',))
+            thread.start()
+            thread.join()
+
+        assert spans['worker'].parent is None
+        assert spans['worker'].tid != threading.get_ident()
+
+    def test_disabled(self):
+        profiler = Profiler(enabled=False)
+        with profiler.span('op') as span:
+            pass
+        assert span is None
+        assert profiler.spans == []
+
+
+class TestMemory():
+    def test_rss_always_recorded(self, profiler):
+        with profiler.span('op') as span:
+            pass
+        assert span.rss_peak > 0
+        assert span.rss_growth >= 0
+        assert span.alloc_peak is None
+
+    def test_rss_growth_per_span(self, profiler):
+        """Only a span which raised the process's peak RSS should report growth
+        """
+        # process peak at the start and stop of each span
+        with patch('smif.profiling.peak_rss', side_effect=[100, 300, 300, 300]):
+            with profiler.span('grow') as grow:
+                pass
+            with profiler.span('steady') as steady:
+                pass
+        assert grow.rss_growth == 200
+        assert steady.rss_growth == 0
+        assert steady.rss_peak == 300
+
+        row = profiler.aggregate()[0]
+        assert row['rss_growth_max'] == max(grow.rss_growth, steady.rss_growth)
+
+    def test_track_allocations(self):
+        profiler = Profiler(track_memory=True)
+        was_tracing = tracemalloc.is_tracing()
+        try:
+            with profiler.span('outer') as outer:
+                with profiler.span('allocate') as inner:
+                    data = bytearray(10 * 1024**2)
+                    del data
+                with profiler.span('keep') as keep:
+                    kept = bytearray(1024**2)
+        finally:
+            if not was_tracing:
+                tracemalloc.stop()
+
+        assert inner.alloc_peak >= 10 * 1024**2
+        assert abs(inner.alloc_delta) < 1024**2
+        assert keep.alloc_delta >= 1024**2
+        # peak of a child span counts towards the parent
+        assert outer.alloc_peak >= inner.alloc_peak
+        assert len(kept) == 1024**2
+
+
+class TestExport():
+    def test_aggregate(self, profiler):
+        for model in ('a', 'a', 'b'):
+            with profiler.span('simulate', model, model=model):
+                pass
+
+        by_op = profiler.aggregate()
+        assert len(by_op) == 1
+        assert by_op[0]['operation'] == 'simulate'
+        assert by_op[0]['count'] == 3
+
+        by_model = profiler.aggregate(group_by=('operation', 'model'))
+        counts = {row['model']: row['count'] for row in by_model}
+        assert counts == {'a': 2, 'b': 1}
+
+    def test_max_spans(self):
+        profiler = Profiler(max_spans=2)
+        for model in ('a', 'b', 'b'):
+            with profiler.span('simulate', model, model=model):
+                pass
+
+        assert [span.key for span in profiler.spans] == ['b', 'b']
+        # totals still cover every span
+        by_model = profiler.aggregate(group_by=('model',))
+        counts = {row['model']: row['count'] for row in by_model}
+        assert counts == {'a': 1, 'b': 2}
+
+    def test_summary_aggregates(self, profiler, caplog, monkeypatch):
+        monkeypatch.setattr(smif.cli.log, 'PROFILER', profiler)
+        for _ in range(50):
+            with profiler.span('Store.read_results', 'key', model='a'):
+                pass
+        with profiler.span('Model.simulate', 'a', model='a'):
+            pass
+
+        logger = logging.getLogger('test_summary')
+        with caplog.at_level(logging.INFO, logger='test_summary'):
+            logger.summary()
+        # title, headings and rules around one row per operation and model
+        messages = [record.getMessage() for record in caplog.records]
+        assert len(messages) == 6
+        rows = {message.split()[0]: message.split()[2] for message in messages[3:5]}
+        assert rows == {'Store.read_results': '50', 'Model.simulate': '1'}
+
+    def test_chrome_trace(self, profiler, tmpdir):
+        with profiler.span('Store.read_results', 'key', model='a', timestep=2010):
+            pass
+        profiler.start('still_open')
+
+        path = str(tmpdir.join('trace.json'))
+        profiler.write_chrome_trace(path)
+        with open(path) as file_handle:
+            trace = json.load(file_handle)
+
+        events = trace['traceEvents']
+        assert len(events) == 1
+        assert events[0]['name'] == 'Store.read_results'
+        assert events[0]['cat'] == 'Store'
+        assert events[0]['ph'] == 'X'
+        assert events[0]['ts'] == 0
+        assert events[0]['args']['model'] == 'a'
+
+    def test_write_json(self, profiler, tmpdir):
+        with profiler.span('op', 'key', model='a'):
+            pass
+
+        path = str(tmpdir.join('profile.json'))
+        profiler.write_json(path, group_by=('operation', 'model'))
+        with open(path) as file_handle:
+            data = json.load(file_handle)
+
+        assert data['spans'][0]['operation'] == 'op'
+        assert data['spans'][0]['meta'] == {'model': 'a'}
+        assert data['aggregate'][0]['model'] == 'a'
+
+    def test_clear(self, profiler):
+        with profiler.span('op'):
+            pass
+        profiler.clear()
+        assert profiler.spans == []
+        assert profiler.aggregate() == []